@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+def move_logos_to_image_store(apps, schema_editor):
+    from core.image_store import migrate_blob_column
+    migrate_blob_column(apps, "accounts.Library", "library_logo", "library_logo_mime", "library_logo_hash")
+
+
+def restore_logos(apps, schema_editor):
+    from core.image_store import restore_blob_column
+    restore_blob_column(apps, "accounts.Library", "library_logo", "library_logo_mime", "library_logo_hash")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_membersettings_member_id_format'),
+        ('core', '0002_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='library',
+            name='library_logo_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(move_logos_to_image_store, restore_logos),
+        migrations.RemoveField(
+            model_name='library',
+            name='library_logo',
+        ),
+        migrations.RemoveField(
+            model_name='library',
+            name='library_logo_mime',
+        ),
+    ]
@@ -35,8 +35,9 @@ class Library(models.Model):
         db_index=True
     )
 
-    library_logo      = models.BinaryField(blank=True, null=True)
-    library_logo_mime = models.CharField(max_length=50, blank=True, null=True)
+    # Digest of the logo in the core image store (core/image_store.py) —
+    # the row carries no image bytes.  Link to it with logo_url().
+    library_logo_hash = models.CharField(max_length=64, blank=True, default="")
 
     library_name   = models.CharField(max_length=255)
     institute_name = models.CharField(max_length=255)
@@ -73,6 +74,23 @@ class Library(models.Model):
                     break
         super().save(*args, **kwargs)
 
+    @property
+    def has_logo(self) -> bool:
+        return bool(self.library_logo_hash)
+
+    def logo_url(self, size: str = "") -> str:
+        """
+        URL of the logo (served by finance:library_logo for the signed-in
+        library), or "" when none is set.  The digest in the query string
+        changes with the logo, so browsers never show a stale one.
+        """
+        if not self.has_logo:
+            return ""
+        from django.urls import reverse
+
+        from core.image_serving import image_url
+        return image_url(reverse("finance:library_logo"), self.library_logo_hash, size)
+
     class Meta:
         ordering = ["-created_at"]
 
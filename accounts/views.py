@@ -1,5 +1,3 @@
-import base64
-import json
 from datetime import date, datetime, timedelta
 
 from django.contrib import messages
@@ -12,13 +10,14 @@ from django.contrib.auth import (
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.db import IntegrityError, transaction
-from django.db.models import Count
 from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect
 from django.utils import timezone
 from django.utils.timesince import timesince
 from django.views.decorators.http import require_POST
 
+from core.image_store import put_image
+
 from .models import (
     Library,
     LibraryRuleSettings,
@@ -211,7 +210,7 @@ def register_library(request):
 
         # ── Logo validation (optional) ────────────────────────────
         logo_data = None
-        logo_mime = None
+        logo_mime = ""
         if "library_logo" in request.FILES:
             logo_file = request.FILES["library_logo"]
             if logo_file.content_type not in ("image/jpeg", "image/png"):
@@ -257,8 +256,7 @@ def register_library(request):
                     district=district,
                     state=state,
                     country=country,
-                    library_logo=logo_data,
-                    library_logo_mime=logo_mime,
+                    library_logo_hash=put_image(logo_data, logo_mime),
                 )
 
         except IntegrityError:
@@ -510,7 +508,7 @@ def admin_dashboard(request):
     owner = library.user
 
     from accounts.models import Library
-    from books.models import Book, Category
+    from dashboards.rollup import kpi_context
     from members.models import Member
     from transactions.models import Transaction
 
@@ -531,110 +529,9 @@ def admin_dashboard(request):
         libraries_this_month = libraries_last_month = 0
     libraries_change = libraries_this_month - libraries_last_month
 
-    total_books  = Book.objects.filter(owner=owner).count()
-    books_change = (
-        Book.objects.filter(owner=owner, created_at__date__gte=this_month_start).count()
-        - Book.objects.filter(
-            owner=owner,
-            created_at__date__gte=last_month_start,
-            created_at__date__lte=last_month_end,
-        ).count()
-    )
-
-    total_members  = Member.objects.filter(owner=owner, status="active").count()
-    members_change = (
-        Member.objects.filter(owner=owner, date_joined__gte=this_month_start).count()
-        - Member.objects.filter(
-            owner=owner,
-            date_joined__gte=last_month_start,
-            date_joined__lte=last_month_end,
-        ).count()
-    )
-
-    base_txns           = Transaction.objects.for_library(library)
-    active_transactions = base_txns.filter(
-        status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE)
-    ).count()
-    transactions_change = (
-        base_txns.filter(issue_date__gte=this_month_start).count()
-        - base_txns.filter(
-            issue_date__gte=last_month_start,
-            issue_date__lte=last_month_end,
-        ).count()
-    )
-
-    count_map = {
-        row["status"]: row["cnt"]
-        for row in Member.objects.filter(owner=owner)
-            .values("status")
-            .annotate(cnt=Count("id"))
-    }
-    active_count   = count_map.get("active",   0)
-    passout_count  = count_map.get("passout",  0)
-    inactive_count = count_map.get("inactive", 0)
-    total_count    = active_count + passout_count + inactive_count
-
-    def _pct(n):
-        return round(n / total_count * 100, 1) if total_count else 0
-
-    stats = {
-        "active_count":        active_count,
-        "passout_count":       passout_count,
-        "inactive_count":      inactive_count,
-        "total_count":         total_count,
-        "active_percentage":   _pct(active_count),
-        "passout_percentage":  _pct(passout_count),
-        "inactive_percentage": _pct(inactive_count),
-    }
-
-    # ── Chart 1: Monthly Loans (last 6 months) ────────────────
-    _loan_labels_raw, _loan_data_raw = [], []
-    for i in range(5, -1, -1):
-        ms  = _first_of_month(today, months_back=i)
-        me  = _first_of_next_month(ms)
-        cnt = base_txns.filter(issue_date__gte=ms, issue_date__lt=me).count()
-        _loan_labels_raw.append(ms.strftime("%b %Y"))
-        _loan_data_raw.append(cnt)
-    loans_have_data = any(v > 0 for v in _loan_data_raw)
-
-    # ── Chart 2: Books by Category ────────────────────────────
-    cat_qs = (
-        Category.objects
-        .filter(owner=owner)
-        .annotate(cnt=Count("books"))
-        .filter(cnt__gt=0)
-        .order_by("-cnt")[:8]
-    )
-    _cat_labels_raw      = [c.name for c in cat_qs]
-    _cat_data_raw        = [c.cnt  for c in cat_qs]
-    categories_have_data = len(_cat_labels_raw) > 0
-
-    # ── Chart 3: New Members per day (last 7 days) ────────────
-    day_count_map = {
-        row["date_joined"]: row["cnt"]
-        for row in Member.objects.filter(
-            owner=owner,
-            date_joined__gte=today - timedelta(days=6),
-            date_joined__lte=today,
-        ).values("date_joined").annotate(cnt=Count("id"))
-    }
-    _day_labels_raw, _day_data_raw = [], []
-    for i in range(6, -1, -1):
-        d = today - timedelta(days=i)
-        _day_labels_raw.append(d.strftime("%a"))
-        _day_data_raw.append(day_count_map.get(d, 0))
-    members_chart_have_data = any(v > 0 for v in _day_data_raw)
-
-    # ── Chart 4: Members by Department ───────────────────────
-    dept_qs = (
-        Member.objects
-        .filter(owner=owner)
-        .values("department__name")
-        .annotate(cnt=Count("id"))
-        .order_by("-cnt")
-    )
-    _dept_labels_raw = [row["department__name"] or "No Department" for row in dept_qs]
-    _dept_data_raw   = [row["cnt"] for row in dept_qs]
+    # ── KPI cards + charts — read from the daily rollup (dashboards/rollup.py)
+    kpis = kpi_context(library, today=today)
+    base_txns = Transaction.objects.for_library(library)
 
     # ── Recent Activity Feed ──────────────────────────────────
     recent_activities = []
@@ -674,35 +571,15 @@ def admin_dashboard(request):
         .order_by("-date_joined", "-id")[:5]
     )
 
-    library_logo_b64 = ""
-    if library.library_logo and library.library_logo_mime:
-        raw = base64.b64encode(bytes(library.library_logo)).decode("ascii")
-        library_logo_b64 = f"data:{library.library_logo_mime};base64,{raw}"
-
-    notification_count = base_txns.filter(status=Transaction.STATUS_OVERDUE).count()
+    library_logo_url = library.logo_url("sm")
 
     return render(request, "dashboards/admin_dashboard.html", {
         "total_libraries":     total_libraries,
         "libraries_change":    libraries_change,
-        "total_books":         total_books,
-        "books_change":        books_change,
-        "total_members":       total_members,
-        "members_change":      members_change,
-        "active_transactions": active_transactions,
-        "transactions_change": transactions_change,
-        "stats":               stats,
-        "monthly_loan_labels": json.dumps(_loan_labels_raw)  if loans_have_data         else "",
-        "monthly_loan_data":   json.dumps(_loan_data_raw)    if loans_have_data         else "",
-        "category_labels":     json.dumps(_cat_labels_raw)   if categories_have_data    else "",
-        "category_data":       json.dumps(_cat_data_raw)     if categories_have_data    else "",
-        "member_day_labels":   json.dumps(_day_labels_raw)   if members_chart_have_data else "",
-        "member_day_data":     json.dumps(_day_data_raw)     if members_chart_have_data else "",
-        "department_labels":   json.dumps(_dept_labels_raw),
-        "department_data":     json.dumps(_dept_data_raw),
+        **kpis,
         "recent_activities":   recent_activities,
         "recent_members":      recent_members,
-        "library_logo_b64":    library_logo_b64,
-        "notification_count":  notification_count,
+        "library_logo_url":    library_logo_url,
     })
 
 
@@ -740,11 +617,10 @@ def settings_view(request):
             library.address        = request.POST.get("address",        library.address).strip()
 
             if "library_logo" in request.FILES:
-                logo_file             = request.FILES["library_logo"]
-                library.library_logo      = logo_file.read()
-                library.library_logo_mime = logo_file.content_type
+                logo_file                 = request.FILES["library_logo"]
+                library.library_logo_hash = put_image(logo_file.read(), logo_file.content_type)
             elif request.POST.get("remove_logo") == "1":
-                library.library_logo = library.library_logo_mime = None
+                library.library_logo_hash = ""
             library.save()
             messages.success(request, "Profile updated successfully.")
 
@@ -817,6 +693,10 @@ def settings_view(request):
             rules.auto_mark_lost        = request.POST.get("auto_mark_lost")        == "on"
             rules.allow_advance_booking = request.POST.get("allow_advance_booking") == "on"
             rules.save()
+            # post_save drops the process-level snapshot; also clear this
+            # request's memoised copy on the Library instance.
+            from transactions.rules import invalidate_rules
+            invalidate_rules(library)
             messages.success(request, "Loan & fine settings saved.")
 
         # ── Members ───────────────────────────────────────────────
@@ -836,6 +716,8 @@ def settings_view(request):
             rules.student_borrow_limit = member_cfg.student_borrow_limit
             rules.teacher_borrow_limit = member_cfg.teacher_borrow_limit
             rules.save()
+            from transactions.rules import invalidate_rules
+            invalidate_rules(library)
             messages.success(request, "Member settings saved.")
 
         else:
@@ -879,11 +761,7 @@ def settings_view(request):
         "allow_advance_booking": rules.allow_advance_booking,
     })
 
-    library_logo_b64 = None
-    if library.library_logo:
-        mime    = library.library_logo_mime or "image/png"
-        encoded = base64.b64encode(bytes(library.library_logo)).decode("utf-8")
-        library_logo_b64 = f"data:{mime};base64,{encoded}"
+    library_logo_url = library.logo_url("md")
 
     return render(request, "accounts/settings.html", {
         "library":               library,
@@ -895,7 +773,7 @@ def settings_view(request):
         "system_settings":       system_settings,
         "loan_settings":         loan_settings,
         "notification_settings": notification_list,
-        "library_logo_b64":      library_logo_b64,
+        "library_logo_url":      library_logo_url,
         "active_sessions":       [],
     })
 
@@ -919,10 +797,6 @@ def _first_of_month(ref_date, months_back=0):
     return date(y, m, 1)
 
 
-def _first_of_next_month(d):
-    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
-
-
 def _int(value, fallback=0):
     try:
         return int(value)
@@ -102,7 +102,7 @@ class BookAdmin(admin.ModelAdmin):
             ),
         }),
         ("Media & Description", {
-            "fields": ("cover_image", "cover_preview", "description"),
+            "fields": ("cover_preview", "description"),
         }),
         ("Timestamps", {
             "classes": ("collapse",),
@@ -140,12 +140,19 @@ class BookAdmin(admin.ModelAdmin):
 
     @admin.display(description="Cover")
     def cover_preview(self, obj):
-        if obj.cover_image:
-            return format_html(
-                '<img src="{}" style="max-height:120px;border-radius:6px;" />',
-                obj.cover_image_b64,
-            )
-        return "—"
+        # Admin users aren't necessarily the book's owner, so the owner-
+        # scoped cover view won't do — inline the small thumbnail instead.
+        import base64
+
+        from core.image_store import get_image
+
+        blob = get_image(obj.cover_hash, "md")
+        if blob is None:
+            return "—"
+        return format_html(
+            '<img src="data:{};base64,{}" style="max-height:120px;border-radius:6px;" />',
+            blob.mime_type, base64.b64encode(bytes(blob.data)).decode("ascii"),
+        )
 
 
 # ─────────────────────────────────────────────────────────────
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+def move_covers_to_image_store(apps, schema_editor):
+    from core.image_store import migrate_blob_column
+    migrate_blob_column(apps, "books.Book", "cover_image", "cover_mime_type", "cover_hash")
+
+
+def restore_covers(apps, schema_editor):
+    from core.image_store import restore_blob_column
+    restore_blob_column(apps, "books.Book", "cover_image", "cover_mime_type", "cover_hash")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_alter_book_cover_image'),
+        ('core', '0002_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the cover image in the image store.', max_length=64),
+        ),
+        migrations.RunPython(move_covers_to_image_store, restore_covers),
+        migrations.RemoveField(
+            model_name='book',
+            name='cover_image',
+        ),
+        migrations.RemoveField(
+            model_name='book',
+            name='cover_mime_type',
+        ),
+    ]
@@ -20,6 +20,11 @@ Design notes
 
 • Status choices live on BookCopy.Status so views/admin can reference them
   without hard-coding strings.
+
+• The stock properties (copy_count, available_copy_count, …) read, in
+  order: counts annotated by Book.objects.with_stock(), a prefetched
+  `copies` cache, else one COUNT query.  Lists should use one of the
+  first two so a page of books costs no query per row.
 """
 
 import re
@@ -27,6 +32,7 @@ import re
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, Q
 from django.utils.text import slugify
 
 # Validates a BookCopy.copy_id at the model level.
@@ -71,6 +77,38 @@ class Category(models.Model):
 # Book  (bibliographic record — one per title / edition)
 # ─────────────────────────────────────────────────────────────
 
+class BookQuerySet(models.QuerySet):
+
+    def for_owner(self, owner):
+        return self.filter(owner=owner)
+
+    def cards(self):
+        """Rows for lists and lookups — everything but the description text."""
+        return self.defer("description")
+
+    def with_stock(self):
+        """Annotate stock_total / stock_available / stock_borrowed copy counts."""
+        return self.annotate(
+            stock_total     = Count("copies"),
+            stock_available = Count("copies", filter=Q(copies__status="available")),
+            stock_borrowed  = Count("copies", filter=Q(copies__status="borrowed")),
+        )
+
+
+class BookManager(models.Manager):
+    def get_queryset(self):
+        return BookQuerySet(self.model, using=self._db)
+
+    def for_owner(self, owner):
+        return self.get_queryset().for_owner(owner)
+
+    def cards(self):
+        return self.get_queryset().cards()
+
+    def with_stock(self):
+        return self.get_queryset().with_stock()
+
+
 class Book(models.Model):
     LANGUAGE_CHOICES = [
         ("English",  "English"),
@@ -116,11 +154,12 @@ class Book(models.Model):
                   "Kept for migration compatibility.",
     )
 
-    # ── Cover image stored as binary blob ─────────────────────────────
-    cover_image     = models.BinaryField(null=True, blank=True, editable=True)
-    cover_mime_type = models.CharField(
-        max_length=50, blank=True, default="image/jpeg",
-        help_text="MIME type of the stored cover image.",
+    # ── Cover image — digest into the core image store ────────────────
+    # Bytes and thumbnails live in core.ImageBlob (core/image_store.py), so
+    # Book queries never carry image data.  Serve via the book_cover view.
+    cover_hash = models.CharField(
+        max_length=64, blank=True, default="",
+        help_text="SHA-256 of the cover image in the image store.",
     )
 
     description = models.TextField(blank=True)
@@ -131,6 +170,8 @@ class Book(models.Model):
     created_at  = models.DateTimeField(auto_now_add=True)
     updated_at  = models.DateTimeField(auto_now=True)
 
+    objects = BookManager()
+
     class Meta:
         ordering            = ["-created_at"]
         verbose_name        = "Book"
@@ -143,34 +184,51 @@ class Book(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
-    # ── Cover helper ──────────────────────────────────────────────────
-
     @property
-    def cover_image_b64(self):
-        """Data-URI string for use in <img src="…">."""
-        if self.cover_image:
-            import base64
-            data = base64.b64encode(bytes(self.cover_image)).decode("ascii")
-            mime = self.cover_mime_type or "image/jpeg"
-            return f"data:{mime};base64,{data}"
-        return ""
+    def has_cover(self) -> bool:
+        """True when a cover is stored — no image data is loaded."""
+        return bool(self.cover_hash)
 
     # ── Derived stock properties (read from BookCopy) ──────────────────
 
+    def _copy_tally(self, status=None) -> int:
+        annotated = self.__dict__.get(f"stock_{status or 'total'}")
+        if annotated is not None:
+            return annotated
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("copies")
+        if prefetched is not None:
+            return sum(1 for c in prefetched if status is None or c.status == status)
+        copies = self.copies.all()
+        if status is not None:
+            copies = copies.filter(status=status)
+        return copies.count()
+
     @property
     def copy_count(self) -> int:
         """Total number of registered physical copies."""
-        return self.copies.count()
+        return self._copy_tally()
 
     @property
     def available_copy_count(self) -> int:
         """Number of copies currently available for borrowing."""
-        return self.copies.filter(status=BookCopy.Status.AVAILABLE).count()
+        return self._copy_tally(BookCopy.Status.AVAILABLE)
 
     @property
     def borrowed_copy_count(self) -> int:
         """Number of copies currently borrowed."""
-        return self.copies.filter(status=BookCopy.Status.BORROWED).count()
+        return self._copy_tally(BookCopy.Status.BORROWED)
+
+    @property
+    def first_copy(self):
+        """Lowest Copy ID — from prefetched copies when present."""
+        copies = list(self.copies.all())
+        return copies[0] if copies else None
+
+    @property
+    def last_copy(self):
+        """Highest Copy ID — from prefetched copies when present."""
+        copies = list(self.copies.all())
+        return copies[-1] if copies else None
 
     @property
     def issued_copies(self) -> int:
@@ -14,6 +14,9 @@ from django.db.models import Count, Q, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.image_serving import image_response
+from core.image_store import put_image
+
 from .forms import BookForm
 from .models import Book, BookCopy, Category
 from .services import create_book_copies
@@ -102,7 +105,7 @@ def _find_title_author_edition_duplicate(user, title, author, edition):
 
 @login_required
 def book_list(request):
-    qs = _user_books(request.user)
+    qs = _user_books(request.user).cards().prefetch_related("copies")
     qs = _filter_books(qs, request)
 
     paginator = Paginator(qs, 20)
@@ -252,8 +255,7 @@ def book_create(request):
                 book.price            = form.cleaned_data.get("price") or None
                 img = form.cleaned_data.get("cover_image")
                 if img:
-                    book.cover_image     = img["data"]
-                    book.cover_mime_type = img["mime"]
+                    book.cover_hash = put_image(img["data"], img["mime"])
                 book.save()
                 create_book_copies(book, lib_code, total)
 
@@ -297,33 +299,19 @@ def book_update(request, pk):
                 updated.category = form.cleaned_data["category"]
                 updated.price    = form.cleaned_data.get("price") or None
                 img = form.cleaned_data.get("cover_image")
-                cover_changed = False
                 if img is False:
-                    # User ticked "Clear" — wipe the stored image
-                    updated.cover_image     = None
-                    updated.cover_mime_type = ""
-                    cover_changed = True
+                    # User ticked "Clear" — drop the reference; the blob is
+                    # pruned later if nothing else uses it.
+                    updated.cover_hash = ""
                 elif img:
-                    # New file uploaded — replace the stored image
-                    updated.cover_image     = img["data"]
-                    updated.cover_mime_type = img["mime"]
-                    cover_changed = True
-                else:
-                    # No change — preserve the existing image
-                    updated.cover_image     = book.cover_image
-                    updated.cover_mime_type = book.cover_mime_type
+                    # New file uploaded — point at the new blob
+                    updated.cover_hash = put_image(img["data"], img["mime"])
                 updated.save()
 
-                # BinaryField is editable=False by default — Django's UPDATE
-                # query omits it. Force-write cover columns whenever they changed.
-                update_kwargs = {
-                    "total_copies":     book.copy_count,
-                    "available_copies": book.available_copy_count,
-                }
-                if cover_changed:
-                    update_kwargs["cover_image"]     = updated.cover_image
-                    update_kwargs["cover_mime_type"] = updated.cover_mime_type
-                Book.objects.filter(pk=book.pk).update(**update_kwargs)
+                Book.objects.filter(pk=book.pk).update(
+                    total_copies     = book.copy_count,
+                    available_copies = book.available_copy_count,
+                )
 
                 current_total = book.copy_count
                 if new_total > current_total:
@@ -424,8 +412,8 @@ def return_copy(request):
 
 @login_required
 def stock_dashboard(request):
-    all_books  = _user_books(request.user).prefetch_related("copies")
-    total_books = all_books.count()
+    all_books   = list(_user_books(request.user).with_stock())
+    total_books = len(all_books)
 
     low_stock_count    = 0
     out_of_stock_count = 0
@@ -440,11 +428,15 @@ def stock_dashboard(request):
     def pct(n):
         return round(n / total_books * 100) if total_books else 0
 
+    by_category = {}
+    for b in all_books:
+        by_category.setdefault(b.category_id, []).append(b)
+
     category_stats = []
     for cat in _user_categories(request.user):
-        cat_qs    = all_books.filter(category=cat)
-        total     = cat_qs.count()
-        available = sum(1 for b in cat_qs if b.available_copy_count > 0)
+        cat_books = by_category.get(cat.pk, [])
+        total     = len(cat_books)
+        available = sum(1 for b in cat_books if b.available_copy_count > 0)
         category_stats.append({
             "name":      cat.name,
             "total":     total,
@@ -458,7 +450,7 @@ def stock_dashboard(request):
         b.issue_count = b.borrowed_copy_count
         most_issued.append(b)
 
-    recent_books   = all_books.order_by("-created_at")[:5]
+    recent_books   = sorted(all_books, key=lambda b: b.created_at, reverse=True)[:5]
     low_stock_list = [b for b in all_books if 0 < b.available_copy_count <= LOW_STOCK_THRESHOLD]
 
     return render(request, "books/book_stock_dashboard.html", {
@@ -623,25 +615,12 @@ def update_stock(request):
 
 @login_required
 def book_cover(request, pk):
-    from django.http import Http404
-    book = get_object_or_404(Book, pk=pk, owner=request.user)
-    raw = book.cover_image
-    if raw is None:
-        raise Http404("No cover image.")
-    image_bytes = bytes(raw)
-    if not image_bytes:
-        raise Http404("Cover image is empty.")
-
-    # ETag from updated_at — changes whenever the book record is saved
-    etag = f'"{pk}-{int(book.updated_at.timestamp())}"'
-    if request.META.get("HTTP_IF_NONE_MATCH") == etag:
-        return HttpResponse(status=304)
-
-    mime = (book.cover_mime_type or "image/jpeg").strip() or "image/jpeg"
-    response = HttpResponse(image_bytes, content_type=mime)
-    response["ETag"] = etag
-    response["Cache-Control"] = "private, max-age=0, must-revalidate"
-    return response
+    # Metadata-only lookup: image_response() answers 304s from these columns
+    # and reads the blob only for a 200.
+    book = get_object_or_404(
+        Book.objects.only("pk", "owner_id", "cover_hash", "updated_at"), pk=pk, owner=request.user,
+    )
+    return image_response(request, book.cover_hash, book.updated_at, not_found="No cover image.")
 
 
 @login_required
@@ -1902,4 +1902,101 @@ Unpaid fines may restrict your borrowing privileges.
     """
 
     html_message = build_html_email("Outstanding Fine Reminder", body_content)
-    return send_basic_email(subject, plain_message, html_message, member.email)
\ No newline at end of file
+    return send_basic_email(subject, plain_message, html_message, member.email)
+
+# ==============================
+# 2️⃣0️⃣ Books Issued (Batch Checkout) Email
+# ==============================
+def send_books_issued_email(member, transactions):
+    """
+    One confirmation for several books issued together (batch checkout),
+    instead of a send_book_issued_email() per book.
+
+    Args:
+        member       – Member model instance
+        transactions – list of Transaction instances with .book.title,
+                       .book_copy (optional), .issue_date, .due_date,
+                       .fine_rate_per_day populated.
+    """
+    txns       = list(transactions)
+    book_count = len(txns)
+    subject    = f"📚 {book_count} Books Issued Successfully | Dooars Granthika"
+
+    issue_date_str = txns[0].issue_date.strftime('%d %b %Y') if txns else 'N/A'
+    fine_rate      = txns[0].fine_rate_per_day if txns else 'N/A'
+    earliest_due   = min((t.due_date for t in txns), default=None)
+    due_date_str   = earliest_due.strftime('%d %b %Y') if earliest_due else 'N/A'
+
+    def _copy_id(t):
+        return getattr(t.book_copy, 'copy_id', None) or 'N/A'
+
+    book_lines = "\n".join(
+        f"  • {t.book.title} ({_copy_id(t)}) — Due: {t.due_date.strftime('%d %b %Y')}"
+        for t in txns
+    )
+
+    plain_message = f"""
+Hello {member.full_name},
+
+{book_count} books have been issued to you at Dooars Granthika Library.
+
+Member ID  : {member.member_id}
+Issue Date : {issue_date_str}
+Books      :
+{book_lines}
+
+Please return the books on or before their due dates to avoid late fines.
+
+Happy Reading!
+Dooars Granthika
+"""
+
+    book_rows = ""
+    for t in txns:
+        book_rows += f"""
+            <tr>
+                <td style="padding:10px 14px; border-bottom:1px solid #e8edf2; font-size:14px; color:#2c3e50;">{t.book.title}</td>
+                <td style="padding:10px 14px; border-bottom:1px solid #e8edf2; font-size:14px; color:#666; text-align:center;">{_copy_id(t)}</td>
+                <td style="padding:10px 14px; border-bottom:1px solid #e8edf2; font-size:14px; color:#e5a000; text-align:center; font-weight:600;">{t.due_date.strftime('%d %b %Y')}</td>
+            </tr>
+        """
+
+    body_content = f"""
+        <p class="greeting">Books Issued! 📚</p>
+        <p>Hello <span class="highlight">{member.full_name}</span>, {book_count} books have been issued to you from <span class="highlight">Dooars Granthika Library</span>.</p>
+
+        <table width="100%" cellpadding="0" cellspacing="0" style="border-collapse:collapse; margin:24px 0; border:1px solid #e8edf2; border-radius:10px; overflow:hidden;">
+            <thead>
+                <tr style="background:linear-gradient(135deg, #1e3a5f, #2c3e50);">
+                    <th style="padding:12px 14px; text-align:left; font-size:12px; color:#a8c4e0; text-transform:uppercase; letter-spacing:1px; font-weight:600;">Book Title</th>
+                    <th style="padding:12px 14px; text-align:center; font-size:12px; color:#a8c4e0; text-transform:uppercase; letter-spacing:1px; font-weight:600;">Copy ID</th>
+                    <th style="padding:12px 14px; text-align:center; font-size:12px; color:#a8c4e0; text-transform:uppercase; letter-spacing:1px; font-weight:600;">Due Date</th>
+                </tr>
+            </thead>
+            <tbody>
+                {book_rows}
+            </tbody>
+        </table>
+
+        <div class="info-strip">
+            <div class="info-strip-item">
+                <div class="info-label">Books</div>
+                <div class="info-value">{book_count}</div>
+            </div>
+            <div class="info-strip-item">
+                <div class="info-label">Return By</div>
+                <div class="info-value" style="color:#e5a000;">{due_date_str}</div>
+            </div>
+            <div class="info-strip-item">
+                <div class="info-label">Fine / Day</div>
+                <div class="info-value" style="font-size:13px;">₹{fine_rate}</div>
+            </div>
+        </div>
+
+        <hr class="divider"/>
+        <p>You can track your borrowing history and due dates from your member portal. If you need an extension, please contact the library in advance.</p>
+        <p style="margin-top: 24px; font-size: 18px;">Happy Reading! 🌟</p>
+    """
+
+    html_message = build_html_email("Books Issued", body_content)
+    return send_basic_email(subject, plain_message, html_message, member.email)
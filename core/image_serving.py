@@ -0,0 +1,79 @@
+# core/image_serving.py
+# ─────────────────────────────────────────────────────────────────────────────
+# One HTTP path for every image endpoint (book covers, member photos,
+# library logos).
+#
+#   image_response(request, digest, updated_at)  — 200 / 304 / 404
+#   image_url(url, digest, size)                 — versioned <img> URL
+#
+# Validators come from the owning row, never from the blob:
+#   ETag           "<digest>[-<size>]" — strong, since the store is content-
+#                  addressed: the same digest is always the same bytes
+#   Last-Modified  the owning row's updated_at
+# so the view answers a conditional GET from the metadata query it already
+# ran (Member / Book / Library columns only) and returns 304 without
+# touching core.ImageBlob.  The blob is read only for a 200.
+#
+# Caching
+#   • A request carrying ?v=<digest prefix> (built by image_url()) names
+#     one immutable image: it is cached for IMAGE_IMMUTABLE_MAX_AGE and
+#     not revalidated at all.
+#   • Anything else is revalidated on every use (max-age=0,
+#     must-revalidate) — cheap, since the answer is usually a 304.
+#
+# Override in settings.py:
+#     IMAGE_IMMUTABLE_MAX_AGE = 31536000   # seconds (one year)
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .image_store import IMAGE_THUMBNAIL_SIZES, get_image
+
+IMAGE_IMMUTABLE_MAX_AGE: int = int(getattr(settings, "IMAGE_IMMUTABLE_MAX_AGE", 365 * 24 * 3600))
+
+_VERSION_LEN = 12
+
+
+def image_url(url: str, digest: str, size: str = "") -> str:
+    """*url* with ?size= and the ?v= version that makes it cacheable forever."""
+    query = f"v={digest[:_VERSION_LEN]}"
+    if size:
+        query += f"&size={size}"
+    return f"{url}?{query}"
+
+
+def image_response(request, digest: str, updated_at=None, *, not_found: str = "No image."):
+    """
+    Serve *digest* at the ?size= the request asks for, honouring
+    If-None-Match / If-Modified-Since.  Raises Http404 when there is no image.
+    """
+    if not digest:
+        raise Http404(not_found)
+
+    size = request.GET.get("size", "")
+    if size not in IMAGE_THUMBNAIL_SIZES:
+        size = ""
+
+    etag          = f'"{digest}-{size}"' if size else f'"{digest}"'
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+
+    if request.GET.get("v") and digest.startswith(request.GET["v"]):
+        cache_control = f"private, max-age={IMAGE_IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = "private, max-age=0, must-revalidate"
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        blob = get_image(digest, size)
+        if blob is None:
+            raise Http404(not_found)
+        response = HttpResponse(bytes(blob.data), content_type=blob.mime_type)
+
+    response["ETag"]          = etag
+    response["Cache-Control"] = cache_control
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
@@ -0,0 +1,205 @@
+# core/image_store.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Content-addressed image store for book covers, member photos and library
+# logos.
+#
+#   put_image(data, mime_type)  → digest      store an upload + thumbnails
+#   get_image(digest, size)     → ImageBlob   one variant (or the original)
+#   delete_unreferenced()       → int         prune blobs nothing points at
+#
+# Images live in core.ImageBlob, one row per (digest, variant), keyed by the
+# SHA-256 of the original bytes.  Book.cover_hash, Member.photo_hash and
+# Library.library_logo_hash hold only that 64-char digest, so list and
+# lookup queries never carry image bytes, and identical uploads (the same
+# cover for every edition, a re-saved form) share one copy.
+#
+# Thumbnails are generated once, at upload time, with Pillow: each entry of
+# IMAGE_THUMBNAIL_SIZES is the image fitted inside N×N px (PNG when it has
+# transparency, JPEG otherwise).  A variant is skipped when the original is
+# already that small — get_image() then falls back to the original.
+# Without Pillow only originals are stored.
+#
+# Blobs are immutable: replacing a photo stores a new digest and leaves the
+# old rows for `manage.py prune_image_store`.
+#
+# Override in settings.py:
+#     IMAGE_THUMBNAIL_SIZES = {"sm": 96, "md": 320}   # variant → max px
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import io
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ImageBlob
+
+logger = logging.getLogger("core.image_store")
+
+IMAGE_THUMBNAIL_SIZES: dict = dict(getattr(settings, "IMAGE_THUMBNAIL_SIZES", {"sm": 96, "md": 320}))
+
+_DEFAULT_MIME = "image/jpeg"
+
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _render_variants(data: bytes, mime_type: str) -> list:
+    """
+    [(variant, bytes, mime, width, height), …] for *data* — the original
+    first, then one entry per thumbnail size it is larger than.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return [("", data, mime_type or _DEFAULT_MIME, 0, 0)]
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        # Not something Pillow can read — keep the bytes, skip thumbnails.
+        return [("", data, mime_type or _DEFAULT_MIME, 0, 0)]
+
+    # Trust the decoder over the client-supplied / legacy column value.
+    mime     = Image.MIME.get(img.format or "") or mime_type or _DEFAULT_MIME
+    variants = [("", data, mime, img.width, img.height)]
+
+    img   = ImageOps.exif_transpose(img)
+    alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    for name, max_px in sorted(IMAGE_THUMBNAIL_SIZES.items(), key=lambda kv: kv[1]):
+        if max(img.size) <= max_px:
+            continue
+        thumb = img.copy()
+        thumb.thumbnail((max_px, max_px), Image.LANCZOS)
+        buf = io.BytesIO()
+        if alpha:
+            thumb.convert("RGBA").save(buf, format="PNG", optimize=True)
+            thumb_mime = "image/png"
+        else:
+            thumb.convert("RGB").save(buf, format="JPEG", quality=85, optimize=True)
+            thumb_mime = "image/jpeg"
+        variants.append((name, buf.getvalue(), thumb_mime, thumb.width, thumb.height))
+    return variants
+
+
+def put_image(data, mime_type: str = "", *, model=None) -> str:
+    """
+    Store *data* (and its thumbnails) and return its digest; "" for empty
+    input.  Storing bytes that are already present is one indexed lookup.
+
+    *model* lets data migrations pass their historical ImageBlob.
+    """
+    model = model or ImageBlob
+    data  = bytes(data or b"")
+    if not data:
+        return ""
+
+    digest = digest_of(data)
+    if model.objects.filter(digest=digest, variant="").exists():
+        return digest
+
+    model.objects.bulk_create(
+        [
+            model(
+                digest    = digest,
+                variant   = variant,
+                mime_type = mime[:50],
+                width     = width,
+                height    = height,
+                byte_size = len(blob),
+                data      = blob,
+            )
+            for variant, blob, mime, width, height in _render_variants(data, mime_type)
+        ],
+        ignore_conflicts=True,  # a concurrent upload of the same image
+    )
+    return digest
+
+
+def get_image(digest: str, size: str = ""):
+    """
+    The ImageBlob for *digest* at *size* (a key of IMAGE_THUMBNAIL_SIZES),
+    falling back to the original; None when nothing is stored.
+    """
+    if not digest:
+        return None
+    variants = [""]
+    if size and size in IMAGE_THUMBNAIL_SIZES:
+        variants.append(size)
+    rows = {b.variant: b for b in ImageBlob.objects.filter(digest=digest, variant__in=variants)}
+    return rows.get(size) or rows.get("")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Garbage collection
+# ─────────────────────────────────────────────────────────────────────────────
+
+def referenced_digests() -> set:
+    """Every digest a Book, Member or Library row currently points at."""
+    from accounts.models import Library
+    from books.models import Book
+    from members.models import Member
+
+    digests = set()
+    for qs in (
+        Book.objects.exclude(cover_hash="").values_list("cover_hash", flat=True),
+        Member.objects.exclude(photo_hash="").values_list("photo_hash", flat=True),
+        Library.objects.exclude(library_logo_hash="").values_list("library_logo_hash", flat=True),
+    ):
+        digests.update(qs.distinct().iterator())
+    return digests
+
+
+def delete_unreferenced(grace: timedelta = timedelta(days=1)) -> int:
+    """
+    Delete blobs no row references.  Blobs younger than *grace* are kept —
+    an upload is stored before the row that points at it is saved.
+    """
+    keep = referenced_digests()
+    stale = (
+        ImageBlob.objects
+        .filter(created_at__lt=timezone.now() - grace)
+        .values_list("digest", flat=True)
+        .distinct()
+    )
+    doomed = [d for d in stale.iterator() if d not in keep]
+    deleted = 0
+    for start in range(0, len(doomed), 500):
+        deleted += ImageBlob.objects.filter(digest__in=doomed[start:start + 500]).delete()[0]
+    if deleted:
+        logger.info("image_store: pruned %d blob row(s).", deleted)
+    return deleted
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Data-migration helpers (BinaryField column → digest column)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def migrate_blob_column(apps, model_label: str, blob_field: str, mime_field: str, hash_field: str) -> None:
+    """Move every non-empty *blob_field* into the store, recording its digest."""
+    Model     = apps.get_model(model_label)
+    BlobModel = apps.get_model("core", "ImageBlob")
+
+    pks = list(Model.objects.exclude(**{blob_field: None}).values_list("pk", flat=True))
+    for pk in pks:
+        # One row at a time — never hold more than one BLOB in memory.
+        data, mime = Model.objects.values_list(blob_field, mime_field).get(pk=pk)
+        digest = put_image(data, mime or "", model=BlobModel)
+        if digest:
+            Model.objects.filter(pk=pk).update(**{hash_field: digest})
+
+
+def restore_blob_column(apps, model_label: str, blob_field: str, mime_field: str, hash_field: str) -> None:
+    """Reverse of migrate_blob_column(): copy originals back onto the rows."""
+    Model     = apps.get_model(model_label)
+    BlobModel = apps.get_model("core", "ImageBlob")
+
+    rows = list(Model.objects.exclude(**{hash_field: ""}).values_list("pk", hash_field))
+    for pk, digest in rows:
+        blob = BlobModel.objects.filter(digest=digest, variant="").first()
+        if blob is not None:
+            Model.objects.filter(pk=pk).update(**{blob_field: blob.data, mime_field: blob.mime_type})
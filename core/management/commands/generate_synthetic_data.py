@@ -0,0 +1,99 @@
+# core/management/commands/generate_synthetic_data.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Create synthetic libraries at production scale (core/synthetic.py) — for
+# load tests, the benchmark runner and reproducing slow pages locally.
+#
+#     python manage.py generate_synthetic_data                      # 1 library
+#     python manage.py generate_synthetic_data --libraries 20 \
+#         --members 5000 --books 20000 --transactions 200000 --seed 7
+#
+# Each library gets its own owner account (synthetic_<prefix>, no usable
+# password) and rows in every app.  Remove them with --delete, which lists
+# what core.synthetic.synthetic_libraries() matches and asks before
+# deleting (--yes skips the prompt).
+# ─────────────────────────────────────────────────────────────────────────────
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import Sizes, generate, synthetic_libraries
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic libraries with members, books, copies, loans, fines and payments."
+
+    def add_arguments(self, parser):
+        defaults = Sizes()
+        parser.add_argument("--libraries", type=int, default=1)
+        parser.add_argument("--members", type=int, default=defaults.members, help="Members per library.")
+        parser.add_argument("--books", type=int, default=defaults.books, help="Titles per library.")
+        parser.add_argument("--copies-per-book", type=int, default=defaults.copies_per_book,
+                            help="Each title gets 1 … this many copies.")
+        parser.add_argument("--transactions", type=int, default=defaults.transactions, help="Loans per library.")
+        parser.add_argument("--history-days", type=int, default=defaults.history_days,
+                            help="How far back the loan history goes.")
+        parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed and sizes → same data.")
+        parser.add_argument("--delete", action="store_true", help="Delete every synthetic library instead.")
+        parser.add_argument("--yes", action="store_true", help="With --delete: don't ask for confirmation.")
+
+    def handle(self, *args, **options):
+        if options["delete"]:
+            return self._delete(options["yes"])
+
+        if options["libraries"] < 1 or options["members"] < 1 or options["books"] < 1:
+            raise CommandError("--libraries, --members and --books must be at least 1.")
+        sizes = Sizes(
+            members=options["members"],
+            books=options["books"],
+            copies_per_book=options["copies_per_book"],
+            transactions=options["transactions"],
+            history_days=options["history_days"],
+            batch_size=options["batch_size"],
+        )
+
+        started = time.perf_counter()
+
+        def progress(library, counts):
+            rows = ", ".join(f"{n} {name}" for name, n in counts.items())
+            self.stdout.write(f"  library {library.pk} ({library.library_name}): {rows}")
+
+        results = generate(options["libraries"], sizes, seed=options["seed"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done — {len(results)} librar{'y' if len(results) == 1 else 'ies'} "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def _delete(self, assume_yes: bool):
+        from django.contrib.auth.models import User
+        from django.db import transaction as db_transaction
+
+        from books.models import Book
+        from finance.models import Fine, Payment
+        from members.models import Member
+        from transactions.models import Transaction
+
+        libraries = list(synthetic_libraries())
+        if not libraries:
+            self.stdout.write("No synthetic libraries found.")
+            return
+        for library in libraries:
+            self.stdout.write(f"  {library.pk:>6}  {library.library_name}  ({library.user.username})")
+        if not assume_yes:
+            answer = input(f"Delete these {len(libraries)} librar{'y' if len(libraries) == 1 else 'ies'} "
+                           f"and all their data? [y/N] ")
+            if answer.strip().lower() not in ("y", "yes"):
+                raise CommandError("Aborted — nothing deleted.")
+
+        for library in libraries:
+            with db_transaction.atomic():
+                # Loans PROTECT members and books — remove them first.
+                Payment.objects.filter(library=library).delete()
+                Fine.objects.filter(library=library).delete()
+                Transaction.objects.filter(library=library).delete()
+                Member.objects.filter(owner=library.user).delete()
+                Book.objects.filter(owner=library.user).delete()
+                User.objects.filter(pk=library.user_id).delete()
+            self.stdout.write(f"  deleted library {library.pk} ({library.library_name})")
+        self.stdout.write(self.style.SUCCESS(f"Done — {len(libraries)} synthetic librar{'y' if len(libraries) == 1 else 'ies'} deleted."))
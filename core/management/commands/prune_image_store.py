@@ -0,0 +1,27 @@
+# core/management/commands/prune_image_store.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Delete image-store blobs (core/image_store.py) that no Book, Member or
+# Library row references any more — replaced or removed covers, photos and
+# logos.  Safe to run from cron.
+#
+#     python manage.py prune_image_store
+#     python manage.py prune_image_store --grace-hours 1
+# ─────────────────────────────────────────────────────────────────────────────
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.image_store import delete_unreferenced
+
+
+class Command(BaseCommand):
+    help = "Delete stored images that nothing references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=int, default=24,
+                            help="Keep blobs younger than this (default 24).")
+
+    def handle(self, *args, **options):
+        deleted = delete_unreferenced(timedelta(hours=options["grace_hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Done — {deleted} blob row(s) deleted."))
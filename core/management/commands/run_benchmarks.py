@@ -0,0 +1,254 @@
+# core/management/commands/run_benchmarks.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Time the hot paths end to end and write the numbers to a JSON file that
+# can be diffed between commits.
+#
+#     python manage.py run_benchmarks --library 3 -o bench.json
+#     python manage.py run_benchmarks --generate --members 5000 \
+#         --books 20000 --transactions 200000 --iterations 10
+#
+# Views are driven through the Django test client, signed in as the
+# library's owner, so middleware, templates and signals are all included:
+#
+#     issue_book, return_book           (POST — a fresh member / loan each run)
+#     transaction_list, member_lookup_api
+#     reports (overview, transactions, overdue, fines, inventory)
+#     exports (transactions / overdue / fines / members CSV, books Excel)
+#     fine_sync._run_sync_once()        (every library in the database)
+#
+# Everything runs inside a transaction that is rolled back at the end —
+# including the --generate library — so the database is left as it was.
+# Fine reminder e-mails are switched off for the run.
+#
+# Each result records wall time per iteration (ms), min / median / p95 /
+# max, the median query count (core/query_budget.py) and the HTTP status
+# codes seen.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import QueryRecorder
+from core.synthetic import Sizes, generate_library
+
+VIEWS = (
+    ("transaction_list",          "transactions:transaction_list"),
+    ("report_overview",           "reports:overview"),
+    ("report_transactions",       "reports:transactions"),
+    ("report_overdue",            "reports:overdue"),
+    ("report_fines",              "reports:fines"),
+    ("report_inventory",          "reports:inventory"),
+    ("export_transactions_csv",   "reports:export_transactions"),
+    ("export_overdue_csv",        "reports:export_overdue"),
+    ("export_fines_csv",          "reports:export_fines"),
+    ("export_members_csv",        "reports:export_members"),
+    ("export_books_excel",        "books:export_books_excel"),
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _host() -> str:
+    """A host name ALLOWED_HOSTS accepts, for the test client."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.strip().lstrip(".")
+        if host and host != "*":
+            return host
+    return "localhost"
+
+
+class Command(BaseCommand):
+    help = "Benchmark issue / return, lists, reports, exports and the fine sync; write JSON results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, help="Library pk to benchmark.")
+        parser.add_argument("--generate", action="store_true",
+                            help="Benchmark a synthetic library created (and rolled back) for the run.")
+        parser.add_argument("--members", type=int, default=Sizes.members)
+        parser.add_argument("--books", type=int, default=Sizes.books)
+        parser.add_argument("--transactions", type=int, default=Sizes.transactions)
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("-o", "--output", default="benchmark_results.json")
+
+    def handle(self, *args, **options):
+        from accounts.models import Library
+
+        if bool(options["library"]) == options["generate"]:
+            raise CommandError("Pass exactly one of --library or --generate.")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        self.iterations = options["iterations"]
+
+        try:
+            with override_settings(FINE_DAILY_REMINDER=False,
+                                   EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"):
+                with db_transaction.atomic():
+                    if options["generate"]:
+                        started = time.perf_counter()
+                        library, _ = generate_library(0, Sizes(
+                            members=options["members"], books=options["books"],
+                            transactions=options["transactions"],
+                        ), random.Random(options["seed"]))
+                        self.stdout.write(f"  generated library {library.pk} in {time.perf_counter() - started:.1f}s")
+                    else:
+                        library = Library.objects.filter(pk=options["library"]).first()
+                        if library is None:
+                            raise CommandError(f"Library {options['library']} does not exist.")
+                    report = self._run(library)
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']} (rolled back)."))
+
+    # ── Runs ────────────────────────────────────────────────────────────────
+
+    def _run(self, library) -> dict:
+        self.client = Client(SERVER_NAME=_host())
+        self.client.force_login(library.user)
+        dataset = self._dataset(library)   # before issue / return add and close loans
+        results = {}
+
+        for name, url_name in VIEWS:
+            url = reverse(url_name)
+            self.client.get(url)   # warm-up: imports, template loading, the once-per-process sync
+            results[name] = self._time(name, lambda: self.client.get(url))
+
+        member_ids = self._member_ids(library)
+        results["member_lookup_api"] = self._time("member_lookup_api", lambda i: self.client.get(
+            reverse("transactions:member_lookup_api"), {"member_id": member_ids[i % len(member_ids)]},
+        ), indexed=True)
+
+        issues = self._issue_candidates(library)
+        if issues:
+            results["issue_book"] = self._time("issue_book", lambda i: self.client.post(
+                reverse("transactions:issue_book"), issues[i % len(issues)],
+            ), indexed=True)
+
+        loans = self._open_loans(library)
+        if loans:
+            results["return_book"] = self._time("return_book", lambda i: self.client.post(
+                reverse("transactions:return_book", args=[loans[i % len(loans)]]),
+                {"return_date": date.today().isoformat(), "condition": "good"},
+            ), indexed=True)
+
+        from transactions.fine_sync import _run_sync_once
+        results["fine_sync_run_once"] = self._time("fine_sync_run_once", _run_sync_once)
+
+        return {
+            "generated_at": timezone.now().isoformat(),
+            "database":     connection.vendor,
+            "python":       platform.python_version(),
+            "library":      library.pk,
+            "dataset":      dataset,
+            "iterations":   self.iterations,
+            "results":      results,
+        }
+
+    def _time(self, name, fn, indexed=False) -> dict:
+        timings, queries, statuses = [], [], []
+        for i in range(self.iterations):
+            with QueryRecorder() as rec:
+                started = time.perf_counter()
+                result  = fn(i) if indexed else fn()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(rec.count)
+            if hasattr(result, "status_code"):
+                statuses.append(result.status_code)
+
+        ordered = sorted(timings)
+        summary = {
+            "ms":        [round(t, 2) for t in timings],
+            "min_ms":    round(ordered[0], 2),
+            "median_ms": round(statistics.median(ordered), 2),
+            "p95_ms":    round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max_ms":    round(ordered[-1], 2),
+            "queries":   int(statistics.median(queries)),
+        }
+        if statuses:
+            summary["status"] = sorted(set(statuses))
+        self.stdout.write(f"  {name:<28} median {summary['median_ms']:9.2f} ms   "
+                          f"p95 {summary['p95_ms']:9.2f} ms   {summary['queries']:4d} queries")
+        return summary
+
+    # ── Inputs ──────────────────────────────────────────────────────────────
+
+    def _member_ids(self, library) -> list:
+        from members.models import Member
+
+        ids = list(Member.objects.filter(owner=library.user).order_by("?")
+                   .values_list("member_id", flat=True)[:self.iterations])
+        if not ids:
+            raise CommandError(f"Library {library.pk} has no members to benchmark.")
+        return ids
+
+    def _issue_candidates(self, library) -> list:
+        """Form data for issuing a free copy to a member with nothing out or owed — one per iteration."""
+        from books.models import BookCopy
+        from finance.models import Fine
+        from members.models import Member
+        from transactions.models import Transaction
+
+        busy = Transaction.objects.for_library(library).filter(
+            status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE),
+        ).values("member_id")
+        owing = Fine.objects.for_library(library).filter(status=Fine.STATUS_UNPAID).values("transaction__member_id")
+        members = list(
+            Member.objects.filter(owner=library.user, status="active")
+            .exclude(pk__in=busy).exclude(pk__in=owing)
+            .values_list("pk", flat=True)[:self.iterations]
+        )
+        copies, seen = [], set()
+        for copy_pk, book_pk in (
+            BookCopy.objects.filter(book__owner=library.user, status=BookCopy.Status.AVAILABLE)
+            .values_list("pk", "book_id")[:self.iterations * 4]
+        ):
+            if book_pk not in seen:
+                seen.add(book_pk)
+                copies.append((copy_pk, book_pk))
+        return [
+            {"member": m, "book": b, "book_copy": c, "issue_date": date.today().isoformat()}
+            for m, (c, b) in zip(members, copies)
+        ]
+
+    def _open_loans(self, library) -> list:
+        from transactions.models import Transaction
+
+        return list(
+            Transaction.objects.for_library(library)
+            .filter(status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE))
+            .order_by("pk").values_list("pk", flat=True)[:self.iterations]
+        )
+
+    def _dataset(self, library) -> dict:
+        from books.models import Book, BookCopy
+        from finance.models import Fine, Payment
+        from members.models import Member
+        from transactions.models import Transaction
+
+        return {
+            "members":      Member.objects.filter(owner=library.user).count(),
+            "books":        Book.objects.filter(owner=library.user).count(),
+            "copies":       BookCopy.objects.filter(book__owner=library.user).count(),
+            "transactions": Transaction.objects.for_library(library).count(),
+            "fines":        Fine.objects.for_library(library).count(),
+            "payments":     Payment.objects.filter(library=library).count(),
+        }
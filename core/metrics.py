@@ -0,0 +1,295 @@
+# core/metrics.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Timing spans for the hot paths (the fine sync cycle, issue / return /
+# renew), reported to pluggable sinks.
+#
+#   span(name, library=…, **labels)  — context manager; on exit emits one
+#                                      record with duration_ms, db_ms,
+#                                      queries, rows (written by INSERT /
+#                                      UPDATE / DELETE) and email_ms, plus
+#                                      any counter added with sp.add()
+#   timing(field)                    — add a block's wall time to *field*
+#                                      of every open span (email_ms from
+#                                      transactions.views._send_email)
+#   instrument(name)                 — view decorator: a span labelled with
+#                                      the user's library, method and status
+#   render_prometheus()              — text exposition for /metrics/
+#
+# Sinks (METRICS_SINKS — names, or dotted paths to a class with emit(span)):
+#   "log"         LogSink         one INFO line per span on "core.metrics",
+#                                 with the record in extra={"span": …}
+#   "ring"        RingBufferSink  the last METRICS_RING_SIZE spans in memory
+#                                 (recent_spans() from a shell or a test)
+#   "prometheus"  PrometheusSink  counters per (span, labels), served as
+#                                 text at /metrics/.  Per process — with
+#                                 several workers, scrape each one or use
+#                                 the log sink.
+#
+# /metrics/ accepts "Authorization: Bearer <METRICS_TOKEN>" when a token is
+# set, and a signed-in staff user otherwise.
+#
+# DB figures come from connection.execute_wrapper() on the calling thread's
+# connection, so nested spans each include their children.  A failing sink
+# is logged and never breaks the request or the sync cycle.
+#
+# Override in settings.py:
+#     METRICS_SINKS     = ["ring", "prometheus"]
+#     METRICS_RING_SIZE = 1000
+#     METRICS_TOKEN     = ""
+# ─────────────────────────────────────────────────────────────────────────────
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("core.metrics")
+
+METRICS_SINKS:     list = list(getattr(settings, "METRICS_SINKS", ["ring", "prometheus"]))
+METRICS_RING_SIZE: int  = int(getattr(settings, "METRICS_RING_SIZE", 1000))
+METRICS_TOKEN:     str  = str(getattr(settings, "METRICS_TOKEN", ""))
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# Spans open on this thread / context, innermost last — timing() adds to all.
+_open_spans: ContextVar = ContextVar("dg_open_spans", default=())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Spans
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Span:
+    """One timed block.  *values* holds the numeric fields, *labels* strings."""
+
+    def __init__(self, name: str, labels: dict):
+        self.name    = name
+        self.labels  = {key: str(value) for key, value in labels.items() if value is not None}
+        self.values  = {"duration_ms": 0.0, "db_ms": 0.0, "queries": 0, "rows": 0, "email_ms": 0.0}
+        self.error   = ""
+        self.started = time.time()
+
+    def add(self, field: str, amount=1) -> None:
+        self.values[field] = self.values.get(field, 0) + amount
+
+    def label(self, **labels) -> None:
+        self.labels.update({key: str(value) for key, value in labels.items() if value is not None})
+
+    def as_dict(self) -> dict:
+        return {
+            "name":    self.name,
+            "labels":  dict(self.labels),
+            "started": self.started,
+            "error":   self.error,
+            **{field: round(value, 3) if isinstance(value, float) else value
+               for field, value in self.values.items()},
+        }
+
+    def _wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.values["db_ms"]   += (time.perf_counter() - started) * 1000
+            self.values["queries"] += 1
+            if sql.lstrip()[:7].upper().startswith(_WRITE_VERBS):
+                rowcount = getattr(context.get("cursor"), "rowcount", -1) or 0
+                self.values["rows"] += max(rowcount, 0)
+
+
+@contextmanager
+def span(name: str, *, library=None, using: str = "default", **labels):
+    """
+    with span("fine_sync.fine_upsert", library=library.pk) as sp:
+        …
+        sp.add("fines", touched)
+
+    *library* may be a Library or its pk; it becomes the "library" label.
+    """
+    if library is not None:
+        labels["library"] = getattr(library, "pk", library)
+    sp = Span(name, labels)
+    sinks = active_sinks()
+    if not sinks:
+        yield sp
+        return
+
+    token = _open_spans.set(_open_spans.get() + (sp,))
+    started = time.perf_counter()
+    try:
+        with connections[using].execute_wrapper(sp._wrapper):
+            yield sp
+    except BaseException as exc:
+        sp.error = type(exc).__name__
+        raise
+    finally:
+        sp.values["duration_ms"] = (time.perf_counter() - started) * 1000
+        _open_spans.reset(token)
+        _emit(sp, sinks)
+
+
+@contextmanager
+def timing(field: str):
+    """Add the block's wall time (ms) to *field* of every open span."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        for sp in _open_spans.get():
+            sp.add(field, elapsed)
+
+
+def _library_label(request):
+    try:
+        return request.user.library.pk
+    except Exception:
+        return None
+
+
+def instrument(name: str):
+    """
+    @login_required
+    @instrument("circulation.issue_book")
+    def issue_book(request): …
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with span(name, library=_library_label(request), method=request.method) as sp:
+                response = view(request, *args, **kwargs)
+                sp.label(status=getattr(response, "status_code", None))
+            return response
+        return wrapper
+    return decorator
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sinks
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LogSink:
+    def emit(self, sp: Span) -> None:
+        record = sp.as_dict()
+        fields = " ".join(f"{key}={value}" for key, value in {**sp.labels, **sp.values}.items()
+                          if not isinstance(value, float))
+        logger.info(
+            "span %s %.1f ms (db %.1f ms, email %.1f ms) %s%s",
+            sp.name, record["duration_ms"], record["db_ms"], record["email_ms"], fields,
+            f" error={sp.error}" if sp.error else "",
+            extra={"span": record},
+        )
+
+
+class RingBufferSink:
+    def __init__(self, size: int = METRICS_RING_SIZE):
+        self._spans = deque(maxlen=size)
+        self._lock  = threading.Lock()
+
+    def emit(self, sp: Span) -> None:
+        with self._lock:
+            self._spans.append(sp.as_dict())
+
+    def spans(self, name: str = None, **labels) -> list:
+        """Recorded span dicts, oldest first, optionally filtered."""
+        with self._lock:
+            spans = list(self._spans)
+        return [
+            s for s in spans
+            if (name is None or s["name"] == name)
+            and all(s["labels"].get(key) == str(value) for key, value in labels.items())
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class PrometheusSink:
+    """Running totals per (span name, labels); render() is the text format."""
+
+    def __init__(self):
+        self._series = {}   # (name, ((label, value), …)) → {metric: total}
+        self._lock   = threading.Lock()
+
+    def emit(self, sp: Span) -> None:
+        key = (sp.name, tuple(sorted(sp.labels.items())))
+        with self._lock:
+            totals = self._series.setdefault(key, {"dg_span_total": 0, "dg_span_errors_total": 0})
+            totals["dg_span_total"] += 1
+            totals["dg_span_errors_total"] += bool(sp.error)
+            for field, value in sp.values.items():
+                if field.endswith("_ms"):
+                    metric, value = f"dg_span_{field[:-3]}_seconds_total", value / 1000
+                else:
+                    metric = f"dg_span_{field}_total"
+                totals[metric] = totals.get(metric, 0) + value
+
+    def render(self) -> str:
+        with self._lock:
+            series = {key: dict(totals) for key, totals in self._series.items()}
+        by_metric = {}
+        for (name, labels), totals in sorted(series.items()):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in (("span", name),) + labels)
+            for metric, value in totals.items():
+                by_metric.setdefault(metric, []).append(f"{metric}{{{label_text}}} {value:g}")
+        lines = []
+        for metric in sorted(by_metric):
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(by_metric[metric])
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+ring       = RingBufferSink()
+prometheus = PrometheusSink()
+_NAMED     = {"log": LogSink, "ring": lambda: ring, "prometheus": lambda: prometheus}
+
+_sinks      = None
+_sinks_lock = threading.Lock()
+
+
+def active_sinks() -> list:
+    """The sinks named in METRICS_SINKS, built on first use."""
+    global _sinks
+    if _sinks is None:
+        with _sinks_lock:
+            if _sinks is None:
+                built = []
+                for entry in METRICS_SINKS:
+                    try:
+                        built.append(_NAMED[entry]() if entry in _NAMED else import_string(entry)())
+                    except Exception as exc:
+                        logger.warning("metrics: could not load sink %r: %s", entry, exc)
+                _sinks = built
+    return _sinks
+
+
+def _emit(sp: Span, sinks) -> None:
+    for sink in sinks:
+        try:
+            sink.emit(sp)
+        except Exception as exc:
+            logger.warning("metrics: sink %s failed for span %s: %s", type(sink).__name__, sp.name, exc)
+
+
+def recent_spans(name: str = None, **labels) -> list:
+    return ring.spans(name, **labels)
+
+
+def render_prometheus() -> str:
+    return prometheus.render()
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64)),
+                ('variant', models.CharField(blank=True, default='', max_length=10)),
+                ('mime_type', models.CharField(max_length=50)),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('byte_size', models.PositiveIntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Image Blob',
+                'verbose_name_plural': 'Image Blobs',
+                'constraints': [models.UniqueConstraint(fields=('digest', 'variant'), name='uniq_image_blob_variant')],
+            },
+        ),
+    ]
@@ -30,4 +30,32 @@ class ContactMessage(models.Model):
         verbose_name_plural = "Contact Messages"
 
     def __str__(self):
-        return f"{self.name} — {self.get_subject_display()} ({self.submitted_at:%d %b %Y})"
\ No newline at end of file
+        return f"{self.name} — {self.get_subject_display()} ({self.submitted_at:%d %b %Y})"
+
+class ImageBlob(models.Model):
+    """
+    One stored image variant, keyed by the SHA-256 of the original upload.
+
+    variant "" is the original bytes; other variants are thumbnails named
+    after IMAGE_THUMBNAIL_SIZES.  Written and read through core/image_store.py
+    — Book / Member / Library rows hold only the digest.
+    """
+
+    digest     = models.CharField(max_length=64)
+    variant    = models.CharField(max_length=10, blank=True, default="")
+    mime_type  = models.CharField(max_length=50)
+    width      = models.PositiveIntegerField(default=0)
+    height     = models.PositiveIntegerField(default=0)
+    byte_size  = models.PositiveIntegerField(default=0)
+    data       = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name        = "Image Blob"
+        verbose_name_plural = "Image Blobs"
+        constraints = [
+            models.UniqueConstraint(fields=["digest", "variant"], name="uniq_image_blob_variant"),
+        ]
+
+    def __str__(self):
+        return f"{self.digest[:12]}{'/' + self.variant if self.variant else ''} ({self.mime_type}, {self.byte_size} B)"
@@ -0,0 +1,183 @@
+# core/query_budget.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-view query accounting for development and CI.
+#
+#   QueryRecorder            — context manager: every SQL statement run on
+#                              the default connection, with its duration
+#   fingerprint(sql)         — the statement with literals / IN-lists folded,
+#                              so an N+1 loop shows up as one repeated shape
+#   QueryBudgetMiddleware    — records each request and reports
+#                              X-Query-Count / X-Query-Time-Ms /
+#                              X-Query-Duplicates headers, logging a
+#                              warning when a view goes over its budget
+#   QueryBudgetTestMixin     — assertQueryBudget() for TestCase classes
+#
+# A view is over budget when it runs more than its budget of queries
+# (QUERY_BUDGETS[url name], else QUERY_BUDGET_DEFAULT) or repeats one
+# fingerprint more than QUERY_BUDGET_MAX_REPEATS times — the N+1 signature
+# of a property such as Member.books_issued_count evaluated in a loop.
+#
+# Recording uses connection.execute_wrapper(), so it works with DEBUG off.
+# The middleware removes itself (MiddlewareNotUsed) unless enabled.
+#
+# Override in settings.py:
+#     QUERY_BUDGET_ENABLED     = DEBUG   # install the middleware
+#     QUERY_BUDGET_STRICT      = False   # raise QueryBudgetExceeded (CI)
+#     QUERY_BUDGET_DEFAULT     = 40      # queries per request
+#     QUERY_BUDGET_MAX_REPEATS = 5       # identical fingerprints per request
+#     QUERY_BUDGETS            = {"members:members_list": 12, …}
+# ─────────────────────────────────────────────────────────────────────────────
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("core.query_budget")
+
+QUERY_BUDGET_ENABLED:     bool = bool(getattr(settings, "QUERY_BUDGET_ENABLED", settings.DEBUG))
+QUERY_BUDGET_STRICT:      bool = bool(getattr(settings, "QUERY_BUDGET_STRICT", False))
+QUERY_BUDGET_DEFAULT:     int  = int(getattr(settings, "QUERY_BUDGET_DEFAULT", 40))
+QUERY_BUDGET_MAX_REPEATS: int  = int(getattr(settings, "QUERY_BUDGET_MAX_REPEATS", 5))
+QUERY_BUDGETS:            dict = dict(getattr(settings, "QUERY_BUDGETS", {}))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fingerprints
+# ─────────────────────────────────────────────────────────────────────────────
+
+_STRING_RE  = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE  = re.compile(r"(?<![\w\"`.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_SPACE_RE   = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """*sql* with placeholders, literals and IN (…) lists reduced to `?`."""
+    sql = sql.replace("%s", "?")
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (?)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Recorder
+# ─────────────────────────────────────────────────────────────────────────────
+
+class QueryRecorder:
+    """
+    with QueryRecorder() as rec:
+        …
+    rec.count, rec.total_ms, rec.duplicates()  → {fingerprint: times}
+    """
+
+    def __init__(self, using: str = "default"):
+        self.using   = using
+        self.queries = []   # [(sql, ms), …]
+        self._cm     = None
+
+    def _wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+    def __enter__(self):
+        self._cm = connections[self.using].execute_wrapper(self._wrapper)
+        self._cm.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._cm.__exit__(*exc)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.queries)
+
+    def duplicates(self, at_least: int = 2) -> dict:
+        """Fingerprints run *at_least* times, most repeated first."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {fp: n for fp, n in counts.most_common() if n >= at_least}
+
+    def problems(self, budget: int, max_repeats: int = QUERY_BUDGET_MAX_REPEATS) -> list:
+        """Human-readable reasons this recording is over *budget*; [] if none."""
+        problems = []
+        if self.count > budget:
+            problems.append(f"{self.count} queries (budget {budget})")
+        for fp, n in self.duplicates(at_least=max_repeats + 1).items():
+            problems.append(f"{n}× {fp[:200]}")
+        return problems
+
+
+def budget_for(view_name: str) -> int:
+    return int(QUERY_BUDGETS.get(view_name, QUERY_BUDGET_DEFAULT))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────────────────────
+
+class QueryBudgetMiddleware:
+    """Development / CI only — see the module header."""
+
+    def __init__(self, get_response):
+        if not QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as rec:
+            response = self.get_response(request)
+
+        match     = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else request.path
+        dupes     = rec.duplicates()
+        response["X-Query-Count"]      = str(rec.count)
+        response["X-Query-Time-Ms"]    = f"{rec.total_ms:.1f}"
+        response["X-Query-Duplicates"] = str(sum(n - 1 for n in dupes.values()))
+
+        problems = rec.problems(budget_for(view_name))
+        if problems:
+            message = f"query budget exceeded by {view_name}: " + "; ".join(problems)
+            if QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        else:
+            logger.debug("%s: %d queries in %.1f ms", view_name, rec.count, rec.total_ms)
+        return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class QueryBudgetTestMixin:
+    """
+    class MyTests(QueryBudgetTestMixin, TestCase):
+        def test_list(self):
+            with self.assertQueryBudget(8):
+                self.client.get(url)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, max_repeats: int = QUERY_BUDGET_MAX_REPEATS, label: str = ""):
+        with QueryRecorder() as rec:
+            yield rec
+        problems = rec.problems(budget, max_repeats)
+        if problems:
+            self.fail(f"{label or 'block'} over query budget: " + "; ".join(problems))
@@ -0,0 +1,394 @@
+# core/synthetic.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Synthetic multi-tenant data for load tests and benchmarks.
+#
+#     generate_library(index, sizes, rng)   → one Library with a full history
+#     generate(n_libraries, sizes, seed)    → [(library, counts), …]
+#     synthetic_libraries()                 → the libraries generated here
+#
+# Every library gets its own owner account, departments, courses, members,
+# categories, books, copies, a loan history, fines and payments — written
+# with bulk_create in batches, so a library of 100k loans costs a few
+# hundred INSERTs instead of a few hundred thousand save() calls.
+#
+# bulk_create skips save() and signals, so the derived state those
+# normally maintain is produced here instead:
+#   • human-readable IDs (member / copy / transaction / fine) in the app's
+#     own formats, under a library-name prefix no real library uses
+#     ("9" + two characters — see _free_prefix)
+#   • Member.passout_year / search_document, Payment snapshots and
+#     search_document
+#   • Book.total_copies / available_copies, Transaction.total_fine /
+#     unpaid_fine (fine_summary.py), the cash book (finance/ledger.py)
+#   • the cached counts, member statistics and search-cache version
+#
+# MySQL does not return primary keys from bulk_create, so rows are read
+# back by their natural keys before anything refers to them.
+#
+# Loan mix (fractions of --transactions):
+#     60 % returned on time      15 % returned late (exponential, mean 7 days)
+#     15 % out, not yet due       8 % overdue (exponential, mean 10 days)
+#      2 % lost
+# Late returns are mostly paid (75 %), some waived (10 %), the rest owed.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import random
+import string
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+_ALNUM = string.digits + string.ascii_uppercase
+
+FIRST_NAMES = ("Arjun", "Priya", "Rahul", "Ananya", "Sourav", "Riya", "Amit", "Sneha", "Kunal", "Pooja",
+               "Tenzing", "Moumita", "Bikash", "Ishita", "Rohan", "Sayani", "Vikram", "Nisha")
+LAST_NAMES  = ("Sen", "Das", "Roy", "Ghosh", "Barman", "Sarkar", "Tamang", "Rai", "Bose", "Paul",
+               "Mondal", "Chettri", "Dutta", "Saha", "Oraon", "Lama")
+DEPARTMENTS = (("CSE", "Computer Science"), ("ECE", "Electronics"), ("ME", "Mechanical"), ("BBA", "Business"))
+COURSES     = (("BTECH", "B.Tech", 4), ("DIP", "Diploma", 3), ("MBA", "MBA", 2), ("BSC", "B.Sc", 3))
+CATEGORIES  = ("Fiction", "Science", "Engineering", "History", "Reference", "Biography", "Mathematics")
+
+
+@dataclass
+class Sizes:
+    members:         int = 1000
+    books:           int = 2000
+    copies_per_book: int = 3      # each book gets 1 … copies_per_book copies
+    transactions:    int = 10000
+    history_days:    int = 365
+    batch_size:      int = 2000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _free_prefix() -> str:
+    """A 3-character library-name prefix no existing library starts with."""
+    from accounts.models import Library
+
+    for i in range(len(_ALNUM) ** 2):
+        prefix = "9" + _ALNUM[i // len(_ALNUM)] + _ALNUM[i % len(_ALNUM)]
+        if not Library.objects.filter(library_name__startswith=prefix).exists():
+            return prefix
+    raise RuntimeError("No free synthetic library prefix left.")
+
+
+def _months_back(day, months: int):
+    """First day of the month *months* before *day*'s month."""
+    total = day.year * 12 + day.month - 1 - months
+    return day.replace(year=total // 12, month=total % 12 + 1, day=1)
+
+
+def _copy_id(prefix: str, index: int, today) -> str:
+    """DG<LIB3>BK<MM><YY><SERIAL> — 999 serials per month, then a month earlier."""
+    month = _months_back(today, index // 999)
+    return f"DG{prefix}BK{month:%m%y}{index % 999 + 1:03d}"
+
+
+def _bulk(model, objs, batch_size):
+    model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def _aware(day, rng):
+    return timezone.make_aware(datetime.combine(day, time(rng.randint(9, 17), rng.randint(0, 59))))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# One library
+# ─────────────────────────────────────────────────────────────────────────────
+
+def generate_library(index: int, sizes: Sizes, rng: random.Random):
+    """Create one synthetic library; returns (library, {model: rows})."""
+    from accounts.models import Library, LibraryRuleSettings
+
+    prefix   = _free_prefix()
+    username = f"synthetic_{prefix.lower()}"
+    with db_transaction.atomic():
+        user    = User.objects.create_user(username, f"{username}@example.org", None)
+        library = Library.objects.create(
+            user=user,
+            library_name=f"{prefix} Synthetic Library {index}",
+            institute_name=f"Synthetic Institute {index}",
+            institute_email=f"{username}@example.org",
+            address="1 Synthetic Road", district="Jalpaiguri", state="West Bengal", country="India",
+        )
+        LibraryRuleSettings.objects.filter(library=library).update(is_setup_complete=True)
+        counts = _populate(library, prefix, sizes, rng)
+    _refresh_derived(library)
+    return library, counts
+
+
+def _populate(library, prefix, sizes, rng) -> dict:
+    from books.models import Book, BookCopy, Category
+    from finance.models import Fine, Payment
+    from finance.search import build_search_document as payment_search_document
+    from members.models import Course, Department, Member
+    from members.search import build_search_document as member_search_document
+    from transactions.models import Transaction
+    from transactions.rules import get_rules
+
+    owner = library.user
+    today = timezone.localdate()
+    batch = sizes.batch_size
+    rules = get_rules(library, refresh=True)
+    rate  = rules.fine_rate()
+    loan  = rules.borrowing_period
+
+    # ── Departments / courses / categories ───────────────────────────────
+    _bulk(Department, [Department(owner=owner, code=c, name=n) for c, n in DEPARTMENTS], batch)
+    _bulk(Course, [Course(owner=owner, code=c, name=n, duration=d) for c, n, d in COURSES], batch)
+    _bulk(Category, [Category(owner=owner, name=n, slug=n.lower()) for n in CATEGORIES], batch)
+    departments = list(Department.objects.filter(owner=owner).values_list("pk", flat=True))
+    courses     = list(Course.objects.filter(owner=owner).values_list("pk", "duration"))
+    categories  = list(Category.objects.filter(owner=owner).values_list("pk", flat=True))
+
+    # ── Members ───────────────────────────────────────────────────────────
+    serials, members = {}, []
+    for n in range(1, sizes.members + 1):
+        role = rng.choices(("student", "teacher", "general"), (80, 10, 10))[0]
+        code = {"student": "ST", "teacher": "TC", "general": "GM"}[role]
+        serials[code] = serials.get(code, 0) + 1
+        m = Member(
+            owner=owner, role=role,
+            member_id=f"DG{prefix}{code}{today:%m%y}{serials[code]:03d}",
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            email=f"member{n:06d}@example.org", phone=f"9{rng.randint(100, 999)}{n:06d}",
+            date_of_birth=today.replace(year=today.year - rng.randint(18, 55), day=1),
+            gender=rng.choice("MF"),
+            status=rng.choices(("active", "inactive", "passout"), (90, 5, 5))[0],
+        )
+        if role == "student":
+            course_pk, duration = rng.choice(courses)
+            m.department_id  = rng.choice(departments)
+            m.course_id      = course_pk
+            m.admission_year = today.year - rng.randint(0, duration)
+            m.passout_year   = m.admission_year + duration
+            m.roll_number    = f"R{n:06d}"
+        if m.status == "inactive":
+            m.inactive_since = timezone.now()
+        m.search_document = member_search_document(m)
+        members.append(m)
+    _bulk(Member, members, batch)
+    member_rows  = list(Member.objects.filter(owner=owner).values_list("pk", "status", "member_id",
+                                                                      "first_name", "last_name"))
+    active_pks   = [pk for pk, status, *_ in member_rows if status == "active"] or [r[0] for r in member_rows]
+    member_by_pk = {pk: (mid, f"{first} {last}") for pk, _, mid, first, last in member_rows}
+
+    # ── Books / copies ────────────────────────────────────────────────────
+    _bulk(Book, [
+        Book(
+            owner=owner, title=f"Synthetic Title {n}", author=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            isbn=f"979{n:010d}", category_id=rng.choice(categories),
+            publisher="Synthetic Press", publication_year=rng.randint(1960, today.year),
+            language=rng.choice(("English", "Bengali", "Hindi")),
+            price=Decimal(rng.randrange(150, 1500, 10)),
+        )
+        for n in range(1, sizes.books + 1)
+    ], batch)
+    book_rows  = list(Book.objects.filter(owner=owner).values_list("pk", "title", "price"))
+    copies, n_copy = [], 0
+    for book_pk, _, _ in book_rows:
+        for number in range(1, rng.randint(1, max(1, sizes.copies_per_book)) + 1):
+            copies.append(BookCopy(book_id=book_pk, copy_id=_copy_id(prefix, n_copy, today), copy_number=number))
+            n_copy += 1
+    _bulk(BookCopy, copies, batch)
+    free_copies = {}
+    for copy_pk, book_pk in BookCopy.objects.filter(book__owner=owner).values_list("pk", "book_id"):
+        free_copies.setdefault(book_pk, []).append(copy_pk)
+    book_by_pk = {pk: (title, price) for pk, title, price in book_rows}
+
+    # ── Loans ─────────────────────────────────────────────────────────────
+    kinds = ("returned", "late", "issued", "overdue", "lost")
+    txns, plans, copy_status = [], [], {}
+    for n in range(1, sizes.transactions + 1):
+        kind    = rng.choices(kinds, (60, 15, 15, 8, 2))[0]
+        book_pk = rng.choice(book_rows)[0]
+        copy_pk = None
+        if kind in ("issued", "overdue", "lost"):
+            if not free_copies[book_pk]:
+                kind = "returned"   # every copy of this title is already out
+            else:
+                copy_pk = free_copies[book_pk].pop()
+                copy_status[copy_pk] = BookCopy.Status.LOST if kind == "lost" else BookCopy.Status.BORROWED
+        if copy_pk is None:
+            copy_pk = rng.choice(free_copies[book_pk] or [None])
+
+        late_days = 0
+        if kind == "issued":
+            issue = today - timedelta(days=rng.randint(0, loan - 1))
+        elif kind == "overdue":
+            late_days = min(180, int(rng.expovariate(1 / 10)) + 1)
+            issue = today - timedelta(days=loan + late_days)
+        else:
+            issue = today - timedelta(days=rng.randint(loan + 1, max(loan + 1, sizes.history_days)))
+        due = issue + timedelta(days=loan)
+
+        t = Transaction(
+            library=library, transaction_id=f"DG{prefix}TR{issue:%m%y}{n:06d}",
+            member_id=rng.choice(active_pks if kind in ("issued", "overdue") else list(member_by_pk)),
+            book_id=book_pk, book_copy_id=copy_pk,
+            issue_date=issue, due_date=due, loan_duration_days=loan, fine_rate_per_day=rate,
+            status={"returned": Transaction.STATUS_RETURNED, "late": Transaction.STATUS_RETURNED,
+                    "issued": Transaction.STATUS_ISSUED, "overdue": Transaction.STATUS_OVERDUE,
+                    "lost": Transaction.STATUS_LOST}[kind],
+            issued_by="synthetic",
+        )
+        if kind == "returned":
+            t.return_date = issue + timedelta(days=rng.randint(1, loan))
+        elif kind == "late":
+            late_days     = min(120, int(rng.expovariate(1 / 7)) + 1)
+            t.return_date = min(today, due + timedelta(days=late_days))
+            late_days     = (t.return_date - due).days
+        elif kind == "lost":
+            t.lost_date = min(today, due + timedelta(days=rng.randint(15, 60)))
+        if t.return_date:
+            t.return_condition = Transaction.CONDITION_GOOD
+            t.returned_to      = "synthetic"
+
+        outcome = "unpaid"
+        if kind == "late":
+            outcome = rng.choices(("paid", "waived", "unpaid"), (75, 10, 15))[0]
+        elif kind == "lost":
+            outcome = rng.choice(("paid", "unpaid"))
+        if outcome == "paid":
+            t.fine_paid, t.fine_paid_date = True, t.return_date or t.lost_date
+        txns.append(t)
+        plans.append((kind, late_days, outcome))
+    _bulk(Transaction, txns, batch)
+    txn_pks = dict(Transaction.objects.filter(library=library).values_list("transaction_id", "pk"))
+
+    # ── Fines / payments ──────────────────────────────────────────────────
+    fines, settle = [], []
+    for t, (kind, late_days, outcome) in zip(txns, plans):
+        if kind in ("late", "overdue") and late_days > 0:
+            fine_type, amount = Fine.TYPE_OVERDUE, Decimal(late_days) * rate
+        elif kind == "lost":
+            fine_type, amount = Fine.TYPE_LOST, book_by_pk[t.book_id][1] or Decimal("300.00")
+        else:
+            continue
+        paid_on = t.fine_paid_date or t.return_date or t.lost_date
+        member_id, member_name = member_by_pk[t.member_id]
+        fines.append(Fine(
+            library=library, fine_id=f"DG{prefix}FN{today:%m%y}{len(fines) + 1:06d}",
+            transaction_id=txn_pks[t.transaction_id], fine_type=fine_type, amount=amount,
+            status={"paid": Fine.STATUS_PAID, "waived": Fine.STATUS_WAIVED, "unpaid": Fine.STATUS_UNPAID}[outcome],
+            paid_date=paid_on if outcome != "unpaid" else None,
+            payment_method={"paid": Fine.METHOD_CASH, "waived": Fine.METHOD_WAIVER}.get(outcome, ""),
+            transaction_id_snapshot=t.transaction_id, member_name=member_name, member_id_snapshot=member_id,
+            book_title=book_by_pk[t.book_id][0], issue_date_snapshot=t.issue_date, due_date_snapshot=t.due_date,
+        ))
+        if outcome == "paid":
+            settle.append((fines[-1], paid_on))
+    _bulk(Fine, fines, batch)
+    fine_pks = dict(Fine.objects.filter(library=library).values_list("fine_id", "pk"))
+
+    payments = []
+    for n, (fine, paid_on) in enumerate(settle, start=1):
+        p = Payment(
+            library=library, fine_id=fine_pks[fine.fine_id], amount=fine.amount,
+            method=rng.choice((Payment.METHOD_CASH, Payment.METHOD_CASH, Payment.METHOD_UPI, Payment.METHOD_ONLINE)),
+            status=Payment.STATUS_SUCCESS, transaction_date=_aware(paid_on, rng),
+            receipt_number=f"RCPT-{prefix}-{n:06d}", collected_by="synthetic",
+            transaction_id_snapshot=fine.transaction_id_snapshot, member_name=fine.member_name,
+            member_id_snapshot=fine.member_id_snapshot, book_title=fine.book_title,
+            fine_id_snapshot=fine.fine_id, fine_type_snapshot=fine.fine_type,
+            fine_amount_snapshot=fine.amount, library_name=library.library_name,
+        )
+        p.search_document = payment_search_document(p)
+        payments.append(p)
+    _bulk(Payment, payments, batch)
+
+    # ── State the loans imply ─────────────────────────────────────────────
+    # Members with an overdue loan are blocked, as the overdue auto-block
+    # (transactions/views.py) would do on the first page load.
+    overdue = sorted({t.member_id for t, plan in zip(txns, plans) if plan[0] == "overdue"})
+    for start in range(0, len(overdue), batch):
+        Member.objects.filter(pk__in=overdue[start:start + batch], status="active").update(status="blocked")
+    for status in (BookCopy.Status.BORROWED, BookCopy.Status.LOST):
+        pks = [pk for pk, s in copy_status.items() if s == status]
+        for start in range(0, len(pks), batch):
+            BookCopy.objects.filter(pk__in=pks[start:start + batch]).update(status=status)
+
+    return {
+        "members": len(members), "books": len(book_rows), "copies": len(copies),
+        "transactions": len(txns), "fines": len(fines), "payments": len(payments),
+    }
+
+
+def _refresh_derived(library) -> None:
+    """Recompute what save() / signals would have maintained."""
+    from books.models import Book, BookCopy
+    from finance.ledger import rebuild
+    from members.stats import invalidate_member_stats
+    from transactions import search_cache
+    from transactions.counts import invalidate_status_counts
+    from transactions.fine_summary import fine_summary_expressions
+    from transactions.models import Transaction
+
+    def copies(**filters):
+        return Coalesce(Subquery(
+            BookCopy.objects.filter(book=OuterRef("pk"), **filters).order_by()
+            .values("book").annotate(n=Count("pk")).values("n"),
+            output_field=IntegerField(),
+        ), 0)
+
+    Book.objects.filter(owner=library.user).update(
+        total_copies=copies(), available_copies=copies(status=BookCopy.Status.AVAILABLE),
+    )
+    Transaction.objects.filter(library=library).update(**fine_summary_expressions())
+    rebuild(library)
+
+    invalidate_status_counts(library.pk)
+    invalidate_member_stats(library.user_id)
+    search_cache.bump_version(library.pk)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Many libraries
+# ─────────────────────────────────────────────────────────────────────────────
+
+def synthetic_libraries():
+    """
+    Libraries created by generate_library(), recognised by every marker it
+    sets — a real account that merely shares the username prefix is not
+    matched.
+    """
+    from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+    from django.db.models import F, Value
+    from django.db.models.functions import Concat
+
+    from accounts.models import Library
+
+    return (
+        Library.objects
+        .filter(
+            user__username__startswith="synthetic_",
+            user__password__startswith=UNUSABLE_PASSWORD_PREFIX,
+            user__email=Concat(F("user__username"), Value("@example.org")),
+            institute_email=Concat(F("user__username"), Value("@example.org")),
+            library_name__regex=r"^9[0-9A-Z]{2} Synthetic Library [0-9]+$",
+        )
+        .select_related("user")
+        .order_by("pk")
+    )
+
+
+def generate(n_libraries: int, sizes: Sizes, seed: int = 0, progress=None) -> list:
+    """
+    *n_libraries* synthetic libraries; [(library, counts), …].
+    The same *seed* and sizes give the same data.
+    """
+    results = []
+    for index in range(1, n_libraries + 1):
+        library, counts = generate_library(index, sizes, random.Random(f"{seed}:{index}"))
+        results.append((library, counts))
+        if progress:
+            progress(library, counts)
+    return results
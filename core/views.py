@@ -309,4 +309,28 @@ def privacy(request):
 
 
 def terms(request):
-    return render(request, 'core/terms.html')
\ No newline at end of file
+    return render(request, 'core/terms.html')
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics — Prometheus text exposition of the hot-path spans (core/metrics.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def metrics(request):
+    import hmac
+
+    from django.http import HttpResponse, HttpResponseForbidden
+
+    from . import metrics as _metrics
+
+    if _metrics.METRICS_TOKEN:
+        supplied = request.META.get("HTTP_AUTHORIZATION", "").removeprefix("Bearer ").strip()
+        allowed  = hmac.compare_digest(supplied.encode(), _metrics.METRICS_TOKEN.encode())
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden("Metrics require a staff account or the metrics token.")
+
+    return HttpResponse(
+        _metrics.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
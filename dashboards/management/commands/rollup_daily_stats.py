@@ -0,0 +1,37 @@
+"""
+dashboards/management/commands/rollup_daily_stats.py
+────────────────────────────────────────────────────
+Refresh the LibraryDailyStats KPI rollup outside the fine-sync daemon —
+e.g. from cron, or to rebuild history after a data import.
+
+    python manage.py rollup_daily_stats                # incremental, all libraries
+    python manage.py rollup_daily_stats --library 3 --full
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboards.rollup import rollup_library
+
+
+class Command(BaseCommand):
+    help = "Incrementally refresh the per-library daily KPI rollup."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, help="Only roll up this Library pk.")
+        parser.add_argument("--full", action="store_true", help="Rebuild from the first recorded activity.")
+
+    def handle(self, *args, **options):
+        from accounts.models import Library
+
+        libraries = Library.objects.select_related("user").order_by("pk")
+        if options["library"]:
+            libraries = libraries.filter(pk=options["library"])
+            if not libraries.exists():
+                raise CommandError(f"Library {options['library']} does not exist.")
+
+        total = 0
+        for library in libraries:
+            rows = rollup_library(library, full=options["full"])
+            total += rows
+            self.stdout.write(f"  library {library.pk}: {rows} day(s) rolled up")
+        self.stdout.write(self.style.SUCCESS(f"Done — {total} row(s) written."))
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:17
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_membersettings_member_id_format'),
+        ('dashboards', '0002_delete_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('issues', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('new_members', models.PositiveIntegerField(default=0)),
+                ('new_books', models.PositiveIntegerField(default=0)),
+                ('fines_raised', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('fines_paid', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('total_books', models.PositiveIntegerField(default=0)),
+                ('active_members', models.PositiveIntegerField(default=0)),
+                ('active_loans', models.PositiveIntegerField(default=0)),
+                ('overdue_loans', models.PositiveIntegerField(default=0)),
+                ('member_status_counts', models.JSONField(blank=True, default=dict)),
+                ('department_counts', models.JSONField(blank=True, default=list)),
+                ('category_counts', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('library', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='accounts.library')),
+            ],
+            options={
+                'verbose_name': 'Library daily stats',
+                'verbose_name_plural': 'Library daily stats',
+                'ordering': ['library', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('library', 'date'), name='uniq_library_daily_stats')],
+            },
+        ),
+    ]
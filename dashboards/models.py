@@ -0,0 +1,56 @@
+"""
+dashboards/models.py
+────────────────────
+LibraryDailyStats — one precomputed KPI row per library per day.
+
+Filled incrementally by dashboards/rollup.py (fine-sync cycle or the
+`rollup_daily_stats` command); read by both admin dashboards so their
+cost does not grow with the library's history.
+"""
+
+from decimal import Decimal
+
+from django.db import models
+
+
+class LibraryDailyStats(models.Model):
+
+    library = models.ForeignKey(
+        "accounts.Library",
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    date = models.DateField()
+
+    # ── Flows: events that happened on `date` ─────────────────────────────
+    issues       = models.PositiveIntegerField(default=0)
+    returns      = models.PositiveIntegerField(default=0)
+    new_members  = models.PositiveIntegerField(default=0)
+    new_books    = models.PositiveIntegerField(default=0)
+    fines_raised = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    fines_paid   = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    # ── Gauges: library state as of the last rollup of `date` ─────────────
+    total_books    = models.PositiveIntegerField(default=0)
+    active_members = models.PositiveIntegerField(default=0)
+    active_loans   = models.PositiveIntegerField(default=0)
+    overdue_loans  = models.PositiveIntegerField(default=0)
+
+    # {"active": n, "passout": n, "inactive": n}
+    member_status_counts = models.JSONField(default=dict, blank=True)
+    # [[label, count], …] — largest first
+    department_counts    = models.JSONField(default=list, blank=True)
+    category_counts      = models.JSONField(default=list, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering            = ["library", "date"]
+        verbose_name        = "Library daily stats"
+        verbose_name_plural = "Library daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=["library", "date"], name="uniq_library_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.library_id} @ {self.date}"
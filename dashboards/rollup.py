@@ -0,0 +1,327 @@
+"""
+dashboards/rollup.py
+────────────────────
+Incremental daily KPI rollup (LibraryDailyStats) and the dashboard reader.
+
+Writing
+───────
+rollup_range(library, start, end) recomputes the per-day flows for
+[start, end] with one GROUP BY query per metric — the cost depends on
+the window, not the history.  The row for *today* also gets the gauges
+(book total, member status split, department / category breakdowns).
+
+rollup_library(library) is the incremental step: it re-rolls the last
+KPI_ROLLUP_LOOKBACK_DAYS before the newest stored row (late returns,
+back-dated payments) up to today, or backfills everything on first run.
+
+Scheduled from the fine-sync daemon via rollup_if_due() every
+KPI_ROLLUP_INTERVAL seconds per library; `manage.py rollup_daily_stats`
+does the same from cron or for a full rebuild.
+
+Reading
+───────
+kpi_context(library) builds the KPI / chart part of the admin dashboard
+context from ~180 rollup rows plus the cached transaction status counts
+and member statistics (members/stats.py).
+
+Settings:
+    KPI_ROLLUP_INTERVAL      = 300   # seconds between rollups per library
+    KPI_ROLLUP_LOOKBACK_DAYS = 2     # days re-rolled behind the newest row
+"""
+
+import json
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import LibraryDailyStats
+
+logger = logging.getLogger("dashboards.rollup")
+
+KPI_ROLLUP_INTERVAL:      int = int(getattr(settings, "KPI_ROLLUP_INTERVAL", 300))
+KPI_ROLLUP_LOOKBACK_DAYS: int = int(getattr(settings, "KPI_ROLLUP_LOOKBACK_DAYS", 2))
+
+FLOW_FIELDS  = ("issues", "returns", "new_members", "new_books", "fines_raised", "fines_paid")
+GAUGE_FIELDS = (
+    "total_books", "active_members", "active_loans", "overdue_loans",
+    "member_status_counts", "department_counts", "category_counts",
+)
+
+# library.pk → time.monotonic() of the last scheduled rollup
+_last_rollup: dict = {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Computation
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _daily_flows(library, start: date, end: date) -> dict:
+    """{date: {flow_field: value}} for every day in [start, end]."""
+    from books.models import Book
+    from finance.models import Fine
+    from members.models import Member
+    from transactions.models import Transaction
+
+    owner = library.user
+    days  = {
+        start + timedelta(days=i): {
+            "issues": 0, "returns": 0, "new_members": 0, "new_books": 0,
+            "fines_raised": Decimal("0.00"), "fines_paid": Decimal("0.00"),
+        }
+        for i in range((end - start).days + 1)
+    }
+
+    txns = Transaction.objects.for_library(library).order_by()
+    grouped = (
+        ("issues", "n", txns.filter(issue_date__range=(start, end))
+            .values(day=F("issue_date")).annotate(n=Count("id"))),
+        ("returns", "n", txns.filter(return_date__range=(start, end))
+            .values(day=F("return_date")).annotate(n=Count("id"))),
+        ("new_members", "n", Member.objects.filter(owner=owner).order_by()
+            .annotate(day=TruncDate("date_joined")).filter(day__range=(start, end))
+            .values("day").annotate(n=Count("id"))),
+        ("new_books", "n", Book.objects.filter(owner=owner).order_by()
+            .annotate(day=TruncDate("created_at")).filter(day__range=(start, end))
+            .values("day").annotate(n=Count("id"))),
+        ("fines_raised", "t", Fine.objects.for_library(library).order_by()
+            .annotate(day=TruncDate("created_at")).filter(day__range=(start, end))
+            .values("day").annotate(t=Sum("amount"))),
+        ("fines_paid", "t", Fine.objects.for_library(library).order_by()
+            .filter(status=Fine.STATUS_PAID, paid_date__range=(start, end))
+            .values(day=F("paid_date")).annotate(t=Sum("amount"))),
+    )
+    for field, key, qs in grouped:
+        for row in qs:
+            if row["day"] in days:
+                value = row[key] or 0
+                if field.startswith("fines_"):
+                    value = Decimal(value).quantize(Decimal("0.01"))
+                days[row["day"]][field] = value
+    return days
+
+
+def _gauges(library) -> dict:
+    """Point-in-time library state, stored on today's row."""
+    from books.models import Book, Category
+    from members.stats import get_member_stats
+    from transactions.counts import compute_status_counts
+
+    owner   = library.user
+    members = get_member_stats(owner)
+    status  = {s: n for s, n in members["status_counts"].items() if n}
+    categories = (
+        Category.objects.filter(owner=owner)
+        .annotate(n=Count("books")).filter(n__gt=0).order_by("-n")[:8]
+    )
+    counts = compute_status_counts(library)
+    return {
+        "total_books":          Book.objects.filter(owner=owner).count(),
+        "active_members":       status.get("active", 0),
+        "active_loans":         counts["issued_count"] + counts["overdue_count"],
+        "overdue_loans":        counts["overdue_count"],
+        "member_status_counts": status,
+        "department_counts":    [[d["name"], d["count"]] for d in members["departments"]],
+        "category_counts":      [[c.name, c.n] for c in categories],
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing
+# ─────────────────────────────────────────────────────────────────────────────
+
+def rollup_range(library, start: date, end: date, today: date = None) -> int:
+    """Recompute rows for [start, end]; returns the number of rows written."""
+    today = today or date.today()
+    end   = min(end, today)
+    if start > end:
+        return 0
+
+    flows  = _daily_flows(library, start, end)
+    gauges = _gauges(library) if end == today else None
+
+    now = timezone.now()
+    with db_transaction.atomic():
+        existing = {
+            row.date: row
+            for row in LibraryDailyStats.objects
+                .select_for_update()
+                .filter(library=library, date__range=(start, end))
+        }
+        to_create, to_update = [], []
+        for day, values in flows.items():
+            row = existing.get(day) or LibraryDailyStats(library=library, date=day)
+            for field, value in values.items():
+                setattr(row, field, value)
+            if gauges and day == today:
+                for field, value in gauges.items():
+                    setattr(row, field, value)
+            row.updated_at = now
+            (to_update if row.pk else to_create).append(row)
+
+        if to_create:
+            # A concurrent rollup may have inserted the same day; its values
+            # are equally fresh, so keep whichever row landed first.
+            LibraryDailyStats.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+        if to_update:
+            fields = list(FLOW_FIELDS) + (list(GAUGE_FIELDS) if gauges else [])
+            LibraryDailyStats.objects.bulk_update(to_update, fields + ["updated_at"], batch_size=500)
+    return len(flows)
+
+
+def _first_activity_date(library, today: date) -> date:
+    from books.models import Book
+    from finance.models import Fine
+    from members.models import Member
+    from transactions.models import Transaction
+
+    owner = library.user
+    candidates = [
+        Transaction.objects.for_library(library).aggregate(d=Min("issue_date"))["d"],
+        Member.objects.filter(owner=owner).aggregate(d=Min(TruncDate("date_joined")))["d"],
+        Book.objects.filter(owner=owner).aggregate(d=Min(TruncDate("created_at")))["d"],
+        Fine.objects.for_library(library).aggregate(d=Min(TruncDate("created_at")))["d"],
+    ]
+    return min([d for d in candidates if d] or [today])
+
+
+def rollup_library(library, today: date = None, full: bool = False) -> int:
+    """Incremental rollup up to today; full=True rebuilds from the first activity."""
+    today  = today or date.today()
+    newest = None
+    if not full:
+        newest = LibraryDailyStats.objects.filter(library=library).aggregate(d=Max("date"))["d"]
+    if newest is None:
+        start = _first_activity_date(library, today)
+    else:
+        start = min(newest, today) - timedelta(days=KPI_ROLLUP_LOOKBACK_DAYS)
+    return rollup_range(library, start, today, today=today)
+
+
+def rollup_if_due(library) -> int:
+    """Throttled rollup_library() for the fine-sync cycle."""
+    now  = time.monotonic()
+    last = _last_rollup.get(library.pk)
+    if last is not None and now - last < KPI_ROLLUP_INTERVAL:
+        return 0
+    _last_rollup[library.pk] = now
+    try:
+        return rollup_library(library)
+    except Exception as exc:
+        _last_rollup.pop(library.pk, None)
+        logger.warning("kpi rollup failed for library %s: %s", library.pk, exc)
+        return 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _first_of_month(ref_date, months_back=0):
+    m, y = ref_date.month - months_back, ref_date.year
+    while m <= 0:
+        m += 12
+        y -= 1
+    return date(y, m, 1)
+
+
+def _first_of_next_month(d):
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+def kpi_context(library, today: date = None) -> dict:
+    """
+    KPI cards + chart data for the admin dashboards, read from the rollup.
+    Falls back to rolling up the visible window inline when today's row
+    hasn't been written yet (fresh install, scheduler not running).
+    """
+    from members.stats import get_member_stats, status_summary
+    from transactions.counts import get_status_counts
+
+    today            = today or date.today()
+    window_start     = _first_of_month(today, months_back=5)
+    this_month_start = _first_of_month(today, months_back=0)
+    last_month_start = _first_of_month(today, months_back=1)
+
+    rows = {
+        r.date: r
+        for r in LibraryDailyStats.objects.filter(
+            library=library, date__range=(window_start, today),
+        )
+    }
+    if today not in rows:
+        rollup_range(library, window_start, today, today=today)
+        rows = {
+            r.date: r
+            for r in LibraryDailyStats.objects.filter(
+                library=library, date__range=(window_start, today),
+            )
+        }
+    latest = rows[today]
+
+    def _total(field, start, end):
+        return sum(getattr(r, field) for d, r in rows.items() if start <= d <= end)
+
+    last_month_end = this_month_start - timedelta(days=1)
+
+    def _change(field):
+        return (
+            _total(field, this_month_start, today)
+            - _total(field, last_month_start, last_month_end)
+        )
+
+    # ── Member status breakdown — live, from the cached member stats ──
+    member_stats = get_member_stats(library.user)
+    stats        = status_summary(member_stats)
+
+    # ── Chart 1: Monthly Loans (last 6 months) ────────────────
+    loan_labels, loan_data = [], []
+    for i in range(5, -1, -1):
+        ms = _first_of_month(today, months_back=i)
+        me = _first_of_next_month(ms) - timedelta(days=1)
+        loan_labels.append(ms.strftime("%b %Y"))
+        loan_data.append(_total("issues", ms, me))
+    loans_have_data = any(v > 0 for v in loan_data)
+
+    # ── Chart 2: Books by Category ────────────────────────────
+    cat_labels = [name for name, _ in latest.category_counts]
+    cat_data   = [n for _, n in latest.category_counts]
+
+    # ── Chart 3: New Members per day (last 7 days) ────────────
+    day_labels, day_data = [], []
+    for i in range(6, -1, -1):
+        d = today - timedelta(days=i)
+        day_labels.append(d.strftime("%a"))
+        day_data.append(rows[d].new_members if d in rows else 0)
+    members_chart_have_data = any(v > 0 for v in day_data)
+
+    # ── Chart 4: Members by Department ───────────────────────
+    dept_labels = [d["name"] for d in member_stats["departments"]]
+    dept_data   = [d["count"] for d in member_stats["departments"]]
+
+    counts = get_status_counts(library)
+
+    return {
+        "total_books":         latest.total_books,
+        "books_change":        _change("new_books"),
+        "total_members":       stats["active_count"],
+        "members_change":      _change("new_members"),
+        "active_transactions": counts["issued_count"] + counts["overdue_count"],
+        "transactions_change": _change("issues"),
+        "stats":               stats,
+        "monthly_loan_labels": json.dumps(loan_labels) if loans_have_data         else "",
+        "monthly_loan_data":   json.dumps(loan_data)   if loans_have_data         else "",
+        "category_labels":     json.dumps(cat_labels)  if cat_labels              else "",
+        "category_data":       json.dumps(cat_data)    if cat_labels              else "",
+        "member_day_labels":   json.dumps(day_labels)  if members_chart_have_data else "",
+        "member_day_data":     json.dumps(day_data)    if members_chart_have_data else "",
+        "department_labels":   json.dumps(dept_labels),
+        "department_data":     json.dumps(dept_data),
+        "notification_count":  counts["overdue_count"],
+    }
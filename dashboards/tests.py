@@ -1,3 +1,56 @@
+"""
+dashboards/tests.py
+
+Run with:
+    python manage.py test dashboards
+"""
+
+import json
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from transactions.tests import _make_book, _make_library, _make_member, _make_transaction
+
+
+class DailyRollupTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.library = _make_library()
+        member = _make_member(self.library)
+        book   = _make_book(self.library)
+        today  = date.today()
+        for days_ago in (0, 0, 3, 40):
+            _make_transaction(
+                self.library, member, book,
+                issue_date=today - timedelta(days=days_ago),
+                due_date=today + timedelta(days=14 - days_ago),
+            )
+
+    def test_incremental_rollup(self):
+        from dashboards.models import LibraryDailyStats
+        from dashboards.rollup import KPI_ROLLUP_LOOKBACK_DAYS, rollup_library
+
+        today = date.today()
+        self.assertEqual(rollup_library(self.library), 41)
+        row = LibraryDailyStats.objects.get(library=self.library, date=today)
+        self.assertEqual((row.issues, row.new_members, row.new_books), (2, 1, 1))
+        self.assertEqual(row.total_books, 1)
+        self.assertEqual(row.member_status_counts, {"active": 1})
+
+        # Second run only re-rolls the lookback window.
+        self.assertEqual(rollup_library(self.library), KPI_ROLLUP_LOOKBACK_DAYS + 1)
+
+    def test_dashboard_reads_rollup(self):
+        from accounts.models import LibraryRuleSettings
+        LibraryRuleSettings.objects.update_or_create(
+            library=self.library, defaults={"is_setup_complete": True},
+        )
+        self.client.force_login(self.library.user)
+        resp = self.client.get("/dashboard/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_books"], 1)
+        self.assertEqual(resp.context["active_transactions"], 4)
+        self.assertEqual(sum(json.loads(resp.context["monthly_loan_data"])), 4)
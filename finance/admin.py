@@ -50,19 +50,28 @@ class FineAdmin(admin.ModelAdmin):
 
     actions = ['mark_as_paid', 'mark_as_waived']
 
+    # Both actions go through finance/settlement.py, one library at a time,
+    # so transaction fine totals, the cash book and the caches stay in step.
+
+    def _by_library(self, queryset):
+        from accounts.models import Library
+        for library in Library.objects.filter(pk__in=queryset.values('library_id')):
+            yield library, queryset.filter(library=library)
+
     def mark_as_paid(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.filter(status=Fine.STATUS_UNPAID).update(
-            status=Fine.STATUS_PAID, paid_date=timezone.now().date()
-        )
+        from .settlement import settle_fines
+        collected_by = request.user.get_full_name() or request.user.username
+        updated = 0
+        for library, fines in self._by_library(queryset):
+            unpaid = fines.filter(status=Fine.STATUS_UNPAID).count()
+            if settle_fines(library, fines, method=Payment.METHOD_CASH, collected_by=collected_by):
+                updated += unpaid
         self.message_user(request, f'{updated} fine(s) marked as paid.')
     mark_as_paid.short_description = 'Mark selected fines as paid'
 
     def mark_as_waived(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.filter(status=Fine.STATUS_UNPAID).update(
-            status=Fine.STATUS_WAIVED, paid_date=timezone.now().date()
-        )
+        from .settlement import waive_fines
+        updated = sum(waive_fines(library, fines) for library, fines in self._by_library(queryset))
         self.message_user(request, f'{updated} fine(s) waived.')
     mark_as_waived.short_description = 'Waive selected fines'
 
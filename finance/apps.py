@@ -9,3 +9,25 @@ class FinanceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name               = "finance"
     verbose_name       = "Finance & Payments"
+
+    def ready(self):
+        # Cache invalidation for the finance charts (timeseries.py).
+        from . import signals
+        signals.connect()
+
+        # Webhook inbox consumer — same process rules as the fine-sync
+        # thread in TransactionsConfig.ready().
+        import os
+        import sys
+
+        _mgmt_commands = {"migrate", "makemigrations", "collectstatic", "shell",
+                          "test", "check", "inspectdb", "showmigrations",
+                          "squashmigrations", "flush", "dbshell",
+                          "process_webhook_events", "razorpay_webhook_payload"}
+        if len(sys.argv) > 1 and sys.argv[1] in _mgmt_commands:
+            return
+
+        from transactions.apps import _is_dev_server
+        if os.environ.get("RUN_MAIN") == "true" or not _is_dev_server():
+            from .webhook_inbox import start_consumer
+            start_consumer()
@@ -0,0 +1,87 @@
+# finance/exports.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming CSV exports for Payment querysets.
+#
+#   stream_csv(filename, header, rows)  — StreamingHttpResponse over rows
+#   income_csv_rows(qs)                 — rows for finance:income_list
+#   audit_csv_rows(qs)                  — rows for finance:audit_log
+#
+# Rows are read with .values_list().iterator(), so a million-payment export
+# holds one chunk in memory at a time and never builds model instances.
+# Member / book details come from the denormalised snapshot columns filled
+# in Payment.save() — no join through fine → transaction → member / book.
+#
+# Override the chunk size in settings.py:
+#     FINANCE_EXPORT_CHUNK_SIZE = 2000   # rows per fetch (default: 2000)
+# ─────────────────────────────────────────────────────────────────────────────
+
+import csv
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .models import Payment
+
+FINANCE_EXPORT_CHUNK_SIZE: int = int(getattr(settings, "FINANCE_EXPORT_CHUNK_SIZE", 2000))
+
+_METHOD_LABELS = dict(Payment.METHOD_CHOICES)
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename: str, header: list, rows) -> StreamingHttpResponse:
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _iter_values(qs, *fields):
+    return (
+        qs.order_by("-transaction_date", "-pk")
+        .values_list(*fields)
+        .iterator(chunk_size=FINANCE_EXPORT_CHUNK_SIZE)
+    )
+
+
+INCOME_CSV_HEADER = ["Date", "Receipt", "Member", "Member ID", "Book", "Fine Type", "Method", "Amount"]
+
+
+def income_csv_rows(qs):
+    for ts, receipt, mname, mid, btitle, ftype, method, amount in _iter_values(
+        qs, "transaction_date", "receipt_number", "member_name", "member_id_snapshot",
+        "book_title", "fine_type_snapshot", "method", "amount",
+    ):
+        yield [
+            ts.strftime("%d %b %Y"), receipt, mname, mid, btitle, ftype,
+            _METHOD_LABELS.get(method, method), amount,
+        ]
+
+
+AUDIT_CSV_HEADER = [
+    "Date", "Time", "Receipt/ID", "Member", "Member ID",
+    "Book", "Method", "Collected By", "Status", "Amount",
+]
+
+
+def audit_csv_rows(qs):
+    for ts, receipt, gateway_id, mname, mid, btitle, method, collected_by, status, amount in _iter_values(
+        qs, "transaction_date", "receipt_number", "gateway_payment_id", "member_name",
+        "member_id_snapshot", "book_title", "method", "collected_by", "status", "amount",
+    ):
+        yield [
+            ts.strftime("%d %b %Y"), ts.strftime("%H:%M"), receipt or gateway_id,
+            mname, mid, btitle, _METHOD_LABELS.get(method, method),
+            collected_by, status, amount,
+        ]
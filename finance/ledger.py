@@ -0,0 +1,261 @@
+# finance/ledger.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Materialised cash book: CashBookEntry rows with stored running balances
+# and CashBookCheckpoint rows (monthly opening balance + totals).
+#
+# Writes
+# ──────
+#   record_payment(p)   — SUCCESS payment → credit line; otherwise removed
+#   record_expense(e)   — expense → debit line (kept in sync on edit)
+#   record_removal(lib_pk, d) — rebalance after a source row was deleted
+#   rebalance_from(lib_pk, d) — recompute balances / checkpoints from the
+#                         start of d's month onward
+#   rebuild(library)    — drop and regenerate a library's whole ledger
+#
+# The common case — a payment or expense dated on/after the newest line —
+# is an O(1) append: balance = last balance ± amount, plus one checkpoint
+# upsert.  A back-dated or edited line rebalances only the months from its
+# date onward, starting from the stored balance just before that month.
+# Ledger writes for one library are serialised by locking the Library row.
+#
+# Called from finance/signals.py (post_save / post_delete) and explicitly
+# after bulk Payment .update() paths (Razorpay webhook).
+#
+# Reads
+# ─────
+#   balance_before(library, d)  — opening balance for a date-range view
+#   ledger_totals(library)      — all-time credits / debits / closing
+# ─────────────────────────────────────────────────────────────────────────────
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import CashBookCheckpoint, CashBookEntry, Expense, Payment
+
+_ZERO = Decimal("0.00")
+
+
+def _month(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _lock(library_pk) -> None:
+    from accounts.models import Library
+    list(Library.objects.select_for_update().filter(pk=library_pk).values_list("pk", flat=True))
+
+
+def _last_entry(library_pk, before: date = None):
+    qs = CashBookEntry.objects.filter(library_id=library_pk)
+    if before is not None:
+        qs = qs.filter(entry_date__lt=before)
+    return qs.order_by("-entry_date", "-id").first()
+
+
+def balance_before(library, d: date) -> Decimal:
+    """Running balance at the end of the day before *d*."""
+    last = _last_entry(getattr(library, "pk", library), before=d)
+    return last.running_balance if last else _ZERO
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Source → ledger fields
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _payment_fields(p: Payment) -> dict:
+    return {
+        "entry_date":  timezone.localdate(p.transaction_date),
+        "entry_type":  CashBookEntry.TYPE_CREDIT,
+        "description": f"Fine payment — {p.member_name or ''}".strip(),
+        "ref":         (p.receipt_number or "")[:100],
+        "amount":      p.amount,
+    }
+
+
+def _expense_fields(e: Expense) -> dict:
+    return {
+        "entry_date":  e.date,
+        "entry_type":  CashBookEntry.TYPE_DEBIT,
+        "description": e.description,
+        "ref":         e.get_category_display() if e.category else "",
+        "amount":      e.amount,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writes
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _bump_checkpoint(library_pk, entry: CashBookEntry) -> None:
+    month = _month(entry.entry_date)
+    cp = CashBookCheckpoint.objects.filter(library_id=library_pk, month=month).first()
+    if cp is None:
+        cp = CashBookCheckpoint(
+            library_id=library_pk, month=month,
+            opening_balance=balance_before(library_pk, month),
+        )
+    if entry.entry_type == CashBookEntry.TYPE_CREDIT:
+        cp.credits += entry.amount
+    else:
+        cp.debits += entry.amount
+    cp.save()
+
+
+def _upsert(library_pk, source: dict, fields: dict) -> None:
+    with db_transaction.atomic():
+        _lock(library_pk)
+        entry = CashBookEntry.objects.filter(**source).first()
+
+        if entry is None:
+            last = _last_entry(library_pk)
+            if last is None:
+                # Empty ledger — first write for this library, or history
+                # that predates the ledger.  Build it from the sources.
+                _rebuild(library_pk)
+                return
+            entry = CashBookEntry(library_id=library_pk, **source, **fields)
+            if entry.entry_date >= last.entry_date:
+                # Append at the end of the ledger.
+                entry.running_balance = last.running_balance + entry.signed_amount
+                entry.save()
+                _bump_checkpoint(library_pk, entry)
+                return
+            entry.save()
+            rebalance_from(library_pk, entry.entry_date)
+            return
+
+        old_date = entry.entry_date
+        changed  = [k for k, v in fields.items() if getattr(entry, k) != v]
+        if not changed:
+            return
+        for k in changed:
+            setattr(entry, k, fields[k])
+        entry.save(update_fields=changed)
+        if {"entry_date", "entry_type", "amount"} & set(changed):
+            rebalance_from(library_pk, min(old_date, entry.entry_date))
+
+
+def record_payment(payment: Payment) -> None:
+    if payment.status == Payment.STATUS_SUCCESS:
+        _upsert(payment.library_id, {"payment": payment}, _payment_fields(payment))
+    else:
+        # PENDING / FAILED — or reversed — payments are not cash in hand.
+        entry = CashBookEntry.objects.filter(payment=payment).only("entry_date").first()
+        if entry is not None:
+            with db_transaction.atomic():
+                _lock(payment.library_id)
+                entry.delete()
+                rebalance_from(payment.library_id, entry.entry_date)
+
+
+def record_expense(expense: Expense) -> None:
+    _upsert(expense.library_id, {"expense": expense}, _expense_fields(expense))
+
+
+def record_removal(library_pk, entry_date: date) -> None:
+    """Rebalance after a source row (and its line) was deleted."""
+    with db_transaction.atomic():
+        _lock(library_pk)
+        rebalance_from(library_pk, entry_date)
+
+
+def rebalance_from(library_pk, from_date: date) -> int:
+    """
+    Recompute running balances and checkpoints for every line from the
+    start of *from_date*'s month.  Returns the number of lines rewritten.
+    """
+    start   = _month(from_date)
+    balance = balance_before(library_pk, start)
+
+    checkpoints: dict = {}
+    dirty, rewritten = [], 0
+    lines = (
+        CashBookEntry.objects
+        .filter(library_id=library_pk, entry_date__gte=start)
+        .order_by("entry_date", "id")
+        .only("entry_date", "entry_type", "amount", "running_balance")
+    )
+    for entry in lines.iterator(chunk_size=2000):
+        month = _month(entry.entry_date)
+        cp = checkpoints.get(month)
+        if cp is None:
+            cp = checkpoints[month] = CashBookCheckpoint(
+                library_id=library_pk, month=month, opening_balance=balance,
+            )
+        if entry.entry_type == CashBookEntry.TYPE_CREDIT:
+            cp.credits += entry.amount
+        else:
+            cp.debits += entry.amount
+        balance += entry.signed_amount
+        if entry.running_balance != balance:
+            entry.running_balance = balance
+            dirty.append(entry)
+        if len(dirty) >= 1000:
+            CashBookEntry.objects.bulk_update(dirty, ["running_balance"])
+            rewritten += len(dirty)
+            dirty = []
+    if dirty:
+        CashBookEntry.objects.bulk_update(dirty, ["running_balance"])
+        rewritten += len(dirty)
+
+    CashBookCheckpoint.objects.filter(library_id=library_pk, month__gte=start).delete()
+    CashBookCheckpoint.objects.bulk_create(checkpoints.values())
+    return rewritten
+
+
+def _rebuild(library_pk) -> None:
+    CashBookEntry.objects.filter(library_id=library_pk).delete()
+    payments = Payment.objects.filter(library_id=library_pk, status=Payment.STATUS_SUCCESS).only(
+        "transaction_date", "member_name", "receipt_number", "amount",
+    )
+    expenses = Expense.objects.filter(library_id=library_pk).only(
+        "date", "description", "category", "amount",
+    )
+    CashBookEntry.objects.bulk_create(
+        [CashBookEntry(library_id=library_pk, payment_id=p.pk, **_payment_fields(p))
+         for p in payments.iterator(chunk_size=2000)]
+        + [CashBookEntry(library_id=library_pk, expense_id=e.pk, **_expense_fields(e))
+           for e in expenses.iterator(chunk_size=2000)],
+        batch_size=1000,
+    )
+    rebalance_from(library_pk, date(1, 1, 1))
+
+
+def rebuild(library) -> int:
+    """Regenerate a library's whole ledger from Payment / Expense rows."""
+    with db_transaction.atomic():
+        _lock(library.pk)
+        _rebuild(library.pk)
+    return CashBookEntry.objects.filter(library=library).count()
+
+
+def ensure_ledger(library) -> None:
+    """Backfill a library whose ledger has never been built."""
+    if CashBookEntry.objects.filter(library=library).exists():
+        return
+    if (
+        Payment.objects.filter(library=library, status=Payment.STATUS_SUCCESS).exists()
+        or Expense.objects.filter(library=library).exists()
+    ):
+        rebuild(library)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reads
+# ─────────────────────────────────────────────────────────────────────────────
+
+def ledger_totals(library) -> dict:
+    """All-time totals from the monthly checkpoints."""
+    agg = CashBookCheckpoint.objects.filter(library=library).aggregate(
+        credits=Sum("credits"), debits=Sum("debits"),
+    )
+    credits = agg["credits"] or _ZERO
+    debits  = agg["debits"] or _ZERO
+    return {
+        "total_credits":   credits,
+        "total_debits":    debits,
+        "closing_balance": credits - debits,
+    }
@@ -0,0 +1,117 @@
+# finance/management/commands/bench_finance_exports.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Benchmark income_list paging, audit_log search and the streamed CSV
+# exports against a large synthetic payment history.
+#
+#     python manage.py bench_finance_exports --library 3                # 1M rows
+#     python manage.py bench_finance_exports --library 3 --payments 200000
+#
+# The synthetic payments are bulk-inserted inside a transaction that is
+# rolled back at the end, so the database is left exactly as it was.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from finance.exports import audit_csv_rows, income_csv_rows
+from finance.models import Payment
+from finance.search import build_search_document, search_payments
+from transactions.pagination import encode_cursor, keyset_page
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time income_list keyset vs OFFSET pages, audit_log search and the streamed CSV exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, required=True, help="Library pk to attach the rows to.")
+        parser.add_argument("--payments", type=int, default=1_000_000, help="Synthetic payments (default: 1M).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        from accounts.models import Library
+
+        library = Library.objects.filter(pk=options["library"]).first()
+        if library is None:
+            raise CommandError(f"Library {options['library']} does not exist.")
+
+        try:
+            with db_transaction.atomic():
+                self._seed(library, options["payments"], options["batch_size"])
+                self._run(library)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Synthetic rows rolled back.")
+
+    def _seed(self, library, n, batch_size):
+        started = time.perf_counter()
+        now     = timezone.now()
+        methods = [Payment.METHOD_CASH, Payment.METHOD_UPI, Payment.METHOD_ONLINE]
+        for offset in range(0, n, batch_size):
+            batch = [
+                Payment(
+                    library=library,
+                    amount=Decimal(5 + i % 50),
+                    method=methods[i % 3],
+                    status=Payment.STATUS_SUCCESS if i % 10 else Payment.STATUS_FAILED,
+                    transaction_date=now - timedelta(minutes=i),
+                    receipt_number=f"BENCH-{i:08d}",
+                    member_name=f"Member {i % 5000}",
+                    member_id_snapshot=f"M{i % 5000:05d}",
+                    book_title=f"Book {i % 20000}",
+                    fine_type_snapshot="late",
+                    library_name=library.library_name,
+                )
+                for i in range(offset, min(offset + batch_size, n))
+            ]
+            for p in batch:  # bulk_create skips save()
+                p.search_document = build_search_document(p)
+            Payment.objects.bulk_create(batch, batch_size=batch_size)
+        self._report(f"seed {n} payments", started)
+
+    def _run(self, library):
+        qs = Payment.objects.filter(library=library, status=Payment.STATUS_SUCCESS)
+        ordered = qs.order_by("-transaction_date", "-pk")
+        deep = max(qs.count() - 50, 0)
+
+        started = time.perf_counter()
+        list(ordered[:50])
+        self._report("first page", started)
+
+        started = time.perf_counter()
+        list(ordered[deep:deep + 50])
+        self._report(f"OFFSET page at row {deep}", started)
+
+        cursor = encode_cursor(ordered[deep], "transaction_date") if deep else ""
+        started = time.perf_counter()
+        keyset_page(qs, cursor, 50, field="transaction_date")
+        self._report(f"keyset page at row {deep}", started)
+
+        audit = Payment.objects.filter(library=library).order_by("-transaction_date", "-pk")
+        for term in ("BENCH-00049999", "member 4242", "book 1999"):
+            started = time.perf_counter()
+            list(search_payments(audit, term)[:50])
+            self._report(f"audit search {term!r}", started)
+
+        for label, rows in (
+            ("income CSV", income_csv_rows(qs)),
+            ("audit CSV", audit_csv_rows(Payment.objects.filter(library=library))),
+        ):
+            tracemalloc.start()
+            started = time.perf_counter()
+            count = sum(1 for _ in rows)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._report(f"{label}: {count} rows, peak {peak / 1_048_576:.1f} MiB", started)
+
+    def _report(self, label, started):
+        self.stdout.write(f"  {label:<48} {time.perf_counter() - started:8.3f}s")
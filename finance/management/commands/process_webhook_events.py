@@ -0,0 +1,40 @@
+# finance/management/commands/process_webhook_events.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Drain the gateway webhook inbox (webhook_inbox.py) once — for deployments
+# that run the consumer as a cron job / separate worker instead of the
+# in-process thread, or to push stuck events through by hand.
+#
+#     python manage.py process_webhook_events
+#     python manage.py process_webhook_events --batch-size 500
+#     python manage.py process_webhook_events --retry-failed
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from finance.models import WebhookEvent
+from finance.webhook_inbox import drain
+
+
+class Command(BaseCommand):
+    help = "Process every due event in the webhook inbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Events per batch (default WEBHOOK_BATCH_SIZE).")
+        parser.add_argument("--retry-failed", action="store_true",
+                            help="Re-queue FAILED events before draining.")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            requeued = WebhookEvent.objects.filter(status=WebhookEvent.STATUS_FAILED).update(
+                status=WebhookEvent.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now(),
+            )
+            self.stdout.write(f"  re-queued {requeued} failed event(s)")
+
+        claimed = drain(options["batch_size"])
+        left    = WebhookEvent.objects.filter(status=WebhookEvent.STATUS_PENDING).count()
+        failed  = WebhookEvent.objects.filter(status=WebhookEvent.STATUS_FAILED).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done — {claimed} event(s) processed; {left} awaiting retry, {failed} failed."
+        ))
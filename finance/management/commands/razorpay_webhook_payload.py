@@ -0,0 +1,61 @@
+# finance/management/commands/razorpay_webhook_payload.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Print a signed "payment.captured" delivery for local testing of
+# razorpay_webhook, as a ready-to-run curl command.  The signature uses the
+# library's configured webhook_secret unless --secret is given.
+#
+#     python manage.py razorpay_webhook_payload --library 3 --payment-id pay_X
+#     python manage.py razorpay_webhook_payload --library 3 --payment-id pay_X \
+#         --fine-id FIN-0001 --amount 50 --url http://localhost:8000
+# ─────────────────────────────────────────────────────────────────────────────
+
+import shlex
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from finance.webhook_inbox import sign_payload
+
+
+class Command(BaseCommand):
+    help = "Print a signed Razorpay webhook delivery (curl) for local testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, required=True, help="Library pk.")
+        parser.add_argument("--payment-id", required=True, help="Gateway payment ID (pay_…).")
+        parser.add_argument("--fine-id", default="", help="Fine ID to put in the payment notes.")
+        parser.add_argument("--order-id", default="", help="Gateway order ID (order_…).")
+        parser.add_argument("--amount", type=Decimal, default=Decimal("0"), help="Amount in rupees.")
+        parser.add_argument("--event-id", default="", help="Reuse an event ID to test de-duplication.")
+        parser.add_argument("--secret", default=None, help="Override the configured webhook secret.")
+        parser.add_argument("--url", default="http://localhost:8000", help="Server base URL.")
+
+    def handle(self, *args, **options):
+        from accounts.models import Library
+
+        try:
+            library = Library.objects.get(pk=options["library"])
+        except Library.DoesNotExist:
+            raise CommandError(f"Library {options['library']} does not exist.")
+
+        secret = options["secret"]
+        if secret is None:
+            ps = getattr(library, "payment_settings", None)
+            secret = ps.webhook_secret if ps else ""
+
+        body, headers = sign_payload(
+            secret,
+            options["payment_id"],
+            amount_paise = int(options["amount"] * 100),
+            fine_id      = options["fine_id"],
+            order_id     = options["order_id"],
+            event_id     = options["event_id"],
+        )
+        url = options["url"].rstrip("/") + reverse("finance:razorpay_webhook", args=[library.pk])
+
+        parts = ["curl", "-X", "POST", url, "-H", "Content-Type: application/json"]
+        for name, value in headers.items():
+            parts += ["-H", f"{name}: {value}"]
+        parts += ["--data-raw", body.decode()]
+        self.stdout.write(" ".join(shlex.quote(p) for p in parts))
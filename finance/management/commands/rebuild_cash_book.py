@@ -0,0 +1,35 @@
+# finance/management/commands/rebuild_cash_book.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Regenerate the materialised cash book (CashBookEntry / CashBookCheckpoint)
+# from Payment and Expense rows — e.g. after a data import or a raw SQL fix.
+#
+#     python manage.py rebuild_cash_book                # all libraries
+#     python manage.py rebuild_cash_book --library 3
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.ledger import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cash book ledger and its monthly checkpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, help="Only rebuild this Library pk.")
+
+    def handle(self, *args, **options):
+        from accounts.models import Library
+
+        libraries = Library.objects.order_by("pk")
+        if options["library"]:
+            libraries = libraries.filter(pk=options["library"])
+            if not libraries.exists():
+                raise CommandError(f"Library {options['library']} does not exist.")
+
+        total = 0
+        for library in libraries:
+            lines = rebuild(library)
+            total += lines
+            self.stdout.write(f"  library {library.pk}: {lines} line(s)")
+        self.stdout.write(self.style.SUCCESS(f"Done — {total} ledger line(s) written."))
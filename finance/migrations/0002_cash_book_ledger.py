@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:25
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_membersettings_member_id_format'),
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashBookCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('debits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('library', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cash_book_checkpoints', to='accounts.library')),
+            ],
+            options={
+                'ordering': ['month'],
+                'constraints': [models.UniqueConstraint(fields=('library', 'month'), name='uniq_cashbook_checkpoint')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CashBookEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_date', models.DateField()),
+                ('entry_type', models.CharField(choices=[('credit', 'Credit'), ('debit', 'Debit')], max_length=6)),
+                ('description', models.CharField(blank=True, max_length=500)),
+                ('ref', models.CharField(blank=True, max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('running_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('expense', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cash_book_entry', to='finance.expense')),
+                ('library', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cash_book_entries', to='accounts.library')),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cash_book_entry', to='finance.payment')),
+            ],
+            options={
+                'ordering': ['entry_date', 'id'],
+                'indexes': [models.Index(fields=['library', 'entry_date', 'id'], name='cashbook_lib_date_id_idx')],
+            },
+        ),
+    ]
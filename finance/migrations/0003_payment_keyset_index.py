@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_cash_book_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['library', 'status', 'transaction_date'], name='finance_pay_library_d780b5_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:30
+
+import finance.search
+from django.db import migrations
+
+from finance.search import build_search_document
+
+
+def backfill_search_document(apps, schema_editor):
+    Payment = apps.get_model('finance', 'Payment')
+    batch = []
+    qs = Payment.objects.select_related('fine__transaction__member', 'fine__transaction__book')
+    for payment in qs.iterator(chunk_size=2000):
+        payment.search_document = build_search_document(payment)
+        batch.append(payment)
+        if len(batch) >= 2000:
+            Payment.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Payment.objects.bulk_update(batch, ['search_document'])
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX finance_payment_search_ft ON finance_payment (search_document)'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX finance_payment_search_ft ON finance_payment "
+            "USING gin (to_tsvector('simple', search_document))"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('DROP INDEX finance_payment_search_ft ON finance_payment')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS finance_payment_search_ft')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_payment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='search_document',
+            field=finance.search.SearchDocumentField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_webhook_event_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='signature_verified',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -8,6 +8,9 @@
 #   Payment         – A payment record that settles one or more fines
 #   Expense         – An operational expenditure recorded by staff
 #   PaymentSettings – Per-library Razorpay gateway credentials
+#   CashBookEntry   – Materialised cash-book line with running balance
+#   CashBookCheckpoint – Monthly opening balance + totals for the cash book
+#   WebhookEvent    – Inbox row for one gateway webhook delivery
 #
 # Conventions
 # ───────────
@@ -15,8 +18,10 @@
 #   • Every model stores a `library` FK so data is always tenant-scoped.
 #   • "Snapshot" fields (member_name, book_title, …) are denormalised copies
 #     that survive even if the related objects are later deleted.
-#   • BinaryField is *not* used here; the accounts `Library` model owns the
-#     logo BinaryField.  Views read it from `request.user.library`.
+#   • Payment.search_document is derived in save() (see search.py) — code
+#     that bulk-writes payments must fill it via build_search_document().
+#   • No image data is stored here; the library logo lives in the core
+#     image store (Library.library_logo_hash, served by library_logo).
 # ─────────────────────────────────────────────────────────────────────────────
 
 import uuid
@@ -29,6 +34,8 @@ from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
+from .search import SEARCH_SOURCE_FIELDS, SearchDocumentField, build_search_document
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
@@ -296,6 +303,17 @@ class Fine(models.Model):
     def is_paid(self) -> bool:
         return self.status == self.STATUS_PAID
 
+    def mark_paid(self, method: str = "", ref: str = "", paid_date=None) -> None:
+        """
+        Settle this fine in full.  Goes through save() so the post_save
+        receiver refreshes the transaction's fine totals.
+        """
+        self.status         = self.STATUS_PAID
+        self.paid_date      = paid_date or date.today()
+        self.payment_method = method or self.payment_method
+        self.payment_ref    = ref or self.payment_ref
+        self.save(update_fields=["status", "paid_date", "payment_method", "payment_ref", "updated_at"])
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Payment
@@ -381,6 +399,11 @@ class Payment(models.Model):
     fine_amount_snapshot    = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     library_name            = models.CharField(max_length=255, blank=True)
 
+    # ── Search ────────────────────────────────────────────────────────────────
+    # Normalised receipt / gateway IDs / collector / member / book text,
+    # rebuilt on save — audit_log ?q= filters on this one column.
+    search_document = SearchDocumentField(blank=True, default="", editable=False)
+
     # ── Timestamps ────────────────────────────────────────────────────────────
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -390,6 +413,8 @@ class Payment(models.Model):
         indexes  = [
             models.Index(fields=["library", "status"]),
             models.Index(fields=["library", "transaction_date"]),
+            # income_list keyset pages: status = success, newest first
+            models.Index(fields=["library", "status", "transaction_date"]),
             models.Index(fields=["receipt_number"]),
             models.Index(fields=["gateway_payment_id"]),
         ]
@@ -417,6 +442,13 @@ class Payment(models.Model):
             except Exception:
                 pass
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.search_document = build_search_document(self)
+        elif SEARCH_SOURCE_FIELDS.intersection(update_fields):
+            self.search_document = build_search_document(self)
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+
         super().save(*args, **kwargs)
 
     def mark_success(self, gateway_payment_id: str = "") -> None:
@@ -427,30 +459,14 @@ class Payment(models.Model):
         if self.status == self.STATUS_SUCCESS:
             return  # already done — idempotent
 
+        from .settlement import settle_pending_payments
+        settle_pending_payments(
+            self.library_id, payment_ids=[self.pk], gateway_payment_id=gateway_payment_id,
+        )
+        self.status = self.STATUS_SUCCESS
         if gateway_payment_id:
             self.gateway_payment_id = gateway_payment_id
 
-        self.status = self.STATUS_SUCCESS
-        self.save(update_fields=["status", "gateway_payment_id", "updated_at"])
-
-        # Mark the fine paid
-        if self.fine_id:
-            Fine.objects.filter(pk=self.fine_id, status=Fine.STATUS_UNPAID).update(
-                status         = Fine.STATUS_PAID,
-                paid_date      = date.today(),
-                payment_method = self.method,
-                payment_ref    = self.receipt_number or self.gateway_payment_id,
-            )
-            # Also keep the transaction's fine_paid flag in sync
-            try:
-                txn = self.fine.transaction
-                if txn:
-                    txn.fine_paid      = True
-                    txn.fine_paid_date = date.today()
-                    txn.save(update_fields=["fine_paid", "fine_paid_date"])
-            except Exception:
-                pass
-
     def mark_failed(self) -> None:
         """Transition this payment to FAILED."""
         self.status = self.STATUS_FAILED
@@ -602,4 +618,150 @@ class PaymentSettings(models.Model):
 
     def __str__(self):
         configured = "✓ configured" if self.is_configured() else "✗ not configured"
-        return f"PaymentSettings [{self.library}] — {configured}"
\ No newline at end of file
+        return f"PaymentSettings [{self.library}] — {configured}"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cash Book ledger (materialised — maintained by finance/ledger.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class CashBookEntry(models.Model):
+    """
+    One ledger line per successful Payment (credit) or Expense (debit),
+    with the library's running balance after this line stored on the row.
+
+    Ledger order is (entry_date, id).  Never written directly by views —
+    see finance/ledger.py.
+    """
+
+    TYPE_CREDIT = "credit"
+    TYPE_DEBIT  = "debit"
+
+    TYPE_CHOICES = [
+        (TYPE_CREDIT, "Credit"),
+        (TYPE_DEBIT,  "Debit"),
+    ]
+
+    library = models.ForeignKey(
+        "accounts.Library",
+        on_delete=models.CASCADE,
+        related_name="cash_book_entries",
+    )
+    payment = models.OneToOneField(
+        Payment, on_delete=models.CASCADE, null=True, blank=True, related_name="cash_book_entry",
+    )
+    expense = models.OneToOneField(
+        Expense, on_delete=models.CASCADE, null=True, blank=True, related_name="cash_book_entry",
+    )
+
+    entry_date  = models.DateField()
+    entry_type  = models.CharField(max_length=6, choices=TYPE_CHOICES)
+    description = models.CharField(max_length=500, blank=True)
+    ref         = models.CharField(max_length=100, blank=True)
+    amount      = models.DecimalField(max_digits=10, decimal_places=2)
+
+    running_balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["entry_date", "id"]
+        indexes  = [
+            models.Index(fields=["library", "entry_date", "id"], name="cashbook_lib_date_id_idx"),
+        ]
+
+    @property
+    def signed_amount(self) -> Decimal:
+        return self.amount if self.entry_type == self.TYPE_CREDIT else -self.amount
+
+    def __str__(self):
+        return f"{self.entry_date} {self.entry_type} ₹{self.amount} → ₹{self.running_balance}"
+
+
+class CashBookCheckpoint(models.Model):
+    """
+    Monthly opening balance + credit / debit totals for one library.
+    Lets a rebalance start at a month boundary and gives all-time totals
+    from ~12 rows per year instead of a scan of the ledger.
+    """
+
+    library = models.ForeignKey(
+        "accounts.Library",
+        on_delete=models.CASCADE,
+        related_name="cash_book_checkpoints",
+    )
+    month           = models.DateField(help_text="First day of the month.")
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credits         = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    debits          = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering    = ["month"]
+        constraints = [
+            models.UniqueConstraint(fields=["library", "month"], name="uniq_cashbook_checkpoint"),
+        ]
+
+    @property
+    def closing_balance(self) -> Decimal:
+        return self.opening_balance + self.credits - self.debits
+
+    def __str__(self):
+        return f"{self.library_id} {self.month:%b %Y} open ₹{self.opening_balance}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Webhook inbox
+# ─────────────────────────────────────────────────────────────────────────────
+
+class WebhookEvent(models.Model):
+    """
+    One gateway webhook delivery, stored before any processing happens.
+
+    The webhook view only inserts (duplicates of the same event_id are
+    ignored) and acknowledges; finance/webhook_inbox.py consumes pending
+    rows in batches and retries failures with backoff.  The payload is
+    never rewritten — only the processing columns change.
+    """
+
+    PROVIDER_RAZORPAY = "razorpay"
+
+    STATUS_PENDING   = "pending"
+    STATUS_PROCESSED = "processed"
+    STATUS_FAILED    = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING,   "Pending"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_FAILED,    "Failed"),
+    ]
+
+    library = models.ForeignKey(
+        "accounts.Library",
+        on_delete=models.CASCADE,
+        related_name="webhook_events",
+    )
+    provider   = models.CharField(max_length=20, default=PROVIDER_RAZORPAY)
+    event_id   = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=60, blank=True)
+    payload    = models.JSONField(default=dict)
+    # True when the delivery carried a valid signature for the library's
+    # webhook secret.  Unverified events may only settle a Payment that the
+    # checkout callback already recorded (finance/webhook_inbox.py).
+    signature_verified = models.BooleanField(default=False)
+
+    status          = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts        = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error      = models.TextField(blank=True)
+
+    received_at  = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering    = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "event_id"], name="uniq_webhook_event"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="webhook_event_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_id} ({self.event_type}, {self.status})"
@@ -0,0 +1,167 @@
+# finance/search.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Payment search document + backend full-text lookup.
+#
+#   build_search_document(p)    — normalised text of everything audit_log's
+#                                 ?q= searches: receipt, gateway IDs,
+#                                 collector, member name / ID, book title
+#   search_payments(qs, q)      — filter a Payment queryset by ?q=
+#   search_document(qs, q)      — the shared filter (members/search.py too)
+#   SearchDocumentField         — TextField carrying the `search` lookup
+#
+# The document is stored on Payment.search_document and rebuilt in
+# Payment.save(), so a search is one indexed predicate on one column
+# instead of ten icontains across fine → transaction → member / book.
+#
+# The `search` lookup compiles per backend:
+#   MySQL       MATCH … AGAINST ('+tok* …' IN BOOLEAN MODE) on the FULLTEXT
+#               index; tokens shorter than innodb_ft_min_token_size fall
+#               back to LIKE on the same column
+#   PostgreSQL  to_tsvector('simple', doc) @@ to_tsquery('tok:* & …') on
+#               the GIN expression index
+#   other       one LIKE per token on the document (portable fallback)
+#
+# Every token must match, as a word prefix (FTS) or substring (fallback).
+# search_document() keeps all-digit tokens out of the lookup and matches
+# them as a plain substring on every backend: receipt, phone and roll
+# numbers are searched by their tail ("5678" → RCT-DG-LIB-12345678), which
+# no word-prefix index can answer.
+#
+# Override in settings.py:
+#     FINANCE_SEARCH_FTS_MIN_TOKEN = 3   # MySQL innodb_ft_min_token_size
+# ─────────────────────────────────────────────────────────────────────────────
+
+import re
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Lookup
+
+FINANCE_SEARCH_FTS_MIN_TOKEN: int = int(getattr(settings, "FINANCE_SEARCH_FTS_MIN_TOKEN", 3))
+
+# Longer queries are almost certainly pasted junk; cap the predicate count.
+_MAX_TOKENS = 8
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens — the same split the FULLTEXT parser makes."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def build_search_document(payment) -> str:
+    """
+    Search text for *payment*.  Works on real and historical (migration)
+    model instances — only plain attributes and FK traversal are used.
+    """
+    member_name = payment.member_name
+    member_id   = payment.member_id_snapshot
+    book_title  = payment.book_title
+    if payment.fine_id and not (member_name and member_id and book_title):
+        # Old rows saved before the snapshots existed — read through once
+        # here rather than joining on every search.
+        try:
+            txn = payment.fine.transaction
+            member_name = member_name or f"{txn.member.first_name} {txn.member.last_name}"
+            member_id   = member_id or txn.member.member_id
+            book_title  = book_title or txn.book.title
+        except Exception:
+            pass
+
+    parts = (
+        payment.receipt_number, payment.gateway_payment_id, payment.gateway_order_id,
+        payment.collected_by, member_name, member_id, book_title,
+    )
+    return " ".join(tokenize(" ".join(p for p in parts if p)))
+
+
+# Payment fields the document is built from — a save(update_fields=…)
+# touching any of them also rewrites search_document.
+SEARCH_SOURCE_FIELDS = frozenset({
+    "receipt_number", "gateway_payment_id", "gateway_order_id", "collected_by",
+    "member_name", "member_id_snapshot", "book_title", "fine",
+})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Field + lookup
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SearchDocumentField(models.TextField):
+    """TextField that supports `field__search=<query>`."""
+
+
+@SearchDocumentField.register_lookup
+class DocumentSearch(Lookup):
+    lookup_name = "search"
+    prepare_rhs = False
+
+    def _tokens(self):
+        return tokenize(str(self.rhs))[:_MAX_TOKENS]
+
+    def _like(self, lhs, token, connection):
+        # The document is lower-cased, so a case-sensitive `contains` is enough.
+        pattern = f"%{connection.ops.prep_for_like_query(token)}%"
+        return f"{lhs} {connection.operators['contains']}", [pattern]
+
+    def _all(self, parts):
+        sql    = " AND ".join(s for s, _ in parts) or "1=1"
+        params = [p for _, ps in parts for p in ps]
+        return f"({sql})", params
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        parts = []
+        for token in self._tokens():
+            sql, params = self._like(lhs, token, connection)
+            parts.append((sql, [*lhs_params, *params]))
+        return self._all(parts)
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        tokens = self._tokens()
+        words  = [t for t in tokens if len(t) >= FINANCE_SEARCH_FTS_MIN_TOKEN]
+        parts  = []
+        if words:
+            parts.append((
+                f"MATCH ({lhs}) AGAINST (%s IN BOOLEAN MODE)",
+                [*lhs_params, " ".join(f"+{w}*" for w in words)],
+            ))
+        for token in tokens:
+            if len(token) < FINANCE_SEARCH_FTS_MIN_TOKEN:
+                sql, params = self._like(lhs, token, connection)
+                parts.append((sql, [*lhs_params, *params]))
+        return self._all(parts)
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        tokens = self._tokens()
+        if not tokens:
+            return "(1=1)", []
+        return (
+            f"to_tsvector('simple', {lhs}) @@ to_tsquery('simple', %s)",
+            [*lhs_params, " & ".join(f"{t}:*" for t in tokens)],
+        )
+
+
+def search_document(qs, q: str):
+    """
+    Filter *qs* (a model with a search_document column) by *q*: word tokens
+    through the `search` lookup, all-digit tokens as substrings.
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return qs
+    words = [t for t in tokens if not t.isdigit()]
+    if words:
+        qs = qs.filter(search_document__search=" ".join(words))
+    for digits in tokens:
+        if digits.isdigit():
+            qs = qs.filter(search_document__contains=digits)
+    return qs
+
+
+def search_payments(qs, q: str):
+    """Filter *qs* (Payment) to rows whose search document matches *q*."""
+    return search_document(qs, q)
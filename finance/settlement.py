@@ -0,0 +1,215 @@
+# finance/settlement.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Fine settlement service — one atomic unit per collection.
+#
+#   settle_fines(library, fines, …)        — cash desk: lock the unpaid fines,
+#                                           write one Payment for their total
+#   settle_pending_payments(library_pk, …) — gateway: flip PENDING payments to
+#                                           SUCCESS and settle their fines
+#   waive_fines(library, fines)            — waive the unpaid fines; no Payment
+#                                           and no cash book entry
+#
+# All paths end in _settle(), which issues a fixed number of statements
+# however many fines are involved:
+#
+#   UPDATE finance_fine  SET status = paid / waived, paid_date, method, ref
+#                        WHERE pk IN (…) AND status = unpaid
+#   UPDATE transaction   SET total_fine / unpaid_fine (subqueries),
+#                            fine_paid, fine_paid_date,
+#                            status overdue → overdue_settled
+#                        WHERE pk IN (…)
+#
+# Fine rows (and, for the gateway path, Payment rows) are locked with
+# SELECT … FOR UPDATE in primary-key order, so two desks collecting for the
+# same member serialise instead of deadlocking, and a replayed webhook or
+# double-submitted form finds nothing left to settle and becomes a no-op.
+# Cache invalidation runs on commit.
+# ─────────────────────────────────────────────────────────────────────────────
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+from django.utils import timezone
+
+from . import ledger
+from .models import Fine, Payment, generate_receipt_number
+from .timeseries import invalidate_finance_series
+
+
+def _settle(library_pk, fine_pks, txn_pks, method: str, ref: str, *, status: str = Fine.STATUS_PAID) -> None:
+    """Mark *fine_pks* paid (or *status*) and bring their transactions in step."""
+    from transactions.counts import invalidate_status_counts
+    from transactions.fine_summary import fine_summary_expressions
+    from transactions.models import Transaction
+    from transactions.search_cache import bump_version
+
+    today = date.today()
+    now   = timezone.now()
+
+    if fine_pks:
+        changes = {"status": status, "paid_date": today, "updated_at": now}
+        if status == Fine.STATUS_PAID:
+            changes.update(payment_method=method, payment_ref=ref)
+        Fine.objects.filter(pk__in=fine_pks, status=Fine.STATUS_UNPAID).update(**changes)
+
+    txn_pks = {pk for pk in txn_pks if pk}
+    if txn_pks:
+        # A transaction is settled once no UNPAID fine is left on it; the
+        # fine we just paid satisfies "at least one paid / waived fine".
+        still_owed = Exists(Fine.objects.filter(
+            transaction=OuterRef("pk"), status=Fine.STATUS_UNPAID,
+        ))
+        Transaction.objects.filter(pk__in=txn_pks).update(
+            **fine_summary_expressions(),
+            fine_paid      = Case(When(still_owed, then=F("fine_paid")), default=Value(True)),
+            fine_paid_date = Case(When(still_owed, then=F("fine_paid_date")), default=Value(today)),
+            status         = Case(
+                When(still_owed, then=F("status")),
+                When(status=Transaction.STATUS_OVERDUE,
+                     then=Value(Transaction.STATUS_OVERDUE_SETTLED)),
+                default=F("status"),
+            ),
+            updated_at     = now,
+        )
+
+    def _invalidate():
+        invalidate_finance_series(library_pk)
+        invalidate_status_counts(library_pk)
+        bump_version(library_pk)
+
+    db_transaction.on_commit(_invalidate)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cash desk
+# ─────────────────────────────────────────────────────────────────────────────
+
+def settle_fines(library, fines, *, method: str, ref: str = "", collected_by: str = "",
+                 primary_fine: Fine = None):
+    """
+    Settle every still-UNPAID fine in *fines* (a Fine queryset already
+    scoped to *library*) with one SUCCESS Payment for their total.
+
+    Returns the Payment, or None when nothing was left to settle.
+    """
+    is_online = method in (Payment.METHOD_ONLINE, Payment.METHOD_UPI, Payment.METHOD_CARD)
+
+    # Resolve the candidates first so the locking read is a plain pk lookup
+    # (no join → only finance_fine rows are locked).
+    candidates = list(fines.filter(status=Fine.STATUS_UNPAID).values_list("pk", flat=True))
+
+    with db_transaction.atomic():
+        rows = list(
+            Fine.objects.filter(pk__in=candidates, status=Fine.STATUS_UNPAID)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "transaction_id", "amount")
+        )
+        if not rows:
+            return None
+
+        fine_pks = [pk for pk, _, _ in rows]
+        if primary_fine is None or primary_fine.pk not in fine_pks:
+            primary_fine = Fine.objects.get(pk=fine_pks[0])
+
+        receipt_number = generate_receipt_number(library)
+        payment = Payment.objects.create(
+            library            = library,
+            fine               = primary_fine,
+            amount             = sum((amount for _, _, amount in rows), Decimal("0.00")),
+            method             = method,
+            status             = Payment.STATUS_SUCCESS,
+            receipt_number     = receipt_number,
+            collected_by       = collected_by,
+            transaction_date   = timezone.now(),
+            gateway_order_id   = ref if is_online else "",
+            gateway_payment_id = ref if is_online else "",
+        )
+        _settle(library.pk, fine_pks, [txn for _, txn, _ in rows], method, ref or receipt_number)
+
+    return payment
+
+
+def waive_fines(library, fines) -> int:
+    """
+    Waive every still-UNPAID fine in *fines* (a Fine queryset already
+    scoped to *library*).  Returns how many were waived.
+    """
+    candidates = list(fines.filter(status=Fine.STATUS_UNPAID).values_list("pk", flat=True))
+
+    with db_transaction.atomic():
+        rows = list(
+            Fine.objects.filter(pk__in=candidates, status=Fine.STATUS_UNPAID)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "transaction_id")
+        )
+        if rows:
+            _settle(library.pk, [pk for pk, _ in rows], [txn for _, txn in rows], "", "",
+                    status=Fine.STATUS_WAIVED)
+    return len(rows)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Gateway (Razorpay webhook, Payment.mark_success)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def settle_pending_payments(library_pk, *, payment_ids=None, gateway_payment_id: str = "") -> list:
+    """
+    Move payments to SUCCESS and settle their fines.
+
+    payment_ids         — these payments (any non-SUCCESS status); a given
+                          gateway_payment_id is recorded on them
+    gateway_payment_id  — otherwise: every PENDING payment with this
+                          gateway ID (the webhook path)
+
+    Returns the payments that changed; [] when they were already settled,
+    so replayed webhooks are harmless.
+    """
+    qs = Payment.objects.filter(library_id=library_pk)
+    if payment_ids is not None:
+        qs = qs.filter(pk__in=payment_ids).exclude(status=Payment.STATUS_SUCCESS)
+    elif gateway_payment_id:
+        qs = qs.filter(gateway_payment_id=gateway_payment_id, status=Payment.STATUS_PENDING)
+    else:
+        return []
+
+    with db_transaction.atomic():
+        payments = list(qs.select_for_update().order_by("pk"))
+        if not payments:
+            return []
+
+        changes = {"status": Payment.STATUS_SUCCESS, "updated_at": timezone.now()}
+        if payment_ids is not None and gateway_payment_id:
+            changes["gateway_payment_id"] = gateway_payment_id
+        Payment.objects.filter(pk__in=[p.pk for p in payments]).update(**changes)
+
+        fine_rows = dict(
+            Fine.objects.filter(
+                pk__in=[p.fine_id for p in payments if p.fine_id],
+                status=Fine.STATUS_UNPAID,
+            )
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "transaction_id")
+        )
+
+        # Payments under one gateway reference share method / ref — group
+        # anyway so each fine records the payment that settled it.
+        groups: dict = {}
+        for p in payments:
+            for field, value in changes.items():
+                setattr(p, field, value)
+            ledger.record_payment(p)  # .update() skipped post_save
+            if p.fine_id in fine_rows:
+                key = (p.method, p.receipt_number or p.gateway_payment_id)
+                groups.setdefault(key, []).append(p.fine_id)
+
+        if not groups:
+            _settle(library_pk, [], [], "", "")
+        for (method, ref), fine_pks in groups.items():
+            _settle(library_pk, fine_pks, [fine_rows[pk] for pk in fine_pks], method, ref)
+
+    return payments
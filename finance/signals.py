@@ -0,0 +1,72 @@
+# finance/signals.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Model signal receivers owned by the finance app.
+# Connected from FinanceConfig.ready().
+#
+# Payment / Expense / Fine writes drop the library's cached monthly series
+# (timeseries.py).  Deferred with on_commit() so a concurrent request can't
+# re-cache pre-commit figures.
+#
+# Payment / Expense saves and deletes also keep the materialised cash book
+# (ledger.py) in step.  That runs inline, inside the writer's transaction,
+# so the ledger commits or rolls back together with the source row.
+# ─────────────────────────────────────────────────────────────────────────────
+
+import logging
+
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import ledger
+from .timeseries import invalidate_finance_series
+
+logger = logging.getLogger("finance.signals")
+
+
+def _on_money_write(sender, instance, **kwargs):
+    library_pk = getattr(instance, "library_id", None)
+    if library_pk:
+        db_transaction.on_commit(lambda: invalidate_finance_series(library_pk))
+
+
+def _on_payment_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        ledger.record_payment(instance)
+    except Exception:
+        logger.warning("Cash book update failed for payment %s", instance.pk, exc_info=True)
+
+
+def _on_expense_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        ledger.record_expense(instance)
+    except Exception:
+        logger.warning("Cash book update failed for expense %s", instance.pk, exc_info=True)
+
+
+def _on_ledger_source_delete(sender, instance, **kwargs):
+    # The CashBookEntry row went with the CASCADE; only balances after it move.
+    when = getattr(instance, "transaction_date", None)
+    when = timezone.localdate(when) if when else instance.date
+    try:
+        ledger.record_removal(instance.library_id, when)
+    except Exception:
+        logger.warning("Cash book rebalance failed for library %s", instance.library_id, exc_info=True)
+
+
+def connect():
+    from .models import Expense, Fine, Payment
+
+    for model in (Payment, Expense, Fine):
+        uid = f"finance_series_{model._meta.label_lower}"
+        post_save.connect(_on_money_write, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_on_money_write, sender=model, dispatch_uid=f"{uid}_delete")
+
+    post_save.connect(_on_payment_save, sender=Payment, dispatch_uid="finance_ledger_payment_save")
+    post_save.connect(_on_expense_save, sender=Expense, dispatch_uid="finance_ledger_expense_save")
+    post_delete.connect(_on_ledger_source_delete, sender=Payment, dispatch_uid="finance_ledger_payment_delete")
+    post_delete.connect(_on_ledger_source_delete, sender=Expense, dispatch_uid="finance_ledger_expense_delete")
@@ -19,8 +19,11 @@ from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -630,3 +633,541 @@ class AuthRedirectTest(TestCase):
             with self.subTest(url=url):
                 resp = c.get(url)
                 self.assertIn(resp.status_code, (302, 301), msg=f"{url} should redirect")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Monthly time-series (timeseries.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FinanceSeriesTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+
+        from finance.models import Expense, Payment
+        from transactions.tests import _make_library as _make_txn_library
+
+        cache.clear()
+        self.library = _make_txn_library("fin")
+        now = timezone.now()
+        for days_ago, amount in ((0, "10.00"), (0, "5.00"), (70, "20.00"), (400, "99.00")):
+            Payment.objects.create(
+                library=self.library, amount=Decimal(amount),
+                status=Payment.STATUS_SUCCESS, transaction_date=now - timedelta(days=days_ago),
+            )
+        Payment.objects.create(library=self.library, amount=Decimal("7.00"))  # pending
+        Expense.objects.create(library=self.library, description="Pens", amount=Decimal("3.00"),
+                               category=Expense.CATEGORY_STATIONERY)
+        Expense.objects.create(library=self.library, description="Fan", amount=Decimal("8.00"),
+                               category=Expense.CATEGORY_MAINTENANCE,
+                               date=date.today() - timedelta(days=70))
+
+    def test_month_starts_are_contiguous(self):
+        from finance.timeseries import month_starts
+        months = month_starts(12, date(2026, 3, 31))
+        self.assertEqual(months[0], date(2025, 4, 1))
+        self.assertEqual(months[-1], date(2026, 3, 1))
+        self.assertEqual(len(set(months)), 12)
+
+    def test_series_matches_per_month_aggregates(self):
+        from finance.timeseries import compute_finance_series
+        series = compute_finance_series(self.library)
+        self.assertEqual(series["income_by_month"][-1], Decimal("15.00"))
+        self.assertEqual(sum(series["income_by_month"]), Decimal("35.00"))
+        self.assertEqual(series["total_income"], Decimal("134.00"))
+        self.assertEqual(series["total_expense"], Decimal("11.00"))
+        self.assertEqual(series["expense_by_category"]["maintenance"], Decimal("8.00"))
+        self.assertEqual(sum(series["expense_by_month"]), Decimal("11.00"))
+
+    def test_cached_series_invalidated_on_expense_write(self):
+        from finance.models import Expense
+        from finance.timeseries import get_finance_series
+
+        self.assertEqual(get_finance_series(self.library)["total_expense"], Decimal("11.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(library=self.library, description="Ink", amount=Decimal("4.00"))
+        self.assertEqual(get_finance_series(self.library)["total_expense"], Decimal("15.00"))
+
+    def test_profit_loss_renders_from_series(self):
+        self.client.force_login(self.library.user)
+        resp = self.client.get(reverse("finance:profit_loss"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_income"], Decimal("134.00"))
+        self.assertEqual(len(json.loads(resp.context["chart_labels"])), 12)
+
+
+class CashBookLedgerTests(TestCase):
+
+    def setUp(self):
+        from django.utils import timezone
+
+        from finance.models import Expense, Payment
+        from transactions.tests import _make_library as _make_txn_library
+
+        self.library = _make_txn_library("ledger")
+        self.today   = date.today()
+        self.p1 = Payment.objects.create(
+            library=self.library, amount=Decimal("50.00"), status=Payment.STATUS_SUCCESS,
+            transaction_date=timezone.now() - timedelta(days=40),
+        )
+        self.e1 = Expense.objects.create(
+            library=self.library, description="Pens", amount=Decimal("20.00"),
+            date=self.today - timedelta(days=10),
+        )
+
+    def _balances(self):
+        from finance.models import CashBookEntry
+        return list(
+            CashBookEntry.objects.filter(library=self.library)
+            .values_list("amount", "running_balance")
+        )
+
+    def _assert_consistent(self):
+        from finance.ledger import ledger_totals
+        from finance.models import CashBookEntry
+
+        balance = Decimal("0.00")
+        for entry in CashBookEntry.objects.filter(library=self.library):
+            balance += entry.signed_amount
+            self.assertEqual(entry.running_balance, balance)
+        self.assertEqual(ledger_totals(self.library)["closing_balance"], balance)
+
+    def test_writes_append_lines(self):
+        from finance.models import Payment
+
+        Payment.objects.create(library=self.library, amount=Decimal("5.00"),
+                               status=Payment.STATUS_SUCCESS)
+        Payment.objects.create(library=self.library, amount=Decimal("9.00"))  # pending
+        self.assertEqual(self._balances(), [
+            (Decimal("50.00"), Decimal("50.00")),
+            (Decimal("20.00"), Decimal("30.00")),
+            (Decimal("5.00"),  Decimal("35.00")),
+        ])
+        self._assert_consistent()
+
+    def test_backdated_edit_and_delete_rebalance(self):
+        from finance.models import Expense
+
+        Expense.objects.create(library=self.library, description="Fan", amount=Decimal("7.00"),
+                               date=self.today - timedelta(days=60))
+        self.assertEqual(self._balances()[0], (Decimal("7.00"), Decimal("-7.00")))
+        self._assert_consistent()
+
+        self.e1.amount = Decimal("25.00")
+        self.e1.save()
+        self._assert_consistent()
+
+        self.p1.delete()
+        self.assertEqual(self._balances()[-1], (Decimal("25.00"), Decimal("-32.00")))
+        self._assert_consistent()
+
+    def test_reversed_payment_is_removed(self):
+        from finance.models import Payment
+
+        self.p1.status = Payment.STATUS_FAILED
+        self.p1.save()
+        self.assertEqual(self._balances(), [(Decimal("20.00"), Decimal("-20.00"))])
+        self._assert_consistent()
+
+    def test_view_pages_and_filters_by_date(self):
+        from finance.models import CashBookCheckpoint, CashBookEntry
+
+        # Simulate history that predates the ledger.
+        CashBookEntry.objects.all().delete()
+        CashBookCheckpoint.objects.all().delete()
+
+        self.client.force_login(self.library.user)
+        resp = self.client.get(reverse("finance:cash_book"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["page_obj"].paginator.count, 2)
+        self.assertEqual(resp.context["closing_balance"], Decimal("30.00"))
+
+        since = self.today - timedelta(days=20)
+        resp = self.client.get(reverse("finance:cash_book"), {"from_date": since.isoformat()})
+        self.assertEqual(resp.context["opening_balance"], Decimal("50.00"))
+        self.assertEqual(resp.context["total_debits"], Decimal("20.00"))
+        self.assertEqual(resp.context["closing_balance"], Decimal("30.00"))
+
+        resp = self.client.get(reverse("finance:cash_book"),
+                               {"from_date": since.isoformat(), "export": "csv"})
+        self.assertEqual(len(resp.content.decode().strip().splitlines()), 2)
+
+
+class PaymentListPagingTests(TestCase):
+
+    def setUp(self):
+        from django.utils import timezone
+
+        from finance.models import Payment
+        from transactions.tests import _make_library as _make_txn_library
+
+        self.library = _make_txn_library("paging")
+        now = timezone.now()
+        Payment.objects.bulk_create([
+            Payment(
+                library=self.library, amount=Decimal("5.00"), status=Payment.STATUS_SUCCESS,
+                # Pairs share a timestamp so the id tie-break is exercised.
+                transaction_date=now - timedelta(minutes=i // 2),
+                receipt_number=f"R{i:03d}", member_name=f"Member {i}",
+                member_id_snapshot=f"M{i:03d}", book_title=f"Book {i}",
+            )
+            for i in range(7)
+        ])
+        self.client.force_login(self.library.user)
+
+    def test_keyset_pages_cover_every_payment_once(self):
+        url  = reverse("finance:income_list")
+        resp = self.client.get(url, {"per_page": 3})
+        seen = [p.receipt_number for p in resp.context["payments"]]
+        while resp.context["payments"].has_next:
+            resp = self.client.get(url, {"per_page": 3, "cursor": resp.context["payments"].next_cursor})
+            seen += [p.receipt_number for p in resp.context["payments"]]
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), {f"R{i:03d}" for i in range(7)})
+        self.assertEqual(resp.context["total_count"], 7)
+
+    def test_csv_exports_stream_snapshot_columns(self):
+        import csv as _csv
+
+        for name in ("finance:income_list", "finance:audit_log"):
+            # session, user, library — then one join-free SELECT for the rows
+            with self.assertNumQueries(4):
+                resp = self.client.get(reverse(name), {"export": "csv"})
+                body = b"".join(resp.streaming_content).decode()
+            rows = list(_csv.reader(body.splitlines()))
+            self.assertEqual(len(rows), 8)
+            # Newest first; R000 / R001 share a timestamp, higher id wins.
+            self.assertIn("Member 1", rows[1])
+            self.assertIn("Book 1", rows[1])
+
+
+class PaymentSearchTests(TestCase):
+
+    def setUp(self):
+        from finance.models import Fine, Payment
+        from transactions.tests import (
+            _make_book, _make_library as _make_txn_library, _make_member, _make_transaction,
+        )
+
+        self.library = _make_txn_library("search")
+        member = _make_member(self.library)
+        txn    = _make_transaction(self.library, member, _make_book(self.library))
+        fine   = Fine.objects.create(library=self.library, transaction=txn,
+                                     fine_type="overdue", amount=Decimal("30.00"))
+        self.linked = Payment.objects.create(
+            library=self.library, fine=fine, amount=Decimal("30.00"),
+            status=Payment.STATUS_SUCCESS, receipt_number="RCP-2026-0042",
+            collected_by="Desk Staff",
+        )
+        self.online = Payment.objects.create(
+            library=self.library, amount=Decimal("12.00"), status=Payment.STATUS_PENDING,
+            method=Payment.METHOD_ONLINE, gateway_payment_id="pay_Q9xZ7",
+            member_name="Rina Das",
+        )
+        self.client.force_login(self.library.user)
+
+    def _audit(self, q):
+        resp = self.client.get(reverse("finance:audit_log"), {"q": q})
+        return {p.pk for p in resp.context["page_obj"]}
+
+    def test_document_covers_member_book_and_ids(self):
+        doc = self.linked.search_document
+        for word in ("rcp", "0042", "desk", "arjun", "sen1", "wings", "fire"):
+            self.assertIn(word, doc.split())
+
+    def test_audit_log_q_matches_every_word(self):
+        self.assertEqual(self._audit("rcp-2026-0042"), {self.linked.pk})
+        self.assertEqual(self._audit("Wings Arjun"), {self.linked.pk})
+        self.assertEqual(self._audit("pay_q9xz7"), {self.online.pk})
+        self.assertEqual(self._audit("rina wings"), set())
+        self.assertEqual(self._audit("  -- "), {self.linked.pk, self.online.pk})
+
+    def test_receipt_number_tail_matches_on_every_backend(self):
+        from finance.models import Payment
+        from finance.search import DocumentSearch, search_payments
+
+        self.linked.receipt_number = "RCT-DG-LIB-12345678"
+        self.linked.save(update_fields=["receipt_number"])
+        for q in ("5678", "345", "lib 5678", "12345678"):
+            self.assertEqual(self._audit(q), {self.linked.pk}, q)
+        self.assertEqual(self._audit("rina 5678"), set())
+
+        # Digits never reach the word-prefix lookup (MATCH / to_tsquery),
+        # which would miss a tail on MySQL and PostgreSQL.
+        def lookups(q):
+            return [type(node).__name__ for node in search_payments(Payment.objects.all(), q).query.where.children]
+        self.assertNotIn(DocumentSearch.__name__, lookups("5678"))
+        self.assertEqual(lookups("lib 5678").count(DocumentSearch.__name__), 1)
+
+    def test_update_fields_refreshes_document_only_when_needed(self):
+        from finance.models import Payment
+
+        self.online.mark_success()
+        self.online.member_name = "Rina Dasgupta"
+        self.online.save(update_fields=["member_name"])
+        self.assertIn(
+            "dasgupta",
+            Payment.objects.get(pk=self.online.pk).search_document.split(),
+        )
+
+
+class SettlementTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from finance.models import Fine
+        from transactions.tests import (
+            _make_book, _make_library as _make_txn_library, _make_member, _make_transaction,
+        )
+
+        cache.clear()
+        self.library = _make_txn_library("settle")
+        self.member  = _make_member(self.library)
+        book = _make_book(self.library)
+        self.txns  = [_make_transaction(self.library, self.member, book) for _ in range(2)]
+        self.fines = [
+            Fine.objects.create(library=self.library, transaction=txn,
+                                fine_type="overdue", amount=Decimal(amount))
+            for txn, amount in zip(self.txns * 2, ("10.00", "15.00", "5.00", "20.00"))
+        ]
+        self.client.force_login(self.library.user)
+
+    def test_cash_pay_all_settles_everything_once(self):
+        from finance.models import Fine, Payment
+        from transactions.models import Transaction
+
+        data = {"fine_id": self.fines[0].fine_id, "pay_all": "1", "method": "cash"}
+        self.client.post(reverse("finance:cash_payment"), data)
+
+        payment = Payment.objects.get(library=self.library)
+        self.assertEqual(payment.amount, Decimal("50.00"))
+        self.assertEqual(payment.status, Payment.STATUS_SUCCESS)
+        self.assertFalse(Fine.objects.filter(library=self.library, status=Fine.STATUS_UNPAID).exists())
+        for txn in Transaction.objects.filter(pk__in=[t.pk for t in self.txns]):
+            self.assertTrue(txn.fine_paid)
+            self.assertEqual(txn.unpaid_fine, Decimal("0.00"))
+            self.assertEqual(txn.status, Transaction.STATUS_OVERDUE_SETTLED)
+
+        # Double submit — nothing left, no second payment.
+        self.client.post(reverse("finance:cash_payment"), data)
+        self.assertEqual(Payment.objects.filter(library=self.library).count(), 1)
+
+    def test_admin_actions_settle_through_the_service(self):
+        from finance.models import CashBookEntry, Fine, Payment
+        from transactions.models import Transaction
+
+        self.client.force_login(User.objects.create_superuser("root", "root@test.com", "pw"))
+        url = reverse("admin:finance_fine_changelist")
+
+        def run(action, fines):
+            self.client.post(url, {"action": action, "_selected_action": [f.pk for f in fines]})
+            return {t.pk: t for t in Transaction.objects.filter(pk__in=[t.pk for t in self.txns])}
+
+        txns = run("mark_as_waived", [self.fines[0], self.fines[2]])   # everything on txns[0]
+        self.assertEqual(txns[self.txns[0].pk].unpaid_fine, Decimal("0.00"))
+        self.assertEqual(txns[self.txns[0].pk].status, Transaction.STATUS_OVERDUE_SETTLED)
+        self.assertEqual(Fine.objects.get(pk=self.fines[0].pk).status, Fine.STATUS_WAIVED)
+        self.assertFalse(Payment.objects.exists())
+
+        txns = run("mark_as_paid", [self.fines[1], self.fines[3]])
+        self.assertEqual(txns[self.txns[1].pk].unpaid_fine, Decimal("0.00"))
+        self.assertTrue(txns[self.txns[1].pk].fine_paid)
+        payment = Payment.objects.get(library=self.library)
+        self.assertEqual((payment.amount, payment.collected_by), (Decimal("35.00"), "root"))
+        self.assertEqual(CashBookEntry.objects.filter(library=self.library).count(), 1)
+
+    def test_partial_settlement_keeps_transaction_open(self):
+        from transactions.models import Transaction
+
+        self.client.post(reverse("finance:cash_payment"), {"fine_id": self.fines[0].fine_id})
+        txn = Transaction.objects.get(pk=self.txns[0].pk)
+        self.assertFalse(txn.fine_paid)
+        self.assertEqual(txn.unpaid_fine, Decimal("5.00"))
+        self.assertEqual(txn.status, Transaction.STATUS_OVERDUE)
+
+    def test_statement_count_does_not_grow_with_fines(self):
+        from finance.models import Fine
+        from finance.settlement import settle_fines
+
+        def settle(fines):
+            with CaptureQueriesContext(connection) as ctx:
+                settle_fines(self.library, Fine.objects.filter(pk__in=[f.pk for f in fines]),
+                             method="cash", primary_fine=fines[0])
+            return len(ctx.captured_queries)
+
+        settle(self.fines[:1])  # first payment builds the cash-book ledger
+        self.assertEqual(settle(self.fines[1:2]), settle(self.fines[2:]))
+
+    def test_replayed_webhook_is_a_no_op(self):
+        from finance.models import CashBookEntry, Fine, Payment, PaymentSettings
+        from finance.webhook_inbox import drain
+
+        PaymentSettings.objects.create(library=self.library)
+        Payment.objects.create(
+            library=self.library, fine=self.fines[1], amount=Decimal("15.00"),
+            method=Payment.METHOD_ONLINE, gateway_payment_id="pay_XYZ",
+        )
+        url  = reverse("finance:razorpay_webhook", args=[self.library.pk])
+        body = json.dumps({"event": "payment.captured",
+                           "payload": {"payment": {"entity": {"id": "pay_XYZ"}}}})
+        for _ in range(2):
+            resp = self.client.post(url, body, content_type="application/json")
+            self.assertEqual(resp.status_code, 200)
+            drain()
+
+        self.fines[1].refresh_from_db()
+        self.assertEqual(self.fines[1].status, Fine.STATUS_PAID)
+        self.assertEqual(Payment.objects.get(gateway_payment_id="pay_XYZ").status, Payment.STATUS_SUCCESS)
+        self.assertEqual(CashBookEntry.objects.filter(library=self.library).count(), 1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Webhook inbox
+# ─────────────────────────────────────────────────────────────────────────────
+
+class WebhookInboxTests(TestCase):
+
+    SECRET = "whsec_test"
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from finance.models import Fine, PaymentSettings
+        from transactions.tests import (
+            _make_book, _make_library as _make_txn_library, _make_member, _make_transaction,
+        )
+
+        cache.clear()
+        self.library = _make_txn_library("inbox")
+        member = _make_member(self.library)
+        txn    = _make_transaction(self.library, member, _make_book(self.library))
+        self.fine = Fine.objects.create(library=self.library, transaction=txn,
+                                        fine_type="overdue", amount=Decimal("40.00"))
+        PaymentSettings.objects.create(library=self.library, webhook_secret=self.SECRET)
+        self.url = reverse("finance:razorpay_webhook", args=[self.library.pk])
+
+    def _deliver(self, body, headers):
+        return self.client.post(self.url, body, content_type="application/json",
+                                headers=headers)
+
+    def test_delivery_is_stored_once_and_not_processed_inline(self):
+        from finance.models import Payment, WebhookEvent
+        from finance.webhook_inbox import sign_payload
+
+        Payment.objects.create(library=self.library, fine=self.fine, amount=Decimal("40.00"),
+                               method=Payment.METHOD_ONLINE, gateway_payment_id="pay_A")
+        body, headers = sign_payload(self.SECRET, "pay_A")
+        for _ in range(3):
+            self.assertEqual(self._deliver(body, headers).status_code, 200)
+
+        event = WebhookEvent.objects.get(library=self.library)
+        self.assertEqual(event.event_type, "payment.captured")
+        self.assertEqual(event.status, WebhookEvent.STATUS_PENDING)
+        self.assertEqual(Payment.objects.get(gateway_payment_id="pay_A").status,
+                         Payment.STATUS_PENDING)
+
+    def test_bad_or_missing_signature_is_rejected(self):
+        from finance.models import WebhookEvent
+        from finance.webhook_inbox import sign_payload
+
+        body, headers = sign_payload("wrong-secret", "pay_A")
+        self.assertEqual(self._deliver(body, headers).status_code, 400)
+        del headers["X-Razorpay-Signature"]
+        self.assertEqual(self._deliver(body, headers).status_code, 400)
+        self.assertEqual(self._deliver(b"[1]", {}).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_consumer_settles_pending_payment(self):
+        from finance.models import Fine, Payment, WebhookEvent
+        from finance.webhook_inbox import process_pending, sign_payload
+
+        Payment.objects.create(library=self.library, fine=self.fine, amount=Decimal("40.00"),
+                               method=Payment.METHOD_ONLINE, gateway_payment_id="pay_B")
+        self._deliver(*sign_payload(self.SECRET, "pay_B"))
+        self.assertEqual(process_pending(), 1)
+
+        self.fine.refresh_from_db()
+        self.assertEqual(self.fine.status, Fine.STATUS_PAID)
+        self.assertEqual(Payment.objects.get(gateway_payment_id="pay_B").status,
+                         Payment.STATUS_SUCCESS)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.STATUS_PROCESSED)
+        self.assertEqual(process_pending(), 0)
+
+    def test_captured_payment_without_callback_is_booked_from_notes(self):
+        from finance.models import Fine, Payment
+        from finance.webhook_inbox import drain, sign_payload
+
+        self._deliver(*sign_payload(self.SECRET, "pay_C", amount_paise=4000,
+                                    fine_id=self.fine.fine_id, order_id="order_C"))
+        # A second event (new event ID) for the same payment books nothing.
+        self._deliver(*sign_payload(self.SECRET, "pay_C", amount_paise=4000,
+                                    fine_id=self.fine.fine_id))
+        drain()
+
+        payment = Payment.objects.get(gateway_payment_id="pay_C")
+        self.assertEqual(payment.status, Payment.STATUS_SUCCESS)
+        self.assertEqual(payment.amount, Decimal("40.00"))
+        self.assertTrue(payment.receipt_number)
+        self.fine.refresh_from_db()
+        self.assertEqual(self.fine.status, Fine.STATUS_PAID)
+
+    def test_unsigned_event_never_books_from_notes(self):
+        from finance.models import Fine, Payment, PaymentSettings, WebhookEvent
+        from finance.webhook_inbox import process_pending, sign_payload
+
+        PaymentSettings.objects.filter(library=self.library).update(webhook_secret="")
+        self.assertEqual(self._deliver(*sign_payload("", "pay_U", amount_paise=4000,
+                                                     fine_id=self.fine.fine_id)).status_code, 200)
+        process_pending()
+
+        event = WebhookEvent.objects.get()
+        self.assertFalse(event.signature_verified)
+        self.assertEqual(event.status, WebhookEvent.STATUS_PENDING)
+        self.assertIn("unsigned", event.last_error)
+        self.assertFalse(Payment.objects.filter(gateway_payment_id="pay_U").exists())
+        self.fine.refresh_from_db()
+        self.assertEqual(self.fine.status, Fine.STATUS_UNPAID)
+
+    def test_short_or_foreign_capture_is_left_for_review(self):
+        from finance.models import Fine, Payment, WebhookEvent
+        from finance.webhook_inbox import process_pending, sign_payload, signature_for
+
+        self._deliver(*sign_payload(self.SECRET, "pay_S", amount_paise=1000, fine_id=self.fine.fine_id))
+        self._deliver(*sign_payload(self.SECRET, "pay_Z", fine_id=self.fine.fine_id))
+
+        body, headers = sign_payload(self.SECRET, "pay_D", amount_paise=4000, fine_id=self.fine.fine_id)
+        payload = json.loads(body)
+        payload["payload"]["payment"]["entity"]["currency"] = "USD"
+        body = json.dumps(payload).encode()
+        headers["X-Razorpay-Signature"] = signature_for(self.SECRET, body)
+        self._deliver(body, headers)
+
+        self.assertEqual(process_pending(), 3)
+        for event in WebhookEvent.objects.all():
+            self.assertEqual((event.status, event.attempts), (WebhookEvent.STATUS_FAILED, 1))
+            self.assertIn("ManualReview", event.last_error)
+        self.assertFalse(Payment.objects.exists())
+        self.fine.refresh_from_db()
+        self.assertEqual(self.fine.status, Fine.STATUS_UNPAID)
+
+    def test_unknown_payment_backs_off_then_fails(self):
+        from finance import webhook_inbox
+        from finance.models import WebhookEvent
+
+        self._deliver(*webhook_inbox.sign_payload(self.SECRET, "pay_missing"))
+        event = WebhookEvent.objects.get()
+
+        for attempt in range(1, webhook_inbox.WEBHOOK_MAX_ATTEMPTS + 1):
+            webhook_inbox.process_pending()
+            event.refresh_from_db()
+            self.assertEqual(event.attempts, attempt)
+            self.assertIn("RetryLater", event.last_error)
+            if event.status == WebhookEvent.STATUS_PENDING:
+                self.assertGreater(event.next_attempt_at, timezone.now())
+                # Not due yet — a poll right now leaves it alone.
+                self.assertEqual(webhook_inbox.process_pending(), 0)
+                WebhookEvent.objects.filter(pk=event.pk).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(event.status, WebhookEvent.STATUS_FAILED)
@@ -0,0 +1,150 @@
+# finance/timeseries.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Monthly time-series aggregation for the finance charts.
+#
+#   month_starts(n)              — first-of-month dates for the last n months
+#   monthly_totals(qs, field)    — one GROUP BY TruncMonth(field)[, by] query
+#   get_finance_series(library)  — every chart / breakdown used by
+#                                  finance_reports and profit_loss, cached
+#   invalidate_finance_series()  — drop a library's cached series
+#
+# get_finance_series() runs exactly three grouped queries (Payment by month,
+# Expense by month × category, paid Fine by type) instead of one aggregate
+# per month and per category.  The result is cached per library and per
+# calendar month; it is dropped on Payment / Expense / Fine writes
+# (finance/signals.py) and explicitly after bulk .update() paths that
+# settle fines or payments.
+#
+# Override the TTL in settings.py:
+#     FINANCE_SERIES_CACHE_TTL = 600   # seconds (default: 600)
+# ─────────────────────────────────────────────────────────────────────────────
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+FINANCE_SERIES_CACHE_TTL: int = int(getattr(settings, "FINANCE_SERIES_CACHE_TTL", 600))
+
+_ZERO = Decimal("0.00")
+
+
+def month_starts(n: int = 12, today: date = None) -> list:
+    """First day of each of the last *n* calendar months, oldest first."""
+    today = today or date.today()
+    y, m  = today.year, today.month
+    out   = []
+    for _ in range(n):
+        out.append(date(y, m, 1))
+        m -= 1
+        if m == 0:
+            y, m = y - 1, 12
+    return out[::-1]
+
+
+def _as_month(value) -> date:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def monthly_totals(qs, date_field: str, value: str = "amount", by: str = None, since: date = None) -> dict:
+    """
+    One grouped query: SUM(value) per TruncMonth(date_field) [and per *by*].
+
+    Returns {month_date: Decimal} or, with *by*, {(month_date, key): Decimal}.
+    *since* limits the scan to rows on/after that date.
+    """
+    if since is not None:
+        field  = qs.model._meta.get_field(date_field)
+        suffix = "__date__gte" if field.get_internal_type() == "DateTimeField" else "__gte"
+        qs = qs.filter(**{date_field + suffix: since})
+    group = ["month", by] if by else ["month"]
+    rows = (
+        qs.order_by()
+        .annotate(month=TruncMonth(date_field))
+        .values(*group)
+        .annotate(total=Sum(value))
+    )
+    out = {}
+    for row in rows:
+        month = _as_month(row["month"])
+        key   = (month, row[by]) if by else month
+        out[key] = out.get(key, _ZERO) + (row["total"] or _ZERO)
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Library finance series (cached)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _key(library_pk, today: date) -> str:
+    return f"dg:fin:series:{library_pk}:{today:%Y%m}"
+
+
+def compute_finance_series(library, months: int = 12, today: date = None) -> dict:
+    from .models import Expense, Fine, Payment
+
+    today  = today or date.today()
+    starts = month_starts(months, today)
+
+    # All-time, so the P&L totals and category breakdowns come out of the
+    # same scan; rows are (month × category), not individual records.
+    income = monthly_totals(
+        Payment.objects.filter(library=library, status=Payment.STATUS_SUCCESS),
+        "transaction_date",
+    )
+    expense = monthly_totals(
+        Expense.objects.filter(library=library), "date", by="category",
+    )
+    fines_by_type = {
+        row["fine_type"]: row["total"] or _ZERO
+        for row in Fine.objects.for_library(library)
+            .filter(status=Fine.STATUS_PAID).order_by()
+            .values("fine_type").annotate(total=Sum("amount"))
+    }
+
+    expense_by_month    = defaultdict(lambda: _ZERO)
+    expense_by_category = defaultdict(lambda: _ZERO)
+    for (month, category), amount in expense.items():
+        expense_by_month[month]       += amount
+        expense_by_category[category] += amount
+
+    return {
+        "months":              starts,
+        "income_by_month":     [income.get(m, _ZERO) for m in starts],
+        "expense_by_month":    [expense_by_month.get(m, _ZERO) for m in starts],
+        "total_income":        sum(income.values(), _ZERO),
+        "total_expense":       sum(expense_by_category.values(), _ZERO),
+        "income_by_fine_type": fines_by_type,
+        "expense_by_category": dict(expense_by_category),
+    }
+
+
+def get_finance_series(library) -> dict:
+    """compute_finance_series() for *library*, served from cache when possible."""
+    key = _key(library.pk, date.today())
+    try:
+        series = cache.get(key)
+    except Exception:
+        series = None
+    if series is None:
+        series = compute_finance_series(library)
+        try:
+            cache.set(key, series, FINANCE_SERIES_CACHE_TTL)
+        except Exception:
+            pass
+    return series
+
+
+def invalidate_finance_series(library_pk) -> None:
+    if not library_pk:
+        return
+    try:
+        cache.delete(_key(library_pk, date.today()))
+    except Exception:
+        pass
@@ -5,7 +5,7 @@
 # Naming conventions
 # ──────────────────
 #   _get_library_or_404(request) — scoped helper; raises Http404 if no library
-#   _month_range(n)              — returns (year, month) tuples for chart data
+#   get_finance_series(library)  — cached monthly chart data (timeseries.py)
 #
 # Every view is @login_required and tenant-scoped to request.user.library.
 # ─────────────────────────────────────────────────────────────────────────────
@@ -18,15 +18,23 @@ from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction as db_transaction
 from django.db.models import Count, Q, Sum
 from django.http import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
-from .models import Expense, Fine, Payment, generate_receipt_number
+from .exports import (
+    AUDIT_CSV_HEADER, INCOME_CSV_HEADER, audit_csv_rows, income_csv_rows, stream_csv,
+)
+from .ledger import balance_before, ensure_ledger, ledger_totals
+from .models import CashBookEntry, Expense, Fine, Payment, generate_receipt_number
+from .search import search_payments
+from .settlement import settle_fines
+from .timeseries import get_finance_series
+from .webhook_inbox import InvalidSignature, receive_event
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -41,49 +49,29 @@ def _get_library_or_404(request):
         raise Http404("No library associated with this account.")
 
 
-def _month_range(n: int = 12):
-    """
-    Return a list of (year, month) tuples for the last *n* calendar months,
-    ordered oldest first.
-    """
-    today = date.today()
-    months = []
-    for i in range(n - 1, -1, -1):
-        d = (today.replace(day=1) - timedelta(days=i * 28)).replace(day=1)
-        months.append((d.year, d.month))
-    return months
+def _parse_date(value):
+    """ISO date from a query-string value, or None if blank / malformed."""
+    try:
+        return date.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Library Logo  (binary-serving)
+# Library Logo  (image-store serving)
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
 def library_logo(request):
     """
-    Serve the library logo stored as a BinaryField / LONGBLOB in the Library
-    model (accounts app).  Scoped to the authenticated user — no PK needed.
+    Serve the library logo from the core image store (?size= picks a
+    thumbnail).  Scoped to the authenticated user — no PK needed.
+    ETag / Last-Modified come from the Library row (core/image_serving.py).
     """
-    library = _get_library_or_404(request)
-
-    # Support both `logo` (accounts model) and `library_logo` field names
-    raw = getattr(library, "library_logo", None) or getattr(library, "logo", None)
-    if raw is None:
-        return HttpResponse(status=404)
-
-    logo_bytes = bytes(raw)
-    if not logo_bytes:
-        return HttpResponse(status=404)
-
-    mime_type = (
-        getattr(library, "library_logo_mime", None)
-        or getattr(library, "logo_mime_type", None)
-        or "image/jpeg"
-    ).strip() or "image/jpeg"
+    from core.image_serving import image_response
 
-    response = HttpResponse(logo_bytes, content_type=mime_type)
-    response["Cache-Control"] = "private, max-age=3600"
-    return response
+    library = _get_library_or_404(request)
+    return image_response(request, library.library_logo_hash, library.updated_at, not_found="No logo.")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -157,14 +145,7 @@ def process_payment(request):
     )
 
     # ── Check whether the member has a stored photo ───────────────────────────
-    member_has_photo = False
-    if member:
-        raw_photo = getattr(member, "photo", None)
-        if raw_photo is not None:
-            try:
-                member_has_photo = len(bytes(raw_photo)) > 0
-            except Exception:
-                member_has_photo = False
+    member_has_photo = bool(member and member.has_photo)
 
     return render(request, "finance/process_payment.html", {
         "fine":                   fine,
@@ -226,50 +207,22 @@ def cash_payment(request):
             .filter(pk=fine.pk, status=Fine.STATUS_UNPAID)
         )
 
-    total_amount = fines_to_pay.aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-
-    if total_amount == Decimal("0.00"):
+    # Lock, total, receipt, Payment, fines and transactions — one atomic unit.
+    payment = settle_fines(
+        library,
+        fines_to_pay,
+        method       = method,
+        ref          = transaction_ref,
+        collected_by = request.user.get_full_name() or request.user.username,
+        primary_fine = fine,
+    )
+    if payment is None:
         messages.warning(request, "No unpaid fines to collect.")
         return redirect(
             reverse("finance:process_payment") + f"?fine_id={fine.fine_id}"
         )
-
-    # ── Create the Payment record ─────────────────────────────────────────────
-    receipt_number = generate_receipt_number(library)
-    is_online = method in (Payment.METHOD_ONLINE, Payment.METHOD_UPI, Payment.METHOD_CARD)
-
-    payment = Payment.objects.create(
-        fine               = fine,
-        amount             = total_amount,
-        method             = method,
-        status             = Payment.STATUS_SUCCESS,
-        receipt_number     = receipt_number,
-        collected_by       = request.user.get_full_name() or request.user.username,
-        library            = library,
-        transaction_date   = timezone.now(),
-        gateway_order_id   = transaction_ref if is_online else "",
-        gateway_payment_id = transaction_ref if is_online else "",
-    )
-
-    # ── Mark fines as paid + sync transactions ────────────────────────────────
-    txn_ids = list(fines_to_pay.values_list("transaction_id", flat=True))
-    today   = date.today()
-
-    fines_to_pay.update(
-        status         = Fine.STATUS_PAID,
-        paid_date      = today,
-        payment_method = method,
-        payment_ref    = transaction_ref or receipt_number,
-    )
-
-    try:
-        from transactions.models import Transaction
-        Transaction.objects.filter(pk__in=txn_ids).update(
-            fine_paid      = True,
-            fine_paid_date = today,
-        )
-    except Exception:
-        pass  # transactions app may not be installed in all envs
+    total_amount   = payment.amount
+    receipt_number = payment.receipt_number
 
     messages.success(
         request,
@@ -330,23 +283,12 @@ def payment_receipt(request, payment_id):
         or "Dooars Granthika"
     )
 
-    # Logo URL — only set when the library actually has binary logo data
-    raw_logo   = getattr(library, "library_logo", None) or getattr(library, "logo", None)
-    logo_bytes = bytes(raw_logo) if raw_logo is not None else b""
-    library_logo_url = (
-        request.build_absolute_uri(reverse("finance:library_logo"))
-        if logo_bytes else None
-    )
+    # Logo URL — only set when the library actually has a logo
+    logo_url = library.logo_url("md")
+    library_logo_url = request.build_absolute_uri(logo_url) if logo_url else None
 
     # Check if the member has a stored profile photo
-    member_has_photo = False
-    if member:
-        raw_photo = getattr(member, "photo", None)
-        if raw_photo is not None:
-            try:
-                member_has_photo = len(bytes(raw_photo)) > 0
-            except Exception:
-                pass
+    member_has_photo = bool(member and member.has_photo)
 
     return render(request, "finance/payment_receipt.html", {
         "payment":          payment,
@@ -454,6 +396,9 @@ def create_online_order(request):
             "amount":   amount_paise,
             "currency": "INR",
             "receipt":  fine.fine_id,
+            # Echoed on the payment entity, so the webhook can book a
+            # payment whose browser never reached payment_success.
+            "notes":    {"fine_id": fine.fine_id},
         })
 
         return JsonResponse({
@@ -462,6 +407,7 @@ def create_online_order(request):
             "key_id":   ps.key_id,
             "fine_id":  fine.fine_id,
             "member":   fine.member_name,
+            "notes":    {"fine_id": fine.fine_id},
         })
 
     except ImportError:
@@ -485,21 +431,37 @@ def payment_success(request):
     razorpay_payment_id = request.GET.get("razorpay_payment_id", "")
     fine_id             = request.GET.get("fine_id", "")
 
-    fine = get_object_or_404(Fine.objects.for_library(library), fine_id=fine_id)
-
-    receipt_number = generate_receipt_number(library)
-    payment = Payment.objects.create(
-        fine               = fine,
-        amount             = fine.amount,
-        method             = Payment.METHOD_ONLINE,
-        status             = Payment.STATUS_PENDING,
-        receipt_number     = receipt_number,
-        library            = library,
-        gateway_order_id   = razorpay_order_id,
-        gateway_payment_id = razorpay_payment_id,
-        collected_by       = request.user.get_full_name() or request.user.username,
-    )
-    payment.mark_success(gateway_payment_id=razorpay_payment_id)
+    with db_transaction.atomic():
+        # The Fine row lock serialises this callback with the webhook
+        # consumer, which books the same payment when the browser never
+        # gets here (webhook_inbox._handle_payment_captured).
+        fine = get_object_or_404(
+            Fine.objects.for_library(library).select_for_update(), fine_id=fine_id,
+        )
+
+        # A reloaded callback (or a webhook that got here first) must not
+        # book the same gateway payment twice.
+        if razorpay_payment_id:
+            existing = Payment.objects.filter(
+                library=library, gateway_payment_id=razorpay_payment_id,
+            ).first()
+            if existing is not None:
+                existing.mark_success()
+                return redirect("finance:payment_receipt", payment_id=existing.pk)
+
+        receipt_number = generate_receipt_number(library)
+        payment = Payment.objects.create(
+            fine               = fine,
+            amount             = fine.amount,
+            method             = Payment.METHOD_ONLINE,
+            status             = Payment.STATUS_PENDING,
+            receipt_number     = receipt_number,
+            library            = library,
+            gateway_order_id   = razorpay_order_id,
+            gateway_payment_id = razorpay_payment_id,
+            collected_by       = request.user.get_full_name() or request.user.username,
+        )
+        payment.mark_success(gateway_payment_id=razorpay_payment_id)
 
     return redirect("finance:payment_receipt", payment_id=payment.pk)
 
@@ -514,8 +476,12 @@ def razorpay_webhook(request, library_id):
     """
     Webhook endpoint: POST /finance/webhook/razorpay/<library_id>/
 
-    Verifies the Razorpay webhook signature (if webhook_secret is configured)
-    and transitions pending payments to SUCCESS on "payment.captured" events.
+    Verifies the Razorpay webhook signature (required once webhook_secret
+    is configured) and stores the event in the inbox (webhook_inbox.py);
+    settlement happens in the background consumer.
+
+    Answers 200 only once the event is stored.  A database error surfaces
+    as a 5xx so Razorpay redelivers; redeliveries are de-duplicated.
     """
     from accounts.models import Library
 
@@ -526,41 +492,11 @@ def razorpay_webhook(request, library_id):
         return HttpResponse(status=404)
 
     try:
-        payload   = json.loads(request.body)
-        signature = request.headers.get("X-Razorpay-Signature", "")
-
-        # Optional signature verification
-        if ps.webhook_secret and signature:
-            import hmac, hashlib
-            expected = hmac.new(
-                ps.webhook_secret.encode(),
-                request.body,
-                hashlib.sha256,
-            ).hexdigest()
-            if not hmac.compare_digest(expected, signature):
-                return HttpResponse(status=400)
-
-        event = payload.get("event", "")
-        if event == "payment.captured":
-            pid = payload["payload"]["payment"]["entity"]["id"]
-            updated = Payment.objects.filter(
-                gateway_payment_id = pid,
-                status             = Payment.STATUS_PENDING,
-            ).update(status=Payment.STATUS_SUCCESS)
-
-            if updated:
-                # Also mark associated fines as paid
-                payments = Payment.objects.filter(
-                    gateway_payment_id=pid, status=Payment.STATUS_SUCCESS
-                )
-                for p in payments:
-                    if p.fine_id:
-                        Fine.objects.filter(
-                            pk=p.fine_id, status=Fine.STATUS_UNPAID
-                        ).update(status=Fine.STATUS_PAID, paid_date=date.today())
-
-    except Exception:
-        pass  # never return 5xx to Razorpay
+        receive_event(library, request.body, request.headers, secret=ps.webhook_secret)
+    except InvalidSignature:
+        return HttpResponse(status=400)
+    except ValueError:  # includes json.JSONDecodeError
+        return HttpResponse(status=400)
 
     return HttpResponse(status=200)
 
@@ -601,16 +537,16 @@ def income_list(request):
     """
     Paginated list of all successful payments (income).
 
-    Filters: ?q= ?method= ?from_date= ?to_date= ?export=csv
+    Filters: ?q= ?method= ?from_date= ?to_date= ?cursor= ?per_page= ?export=csv
+
+    Pages are keyset pages on (transaction_date, id), newest first, so deep
+    pages cost the same as the first one; the CSV export is streamed.
     """
+    from transactions.pagination import bounded_per_page, keyset_page
+
     library = _get_library_or_404(request)
 
-    qs = (
-        Payment.objects
-        .filter(library=library, status=Payment.STATUS_SUCCESS)
-        .select_related("fine__transaction__member", "fine__transaction__book")
-        .order_by("-transaction_date")
-    )
+    qs = Payment.objects.filter(library=library, status=Payment.STATUS_SUCCESS)
 
     # ── Filters ───────────────────────────────────────────────────────────────
     method    = request.GET.get("method", "").strip()
@@ -625,13 +561,11 @@ def income_list(request):
     if to_date:
         qs = qs.filter(transaction_date__date__lte=to_date)
     if q:
-        qs = qs.filter(
-            Q(receipt_number__icontains=q)
-            | Q(member_name__icontains=q)
-            | Q(member_id_snapshot__icontains=q)
-            | Q(fine__transaction__member__first_name__icontains=q)
-            | Q(fine__transaction__member__last_name__icontains=q)
-        )
+        qs = search_payments(qs, q)
+
+    # ── CSV export ─────────────────────────────────────────────────────────────
+    if request.GET.get("export") == "csv":
+        return stream_csv("income.csv", INCOME_CSV_HEADER, income_csv_rows(qs))
 
     # ── Aggregate stats ───────────────────────────────────────────────────────
     stats = qs.aggregate(
@@ -647,36 +581,22 @@ def income_list(request):
     online_income = stats["online_income"] or Decimal("0.00")
     total_count   = stats["total_count"]   or 0
 
-    # ── CSV export ─────────────────────────────────────────────────────────────
-    if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="income.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["Date", "Receipt", "Member", "Member ID", "Book", "Fine Type", "Method", "Amount"])
-        for p in qs:
-            try:
-                m     = p.fine.transaction.member
-                mname = f"{m.first_name} {m.last_name}"
-                mid   = m.member_id
-                btitle = p.fine.transaction.book.title
-            except Exception:
-                mname  = p.member_name or ""
-                mid    = p.member_id_snapshot or ""
-                btitle = p.book_title or ""
-            writer.writerow([
-                p.transaction_date.strftime("%d %b %Y"),
-                p.receipt_number or "",
-                mname,
-                mid,
-                btitle,
-                p.fine_type_snapshot or "",
-                p.get_method_display(),
-                p.amount,
-            ])
-        return response
+    per_page = bounded_per_page(request.GET.get("per_page"), default=50)
+    payments = keyset_page(
+        qs.select_related("fine__transaction__member"),
+        request.GET.get("cursor", "").strip(),
+        per_page,
+        field="transaction_date",
+    )
+
+    # Query string without cursor / export — reused by the pagination links.
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    params.pop("export", None)
 
     return render(request, "finance/income_list.html", {
-        "payments":      qs,
+        "payments":      payments,
+        "query_base":    params.urlencode(),
         "total_income":  total_income,
         "cash_income":   cash_income,
         "online_income": online_income,
@@ -862,23 +782,10 @@ def finance_reports(request):
         .aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
     )
 
-    # ── 12-month bar chart data ───────────────────────────────────────────────
-    months       = _month_range(12)
-    labels       = []
-    monthly_data = []
-    for yr, mo in months:
-        labels.append(date(yr, mo, 1).strftime("%b %Y"))
-        amt = (
-            Payment.objects
-            .filter(
-                library  = library,
-                status   = Payment.STATUS_SUCCESS,
-                transaction_date__year  = yr,
-                transaction_date__month = mo,
-            )
-            .aggregate(t=Sum("amount"))["t"] or 0
-        )
-        monthly_data.append(float(amt))
+    # ── 12-month bar chart data (one grouped query, cached) ──────────────────
+    series       = get_finance_series(library)
+    labels       = [m.strftime("%b %Y") for m in series["months"]]
+    monthly_data = [float(v) for v in series["income_by_month"]]
 
     # ── CSV export ─────────────────────────────────────────────────────────────
     if request.GET.get("export") == "csv":
@@ -960,58 +867,24 @@ def cash_book(request):
     Chronological ledger showing all income (credits) and expenses (debits)
     with a running balance.
 
-    Supports CSV export: ?export=csv
-    """
-    library  = _get_library_or_404(request)
-
-    payments = (
-        Payment.objects
-        .filter(library=library, status=Payment.STATUS_SUCCESS)
-        .select_related("fine__transaction__member")
-        .order_by("transaction_date")
-    )
-    expenses = Expense.objects.filter(library=library).order_by("date")
-
-    # ── Build unified chronological entries list ───────────────────────────────
-    entries = []
-
-    for p in payments:
-        try:
-            m     = p.fine.transaction.member
-            mname = f"{m.first_name} {m.last_name}".strip()
-        except Exception:
-            mname = p.member_name or ""
-        entries.append({
-            "entry_type":  "credit",
-            "date":        p.transaction_date.date(),
-            "description": f"Fine payment — {mname}",
-            "amount":      p.amount,
-            "ref":         p.receipt_number or "",
-        })
-
-    for e in expenses:
-        entries.append({
-            "entry_type":  "debit",
-            "date":        e.date,
-            "description": e.description,
-            "amount":      e.amount,
-            "ref":         e.get_category_display() if e.category else "",
-        })
+    Reads the materialised CashBookEntry lines (see ledger.py): a page is a
+    slice of stored rows, and the totals come from the monthly checkpoints,
+    so the cost does not grow with the library's history.
 
-    entries.sort(key=lambda x: x["date"])
+    Filters: ?from_date= ?to_date= ?page=
+    Supports CSV export: ?export=csv (honours the date range)
+    """
+    library = _get_library_or_404(request)
+    ensure_ledger(library)
 
-    # ── Running balance ────────────────────────────────────────────────────────
-    balance = Decimal("0.00")
-    for entry in entries:
-        if entry["entry_type"] == "credit":
-            balance += entry["amount"]
-        else:
-            balance -= entry["amount"]
-        entry["running_balance"] = balance
+    qs = CashBookEntry.objects.filter(library=library).order_by("entry_date", "id")
 
-    total_credits   = sum(e["amount"] for e in entries if e["entry_type"] == "credit")
-    total_debits    = sum(e["amount"] for e in entries if e["entry_type"] == "debit")
-    closing_balance = total_credits - total_debits
+    from_date = _parse_date(request.GET.get("from_date", ""))
+    to_date   = _parse_date(request.GET.get("to_date",   ""))
+    if from_date:
+        qs = qs.filter(entry_date__gte=from_date)
+    if to_date:
+        qs = qs.filter(entry_date__lte=to_date)
 
     # ── CSV export ─────────────────────────────────────────────────────────────
     if request.GET.get("export") == "csv":
@@ -1019,15 +892,45 @@ def cash_book(request):
         response["Content-Disposition"] = 'attachment; filename="cash_book.csv"'
         writer = csv.writer(response)
         writer.writerow(["Date", "Type", "Description", "Reference", "Amount", "Running Balance"])
-        for e in entries:
+        for e in qs.iterator(chunk_size=2000):
             writer.writerow([
-                e["date"], e["entry_type"], e["description"],
-                e["ref"], e["amount"], e["running_balance"],
+                e.entry_date, e.entry_type, e.description,
+                e.ref, e.amount, e.running_balance,
             ])
         return response
 
+    # ── Totals ─────────────────────────────────────────────────────────────────
+    if from_date or to_date:
+        agg = qs.aggregate(
+            credits = Sum("amount", filter=Q(entry_type=CashBookEntry.TYPE_CREDIT)),
+            debits  = Sum("amount", filter=Q(entry_type=CashBookEntry.TYPE_DEBIT)),
+        )
+        opening_balance = balance_before(library, from_date) if from_date else Decimal("0.00")
+        total_credits   = agg["credits"] or Decimal("0.00")
+        total_debits    = agg["debits"]  or Decimal("0.00")
+        closing_balance = opening_balance + total_credits - total_debits
+    else:
+        totals          = ledger_totals(library)
+        opening_balance = Decimal("0.00")
+        total_credits   = totals["total_credits"]
+        total_debits    = totals["total_debits"]
+        closing_balance = totals["closing_balance"]
+
+    # Newest entries are usually what's wanted — default to the last page.
+    paginator = Paginator(qs, 50)
+    page_obj  = paginator.get_page(request.GET.get("page") or paginator.num_pages)
+
+    query = request.GET.copy()
+    query.pop("page", None)
+    query.pop("export", None)
+
     return render(request, "finance/cash_book.html", {
-        "entries":         entries,
+        "page_obj":        page_obj,
+        "entries":         page_obj.object_list,
+        "query_base":      query.urlencode(),
+        "from_date":       from_date,
+        "to_date":         to_date,
+        "opening_balance": opening_balance,
         "total_credits":   total_credits,
         "total_debits":    total_debits,
         "closing_balance": closing_balance,
@@ -1045,65 +948,31 @@ def profit_loss(request):
     """
     library = _get_library_or_404(request)
 
-    total_income = (
-        Payment.objects
-        .filter(library=library, status=Payment.STATUS_SUCCESS)
-        .aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-    )
-    total_expense = (
-        Expense.objects.filter(library=library)
-        .aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-    )
-    net_surplus = total_income - total_expense
+    # Totals, breakdowns and the 12-month chart all come from the cached
+    # series — three grouped queries in total (see timeseries.py).
+    series        = get_finance_series(library)
+    total_income  = series["total_income"]
+    total_expense = series["total_expense"]
+    net_surplus   = total_income - total_expense
 
     # ── Income breakdown by fine type ─────────────────────────────────────────
-    income_breakdown = []
-    for ftype, label in Fine.FINE_TYPE_CHOICES:
-        amt = (
-            Fine.objects
-            .for_library(library)
-            .filter(fine_type=ftype, status=Fine.STATUS_PAID)
-            .aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-        )
-        if amt > 0:
-            income_breakdown.append({"label": label, "amount": amt})
+    income_breakdown = [
+        {"label": label, "amount": series["income_by_fine_type"][ftype]}
+        for ftype, label in Fine.FINE_TYPE_CHOICES
+        if series["income_by_fine_type"].get(ftype, 0) > 0
+    ]
 
     # ── Expense breakdown by category ─────────────────────────────────────────
-    expense_breakdown = []
-    for cat, label in Expense.CATEGORY_CHOICES:
-        amt = (
-            Expense.objects
-            .filter(library=library, category=cat)
-            .aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-        )
-        if amt > 0:
-            expense_breakdown.append({"label": label, "amount": amt})
+    expense_breakdown = [
+        {"label": label, "amount": series["expense_by_category"][cat]}
+        for cat, label in Expense.CATEGORY_CHOICES
+        if series["expense_by_category"].get(cat, 0) > 0
+    ]
 
     # ── 12-month chart data ───────────────────────────────────────────────────
-    months         = _month_range(12)
-    chart_labels   = []
-    chart_income   = []
-    chart_expenses = []
-
-    for yr, mo in months:
-        chart_labels.append(date(yr, mo, 1).strftime("%b %Y"))
-        inc = (
-            Payment.objects
-            .filter(
-                library  = library,
-                status   = Payment.STATUS_SUCCESS,
-                transaction_date__year  = yr,
-                transaction_date__month = mo,
-            )
-            .aggregate(t=Sum("amount"))["t"] or 0
-        )
-        exp = (
-            Expense.objects
-            .filter(library=library, date__year=yr, date__month=mo)
-            .aggregate(t=Sum("amount"))["t"] or 0
-        )
-        chart_income.append(float(inc))
-        chart_expenses.append(float(exp))
+    chart_labels   = [m.strftime("%b %Y") for m in series["months"]]
+    chart_income   = [float(v) for v in series["income_by_month"]]
+    chart_expenses = [float(v) for v in series["expense_by_month"]]
 
     return render(request, "finance/profit_loss.html", {
         "total_income":      total_income,
@@ -1152,50 +1021,12 @@ def audit_log(request):
     if status:
         qs = qs.filter(status=status)
     if q:
-        qs = qs.filter(
-            Q(receipt_number__icontains=q)
-            | Q(gateway_payment_id__icontains=q)
-            | Q(collected_by__icontains=q)
-            | Q(member_name__icontains=q)
-            | Q(member_id_snapshot__icontains=q)
-            | Q(book_title__icontains=q)
-            | Q(fine__transaction__member__first_name__icontains=q)
-            | Q(fine__transaction__member__last_name__icontains=q)
-            | Q(fine__transaction__member__member_id__icontains=q)
-            | Q(fine__transaction__book__title__icontains=q)
-        )
+        # One predicate on the maintained search document (see search.py).
+        qs = search_payments(qs, q)
 
     # ── CSV export ─────────────────────────────────────────────────────────────
     if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="audit_log.csv"'
-        writer = csv.writer(response)
-        writer.writerow([
-            "Date", "Time", "Receipt/ID", "Member", "Member ID",
-            "Book", "Method", "Collected By", "Status", "Amount",
-        ])
-        for p in qs:
-            try:
-                member = p.fine.transaction.member
-                book   = p.fine.transaction.book
-                mname  = f"{member.first_name} {member.last_name}"
-                mid    = member.member_id
-                btitle = book.title
-            except Exception:
-                mname  = p.member_name or ""
-                mid    = p.member_id_snapshot or ""
-                btitle = p.book_title or ""
-            writer.writerow([
-                p.transaction_date.strftime("%d %b %Y"),
-                p.transaction_date.strftime("%H:%M"),
-                p.receipt_number or p.gateway_payment_id or "",
-                mname, mid, btitle,
-                p.get_method_display(),
-                p.collected_by or "",
-                p.status,
-                p.amount,
-            ])
-        return response
+        return stream_csv("audit_log.csv", AUDIT_CSV_HEADER, audit_csv_rows(qs))
 
     # ── Aggregate stats for the summary strip ─────────────────────────────────
     all_stats = qs.aggregate(
@@ -0,0 +1,331 @@
+# finance/webhook_inbox.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Gateway webhook inbox: persist first, process later.
+#
+#   receive_event(library, body, headers) — called by razorpay_webhook: one
+#                                           INSERT (duplicate event IDs are
+#                                           ignored), then acknowledge
+#   process_pending(batch_size)           — consume due rows in batches
+#   start_consumer()                      — background thread, started from
+#                                           FinanceConfig.ready()
+#   sign_payload(secret, …)               — local signed test deliveries
+#
+# Delivery guarantees
+# ───────────────────
+#   • The view's cost is one INSERT, however much work the event implies,
+#     and it only returns 200 once that INSERT succeeded — on a DB error
+#     Razorpay gets a 5xx and redelivers, so no event is lost.
+#   • Events are keyed by (provider, X-Razorpay-Event-Id); a redelivery of
+#     an already-stored event is a no-op.  Handlers are idempotent too
+#     (finance/settlement.py), so a retried event never settles twice.
+#   • A failed event is retried with exponential backoff
+#     (WEBHOOK_RETRY_BASE_SECONDS × 2^attempts, capped at one hour) and
+#     parked as FAILED after WEBHOOK_MAX_ATTEMPTS for manual inspection.
+#     ManualReview parks it as FAILED straight away.
+#
+# Trust
+# ─────
+#   • A payment with no local Payment row (checkout callback never ran) is
+#     booked from the order's notes.fine_id — but only from an event whose
+#     signature was verified, and only when the captured amount in INR
+#     covers the fine.  Otherwise nothing is settled: unsigned events wait
+#     for the callback (RetryLater), short / foreign-currency captures are
+#     left for manual review.
+#   • Rows are claimed with SELECT … FOR UPDATE SKIP LOCKED where the
+#     backend supports it, so several consumers can run side by side.
+#
+# The consumer thread wakes every WEBHOOK_CONSUMER_INTERVAL seconds, or
+# immediately after the webhook view commits a new event.  Deployments
+# that prefer a separate worker can run `manage.py process_webhook_events`.
+#
+# Override in settings.py:
+#     WEBHOOK_CONSUMER_INTERVAL  = 5    # seconds between idle polls
+#     WEBHOOK_BATCH_SIZE         = 100  # events per batch
+#     WEBHOOK_MAX_ATTEMPTS       = 8
+#     WEBHOOK_RETRY_BASE_SECONDS = 30
+# ─────────────────────────────────────────────────────────────────────────────
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .models import Fine, Payment, WebhookEvent, generate_receipt_number
+from .settlement import settle_pending_payments
+
+logger = logging.getLogger("finance.webhook_inbox")
+
+WEBHOOK_CONSUMER_INTERVAL:  int = int(getattr(settings, "WEBHOOK_CONSUMER_INTERVAL", 5))
+WEBHOOK_BATCH_SIZE:         int = int(getattr(settings, "WEBHOOK_BATCH_SIZE", 100))
+WEBHOOK_MAX_ATTEMPTS:       int = int(getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 8))
+WEBHOOK_RETRY_BASE_SECONDS: int = int(getattr(settings, "WEBHOOK_RETRY_BASE_SECONDS", 30))
+
+_MAX_RETRY_DELAY = 60 * 60
+
+
+class InvalidSignature(Exception):
+    pass
+
+
+class RetryLater(Exception):
+    """The event can't be applied yet (e.g. its payment isn't recorded)."""
+
+
+class ManualReview(Exception):
+    """The event must not be applied automatically — park it as FAILED."""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Receive
+# ─────────────────────────────────────────────────────────────────────────────
+
+def signature_for(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def receive_event(library, body: bytes, headers, secret: str = "") -> None:
+    """
+    Verify and store one delivery (a redelivered event ID is ignored).
+
+    Raises InvalidSignature for a bad / missing signature when *secret* is
+    set, and ValueError for a body that isn't a JSON object.  Database
+    errors propagate so the caller answers 5xx and the gateway redelivers.
+    """
+    if secret:
+        signature = headers.get("X-Razorpay-Signature", "")
+        if not signature or not hmac.compare_digest(signature_for(secret, body), signature):
+            raise InvalidSignature
+
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("webhook body is not a JSON object")
+
+    # Razorpay sends a unique ID per event (stable across redeliveries);
+    # fall back to the body digest for senders that don't.
+    event_id = headers.get("X-Razorpay-Event-Id", "") or hashlib.sha256(body).hexdigest()
+
+    WebhookEvent.objects.bulk_create(
+        [WebhookEvent(
+            library    = library,
+            provider   = WebhookEvent.PROVIDER_RAZORPAY,
+            event_id   = event_id[:100],
+            event_type = str(payload.get("event", ""))[:60],
+            payload    = payload,
+            signature_verified = bool(secret),
+        )],
+        ignore_conflicts=True,
+    )
+    db_transaction.on_commit(_wake.set)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Handlers — each must be idempotent
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _payment_entity(event: WebhookEvent) -> dict:
+    return (event.payload.get("payload") or {}).get("payment", {}).get("entity") or {}
+
+
+def _handle_payment_captured(event: WebhookEvent) -> None:
+    entity = _payment_entity(event)
+    pid    = entity.get("id", "")
+    if not pid:
+        return
+
+    if settle_pending_payments(event.library_id, gateway_payment_id=pid):
+        return
+    if Payment.objects.filter(
+        library_id=event.library_id, gateway_payment_id=pid, status=Payment.STATUS_SUCCESS,
+    ).exists():
+        return  # already settled (callback or an earlier delivery)
+
+    # No local Payment — the member closed the browser before the success
+    # callback.  Orders carry the fine_id in their notes; book it from here.
+    fine_id = (entity.get("notes") or {}).get("fine_id", "")
+    if not fine_id:
+        raise RetryLater(f"no payment recorded for {pid}")
+    if not event.signature_verified:
+        # Without a webhook secret anyone can POST here — an unsigned event
+        # may only confirm a Payment the checkout callback recorded itself.
+        raise RetryLater(f"unsigned event: no payment recorded for {pid}")
+
+    with db_transaction.atomic():
+        fine = (
+            Fine.objects.select_for_update()
+            .filter(library_id=event.library_id, fine_id=fine_id)
+            .first()
+        )
+        if fine is None:
+            raise RetryLater(f"fine {fine_id} not found for {pid}")
+        amount   = Decimal(entity.get("amount") or 0) / 100
+        currency = entity.get("currency") or ""
+        if currency != "INR" or amount < fine.amount:
+            raise ManualReview(
+                f"{pid} captured {amount} {currency or '(no currency)'} for fine {fine_id} of {fine.amount} INR"
+            )
+        if not Payment.objects.filter(library_id=event.library_id, gateway_payment_id=pid).exists():
+            Payment.objects.create(
+                library_id         = event.library_id,
+                fine               = fine,
+                amount             = amount,
+                method             = Payment.METHOD_ONLINE,
+                status             = Payment.STATUS_PENDING,
+                receipt_number     = generate_receipt_number(event.library),
+                gateway_order_id   = entity.get("order_id", "") or "",
+                gateway_payment_id = pid,
+                collected_by       = "Razorpay webhook",
+            )
+        settle_pending_payments(event.library_id, gateway_payment_id=pid)
+
+
+HANDLERS = {
+    "payment.captured": _handle_payment_captured,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Consume
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1), _MAX_RETRY_DELAY))
+
+
+def _process_one(event: WebhookEvent) -> bool:
+    """Run *event*'s handler; record success or schedule a retry."""
+    handler = HANDLERS.get(event.event_type)
+    now = timezone.now()
+    event.attempts += 1
+    try:
+        if handler is not None:
+            with db_transaction.atomic():
+                handler(event)
+    except Exception as exc:
+        event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        if isinstance(exc, ManualReview):
+            event.status = WebhookEvent.STATUS_FAILED
+            logger.error("webhook %s needs manual review: %s", event.event_id, event.last_error)
+        elif event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+            event.status = WebhookEvent.STATUS_FAILED
+            logger.error("webhook %s gave up after %d attempt(s): %s",
+                         event.event_id, event.attempts, event.last_error)
+        else:
+            event.next_attempt_at = now + _retry_delay(event.attempts)
+            log = logger.info if isinstance(exc, RetryLater) else logger.warning
+            log("webhook %s attempt %d failed, retry at %s: %s",
+                event.event_id, event.attempts, event.next_attempt_at, event.last_error)
+        event.save(update_fields=["attempts", "status", "next_attempt_at", "last_error"])
+        return False
+
+    event.status       = WebhookEvent.STATUS_PROCESSED
+    event.processed_at = now
+    event.last_error   = ""
+    event.save(update_fields=["attempts", "status", "processed_at", "last_error"])
+    return True
+
+
+def process_pending(batch_size: int = None) -> int:
+    """
+    Process one batch of due events.  Returns how many were claimed —
+    handled or rescheduled; call again while it returns a full batch.
+    """
+    batch_size = batch_size or WEBHOOK_BATCH_SIZE
+    due = (
+        WebhookEvent.objects
+        .filter(status=WebhookEvent.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+        .order_by("next_attempt_at", "id")
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+
+    with db_transaction.atomic():
+        # Claimed rows stay locked until the batch commits, so a second
+        # consumer skips them instead of double-processing.
+        batch = list(due[:batch_size])
+        for event in batch:
+            _process_one(event)
+    return len(batch)
+
+
+def drain(batch_size: int = None) -> int:
+    """Process batches until nothing is due.  Returns the events claimed."""
+    batch_size = batch_size or WEBHOOK_BATCH_SIZE
+    total = 0
+    while True:
+        claimed = process_pending(batch_size)
+        total  += claimed
+        if claimed < batch_size:
+            return total
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Background thread
+# ─────────────────────────────────────────────────────────────────────────────
+
+_wake    = threading.Event()
+_lock    = threading.Lock()
+_started = False
+
+
+def _consumer_loop() -> None:
+    logger.info("webhook_inbox: consumer started (PID %s, interval %ss).",
+                os.getpid(), WEBHOOK_CONSUMER_INTERVAL)
+    while True:
+        _wake.wait(WEBHOOK_CONSUMER_INTERVAL)
+        _wake.clear()
+        try:
+            drain()
+        except Exception as exc:
+            logger.exception("webhook_inbox: unexpected error in consumer loop: %s", exc)
+        finally:
+            connection.close()
+
+
+def start_consumer() -> None:
+    """Start the consumer thread (safe to call multiple times)."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_consumer_loop, name="webhook-consumer", daemon=True).start()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Local testing
+# ─────────────────────────────────────────────────────────────────────────────
+
+def sign_payload(secret: str, payment_id: str, *, amount_paise: int = 0, fine_id: str = "",
+                 order_id: str = "", event: str = "payment.captured", event_id: str = ""):
+    """
+    Build a Razorpay-shaped delivery: returns (body_bytes, headers) with a
+    valid X-Razorpay-Signature for *secret* and a fresh event ID.
+    """
+    body = json.dumps({
+        "entity":   "event",
+        "event":    event,
+        "payload":  {"payment": {"entity": {
+            "id":       payment_id,
+            "entity":   "payment",
+            "amount":   amount_paise,
+            "currency": "INR",
+            "status":   "captured",
+            "order_id": order_id,
+            "method":   "upi",
+            "notes":    {"fine_id": fine_id} if fine_id else {},
+        }}},
+        "created_at": int(timezone.now().timestamp()),
+    }).encode()
+    headers = {"X-Razorpay-Event-Id": event_id or f"evt_{uuid.uuid4().hex[:14]}"}
+    if secret:
+        headers["X-Razorpay-Signature"] = signature_for(secret, body)
+    return body, headers
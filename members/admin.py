@@ -123,7 +123,7 @@ class MemberAdmin(OwnerScopedMixin, admin.ModelAdmin):
         "roll_number",
     ]
     ordering = ["-date_joined"]
-    readonly_fields = ["date_joined", "created_at", "updated_at"]
+    readonly_fields = ["date_joined", "photo_hash", "created_at", "updated_at"]
 
     fieldsets = (
         (
@@ -145,7 +145,7 @@ class MemberAdmin(OwnerScopedMixin, admin.ModelAdmin):
                     "date_of_birth",
                     "gender",
                     "address",
-                    "photo",
+                    "photo_hash",
                 )
             },
         ),
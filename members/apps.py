@@ -6,4 +6,9 @@ from django.apps import AppConfig
 class MembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'members'
-    verbose_name = 'Members Management'
\ No newline at end of file
+    verbose_name = 'Members Management'
+
+    def ready(self):
+        # Cached member statistics are dropped on every Member / Department write.
+        from . import signals
+        signals.connect()
@@ -0,0 +1,339 @@
+"""
+members/bulk_clearance.py
+─────────────────────────
+Clearance for a whole graduating batch at once.
+
+    select_batch(library, passout_year=…, department=…, course=…)
+    evaluate_batch(library, members)        → eligible pks + blocked, grouped by reason
+    clear_batch(library, members, user)     → mark every eligible member cleared / passout
+    render_certificates(contexts, fmt, …)   → one ZIP (a PDF per member) or one merged PDF
+    start_certificate_job(library, pks, fmt) / job_status(library, job_id)
+    prune_exports()                         → delete export files past CLEARANCE_JOB_TTL
+
+A batch is always one passout year — clearing moves members to passout,
+so a department or course alone would sweep up current students with
+nothing borrowed.  Department and course only narrow the year down.
+
+Evaluation is a single query for the whole batch — the obligation columns
+from members/clearance.py — and clearing is two UPDATEs, so a batch of
+hundreds costs the same handful of statements as a batch of one.
+
+Certificates are rendered from plain certificate_context() dicts (read in
+one query), so the ZIP can be built by a pool of worker processes that
+never touch the database.  A merged PDF is laid out as one ReportLab
+document (finished PDFs cannot be concatenated without an extra
+dependency), reporting progress page by page.
+
+Jobs started from the web run in a background thread of the requesting
+process; progress lives in the Django cache and the finished file in
+CLEARANCE_EXPORT_DIR, so the cache must be shared between web workers
+(as it already is for the other per-library caches).  Both expire after
+CLEARANCE_JOB_TTL: the cache entry by its timeout, the file when a later
+job starts (prune_exports()).
+
+Override in settings.py:
+    CLEARANCE_RENDER_WORKERS = 4      # processes; 0 / 1 renders in-process
+    CLEARANCE_RENDER_CHUNK   = 16     # certificates per worker task
+    CLEARANCE_EXPORT_DIR     = "/var/tmp/dg_clearance"
+    CLEARANCE_JOB_TTL        = 3600   # seconds a job's status and file are kept
+"""
+
+import functools
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .clearance import with_obligations
+from .models import Member
+from .stats import invalidate_member_stats
+
+logger = logging.getLogger("members.bulk_clearance")
+
+CLEARANCE_RENDER_WORKERS: int = int(getattr(settings, "CLEARANCE_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+CLEARANCE_RENDER_CHUNK:   int = int(getattr(settings, "CLEARANCE_RENDER_CHUNK", 16))
+CLEARANCE_EXPORT_DIR:     str = getattr(
+    settings, "CLEARANCE_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "dg_clearance"),
+)
+CLEARANCE_JOB_TTL:        int = int(getattr(settings, "CLEARANCE_JOB_TTL", 3600))
+
+FORMATS = ("zip", "pdf")
+
+# Blocking reason → label.  A member can appear under several.
+BLOCKING_REASONS = {
+    "active_loans": "Unreturned / overdue books",
+    "lost_items":   "Lost books",
+    "unpaid_fines": "Unpaid fines",
+}
+
+_PK_CHUNK = 500   # keep IN (…) lists under SQLite's variable limit
+
+
+def _chunks(seq, size):
+    for start in range(0, len(seq), size):
+        yield seq[start:start + size]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Select / evaluate / clear
+# ─────────────────────────────────────────────────────────────────────────────
+
+def select_batch(library, *, passout_year, department=None, course=None):
+    """Members of *library* graduating in *passout_year*, optionally one department / course."""
+    if not passout_year:
+        raise ValueError("A graduating batch needs a passout year.")
+    members = Member.objects.cards().filter(owner_id=library.user_id, passout_year=passout_year)
+    if department:
+        members = members.filter(department_id=department)
+    if course:
+        members = members.filter(course_id=course)
+    return members
+
+
+def evaluate_batch(library, members) -> dict:
+    """
+    One query over *members*:
+
+        {
+          "total":    int,
+          "eligible": [pk, …],                  # nothing owed
+          "already_cleared": int,               # of those, cleared earlier
+          "blocked":  {reason: [row, …], …},    # keys of BLOCKING_REASONS
+          "blocked_count": int,
+        }
+
+    Rows are dicts with pk, member_id, name and the figures that block.
+    """
+    rows = with_obligations(members.order_by("member_id"), library).values(
+        "pk", "member_id", "first_name", "last_name", "clearance_status",
+        "pending_books", "pending_lost", "total_fine",
+    )
+
+    eligible, blocked_pks = [], set()
+    blocked = {reason: [] for reason in BLOCKING_REASONS}
+    total = already_cleared = 0
+    for row in rows:
+        total += 1
+        row["name"] = f"{row.pop('first_name')} {row.pop('last_name')}".strip()
+        reasons = {
+            "active_loans": row["pending_books"] > 0,
+            "lost_items":   row["pending_lost"] > 0,
+            "unpaid_fines": row["total_fine"] > 0,
+        }
+        if not any(reasons.values()):
+            eligible.append(row["pk"])
+            already_cleared += row["clearance_status"] == "cleared"
+            continue
+        blocked_pks.add(row["pk"])
+        for reason, blocks in reasons.items():
+            if blocks:
+                blocked[reason].append(row)
+
+    return {
+        "total":           total,
+        "eligible":        eligible,
+        "already_cleared": already_cleared,
+        "blocked":         blocked,
+        "blocked_count":   len(blocked_pks),
+    }
+
+
+def clear_batch(library, members, user) -> dict:
+    """
+    Re-evaluate *members* under row locks and mark every eligible one
+    cleared and moved to passout, as issue_clearance does for one member.
+    Returns the evaluation the update was based on.
+    """
+    now = timezone.now()
+    with db_transaction.atomic():
+        pks = list(
+            Member.objects.filter(pk__in=members.values("pk"))
+            .select_for_update().order_by("pk").values_list("pk", flat=True)
+        )
+        evaluation = evaluate_batch(library, Member.objects.filter(pk__in=pks))
+        for chunk in _chunks(evaluation["eligible"], _PK_CHUNK):
+            Member.objects.filter(pk__in=chunk).exclude(clearance_status="cleared").update(
+                clearance_status = "cleared",
+                clearance_date   = now,
+                cleared_by       = user,
+            )
+            # Member.save() clears the inactive_* fields on any non-inactive status.
+            Member.objects.filter(pk__in=chunk).update(
+                status          = "passout",
+                inactive_since  = None,
+                inactive_reason = None,
+                updated_at      = now,
+            )
+    # .update() sends no signals — drop the cached member statistics.
+    invalidate_member_stats(library.user_id)
+    logger.info("bulk clearance: library %s cleared %d of %d member(s).",
+                library.pk, len(evaluation["eligible"]), evaluation["total"])
+    return evaluation
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Certificates
+# ─────────────────────────────────────────────────────────────────────────────
+
+def certificate_contexts(library, member_pks) -> list:
+    """certificate_context() for every cleared member in *member_pks*."""
+    from .clearance_certificate import certificate_context
+
+    contexts = []
+    for chunk in _chunks(list(member_pks), _PK_CHUNK):
+        members = (
+            Member.objects   # not cards(): the certificate prints specialization
+            .filter(owner_id=library.user_id, pk__in=chunk, clearance_status="cleared")
+            .select_related("department", "cleared_by")
+        )
+        contexts += [certificate_context(m, library) for m in members]
+    contexts.sort(key=lambda ctx: ctx["member_id"])
+    return contexts
+
+
+def _rendered(contexts, workers):
+    """Yield (pdf_bytes, filename) per context, in order."""
+    from .clearance_certificate import _load_logo, render_chunk, renderer
+
+    chunks = list(_chunks(contexts, CLEARANCE_RENDER_CHUNK))
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from renderer.render_many(chunk)
+        return
+
+    # "spawn": the caller may be a threaded web process, where fork() is unsafe.
+    # Workers import only members.clearance_certificate (ReportLab, no Django),
+    # so logos are read here once and shipped with every task.
+    logos = {digest: _load_logo(digest) for digest in {ctx.get("logo_hash") for ctx in contexts} if digest}
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        for results in pool.map(functools.partial(render_chunk, logos=logos), chunks):
+            yield from results
+
+
+def render_certificates(contexts, fmt: str = "zip", *, progress=None, workers: int = None) -> bytes:
+    """
+    Render *contexts* into a ZIP of PDFs or one merged PDF (*fmt* "pdf").
+    *progress(done, total)* is called as certificates complete.
+    """
+    from .clearance_certificate import render_merged
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown certificate format {fmt!r}.")
+    total  = len(contexts)
+    report = progress or (lambda done, total: None)
+    workers = CLEARANCE_RENDER_WORKERS if workers is None else workers
+
+    if fmt == "pdf":
+        data = render_merged(contexts, on_page=lambda page: report(min(page, total), total))
+        report(total, total)
+        return data
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for done, (pdf, filename) in enumerate(_rendered(contexts, workers), start=1):
+            zf.writestr(filename, pdf)
+            report(done, total)
+    report(total, total)
+    return buf.getvalue()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Background jobs
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _job_key(job_id: str) -> str:
+    return f"dg:clearance:job:{job_id}"
+
+
+def _update_job(job_id: str, **changes) -> None:
+    job = cache.get(_job_key(job_id)) or {}
+    job.update(changes)
+    cache.set(_job_key(job_id), job, CLEARANCE_JOB_TTL)
+
+
+def export_path(job_id: str, fmt: str) -> str:
+    return os.path.join(CLEARANCE_EXPORT_DIR, f"clearance_{job_id}.{fmt}")
+
+
+def prune_exports(max_age: int = None) -> int:
+    """Delete export files older than *max_age* seconds (CLEARANCE_JOB_TTL). Returns how many."""
+    max_age = CLEARANCE_JOB_TTL if max_age is None else max_age
+    cutoff  = timezone.now().timestamp() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(CLEARANCE_EXPORT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not (entry.name.startswith("clearance_") and entry.name.endswith(tuple(f".{f}" for f in FORMATS))):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as exc:
+            logger.warning("bulk clearance: could not prune %s: %s", entry.path, exc)
+    return removed
+
+
+def _run_job(job_id: str, contexts: list, fmt: str) -> None:
+    try:
+        data = render_certificates(
+            contexts, fmt, progress=lambda done, total: _update_job(job_id, done=done),
+        )
+        os.makedirs(CLEARANCE_EXPORT_DIR, exist_ok=True)
+        with open(export_path(job_id, fmt), "wb") as fh:
+            fh.write(data)
+        _update_job(job_id, state="done", done=len(contexts))
+    except Exception as exc:
+        logger.exception("bulk clearance: certificate job %s failed", job_id)
+        _update_job(job_id, state="failed", error=str(exc))
+
+
+def start_certificate_job(library, member_pks, fmt: str = "zip", *, background: bool = True) -> str:
+    """
+    Render certificates for *member_pks* and return a job ID for
+    job_status().  *background=False* renders before returning.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown certificate format {fmt!r}.")
+    prune_exports()   # files of jobs whose status has expired
+    job_id   = uuid.uuid4().hex
+    contexts = certificate_contexts(library, member_pks)
+    cache.set(_job_key(job_id), {
+        "library": library.pk,
+        "state":   "running",
+        "format":  fmt,
+        "done":    0,
+        "total":   len(contexts),
+        "error":   "",
+    }, CLEARANCE_JOB_TTL)
+
+    if background:
+        threading.Thread(
+            target=_run_job, args=(job_id, contexts, fmt), name=f"clearance-{job_id[:8]}", daemon=True,
+        ).start()
+    else:
+        _run_job(job_id, contexts, fmt)
+    return job_id
+
+
+def job_status(library, job_id: str):
+    """The job dict for *job_id* if it belongs to *library*, else None."""
+    job = cache.get(_job_key(job_id))
+    if not job or job.get("library") != library.pk:
+        return None
+    return job
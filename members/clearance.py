@@ -0,0 +1,155 @@
+"""
+members/clearance.py
+────────────────────
+Clearance obligations computed in SQL.
+
+    with_obligations(members, library)          → annotated Member queryset
+    obligations_for(member, library)            → the same figures for one member
+    pending_clearance_members(library, …)       → filtered for the pending page
+    pending_clearance_stats(members)            → one aggregate for the cards
+
+Every figure comes from the authoritative tables — transactions.Transaction
+and finance.Fine, scoped by library — as a correlated subquery per column,
+so a page of 20 members costs one COUNT and one SELECT however many
+members are pending:
+
+    pending_books    issued + overdue loans
+    pending_lost     lost loans
+    pending_damages  unpaid damage fines
+    total_fine       SUM of unpaid fines (overdue + damage + lost-book)
+    oldest_issue     issue_date of the oldest open loan (NULL when none)
+    days_pending     today − oldest_issue (0 when nothing is on loan)
+    priority         "high" (> 30 days) / "medium" (> 15) / "low"
+
+Filtering, ordering and pagination all happen in the database.
+
+Override in settings.py:
+    CLEARANCE_PRIORITY_HIGH_DAYS   = 30
+    CLEARANCE_PRIORITY_MEDIUM_DAYS = 15
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import (
+    Case, CharField, Count, DateField, DecimalField, IntegerField, Min, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+
+CLEARANCE_PRIORITY_HIGH_DAYS:   int = int(getattr(settings, "CLEARANCE_PRIORITY_HIGH_DAYS", 30))
+CLEARANCE_PRIORITY_MEDIUM_DAYS: int = int(getattr(settings, "CLEARANCE_PRIORITY_MEDIUM_DAYS", 15))
+
+ISSUE_TYPES = ("books", "fines", "damages", "lost")
+PRIORITIES  = ("high", "medium", "low")
+
+_ZERO  = Decimal("0.00")
+_MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _per_member(qs, member_field, aggregate, output_field):
+    """Correlated *aggregate* of *qs* (already filtered to OuterRef("pk"))."""
+    return Subquery(
+        qs.order_by().values(member_field).annotate(v=aggregate).values("v")[:1],
+        output_field=output_field,
+    )
+
+
+def with_obligations(members, library, today=None):
+    """Annotate *members* (a Member queryset) with the columns listed above."""
+    from finance.models import Fine
+    from transactions.models import Transaction, _DaysBetween
+
+    today = today or date.today()
+    zero  = Value(0, output_field=IntegerField())
+
+    loans      = Transaction.objects.for_library(library).filter(member=OuterRef("pk"))
+    open_loans = loans.filter(status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE))
+    fines      = Fine.objects.for_library(library).filter(
+        transaction__member=OuterRef("pk"), status=Fine.STATUS_UNPAID,
+    )
+
+    def loan_count(qs):
+        return Coalesce(_per_member(qs, "member", Count("pk"), IntegerField()), zero)
+
+    members = members.annotate(
+        pending_books   = loan_count(open_loans),
+        pending_lost    = loan_count(loans.filter(status=Transaction.STATUS_LOST)),
+        pending_damages = Coalesce(
+            _per_member(fines.filter(fine_type=Fine.FINE_TYPE_DAMAGE), "transaction__member",
+                        Count("pk"), IntegerField()),
+            zero,
+        ),
+        total_fine      = Coalesce(
+            _per_member(fines, "transaction__member", Sum("amount"), _MONEY),
+            Value(_ZERO, output_field=_MONEY), output_field=_MONEY,
+        ),
+        oldest_issue    = _per_member(open_loans, "member", Min("issue_date"), DateField()),
+    )
+    return members.annotate(
+        days_pending = Coalesce(_DaysBetween(Value(today, output_field=DateField()), "oldest_issue"), zero),
+    ).annotate(
+        priority = Case(
+            When(days_pending__gt=CLEARANCE_PRIORITY_HIGH_DAYS, then=Value("high")),
+            When(days_pending__gt=CLEARANCE_PRIORITY_MEDIUM_DAYS, then=Value("medium")),
+            default=Value("low"),
+            output_field=CharField(),
+        ),
+    )
+
+
+def obligations_for(member, library) -> dict:
+    """{pending_books, pending_lost, pending_damages, total_fine} in one query."""
+    from .models import Member
+
+    fields = ("pending_books", "pending_lost", "pending_damages", "total_fine")
+    row = with_obligations(Member.objects.filter(pk=member.pk), library).values(*fields).first()
+    return row or dict.fromkeys(fields, 0) | {"total_fine": _ZERO}
+
+
+def pending_clearance_members(library, *, department=None, issue_type: str = "",
+                              priority: str = "", today=None):
+    """
+    Members of *library* awaiting clearance who still owe something,
+    optionally narrowed by department, issue type (ISSUE_TYPES) and
+    priority bucket (PRIORITIES).  Unknown filter values are ignored.
+    """
+    from .models import Member
+
+    members = with_obligations(
+        Member.objects.cards()
+        .filter(owner_id=library.user_id, clearance_status="pending")
+        .select_related("department"),
+        library,
+        today,
+    ).filter(Q(pending_books__gt=0) | Q(total_fine__gt=0) | Q(pending_lost__gt=0))
+
+    if department:
+        try:
+            members = members.filter(department_id=int(department))
+        except (TypeError, ValueError):
+            pass
+
+    members = members.filter(**{
+        "books":   {"pending_books__gt": 0},
+        "fines":   {"total_fine__gt": 0},
+        "damages": {"pending_damages__gt": 0},
+        "lost":    {"pending_lost__gt": 0},
+    }.get(issue_type, {}))
+
+    if priority in PRIORITIES:
+        members = members.filter(priority=priority)
+    return members
+
+
+def pending_clearance_stats(members) -> dict:
+    """Totals for the summary cards over an (already filtered) queryset."""
+    agg = members.order_by().aggregate(
+        unreturned_books = Sum("pending_books"),
+        total_fines      = Sum("total_fine"),
+    )
+    return {
+        "unreturned_books": agg["unreturned_books"] or 0,
+        "total_fines":      round(float(agg["total_fines"] or 0), 2),
+    }
@@ -14,6 +14,17 @@ Usage (from views.py):
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
+Bulk issuance renders from certificate_context() dicts instead
+(see members/bulk_clearance.py):
+
+    renderer.render_many(contexts)      → [(pdf_bytes, filename), …]
+
+Rendering goes through one CertificateRenderer per process, which builds
+the paragraph styles and decodes the footer logo once, and keeps each
+library's decoded logo keyed by its image-store digest — a new logo has a
+new digest, so a changed logo is picked up on the next certificate, in
+every process, without explicit invalidation.
+
 Dependencies:
     pip install reportlab
 
@@ -24,6 +35,8 @@ view should catch this and fall back gracefully.
 import io
 import os
 import sys
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
 from reportlab.lib.pagesizes import A4
@@ -31,9 +44,22 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT, TA_LEFT
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer,
-    HRFlowable, Table, TableStyle,
+    SimpleDocTemplate, Paragraph, Spacer, Flowable,
+    HRFlowable, PageBreak, Table, TableStyle,
+)
+
+# Library logos kept decoded per process (least recently used dropped first).
+_LOGO_CACHE_SIZE = 64
+# Logos are drawn under an inch wide; ~3× that in pixels stays sharp in print.
+_LOGO_MAX_PX = 160
+
+# Bundled footer logo: the desktop build's IMG/ folder, else the site's static copy.
+_FOOTER_LOGO_PATHS = (
+    "IMG/logo2.png",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 "static", "assets", "img", "logo2.png"),
 )
 
 
@@ -48,10 +74,11 @@ def _resource_path(relative_path: str) -> str:
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-def _add_footer(canvas, doc):
+def _add_footer(canvas, doc, logo=None):
     """
     Draw the 'LibNexa' logo + text in the bottom-right corner of every page.
-    Mirrors the original add_footer() exactly.
+    Mirrors the original add_footer() exactly; *logo* is the decoded
+    ImageReader from CertificateRenderer.footer_logo.
     """
     page_width, _ = A4
     logo_width    = 40
@@ -62,16 +89,15 @@ def _add_footer(canvas, doc):
 
     canvas.saveState()
     try:
-        logo_path  = _resource_path("IMG/logo2.png")
         canvas.setFont("Helvetica-Bold", 10)
         text_width = canvas.stringWidth(text, "Helvetica-Bold", 10)
         logo_x     = page_width - logo_width - spacing - text_width - right_margin
         text_x     = logo_x + logo_width + spacing
         text_y     = footer_y + logo_width / 2.5
 
-        if os.path.exists(logo_path):
+        if logo is not None:
             canvas.drawImage(
-                logo_path, logo_x, footer_y,
+                logo, logo_x, footer_y,
                 width=logo_width, height=logo_width,
                 mask="auto", preserveAspectRatio=True,
             )
@@ -86,6 +112,25 @@ def _add_footer(canvas, doc):
         canvas.restoreState()
 
 
+class _Logo(Flowable):
+    """A decoded image drawn centred, *height* points tall."""
+
+    def __init__(self, image, height):
+        super().__init__()
+        iw, ih       = image.getSize()
+        self.image   = image
+        self.height  = height
+        self.width   = height * iw / ih if ih else height
+
+    def wrap(self, avail_width, avail_height):
+        self._avail_width = avail_width
+        return avail_width, self.height
+
+    def draw(self):
+        x = (self._avail_width - self.width) / 2
+        self.canv.drawImage(self.image, x, 0, width=self.width, height=self.height, mask="auto")
+
+
 def _cert_number(member_id: str, institution_name: str, role: str) -> str:
     """
     Generate a certificate number in the same format as the original:
@@ -156,6 +201,56 @@ def _teacher_body(
 # Public API
 # ──────────────────────────────────────────────────────────────────────────────
 
+def certificate_context(member, library=None) -> dict:
+    """
+    Everything a certificate prints, as plain picklable values — so bulk
+    issuance can read members in one query and render in worker processes
+    (members/bulk_clearance.py) without touching the database.
+
+    Raises ValueError if the member has not been cleared.
+    """
+    if member.clearance_status != "cleared":
+        raise ValueError(
+            f"Member {member.member_id} has not been cleared yet."
+        )
+
+    # ── Resolve institution details ───────────────────────────────────────────
+    if library is not None:
+        institution_name  = getattr(library, "name", "Library")
+        institution_email = getattr(library, "email", "")
+        address           = getattr(library, "address", "")
+        district          = getattr(library, "district", "")
+        state             = getattr(library, "state", "")
+        country           = getattr(library, "country", "India")
+    else:
+        institution_name  = "Library"
+        institution_email = ""
+        address = district = state = ""
+        country = "India"
+
+    cleared_by_name = ""
+    if member.cleared_by:
+        cleared_by_name = (
+            member.cleared_by.get_full_name()
+            or member.cleared_by.username
+        )
+
+    return {
+        "library_key":         getattr(library, "pk", None),
+        "logo_hash":           getattr(library, "library_logo_hash", ""),
+        "institution_name":    institution_name,
+        "institution_email":   institution_email,
+        "address_parts":       [address, district, state, country],
+        "member_id":           member.member_id,
+        "full_name":           member.full_name,
+        "role":                member.role,   # 'student' | 'teacher' | 'general'
+        "department":          member.department.name if member.department else "N/A",
+        "designation":         member.specialization or "Faculty",   # TeacherMemberForm stores designation here
+        "cleared_by_name":     cleared_by_name,
+        "clearance_date":      member.clearance_date,
+    }
+
+
 def build_clearance_pdf(member, library=None) -> tuple[bytes, str]:
     """
     Generate a library clearance certificate PDF for *member* and return
@@ -179,162 +274,322 @@ def build_clearance_pdf(member, library=None) -> tuple[bytes, str]:
     ImportError   if ReportLab is not installed.
     ValueError    if the member has not been cleared.
     """
+    return render_certificate(certificate_context(member, library))
 
-    if member.clearance_status != "cleared":
-        raise ValueError(
-            f"Member {member.member_id} has not been cleared yet."
-        )
 
-    # ── Resolve institution details ───────────────────────────────────────────
-    if library is not None:
-        institution_name  = getattr(library, "name", "Library")
-        institution_email = getattr(library, "email", "")
-        address           = getattr(library, "address", "")
-        district          = getattr(library, "district", "")
-        state             = getattr(library, "state", "")
-        country           = getattr(library, "country", "India")
-    else:
-        institution_name  = "Library"
-        institution_email = ""
-        address = district = state = ""
-        country = "India"
+def render_certificate(ctx: dict) -> tuple[bytes, str]:
+    """Render one certificate_context() → ``(pdf_bytes, filename)``."""
+    return renderer.render(ctx)
 
-    # Build single-line address, skipping empty parts
-    addr_parts = [p.title() for p in [address, district, state, country] if p.strip()]
-    institution_address = ", ".join(addr_parts) if addr_parts else "India"
 
-    # ── Member details ────────────────────────────────────────────────────────
-    dept_name   = member.department.name if member.department else "N/A"
-    designation = member.specialization or "Faculty"   # TeacherMemberForm stores designation here
-    role        = member.role                           # 'student' | 'teacher' | 'general'
+def render_chunk(contexts, logos=None) -> list:
+    """
+    render_many() over a list — the unit of work for a process pool.
+    *logos* ({digest: image bytes}) spares the worker the image store.
+    """
+    for digest, data in (logos or {}).items():
+        renderer.add_logo(digest, data)
+    return renderer.render_many(contexts)
 
-    purpose_map = {
-        "student": "Final Semester Clearance",
-        "teacher": "Faculty Resignation / Transfer",
-        "general": "Library Membership Clearance",
-    }
-    purpose = purpose_map.get(role, "Library Clearance")
 
-    cert_no    = _cert_number(member.member_id, institution_name, role)
-    date_today = datetime.today().strftime("%d/%m/%Y")
-    filename   = f"clearance_{member.member_id}.pdf"
+def render_merged(contexts, on_page=None) -> bytes:
+    """
+    All *contexts* as one PDF, one certificate per page.  *on_page(n)* is
+    called as each page is laid out.
+    """
+    return renderer.render_merged(contexts, on_page)
 
-    # ── Body text (role-aware) ─────────────────────────────────────────────────
-    if role == "teacher":
-        body_html = _teacher_body(
-            member.full_name, member.member_id, dept_name,
-            designation, institution_name, purpose,
-        )
-    else:
-        body_html = _student_body(
-            member.full_name, member.member_id, dept_name,
-            institution_name, purpose, show_dues_line=True,
-        )
 
-    # ── Styles ────────────────────────────────────────────────────────────────
-    base_styles  = getSampleStyleSheet()
-    center_style = ParagraphStyle(
-        "Center", parent=base_styles["Normal"], alignment=TA_CENTER,
-    )
-    bold_center  = ParagraphStyle(
-        "BoldCenter", parent=center_style,
-        fontName="Helvetica-Bold", fontSize=14,
-    )
-    normal_center = ParagraphStyle(
-        "NormalCenter", parent=center_style, fontSize=11,
-    )
-    justify = ParagraphStyle(
-        "JustifiedIndented", parent=base_styles["Normal"],
-        alignment=TA_JUSTIFY, firstLineIndent=20, fontSize=11, leading=16,
-    )
-    right_style = ParagraphStyle(
-        "RightAligned", parent=base_styles["Normal"],
-        alignment=TA_RIGHT, fontSize=11,
-    )
-    title_style = ParagraphStyle(
-        "CertTitle", parent=base_styles["Normal"],
-        fontName="Helvetica-Bold", fontSize=13,
-        alignment=TA_CENTER, spaceAfter=12,
-    )
-    small_gray = ParagraphStyle(
-        "SmallGray", parent=base_styles["Normal"],
-        fontSize=9, textColor=colors.HexColor("#6b7280"),
-        alignment=TA_CENTER,
-    )
+def certificate_elements(ctx: dict) -> list:
+    """The flowables for one certificate."""
+    return renderer.elements(ctx)
 
-    # ── Build elements list (mirrors original generate_library_clearance_certificate) ──
-    elements = [
-        # Institution header
-        Paragraph(institution_name.upper(), bold_center),
-        Spacer(1, 0.06 * inch),
-        Paragraph(institution_address, normal_center),
-    ]
-
-    if institution_email:
-        elements.append(Paragraph(f"Email: {institution_email.lower()}", normal_center))
-
-    elements += [
-        Spacer(1, 0.1 * inch),
-        HRFlowable(width="100%", thickness=1, color=colors.black),
-        Spacer(1, 0.3 * inch),
-    ]
-
-    # Cert number + date row (mirrors cert_table in original)
-    cert_table = Table(
-        [[f"Certificate No.: {cert_no}", f"Date: {date_today}"]],
-        colWidths=[3.5 * inch, 3.5 * inch],
-    )
-    cert_table.setStyle(TableStyle([
-        ("ALIGN",         (0, 0), (0, 0), "LEFT"),
-        ("ALIGN",         (1, 0), (1, 0), "RIGHT"),
-        ("VALIGN",        (0, 0), (-1, -1), "TOP"),
-        ("FONTSIZE",      (0, 0), (-1, -1), 11),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-    ]))
-    elements.append(cert_table)
-    elements.append(Spacer(1, 1.5 * inch))
-
-    # Certificate title + body
-    elements.append(Paragraph("Library Clearance Certificate", title_style))
-    elements.append(Paragraph(body_html.strip(), justify))
-    elements.append(Spacer(1, 1.3 * inch))
-
-    # Librarian signature block (right-aligned, mirrors original)
-    elements += [
-        Paragraph("Librarian<br/>(Signature &amp; Seal)", right_style),
-        Spacer(1, 0.2 * inch),
-        Paragraph("Name: ____________________", right_style),
-        Spacer(1, 0.06 * inch),
-        Paragraph("Designation: _______________", right_style),
-        Spacer(1, 0.06 * inch),
-        Paragraph(f"Date: {date_today}", right_style),
-    ]
-
-    # Optional: cleared-by note at bottom
-    if member.cleared_by:
-        cleared_by_name = (
-            member.cleared_by.get_full_name()
-            or member.cleared_by.username
+
+def certificate_filename(ctx: dict) -> str:
+    return f"clearance_{ctx['member_id']}.pdf"
+
+
+def _load_logo(digest: str):
+    """Logo bytes from the core image store (the 'md' thumbnail is plenty)."""
+    from core.image_store import get_image
+
+    blob = get_image(digest, "md")
+    return bytes(blob.data) if blob is not None else None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Renderer
+# ──────────────────────────────────────────────────────────────────────────────
+
+class CertificateRenderer:
+    """
+    Builds certificates from certificate_context() dicts, reusing the
+    paragraph styles and decoded images between them.
+
+    *logo_loader(digest)* returns a library logo's bytes (None when
+    missing); the default reads the core image store, so worker processes
+    without a database are handed the bytes through add_logo() instead.
+    """
+
+    def __init__(self, logo_loader=_load_logo, cache_size: int = _LOGO_CACHE_SIZE):
+        self._logo_loader = logo_loader
+        self._cache_size  = cache_size
+        self._lock        = threading.Lock()
+        self._styles      = None
+        self._footer_logo = None
+        self._footer_done = False
+        self._logos       = OrderedDict()   # digest → ImageReader | None
+
+    # ── Cached assets ─────────────────────────────────────────────────────────
+    @property
+    def styles(self) -> dict:
+        if self._styles is None:
+            base_styles  = getSampleStyleSheet()
+            center_style = ParagraphStyle(
+                "Center", parent=base_styles["Normal"], alignment=TA_CENTER,
+            )
+            self._styles = {
+                "bold_center": ParagraphStyle(
+                    "BoldCenter", parent=center_style,
+                    fontName="Helvetica-Bold", fontSize=14,
+                ),
+                "normal_center": ParagraphStyle(
+                    "NormalCenter", parent=center_style, fontSize=11,
+                ),
+                "justify": ParagraphStyle(
+                    "JustifiedIndented", parent=base_styles["Normal"],
+                    alignment=TA_JUSTIFY, firstLineIndent=20, fontSize=11, leading=16,
+                ),
+                "right": ParagraphStyle(
+                    "RightAligned", parent=base_styles["Normal"],
+                    alignment=TA_RIGHT, fontSize=11,
+                ),
+                "title": ParagraphStyle(
+                    "CertTitle", parent=base_styles["Normal"],
+                    fontName="Helvetica-Bold", fontSize=13,
+                    alignment=TA_CENTER, spaceAfter=12,
+                ),
+                "small_gray": ParagraphStyle(
+                    "SmallGray", parent=base_styles["Normal"],
+                    fontSize=9, textColor=colors.HexColor("#6b7280"),
+                    alignment=TA_CENTER,
+                ),
+            }
+        return self._styles
+
+    @property
+    def footer_logo(self):
+        """The bundled footer logo, decoded on first use (None if absent)."""
+        if not self._footer_done:
+            for candidate in _FOOTER_LOGO_PATHS:
+                path = candidate if os.path.isabs(candidate) else _resource_path(candidate)
+                if os.path.exists(path):
+                    with open(path, "rb") as fh:
+                        self._footer_logo = _decode(fh.read())
+                    break
+            self._footer_done = True
+        return self._footer_logo
+
+    def add_logo(self, digest: str, data) -> None:
+        """Cache *data* (image bytes, or None for "no image") under *digest*."""
+        if digest:
+            self._remember(digest, _decode(data) if data else None)
+
+    def library_logo(self, ctx: dict):
+        """The decoded logo for *ctx*'s library, or None."""
+        digest = ctx.get("logo_hash")
+        if not digest:
+            return None
+        with self._lock:
+            if digest in self._logos:
+                self._logos.move_to_end(digest)
+                return self._logos[digest]
+        data = self._logo_loader(digest) if self._logo_loader else None
+        return self._remember(digest, _decode(data) if data else None)
+
+    def invalidate(self, digest: str = "") -> None:
+        """Forget one logo (or, with no *digest*, every cached asset)."""
+        with self._lock:
+            if digest:
+                self._logos.pop(digest, None)
+            else:
+                self._logos.clear()
+                self._styles, self._footer_logo, self._footer_done = None, None, False
+
+    def _remember(self, digest, image):
+        with self._lock:
+            self._logos[digest] = image
+            self._logos.move_to_end(digest)
+            while len(self._logos) > self._cache_size:
+                self._logos.popitem(last=False)
+        return image
+
+    # ── Rendering ─────────────────────────────────────────────────────────────
+    def render(self, ctx: dict) -> tuple[bytes, str]:
+        """One certificate → ``(pdf_bytes, filename)``."""
+        return self._build_document(self.elements(ctx)), certificate_filename(ctx)
+
+    def render_many(self, contexts) -> list:
+        """A certificate per context, in order → ``[(pdf_bytes, filename), …]``."""
+        return [self.render(ctx) for ctx in contexts]
+
+    def render_merged(self, contexts, on_page=None) -> bytes:
+        """All *contexts* as one PDF; *on_page(n)* is called per page."""
+        elements = []
+        for ctx in contexts:
+            if elements:
+                elements.append(PageBreak())
+            elements += self.elements(ctx)
+        return self._build_document(elements, on_page)
+
+    def _build_document(self, elements, on_page=None) -> bytes:
+        logo = self.footer_logo
+
+        def footer(canvas, doc):
+            _add_footer(canvas, doc, logo)
+            if on_page is not None:
+                on_page(doc.page)
+
+        buf = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buf, pagesize=A4,
+            leftMargin=inch, rightMargin=inch,
+            topMargin=inch, bottomMargin=inch,
         )
+        doc.build(elements, onFirstPage=footer, onLaterPages=footer)
+        return buf.getvalue()
+
+    def elements(self, ctx: dict) -> list:
+        """The flowables for one certificate."""
+        institution_name  = ctx["institution_name"]
+        institution_email = ctx["institution_email"]
+
+        # Build single-line address, skipping empty parts
+        addr_parts = [p.title() for p in ctx["address_parts"] if p.strip()]
+        institution_address = ", ".join(addr_parts) if addr_parts else "India"
+
+        # ── Member details ────────────────────────────────────────────────────────
+        dept_name   = ctx["department"]
+        designation = ctx["designation"]
+        role        = ctx["role"]
+
+        purpose_map = {
+            "student": "Final Semester Clearance",
+            "teacher": "Faculty Resignation / Transfer",
+            "general": "Library Membership Clearance",
+        }
+        purpose = purpose_map.get(role, "Library Clearance")
+
+        cert_no    = _cert_number(ctx["member_id"], institution_name, role)
+        date_today = datetime.today().strftime("%d/%m/%Y")
+
+        # ── Body text (role-aware) ─────────────────────────────────────────────────
+        if role == "teacher":
+            body_html = _teacher_body(
+                ctx["full_name"], ctx["member_id"], dept_name,
+                designation, institution_name, purpose,
+            )
+        else:
+            body_html = _student_body(
+                ctx["full_name"], ctx["member_id"], dept_name,
+                institution_name, purpose, show_dues_line=True,
+            )
+
+        # ── Styles (built once per renderer) ───────────────────────────────────
+        styles        = self.styles
+        bold_center   = styles["bold_center"]
+        normal_center = styles["normal_center"]
+        justify       = styles["justify"]
+        right_style   = styles["right"]
+        title_style   = styles["title"]
+        small_gray    = styles["small_gray"]
+
+        # ── Build elements list (mirrors original generate_library_clearance_certificate) ──
+        elements = []
+        logo = self.library_logo(ctx)
+        if logo is not None:
+            elements += [_Logo(logo, 0.6 * inch), Spacer(1, 0.08 * inch)]
+
+        elements += [
+            # Institution header
+            Paragraph(institution_name.upper(), bold_center),
+            Spacer(1, 0.06 * inch),
+            Paragraph(institution_address, normal_center),
+        ]
+
+        if institution_email:
+            elements.append(Paragraph(f"Email: {institution_email.lower()}", normal_center))
+
         elements += [
-            Spacer(1, 0.4 * inch),
-            HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#e5e7eb")),
             Spacer(1, 0.1 * inch),
-            Paragraph(
-                f"Digitally recorded — cleared by: {cleared_by_name} "
-                f"on {member.clearance_date.strftime('%d %B %Y') if member.clearance_date else date_today}",
-                small_gray,
-            ),
+            HRFlowable(width="100%", thickness=1, color=colors.black),
+            Spacer(1, 0.3 * inch),
         ]
 
-    # ── Render to an in-memory buffer ─────────────────────────────────────────
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4,
-        leftMargin=inch, rightMargin=inch,
-        topMargin=inch, bottomMargin=inch,
-    )
-    doc.build(elements, onFirstPage=_add_footer, onLaterPages=_add_footer)
-    buf.seek(0)
+        # Cert number + date row (mirrors cert_table in original)
+        cert_table = Table(
+            [[f"Certificate No.: {cert_no}", f"Date: {date_today}"]],
+            colWidths=[3.5 * inch, 3.5 * inch],
+        )
+        cert_table.setStyle(TableStyle([
+            ("ALIGN",         (0, 0), (0, 0), "LEFT"),
+            ("ALIGN",         (1, 0), (1, 0), "RIGHT"),
+            ("VALIGN",        (0, 0), (-1, -1), "TOP"),
+            ("FONTSIZE",      (0, 0), (-1, -1), 11),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ]))
+        elements.append(cert_table)
+        elements.append(Spacer(1, 1.5 * inch))
+
+        # Certificate title + body
+        elements.append(Paragraph("Library Clearance Certificate", title_style))
+        elements.append(Paragraph(body_html.strip(), justify))
+        elements.append(Spacer(1, 1.3 * inch))
+
+        # Librarian signature block (right-aligned, mirrors original)
+        elements += [
+            Paragraph("Librarian<br/>(Signature &amp; Seal)", right_style),
+            Spacer(1, 0.2 * inch),
+            Paragraph("Name: ____________________", right_style),
+            Spacer(1, 0.06 * inch),
+            Paragraph("Designation: _______________", right_style),
+            Spacer(1, 0.06 * inch),
+            Paragraph(f"Date: {date_today}", right_style),
+        ]
+
+        # Optional: cleared-by note at bottom
+        if ctx["cleared_by_name"]:
+            clearance_date = ctx["clearance_date"]
+            elements += [
+                Spacer(1, 0.4 * inch),
+                HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#e5e7eb")),
+                Spacer(1, 0.1 * inch),
+                Paragraph(
+                    f"Digitally recorded — cleared by: {ctx['cleared_by_name']} "
+                    f"on {clearance_date.strftime('%d %B %Y') if clearance_date else date_today}",
+                    small_gray,
+                ),
+            ]
+
+        return elements
+
+
+def _decode(data: bytes):
+    """
+    Decode image bytes once, scaled down to _LOGO_MAX_PX: every document
+    embeds (and compresses) its own copy, so a full-size logo — the bundled
+    footer logo is 1000 px square — would dominate the render time.
+    """
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((_LOGO_MAX_PX, _LOGO_MAX_PX))
+        return ImageReader(image)
+    except Exception as exc:
+        print(f"[clearance_certificate] logo warning: {exc}")
+        return None
+
 
-    return buf.read(), filename
\ No newline at end of file
+# One per process: web threads, management commands and pool workers.
+renderer = CertificateRenderer()
@@ -12,13 +12,15 @@ Key features
 
 Photo handling
 ──────────────
-Because Member.photo is now a BinaryField (not an ImageField), photos are
-NOT handled by Django's form/model machinery automatically.  Instead:
+Photos live in the core image store (core/image_store.py); Member keeps
+only `photo_hash`, so they are NOT handled by Django's form/model machinery
+automatically.  Instead:
 
   • The form exposes a plain `photo_upload` FileField (accepts image/*).
   • `clean_photo_upload` validates size and MIME type.
-  • `save_with_create` / `_BaseMemberForm.save_with_create` reads the raw
-    bytes and writes them to member.photo / member.photo_mime_type.
+  • `save_with_create` / `_BaseMemberForm.save_with_create` compresses the
+    upload, stores it with put_image() and records the digest on
+    member.photo_hash.
   • To clear an existing photo, a separate `clear_photo` BooleanField is
     provided (replaces the ClearableFileInput behaviour from ImageField).
 
@@ -30,6 +32,8 @@ import io
 from django import forms
 from django.core.exceptions import ValidationError
 
+from core.image_store import put_image
+
 from .models import Member, Department, Course, AcademicYear, Semester
 
 
@@ -347,29 +351,17 @@ class MemberForm(forms.ModelForm):
                 )
         member.semester = semester
 
-        # ── Handle photo blob ─────────────────────────────────────────────────
-        photo_changed = False
+        # ── Handle photo (core image store) ───────────────────────────────────
         if self.cleaned_data.get("clear_photo"):
-            member.photo = None
-            member.photo_mime_type = ""
-            photo_changed = True
+            member.photo_hash = ""
         else:
             photo_file = self.cleaned_data.get("photo_upload")
             if photo_file:
                 photo_bytes, mime = _compress_photo(photo_file)
-                member.photo = photo_bytes
-                member.photo_mime_type = mime
-                photo_changed = True
+                member.photo_hash = put_image(photo_bytes, mime)
 
         if commit:
             member.save()
-            # BinaryField has editable=False by default — Django's UPDATE
-            # omits it. Force-write photo columns whenever they changed.
-            if photo_changed and member.pk:
-                Member.objects.filter(pk=member.pk).update(
-                    photo=member.photo,
-                    photo_mime_type=member.photo_mime_type,
-                )
         return member
 
 
@@ -785,31 +777,20 @@ class _BaseMemberForm(forms.ModelForm):
         else:
             member.semester = None
 
-        # ── Photo blob ────────────────────────────────────────────────────────
-        photo_changed = False
+        # ── Photo (core image store) ──────────────────────────────────────────
         if self.cleaned_data.get("clear_photo"):
-            # User ticked "Remove existing photo"
-            member.photo = None
-            member.photo_mime_type = ""
-            photo_changed = True
+            # User ticked "Remove existing photo" — the blob is pruned later
+            # if nothing else references it.
+            member.photo_hash = ""
         else:
             photo_file = self.cleaned_data.get("photo_upload")
             if photo_file:
                 photo_bytes, mime = _compress_photo(photo_file)
-                member.photo = photo_bytes
-                member.photo_mime_type = mime
-                photo_changed = True
+                member.photo_hash = put_image(photo_bytes, mime)
             # If no new file uploaded, leave existing photo untouched
 
         if commit:
             member.save()
-            # BinaryField has editable=False by default, so Django's UPDATE
-            # query omits it.  Force-write photo columns whenever they changed.
-            if photo_changed and member.pk:
-                Member.objects.filter(pk=member.pk).update(
-                    photo=member.photo,
-                    photo_mime_type=member.photo_mime_type,
-                )
         return member
 
 
@@ -0,0 +1,83 @@
+# members/management/commands/benchmark_certificates.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Certificates per second for the clearance certificate renderer
+# (members/clearance_certificate.py), on synthetic members — no database.
+#
+#     python manage.py benchmark_certificates
+#     python manage.py benchmark_certificates --count 200 --logo static/assets/img/logo2.png
+#
+#   uncached  a fresh CertificateRenderer per certificate (styles and images
+#             rebuilt every time, as build_clearance_pdf used to)
+#   single    renderer.render() one certificate at a time
+#   batch     renderer.render_many() — what a bulk-clearance worker runs
+#   merged    renderer.render_merged() — one PDF, a page per certificate
+# ─────────────────────────────────────────────────────────────────────────────
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from members.clearance_certificate import CertificateRenderer
+
+
+def _contexts(count, logo_hash):
+    return [
+        {
+            "library_key":       1,
+            "logo_hash":         logo_hash,
+            "institution_name":  "Dooars Institute of Technology",
+            "institution_email": "library@dooars.example",
+            "address_parts":     ["college para", "jalpaiguri", "west bengal", "India"],
+            "member_id":         f"DGBENCH{n:06d}",
+            "full_name":         f"Member {n}",
+            "role":              "teacher" if n % 5 == 0 else "student",
+            "department":        "Computer Science",
+            "designation":       "Assistant Professor",
+            "cleared_by_name":   "Librarian",
+            "clearance_date":    None,
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark clearance certificate rendering (certificates per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=50, help="Certificates per run (default 50).")
+        parser.add_argument("--logo", default="", help="Image file to use as the library logo.")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        if count < 1:
+            raise CommandError("--count must be at least 1.")
+
+        logo = b""
+        if options["logo"]:
+            try:
+                with open(options["logo"], "rb") as fh:
+                    logo = fh.read()
+            except OSError as exc:
+                raise CommandError(f"Cannot read logo: {exc}")
+        contexts = _contexts(count, "bench-logo" if logo else "")
+
+        def fresh():
+            return CertificateRenderer(logo_loader=lambda digest: logo)
+
+        warm = fresh()
+        warm.render(contexts[0])   # decode assets outside the timed runs
+
+        runs = {
+            "uncached": lambda: [fresh().render(ctx) for ctx in contexts],
+            "single":   lambda: [warm.render(ctx) for ctx in contexts],
+            "batch":    lambda: warm.render_many(contexts),
+            "merged":   lambda: warm.render_merged(contexts),
+        }
+        self.stdout.write(f"  {count} certificate(s){' with logo' if logo else ''}")
+        for name, run in runs.items():
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {name:<9} {count / elapsed:8.1f} cert/s   ({elapsed * 1000:8.1f} ms)")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
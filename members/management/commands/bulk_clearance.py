@@ -0,0 +1,85 @@
+# members/management/commands/bulk_clearance.py
+# ─────────────────────────────────────────────────────────────────────────────
+# Evaluate — and optionally clear — a graduating batch, then write every
+# certificate to one file (members/bulk_clearance.py).
+#
+#     python manage.py bulk_clearance DG-AB12 --passout-year 2026
+#     python manage.py bulk_clearance DG-AB12 --passout-year 2026 --department 3 --clear -o batch.zip
+#     python manage.py bulk_clearance DG-AB12 --passout-year 2026 --course 5 --clear --format pdf -o batch.pdf
+# ─────────────────────────────────────────────────────────────────────────────
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Library
+from members.bulk_clearance import (
+    BLOCKING_REASONS, FORMATS, certificate_contexts, clear_batch, evaluate_batch,
+    render_certificates, select_batch,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk clearance for a passout year, optionally one department / course."
+
+    def add_arguments(self, parser):
+        parser.add_argument("library_code", help="Library code, e.g. DG-AB12.")
+        parser.add_argument("--passout-year", type=int, required=True, help="admission_year + course duration.")
+        parser.add_argument("--department", type=int, help="Only this department ID.")
+        parser.add_argument("--course", type=int, help="Only this course ID.")
+        parser.add_argument("--clear", action="store_true",
+                            help="Mark eligible members cleared / passout (default: report only).")
+        parser.add_argument("--format", choices=FORMATS, default="zip")
+        parser.add_argument("-o", "--output", help="Write the certificates here (requires --clear).")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Render processes (default CLEARANCE_RENDER_WORKERS).")
+        parser.add_argument("--cleared-by", default="",
+                            help="Username recorded as cleared_by (default: the library owner).")
+
+    def handle(self, *args, **options):
+        library = Library.objects.select_related("user").filter(library_code=options["library_code"]).first()
+        if library is None:
+            raise CommandError(f"No library with code {options['library_code']!r}.")
+
+        filters = {k: options[k] for k in ("department", "course", "passout_year")}
+        if options["output"] and not options["clear"]:
+            raise CommandError("--output requires --clear.")
+
+        members = select_batch(library, **filters)
+        if options["clear"]:
+            user = library.user
+            if options["cleared_by"]:
+                user = get_user_model().objects.filter(username=options["cleared_by"]).first()
+                if user is None:
+                    raise CommandError(f"No user {options['cleared_by']!r}.")
+            evaluation = clear_batch(library, members, user)
+        else:
+            evaluation = evaluate_batch(library, members)
+
+        self.stdout.write(
+            f"  {evaluation['total']} member(s): {len(evaluation['eligible'])} eligible, "
+            f"{evaluation['blocked_count']} blocked"
+        )
+        for reason, rows in evaluation["blocked"].items():
+            if rows:
+                self.stdout.write(f"    {BLOCKING_REASONS[reason]}: {len(rows)}")
+                for row in rows[:10]:
+                    self.stdout.write(f"      {row['member_id']}  {row['name']}")
+                if len(rows) > 10:
+                    self.stdout.write(f"      … and {len(rows) - 10} more")
+
+        if options["output"] and evaluation["eligible"]:
+            contexts = certificate_contexts(library, evaluation["eligible"])
+
+            def progress(done, total):
+                self.stdout.write(f"\r  rendering {done}/{total}", ending="")
+                self.stdout.flush()
+
+            data = render_certificates(contexts, options["format"], progress=progress,
+                                       workers=options["workers"])
+            self.stdout.write("")
+            with open(options["output"], "wb") as fh:
+                fh.write(data)
+            self.stdout.write(f"  wrote {len(contexts)} certificate(s) to {options['output']}")
+
+        verb = "cleared" if options["clear"] else "eligible"
+        self.stdout.write(self.style.SUCCESS(f"Done — {len(evaluation['eligible'])} member(s) {verb}."))
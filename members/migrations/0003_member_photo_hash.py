@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+def move_photos_to_image_store(apps, schema_editor):
+    from core.image_store import migrate_blob_column
+    migrate_blob_column(apps, "members.Member", "photo", "photo_mime_type", "photo_hash")
+
+
+def restore_photos(apps, schema_editor):
+    from core.image_store import restore_blob_column
+    restore_blob_column(apps, "members.Member", "photo", "photo_mime_type", "photo_hash")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_alter_member_photo'),
+        ('core', '0002_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='photo_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the member photo in the image store.', max_length=64),
+        ),
+        migrations.RunPython(move_photos_to_image_store, restore_photos),
+        migrations.RemoveField(
+            model_name='member',
+            name='photo',
+        ),
+        migrations.RemoveField(
+            model_name='member',
+            name='photo_mime_type',
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:30
+
+import finance.search
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+from members.search import build_search_document
+
+
+def backfill(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    Course = apps.get_model('members', 'Course')
+
+    Member.objects.filter(course__isnull=False, admission_year__isnull=False).update(
+        passout_year=F('admission_year') + Subquery(
+            Course.objects.filter(pk=OuterRef('course_id')).values('duration')[:1]
+        ),
+    )
+
+    batch = []
+    fields = ('pk', 'first_name', 'last_name', 'email', 'member_id', 'phone', 'roll_number')
+    for member in Member.objects.only(*fields).iterator(chunk_size=2000):
+        member.search_document = build_search_document(member)
+        batch.append(member)
+        if len(batch) >= 2000:
+            Member.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Member.objects.bulk_update(batch, ['search_document'])
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX members_member_search_ft ON members_member (search_document)'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX members_member_search_ft ON members_member "
+            "USING gin (to_tsvector('simple', search_document))"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('DROP INDEX members_member_search_ft ON members_member')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS members_member_search_ft')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_member_photo_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='passout_year',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='Expected graduation year: admission_year + course duration (kept in sync on save).', null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='search_document',
+            field=finance.search.SearchDocumentField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', '-created_at'], name='member_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'status', '-created_at'], name='member_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'role', '-created_at'], name='member_owner_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'department', '-created_at'], name='member_owner_dept_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'course', '-created_at'], name='member_owner_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'year', '-created_at'], name='member_owner_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'semester', '-created_at'], name='member_owner_sem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'passout_year', '-created_at'], name='member_owner_passout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['owner', 'clearance_status', '-created_at'], name='member_owner_clearance_idx'),
+        ),
+    ]
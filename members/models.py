@@ -8,15 +8,22 @@ Transaction) is scoped to a Django User ("owner") so multiple library
 administrators can share one database instance without seeing each other's data.
 
 Photo Storage Note:
-    Member.photo is a BinaryField — the raw image bytes are stored directly
-    in MySQL as a LONGBLOB column.  Member.photo_mime_type records the MIME
-    type (e.g. "image/jpeg") so the photo can be served with the correct
-    Content-Type header.
+    Member.photo_hash is the SHA-256 digest of the photo in the core image
+    store (core/image_store.py), which keeps the bytes, the MIME type and
+    pre-generated thumbnails.  Member rows carry no image data.
 
-    Use the `member_photo` view to serve photos:
-        <img src="{% url 'members:member_photo' member.pk %}">
+    Use the `member_photo` view to serve photos (?size=sm for avatars):
+        <img src="{% url 'members:member_photo' member.pk %}?size=sm">
 
     No MEDIA_ROOT / MEDIA_URL configuration is required for photos.
+
+Member list performance:
+    Every list filters by owner plus some of status / role / department /
+    course / year / semester / passout year, so each of those has an
+    (owner, …) composite index.  `passout_year` (admission_year + course
+    duration) is stored and kept in sync by Member.save() and Course.save()
+    rather than computed through a join, and searches go through the
+    normalised `search_document` column (members/search.py).
 """
 
 import os
@@ -25,6 +32,10 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.utils import timezone
 
+from finance.search import SearchDocumentField
+
+from .search import SEARCH_SOURCE_FIELDS, build_search_document, search_members
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Validators (shared)
@@ -99,6 +110,13 @@ class Course(models.Model):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Members store their passout year; a changed duration moves it.
+            self.members.update(passout_year=models.F("admission_year") + self.duration)
+
 
 class AcademicYear(models.Model):
     """
@@ -172,6 +190,41 @@ class Semester(models.Model):
 # Core Member Model
 # ══════════════════════════════════════════════════════════════════════════════
 
+class MemberQuerySet(models.QuerySet):
+
+    # Free-text columns only the detail / edit pages show.
+    DETAIL_FIELDS = ("address", "academic_notes", "specialization")
+
+    def for_owner(self, owner):
+        return self.filter(owner=owner)
+
+    def cards(self):
+        """
+        Rows for lists, pickers and lookup APIs: every column a member card
+        renders (including `photo_hash`, so `has_photo` costs nothing) but
+        not the free-text detail columns.
+        """
+        return self.defer(*self.DETAIL_FIELDS, "search_document")
+
+    def search(self, q: str):
+        """Members matching the ?search= text (members/search.py)."""
+        return search_members(self, q)
+
+
+class MemberManager(models.Manager):
+    def get_queryset(self):
+        return MemberQuerySet(self.model, using=self._db)
+
+    def for_owner(self, owner):
+        return self.get_queryset().for_owner(owner)
+
+    def cards(self):
+        return self.get_queryset().cards()
+
+    def search(self, q: str):
+        return self.get_queryset().search(q)
+
+
 class Member(models.Model):
     """
     Library member — owner-scoped (multi-tenant).
@@ -183,8 +236,7 @@ class Member(models.Model):
     • `semester`        – FK to Semester (flexible labels).
     • `specialization`  – free-text optional subject/specialization field.
     • `academic_notes`  – free-text additional academic remarks.
-    • `photo`           – BinaryField: stores raw image bytes as LONGBLOB in MySQL.
-                          `photo_mime_type` stores the MIME type for serving.
+    • `photo_hash`      – digest of the photo in the core image store.
                           Serve via the `member_photo` view.
     • `member_id`       – auto-generated on first save if not provided.
     • `inactive_since`  – automatically set/cleared via save() hook.
@@ -266,16 +318,15 @@ class Member(models.Model):
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
     address = models.TextField(blank=True, null=True)
 
-    # ── Cover image stored as binary blob ─────────────────────────────────────
-    # MySQL stores this as LONGBLOB (up to 4 GB — more than enough for photos).
-    # In Python, reading this field returns a `memoryview`; cast with bytes().
+    # ── Photo — digest into the core image store ──────────────────────────────
+    # Bytes, MIME type and thumbnails live in core.ImageBlob, so Member
+    # queries never carry image data.
     # Serve via the `member_photo` view: {% url 'members:member_photo' member.pk %}
-    photo           = models.BinaryField(null=True, blank=True, editable=True)
-    photo_mime_type = models.CharField(
-        max_length=50,
+    photo_hash = models.CharField(
+        max_length=64,
         blank=True,
-        default="image/jpeg",
-        help_text="MIME type of the stored photo (e.g. image/jpeg, image/png).",
+        default="",
+        help_text="SHA-256 of the member photo in the image store.",
     )
 
     # ── Academic information ──────────────────────────────────────────────────
@@ -315,6 +366,12 @@ class Member(models.Model):
         blank=True,
         help_text="Year of admission (e.g. 2022).",
     )
+    passout_year = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Expected graduation year: admission_year + course duration (kept in sync on save).",
+    )
     specialization = models.CharField(
         max_length=200,
         blank=True,
@@ -369,10 +426,16 @@ class Member(models.Model):
         help_text="Staff member who granted clearance.",
     )
 
+    # ── Search ────────────────────────────────────────────────────────────────
+    # Normalised name / email / IDs / phone, rebuilt on save (members/search.py).
+    search_document = SearchDocumentField(blank=True, default="", editable=False)
+
     # ── Metadata ──────────────────────────────────────────────────────────────
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MemberManager()
+
     # ─────────────────────────────────────────────────────────────────────────
 
     class Meta:
@@ -381,6 +444,19 @@ class Member(models.Model):
             ("owner", "email"),
         ]
         ordering = ["-created_at"]
+        indexes = [
+            # The member lists: owner + any one filter, newest first — each
+            # serves both the WHERE and the ORDER BY of a paginated list.
+            models.Index(fields=["owner", "-created_at"],                     name="member_owner_created_idx"),
+            models.Index(fields=["owner", "status", "-created_at"],           name="member_owner_status_idx"),
+            models.Index(fields=["owner", "role", "-created_at"],             name="member_owner_role_idx"),
+            models.Index(fields=["owner", "department", "-created_at"],       name="member_owner_dept_idx"),
+            models.Index(fields=["owner", "course", "-created_at"],           name="member_owner_course_idx"),
+            models.Index(fields=["owner", "year", "-created_at"],             name="member_owner_year_idx"),
+            models.Index(fields=["owner", "semester", "-created_at"],         name="member_owner_sem_idx"),
+            models.Index(fields=["owner", "passout_year", "-created_at"],     name="member_owner_passout_idx"),
+            models.Index(fields=["owner", "clearance_status", "-created_at"], name="member_owner_clearance_idx"),
+        ]
         verbose_name = "Member"
         verbose_name_plural = "Members"
 
@@ -396,6 +472,11 @@ class Member(models.Model):
         """Return the member's full name."""
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def has_photo(self) -> bool:
+        """True when a photo is stored — no image data is loaded."""
+        return bool(self.photo_hash)
+
     @property
     def books_issued_count(self) -> int:
         """Number of books currently issued or overdue to this member."""
@@ -418,16 +499,6 @@ class Member(models.Model):
         dob = self.date_of_birth
         return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
 
-    @property
-    def passout_year(self):
-        """
-        Expected graduation year: admission_year + course.duration.
-        Returns None if either value is missing.
-        """
-        if self.admission_year and self.course_id and self.course:
-            return self.admission_year + self.course.duration
-        return None
-
     # ── Save hook ─────────────────────────────────────────────────────────────
 
     @staticmethod
@@ -529,6 +600,22 @@ class Member(models.Model):
             self.inactive_since = None
             self.inactive_reason = None
 
+        # Stored derived columns (see the module docstring)
+        self.passout_year = (
+            self.admission_year + self.course.duration
+            if self.admission_year and self.course_id else None
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.search_document = build_search_document(self)
+        else:
+            derived = {"passout_year"} if {"admission_year", "course"} & set(update_fields) else set()
+            if SEARCH_SOURCE_FIELDS.intersection(update_fields):
+                self.search_document = build_search_document(self)
+                derived.add("search_document")
+            if derived:
+                kwargs["update_fields"] = {*update_fields, *derived}
+
         super().save(*args, **kwargs)
 
 
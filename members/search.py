@@ -0,0 +1,42 @@
+"""
+members/search.py
+─────────────────
+Member search document — the same scheme as finance/search.py.
+
+    build_search_document(member)   → normalised text the member lists search
+    search_members(qs, q)           → filter a Member queryset by ?search=
+
+The document (name, email, member ID, phone, roll number) is stored on
+Member.search_document and rebuilt in Member.save(), so a list search is
+one predicate on one column — MATCH … AGAINST on MySQL's FULLTEXT index,
+to_tsvector on PostgreSQL's GIN index, LIKE elsewhere (see the `search`
+lookup in finance/search.py) — instead of six icontains.
+
+Every query token must match.  Word tokens match as a word prefix (or
+substring, on the LIKE fallback): "arj sen" finds "Arjun Sen".  All-digit
+tokens always match as a substring of the document, on every backend
+(finance.search.search_document) — the desk searches phone numbers and
+roll numbers by their tail: "3210" finds 9876543210.
+"""
+
+from finance.search import search_document, tokenize
+
+# Member fields the document is built from — a save(update_fields=…)
+# touching any of them also rewrites search_document.
+SEARCH_SOURCE_FIELDS = frozenset({
+    "first_name", "last_name", "email", "member_id", "phone", "roll_number",
+})
+
+
+def build_search_document(member) -> str:
+    """Search text for *member* (real or historical model instance)."""
+    parts = (
+        member.first_name, member.last_name, member.email,
+        member.member_id, member.phone, member.roll_number,
+    )
+    return " ".join(tokenize(" ".join(p for p in parts if p)))
+
+
+def search_members(qs, q: str):
+    """Filter *qs* (Member) to rows whose search document matches *q*."""
+    return search_document(qs, q)
@@ -0,0 +1,47 @@
+"""
+members/signals.py
+──────────────────
+Model signal receivers owned by the members app.
+
+Connected from MembersConfig.ready().
+
+Any write to a Member or Department drops the owner's cached member
+statistics (stats.py), once immediately and again after COMMIT so a
+concurrent request can't re-cache the old figures in between.
+
+Deleting a Course nulls its members' course FK with an UPDATE (SET_NULL),
+which bypasses Member.save() — their stored passout_year is cleared here.
+"""
+
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+from .stats import invalidate_member_stats
+
+
+def _on_owner_scoped_write(sender, instance, **kwargs):
+    """Member / Department — scoped by owner."""
+    owner_id = getattr(instance, "owner_id", None)
+    if owner_id:
+        invalidate_member_stats(owner_id)
+        db_transaction.on_commit(lambda: invalidate_member_stats(owner_id))
+
+
+def _on_course_delete(sender, instance, **kwargs):
+    """Course — members left without one have no passout year."""
+    from .models import Member
+
+    Member.objects.filter(
+        owner_id=instance.owner_id, course__isnull=True, passout_year__isnull=False,
+    ).update(passout_year=None)
+
+
+def connect():
+    from .models import Course, Department, Member
+
+    for model in (Member, Department):
+        uid = f"member_stats_{model._meta.label_lower}"
+        post_save.connect(_on_owner_scoped_write, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_on_owner_scoped_write, sender=model, dispatch_uid=f"{uid}_delete")
+
+    post_delete.connect(_on_course_delete, sender=Course, dispatch_uid="member_passout_year_course_delete")
@@ -0,0 +1,124 @@
+"""
+members/stats.py
+────────────────
+Per-owner member breakdowns for the dashboards.
+
+    get_member_stats(owner)     → cached dict (below)
+    status_summary(stats)       → the status cards, with percentages
+    invalidate_member_stats(owner_id)
+
+One GROUP BY department query with conditional aggregates yields every
+figure — status and role counts per department, summed in Python for the
+totals — so the members dashboard and the admin dashboards
+(dashboards/rollup.py) share a single query:
+
+    {
+      "total_count":   int,
+      "status_counts": {"active": n, "inactive": n, "passout": n, "blocked": n},
+      "role_counts":   {"student": n, "teacher": n, "general": n},
+      "departments":   [{"id", "name", "count"}, …],   # most members first
+    }
+
+The result is cached (Django cache) per owner and dropped whenever a
+member or department is written:
+
+  • post_save / post_delete on Member and Department  (members/signals.py)
+  • bulk .update() paths that change status (bulk clearance, the overdue
+    auto-block) call invalidate_member_stats() directly because .update()
+    sends no signals.
+
+Override the TTL in settings.py:
+    MEMBER_STATS_CACHE_TTL = 300   # seconds (default: 300)
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+MEMBER_STATS_CACHE_TTL: int = int(getattr(settings, "MEMBER_STATS_CACHE_TTL", 300))
+
+# "blocked" is not a form choice but is set by the overdue auto-block.
+STATUSES = ("active", "inactive", "passout", "blocked")
+ROLES    = ("student", "teacher", "general")
+
+
+def _key(owner_id) -> str:
+    return f"dg:members:stats:{owner_id}"
+
+
+def compute_member_stats(owner) -> dict:
+    """Single aggregate over *owner*'s members, grouped by department."""
+    from .models import Member
+
+    owner_id = getattr(owner, "pk", owner)
+    counts = {f"s_{s}": Count("id", filter=Q(status=s)) for s in STATUSES}
+    counts.update({f"r_{r}": Count("id", filter=Q(role=r)) for r in ROLES})
+    rows = (
+        Member.objects.filter(owner_id=owner_id).order_by()
+        .values("department_id", "department__name")
+        .annotate(n=Count("id"), **counts)
+    )
+
+    stats = {
+        "total_count":   0,
+        "status_counts": dict.fromkeys(STATUSES, 0),
+        "role_counts":   dict.fromkeys(ROLES, 0),
+        "departments":   [],
+    }
+    for row in rows:
+        stats["total_count"] += row["n"]
+        for s in STATUSES:
+            stats["status_counts"][s] += row[f"s_{s}"]
+        for r in ROLES:
+            stats["role_counts"][r] += row[f"r_{r}"]
+        stats["departments"].append({
+            "id":    row["department_id"],
+            "name":  row["department__name"] or "No Department",
+            "count": row["n"],
+        })
+    stats["departments"].sort(key=lambda d: (-d["count"], d["name"]))
+    return stats
+
+
+def get_member_stats(owner) -> dict:
+    """compute_member_stats() for *owner* (User or pk), served from cache when possible."""
+    key = _key(getattr(owner, "pk", owner))
+    try:
+        stats = cache.get(key)
+    except Exception:
+        stats = None
+    if stats is None:
+        stats = compute_member_stats(owner)
+        try:
+            cache.set(key, stats, MEMBER_STATS_CACHE_TTL)
+        except Exception:
+            pass
+    return stats
+
+
+def status_summary(stats) -> dict:
+    """Counts and percentages for the active / passout / inactive cards."""
+    status = stats["status_counts"]
+    total  = stats["total_count"]
+
+    def pct(n):
+        return round(n / total * 100, 1) if total else 0
+
+    return {
+        "total_count":         total,
+        "active_count":        status["active"],
+        "passout_count":       status["passout"],
+        "inactive_count":      status["inactive"],
+        "active_percentage":   pct(status["active"]),
+        "passout_percentage":  pct(status["passout"]),
+        "inactive_percentage": pct(status["inactive"]),
+    }
+
+
+def invalidate_member_stats(owner_id) -> None:
+    if not owner_id:
+        return
+    try:
+        cache.delete(_key(owner_id))
+    except Exception:
+        pass
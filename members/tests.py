@@ -1,3 +1,540 @@
+"""
+members/tests.py
+
+Run with:
+    python manage.py test members
+"""
+
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from transactions.tests import _make_book, _make_library, _make_member, _make_transaction
+
+
+def _make_fine(library, txn, amount, fine_type="overdue"):
+    from finance.models import Fine
+    return Fine.objects.create(library=library, transaction=txn, amount=Decimal(amount), fine_type=fine_type)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pending clearance
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PendingClearanceTests(TestCase):
+
+    def setUp(self):
+        from transactions.models import Transaction
+
+        cache.clear()
+        self.library = _make_library("clr")
+        book  = self.book = _make_book(self.library)
+        today = date.today()
+
+        # late: one book out for 40 days + an unpaid damage fine
+        self.late = _make_member(self.library, 1)
+        txn = _make_transaction(self.library, self.late, book, issue_date=today - timedelta(days=40))
+        _make_transaction(self.library, self.late, book, issue_date=today - timedelta(days=10))
+        _make_fine(self.library, txn, "25.00", "damage")
+
+        # fined: book returned, fine still owed
+        self.fined = _make_member(self.library, 2)
+        txn = _make_transaction(self.library, self.fined, book, status=Transaction.STATUS_RETURNED)
+        _make_fine(self.library, txn, "40.00")
+
+        # lost: a lost book, nothing else
+        self.lost = _make_member(self.library, 3)
+        _make_transaction(self.library, self.lost, book, status=Transaction.STATUS_LOST)
+
+        # clean: owes nothing — never listed
+        self.clean = _make_member(self.library, 4)
+
+        # another library's obligations must not leak in
+        from accounts.models import Library
+        other = Library.objects.create(
+            user=User.objects.create_user("clr2"), library_name="Other", institute_email="clr2@test.com",
+        )
+        _make_transaction(other, self.clean, _make_book(other))
+
+    def test_obligations_are_annotated_in_sql(self):
+        from members.clearance import pending_clearance_members
+
+        rows = {m.pk: m for m in pending_clearance_members(self.library)}
+        self.assertEqual(set(rows), {self.late.pk, self.fined.pk, self.lost.pk})
+
+        late = rows[self.late.pk]
+        self.assertEqual((late.pending_books, late.pending_damages, late.pending_lost), (2, 1, 0))
+        self.assertEqual(late.total_fine, Decimal("25.00"))
+        self.assertEqual((late.days_pending, late.priority), (40, "high"))
+
+        fined = rows[self.fined.pk]
+        self.assertEqual((fined.pending_books, fined.total_fine, fined.days_pending), (0, Decimal("40.00"), 0))
+        self.assertEqual(rows[self.lost.pk].pending_lost, 1)
+
+    def test_filters(self):
+        from members.clearance import pending_clearance_members, pending_clearance_stats
+
+        def pks(**filters):
+            return set(pending_clearance_members(self.library, **filters).values_list("pk", flat=True))
+
+        self.assertEqual(pks(issue_type="books"), {self.late.pk})
+        self.assertEqual(pks(issue_type="fines"), {self.late.pk, self.fined.pk})
+        self.assertEqual(pks(issue_type="damages"), {self.late.pk})
+        self.assertEqual(pks(issue_type="lost"), {self.lost.pk})
+        self.assertEqual(pks(priority="high"), {self.late.pk})
+        self.assertEqual(pks(priority="low"), {self.fined.pk, self.lost.pk})
+        self.assertEqual(pks(department="not-a-number"), pks())
+
+        stats = pending_clearance_stats(pending_clearance_members(self.library))
+        self.assertEqual(stats, {"unreturned_books": 2, "total_fines": 65.0})
+
+    def test_page_query_count_does_not_grow_with_members(self):
+        self.client.force_login(self.library.user)
+        url = reverse("members:pending_clearance")
+
+        with CaptureQueriesContext(connection) as before:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_count"], 3)
+
+        for n in range(5, 15):
+            _make_transaction(self.library, _make_member(self.library, n), self.book)
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as after:
+            resp = self.client.get(url)
+        self.assertEqual(resp.context["total_count"], 13)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+
+    def test_mark_cleared_uses_the_same_figures(self):
+        self.client.force_login(self.library.user)
+        resp = self.client.post(
+            reverse("members:member_mark_cleared", args=[self.clean.pk]),
+            headers={"accept": "application/json"},
+        )
+        self.assertTrue(resp.json()["success"])
+        resp = self.client.post(
+            reverse("members:member_mark_cleared", args=[self.fined.pk]),
+            headers={"accept": "application/json"},
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("₹40", resp.json()["message"])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Bulk clearance
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BulkClearanceTests(TestCase):
+
+    def setUp(self):
+        from members.models import Course
+        from transactions.models import Transaction
+
+        cache.clear()
+        self.library = _make_library("bulk")
+        self.course  = Course.objects.create(owner=self.library.user, name="B.Tech", code="BT", duration=4)
+        book = _make_book(self.library)
+
+        self.batch = []
+        for n in range(1, 6):
+            member = _make_member(self.library, n)
+            member.course, member.admission_year = self.course, 2022
+            member.save()
+            self.batch.append(member)
+        self.outsider = _make_member(self.library, 9)   # no course — not in the batch
+
+        # batch[0] has a book out, batch[1] owes a fine, batch[2] lost a book
+        _make_transaction(self.library, self.batch[0], book)
+        txn = _make_transaction(self.library, self.batch[1], book, status=Transaction.STATUS_RETURNED)
+        _make_fine(self.library, txn, "15.00")
+        _make_transaction(self.library, self.batch[2], book, status=Transaction.STATUS_LOST)
+        self.eligible = {self.batch[3].pk, self.batch[4].pk}
+
+    def _batch(self):
+        from members.bulk_clearance import select_batch
+        return select_batch(self.library, passout_year=2026)
+
+    def test_evaluation_groups_blocking_reasons(self):
+        from members.bulk_clearance import evaluate_batch
+
+        with CaptureQueriesContext(connection) as ctx:
+            evaluation = evaluate_batch(self.library, self._batch())
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(evaluation["total"], 5)
+        self.assertEqual(set(evaluation["eligible"]), self.eligible)
+        self.assertEqual(evaluation["blocked_count"], 3)
+        blocked = {reason: [row["pk"] for row in rows] for reason, rows in evaluation["blocked"].items()}
+        self.assertEqual(blocked, {
+            "active_loans": [self.batch[0].pk],
+            "unpaid_fines": [self.batch[1].pk],
+            "lost_items":   [self.batch[2].pk],
+        })
+
+    def test_clear_batch_only_touches_eligible_members(self):
+        from members.bulk_clearance import clear_batch
+        from members.models import Member
+
+        clear_batch(self.library, self._batch(), self.library.user)
+        cleared = Member.objects.filter(clearance_status="cleared")
+        self.assertEqual(set(cleared.values_list("pk", flat=True)), self.eligible)
+        self.assertEqual(set(cleared.values_list("status", flat=True)), {"passout"})
+        self.assertEqual(set(cleared.values_list("cleared_by", flat=True)), {self.library.user.pk})
+        self.assertEqual(Member.objects.get(pk=self.batch[0].pk).clearance_status, "pending")
+
+    def test_later_years_in_the_same_course_are_never_cleared(self):
+        from unittest import mock
+
+        from members.bulk_clearance import select_batch
+        from members.models import Member
+
+        first_year = _make_member(self.library, 7)
+        first_year.course, first_year.admission_year = self.course, 2025   # passout 2029, nothing borrowed
+        first_year.save()
+
+        with self.assertRaises(ValueError):
+            select_batch(self.library, passout_year=None, course=self.course.pk)
+
+        self.client.force_login(self.library.user)
+        url = reverse("members:bulk_clearance")
+        self.client.post(url, {"course": self.course.pk})
+        self.assertFalse(Member.objects.filter(clearance_status="cleared").exists())
+
+        with mock.patch("members.views.start_certificate_job", return_value=""):
+            self.client.post(url, {"course": self.course.pk, "passout_year": 2026})
+        self.assertEqual(set(Member.objects.filter(clearance_status="cleared").values_list("pk", flat=True)),
+                         self.eligible)
+        first_year.refresh_from_db()
+        self.assertEqual((first_year.status, first_year.clearance_status), ("active", "pending"))
+
+    def test_expired_export_files_are_pruned(self):
+        import os
+        import tempfile
+        import time
+        from unittest import mock
+
+        from members import bulk_clearance
+
+        with tempfile.TemporaryDirectory() as export_dir, \
+                mock.patch("members.bulk_clearance.CLEARANCE_EXPORT_DIR", export_dir):
+            old, fresh, other = (os.path.join(export_dir, name)
+                                 for name in ("clearance_old.zip", "clearance_new.pdf", "notes.zip"))
+            for path in (old, fresh, other):
+                open(path, "wb").close()
+            stale = time.time() - bulk_clearance.CLEARANCE_JOB_TTL - 60
+            os.utime(old, (stale, stale))
+            os.utime(other, (stale, stale))
+
+            bulk_clearance.start_certificate_job(self.library, [], "zip", background=False)
+            self.assertFalse(os.path.exists(old))
+            self.assertTrue(os.path.exists(fresh))
+            self.assertTrue(os.path.exists(other))   # not ours
+
+    def test_certificates_zip_and_merged_pdf(self):
+        import zipfile
+        from unittest import mock
+
+        from members.bulk_clearance import certificate_contexts, clear_batch, render_certificates
+
+        evaluation = clear_batch(self.library, self._batch(), self.library.user)
+        contexts   = certificate_contexts(self.library, evaluation["eligible"] + [self.batch[0].pk])
+        self.assertEqual(len(contexts), 2)   # uncleared members get no certificate
+
+        seen = []
+        for workers in (1, 2):   # one chunk per certificate, so two workers use the process pool
+            with mock.patch("members.bulk_clearance.CLEARANCE_RENDER_CHUNK", 1):
+                data = render_certificates(contexts, "zip", workers=workers,
+                                           progress=lambda done, total: seen.append((done, total)))
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                names = zf.namelist()
+                self.assertEqual(len(names), 2)
+                self.assertTrue(all(zf.read(n).startswith(b"%PDF") for n in names))
+        self.assertEqual(seen[-1], (2, 2))
+
+        merged = render_certificates(contexts, "pdf")
+        self.assertTrue(merged.startswith(b"%PDF"))
+        self.assertIn(b"/Count 2", merged)
+
+    def test_view_clears_and_serves_the_export(self):
+        from unittest import mock
+
+        from members import bulk_clearance
+
+        self.client.force_login(self.library.user)
+        url = reverse("members:bulk_clearance")
+        resp = self.client.get(url, {"passout_year": 2026})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["evaluation"]["eligible"]), 2)
+
+        real_start = bulk_clearance.start_certificate_job
+        with mock.patch("members.views.start_certificate_job",
+                        lambda *a, **kw: real_start(*a, background=False, **kw)):
+            resp = self.client.post(url, {"passout_year": 2026, "format": "pdf"},
+                                    headers={"accept": "application/json"})
+        payload = resp.json()
+        self.assertEqual((payload["cleared"], payload["blocked"]), (2, 3))
+
+        status = self.client.get(payload["status_url"]).json()
+        self.assertEqual((status["state"], status["done"], status["total"]), ("done", 2, 2))
+        resp = self.client.get(status["download_url"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(b"".join(resp.streaming_content).startswith(b"%PDF"))
+
+        from accounts.models import Library
+        other = User.objects.create_user("bulk2")
+        Library.objects.create(user=other, library_name="Other", institute_email="bulk2@test.com")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(payload["status_url"]).status_code, 404)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Certificate renderer
+# ─────────────────────────────────────────────────────────────────────────────
+
+class CertificateRendererTests(TestCase):
+
+    def setUp(self):
+        from members.bulk_clearance import certificate_contexts, clear_batch
+        from members.models import Member
+
+        self.library = _make_library("cert")
+        for n in (1, 2):
+            _make_member(self.library, n)
+        clear_batch(self.library, Member.objects.all(), self.library.user)
+        self.contexts = lambda: certificate_contexts(self.library, Member.objects.values_list("pk", flat=True))
+
+    def _png(self, width):
+        from PIL import Image
+
+        buf = io.BytesIO()
+        Image.new("RGB", (width, 100), "navy").save(buf, format="PNG")
+        return buf.getvalue()
+
+    def test_assets_are_built_once_per_renderer(self):
+        from unittest import mock
+
+        from members import clearance_certificate
+        from members.clearance_certificate import CertificateRenderer
+
+        loads = []
+        renderer = CertificateRenderer(logo_loader=lambda digest: loads.append(digest) or self._png(300))
+        self.library.library_logo_hash = "a" * 64
+        contexts = self.contexts()
+        with mock.patch.object(clearance_certificate, "getSampleStyleSheet",
+                               wraps=clearance_certificate.getSampleStyleSheet) as sheet:
+            results = renderer.render_many(contexts + contexts)
+            renderer.render(contexts[0])
+        self.assertEqual(sheet.call_count, 1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(loads, ["a" * 64])
+        self.assertLessEqual(renderer.library_logo(contexts[0]).getSize()[0], 160)
+
+        # A new logo is a new digest — picked up without invalidation.
+        self.library.library_logo_hash = "b" * 64
+        renderer.render(self.contexts()[0])
+        self.assertEqual(loads, ["a" * 64, "b" * 64])
+
+    def test_build_clearance_pdf_draws_the_library_logo(self):
+        from core.image_store import put_image
+        from members.clearance_certificate import build_clearance_pdf, renderer
+        from members.models import Member
+
+        member = Member.objects.first()
+        plain, _ = build_clearance_pdf(member, self.library)
+        self.library.library_logo_hash = put_image(self._png(400))
+        self.library.save()
+        with_logo, filename = build_clearance_pdf(member, self.library)
+        self.assertEqual(filename, f"clearance_{member.member_id}.pdf")
+        self.assertEqual(with_logo.count(b"/Subtype /Image"), plain.count(b"/Subtype /Image") + 1)
+        self.assertIsNotNone(renderer.footer_logo)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Member statistics
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MemberStatsTests(TestCase):
+
+    def setUp(self):
+        from members.models import Department
+
+        cache.clear()
+        self.library = _make_library("mstats")
+        self.owner   = self.library.user
+        self.dept    = Department.objects.create(owner=self.owner, name="Physics", code="PHY")
+        self.members = [_make_member(self.library, n) for n in range(1, 5)]
+        self.members[0].role = "teacher"
+        self.members[0].department = self.dept
+        self.members[0].save()
+        self.members[1].status = "passout"
+        self.members[1].department = self.dept
+        self.members[1].save()
+
+    def test_one_query_then_cached(self):
+        from members.stats import get_member_stats
+
+        with CaptureQueriesContext(connection) as ctx:
+            stats = get_member_stats(self.owner)
+            self.assertEqual(get_member_stats(self.owner.pk), stats)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.assertEqual(stats["total_count"], 4)
+        self.assertEqual(stats["status_counts"], {"active": 3, "inactive": 0, "passout": 1, "blocked": 0})
+        self.assertEqual(stats["role_counts"], {"student": 3, "teacher": 1, "general": 0})
+        self.assertEqual(
+            [(d["name"], d["count"]) for d in stats["departments"]],
+            [("No Department", 2), ("Physics", 2)],
+        )
+
+    def test_writes_invalidate(self):
+        from members.bulk_clearance import clear_batch
+        from members.models import Member
+        from members.stats import get_member_stats
+
+        get_member_stats(self.owner)
+        self.members[2].status = "inactive"
+        self.members[2].save()
+        self.assertEqual(get_member_stats(self.owner)["status_counts"]["inactive"], 1)
+
+        self.members[3].delete()
+        self.assertEqual(get_member_stats(self.owner)["total_count"], 3)
+
+        self.dept.name = "Applied Physics"
+        self.dept.save()
+        self.assertIn("Applied Physics", [d["name"] for d in get_member_stats(self.owner)["departments"]])
+
+        clear_batch(self.library, Member.objects.filter(pk=self.members[0].pk), self.owner)
+        self.assertEqual(get_member_stats(self.owner)["status_counts"]["passout"], 2)
+
+    def test_dashboards_share_the_stats(self):
+        from unittest import mock
+
+        from django.test import RequestFactory
+
+        from members import views
+
+        # members_dashboard is not routed yet (members/urls.py) — call it directly.
+        request = RequestFactory().get("/members/dashboard/")
+        request.user = self.owner
+        with mock.patch.object(views, "render") as render:
+            views.members_dashboard(request)
+        context = render.call_args.args[2]
+        self.assertEqual((context["total_count"], context["passout_percentage"]), (4, 25.0))
+        self.assertEqual(context["department_labels"], '["Physics"]')
+        self.assertEqual(context["role_counts"]["teacher"], 1)
+
+        from dashboards.rollup import kpi_context
+        kpis = kpi_context(self.library)
+        self.assertEqual(kpis["stats"]["active_count"], 3)
+        self.assertEqual(kpis["department_data"], "[2, 2]")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Member list indexes / stored columns
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MemberListIndexTests(TestCase):
+
+    def setUp(self):
+        from members.models import Course, Department
+
+        self.library = _make_library("idx")
+        self.owner   = self.library.user
+        self.course  = Course.objects.create(owner=self.owner, name="B.Sc", code="BSC", duration=3)
+        self.dept    = Department.objects.create(owner=self.owner, name="Chemistry", code="CHE")
+        self.member  = _make_member(self.library, 1)
+        self.member.course, self.member.admission_year = self.course, 2023
+        self.member.roll_number = "CHE-17"
+        self.member.save()
+
+    def test_passout_year_is_stored_and_kept_in_sync(self):
+        from members.models import Member
+
+        def stored():
+            return Member.objects.values_list("passout_year", flat=True).get(pk=self.member.pk)
+
+        self.assertEqual(stored(), 2026)
+        self.member.admission_year = 2024
+        self.member.save(update_fields=["admission_year"])
+        self.assertEqual(stored(), 2027)
+
+        self.course.duration = 4
+        self.course.save()
+        self.assertEqual(stored(), 2028)
+
+        self.course.delete()
+        self.assertIsNone(stored())
+
+    def test_search_document(self):
+        from members.models import Member
+
+        def found(q):
+            return list(Member.objects.filter(owner=self.owner).search(q).values_list("pk", flat=True))
+
+        other = _make_member(self.library, 2)
+        self.assertEqual(found("arj sen1"), [self.member.pk])
+        self.assertEqual(found("ARJUN2@test.com"), [other.pk])
+        self.assertEqual(found("che-17"), [self.member.pk])
+        self.assertEqual(found(self.member.phone), [self.member.pk])
+        self.assertEqual(len(found("  ")), 2)
+
+        self.member.first_name = "Bikram"
+        self.member.save(update_fields=["first_name"])
+        self.assertEqual(found("bikram"), [self.member.pk])
+
+        self.client.force_login(self.owner)
+        resp = self.client.get(reverse("members:members_list"), {"search": "bikram"})
+        self.assertEqual(resp.context["total_count"], 1)
+
+    def test_numeric_search_matches_phone_and_roll_number_tails(self):
+        from finance.search import DocumentSearch
+        from members.models import Member
+
+        self.member.phone, self.member.roll_number = "9876543210", "2023041"
+        self.member.save()
+        _make_member(self.library, 2)
+        members = Member.objects.filter(owner=self.owner)
+
+        for q in ("3210", "543", "9876543210", "041", "arj 3210"):
+            self.assertEqual(list(members.search(q).values_list("pk", flat=True)), [self.member.pk], q)
+
+        # Digits never go to the word-prefix index (MATCH / to_tsquery), which
+        # would miss a suffix on MySQL and PostgreSQL — only words do.
+        lookups = [type(node).__name__ for node in members.search("arj 3210").query.where.children]
+        self.assertEqual(lookups.count(DocumentSearch.__name__), 1)
+        self.assertIn("Contains", lookups)
+        self.assertNotIn(DocumentSearch.__name__,
+                         [type(node).__name__ for node in members.search("3210").query.where.children])
+
+    def test_list_filters_use_the_composite_indexes(self):
+        from members.models import Member
+
+        if connection.vendor != "sqlite":
+            self.skipTest("planner choice on tiny tables is only deterministic on SQLite")
 
-# Create your tests here.
+        # The lists order by -created_at (Member.Meta.ordering) and paginate,
+        # so each index must serve the filter and the order without a sort.
+        members = Member.objects.filter(owner=self.owner)
+        cases = {
+            "member_owner_created_idx":   members,
+            "member_owner_status_idx":    members.filter(status="active"),
+            "member_owner_role_idx":      members.filter(role="teacher"),
+            "member_owner_year_idx":      members.filter(year_id=1),
+            "member_owner_sem_idx":       members.filter(semester_id=1),
+            "member_owner_dept_idx":      members.filter(department=self.dept),
+            "member_owner_course_idx":    members.filter(course=self.course),
+            "member_owner_passout_idx":   members.filter(passout_year=2026),
+            "member_owner_clearance_idx": members.filter(clearance_status="pending"),
+        }
+        for index, qs in cases.items():
+            with self.subTest(index=index):
+                plan = qs.explain()
+                self.assertIn(index, plan)
+                self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
@@ -35,6 +35,9 @@ urlpatterns = [
     path("clearance/pending/", views.pending_clearance, name="pending_clearance"),
     path("<int:pk>/clearance-certificate/", views.clearance_certificate, name="clearance_certificate"),
     path("<int:pk>/issue-clearance/", views.issue_clearance, name="issue_clearance"),
+    path("clearance/bulk/", views.bulk_clearance, name="bulk_clearance"),
+    path("clearance/bulk/<slug:job_id>/", views.bulk_clearance_status, name="bulk_clearance_status"),
+    path("clearance/bulk/<slug:job_id>/download/", views.bulk_clearance_download, name="bulk_clearance_download"),
 
     # ── Lookup management (settings / admin-like pages) ────────────────────────
     path("settings/departments/", views.department_list, name="department_list"),
@@ -6,22 +6,33 @@ Every queryset is filtered by `owner=request.user` (multi-tenancy).
 
 Photo serving
 ─────────────
-Member photos are stored as binary blobs (BinaryField) in MySQL.
-Use the `member_photo` view to serve them:
-    <img src="{% url 'members:member_photo' member.pk %}">
+Member photos live in the core image store (core/image_store.py); the
+Member row keeps only `photo_hash`.  Use the `member_photo` view to serve
+them (?size=sm / ?size=md for the pre-generated thumbnails):
+    <img src="{% url 'members:member_photo' member.pk %}?size=sm">
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Count, Sum, F, ExpressionWrapper, IntegerField
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse
+from django.db.models import Q, Sum
 from django.utils import timezone
 from django.core.paginator import Paginator
 from datetime import timedelta
+from urllib.parse import urlencode
 import json
+import os
 
+from core.image_serving import image_response
+
+from .bulk_clearance import (
+    BLOCKING_REASONS, FORMATS, clear_batch, evaluate_batch, export_path, job_status,
+    select_batch, start_certificate_job,
+)
+from .clearance import obligations_for, pending_clearance_members, pending_clearance_stats
 from .models import Member, Department, Course, AcademicYear, Semester, Transaction
+from .stats import get_member_stats, status_summary
 from .forms import (
     MemberForm, DepartmentForm, CourseForm, AcademicYearForm, SemesterForm,
     StudentMemberForm, TeacherMemberForm, GeneralMemberForm,
@@ -79,8 +90,9 @@ def _pending_counts(member, owner):
     Return (pending_books, pending_fines_decimal, lost_items) for one member.
 
     Queries the transactions app (Fine + Transaction scoped by library) as the
-    authoritative source.  Falls back to the legacy members.Transaction model
-    (scoped by owner) if the transactions app is unavailable.
+    authoritative source (one query — see members/clearance.py).  Falls back
+    to the legacy members.Transaction model (scoped by owner) if the
+    transactions app is unavailable.
     """
     library = None
     try:
@@ -90,32 +102,8 @@ def _pending_counts(member, owner):
 
     if library is not None:
         try:
-            from transactions.models import (
-                Transaction as TxnModel,
-                Fine as FineModel,
-            )
-            from django.db.models import Sum as _Sum
-
-            pending_books = TxnModel.objects.for_library(library).filter(
-                member=member,
-                status__in=[TxnModel.STATUS_ISSUED, TxnModel.STATUS_OVERDUE],
-            ).count()
-
-            lost_items = TxnModel.objects.for_library(library).filter(
-                member=member,
-                status=TxnModel.STATUS_LOST,
-            ).count()
-
-            # All unpaid fines: overdue + damage + lost-book penalties
-            pending_fines = (
-                FineModel.objects.for_library(library).filter(
-                    transaction__member=member,
-                    status=FineModel.STATUS_UNPAID,
-                ).aggregate(total=_Sum("amount"))["total"]
-                or 0
-            )
-
-            return pending_books, pending_fines, lost_items
+            row = obligations_for(member, library)
+            return row["pending_books"], row["total_fine"], row["pending_lost"]
 
         except Exception:
             pass   # transactions app unavailable — fall through
@@ -154,40 +142,23 @@ def _wants_json(request):
 
 @login_required
 def members_dashboard(request):
-    members = Member.objects.filter(owner=request.user)
-
-    total    = members.count()
-    active   = members.filter(status="active").count()
-    passout  = members.filter(status="passout").count()
-    inactive = members.filter(status="inactive").count()
-
-    def pct(n):
-        return round(n / total * 100, 1) if total else 0
-
-    stats = {
-        "total_count":         total,
-        "active_count":        active,
-        "passout_count":       passout,
-        "inactive_count":      inactive,
-        "active_percentage":   pct(active),
-        "passout_percentage":  pct(passout),
-        "inactive_percentage": pct(inactive),
-    }
+    member_stats = get_member_stats(request.user)
+    stats        = status_summary(member_stats)
 
-    recent_members = members.order_by("-created_at")[:10]
+    recent_members = Member.objects.cards().filter(owner=request.user).order_by("-created_at")[:10]
 
-    departments = (
-        Department.objects.filter(owner=request.user)
-        .annotate(member_count=Count("members"))
-        .filter(member_count__gt=0)
+    departments = sorted(
+        (d for d in member_stats["departments"] if d["id"] is not None),
+        key=lambda d: d["name"],
     )
 
     context = {
         **stats,
         "stats":             stats,
+        "role_counts":       member_stats["role_counts"],
         "recent_members":    recent_members,
-        "department_labels": json.dumps([d.name for d in departments]),
-        "department_data":   json.dumps([d.member_count for d in departments]),
+        "department_labels": json.dumps([d["name"] for d in departments]),
+        "department_data":   json.dumps([d["count"] for d in departments]),
     }
     return render(request, "members/members_dashboard.html", context)
 
@@ -198,7 +169,7 @@ def members_dashboard(request):
 
 @login_required
 def members_list(request):
-    members = Member.objects.filter(owner=request.user).select_related(
+    members = Member.objects.cards().filter(owner=request.user).select_related(
         "department", "course", "year", "semester"
     )
 
@@ -217,11 +188,7 @@ def members_list(request):
 
     search = request.GET.get("search", "").strip()
     if search:
-        members = members.filter(
-            Q(first_name__icontains=search) | Q(last_name__icontains=search)
-            | Q(email__icontains=search)    | Q(member_id__icontains=search)
-            | Q(phone__icontains=search)    | Q(roll_number__icontains=search)
-        )
+        members = members.search(search)
 
     total_count = members.count()
     page_obj    = _paginate(members, request)
@@ -237,7 +204,7 @@ def members_list(request):
 
 @login_required
 def members_active(request):
-    members = Member.objects.filter(
+    members = Member.objects.cards().filter(
         owner=request.user, status="active"
     ).select_related("department", "course", "year", "semester")
 
@@ -250,10 +217,7 @@ def members_active(request):
 
     search = request.GET.get("search", "").strip()
     if search:
-        members = members.filter(
-            Q(first_name__icontains=search) | Q(last_name__icontains=search)
-            | Q(email__icontains=search)    | Q(member_id__icontains=search)
-        )
+        members = members.search(search)
 
     total_count = members.count()
     page_obj    = _paginate(members, request)
@@ -269,7 +233,7 @@ def members_active(request):
 
 @login_required
 def members_inactive(request):
-    members = Member.objects.filter(
+    members = Member.objects.cards().filter(
         owner=request.user, status="inactive"
     ).select_related("department", "course", "year", "semester")
 
@@ -295,7 +259,7 @@ def members_inactive(request):
 @login_required
 def members_passout(request):
     """Pass-out members with department / passout-year / clearance filtering."""
-    members = Member.objects.filter(
+    members = Member.objects.cards().filter(
         owner=request.user, status="passout"
     ).select_related("department", "course", "year", "semester")
 
@@ -304,13 +268,7 @@ def members_passout(request):
 
     if request.GET.get("passout_year"):
         try:
-            py = int(request.GET["passout_year"])
-            members = members.annotate(
-                computed_passout_year=ExpressionWrapper(
-                    F("admission_year") + F("course__duration"),
-                    output_field=IntegerField(),
-                )
-            ).filter(computed_passout_year=py)
+            members = members.filter(passout_year=int(request.GET["passout_year"]))
         except (ValueError, TypeError):
             pass
 
@@ -319,18 +277,10 @@ def members_passout(request):
 
     # Distinct passout years for the dropdown
     passout_years = (
-        Member.objects.filter(owner=request.user, status="passout")
-        .exclude(admission_year__isnull=True)
-        .exclude(course__isnull=True)
-        .annotate(
-            passout_yr=ExpressionWrapper(
-                F("admission_year") + F("course__duration"),
-                output_field=IntegerField(),
-            )
-        )
-        .values_list("passout_yr", flat=True)
+        Member.objects.filter(owner=request.user, status="passout", passout_year__isnull=False)
+        .values_list("passout_year", flat=True)
         .distinct()
-        .order_by("-passout_yr")
+        .order_by("-passout_year")
     )
 
     total_count = members.count()
@@ -358,8 +308,7 @@ def member_detail(request, pk):
         member=member, owner=request.user
     ).order_by("-issue_date")[:10]
 
-    # BinaryField is always truthy — check bytes length instead
-    has_photo = bool(member.photo and bytes(member.photo))
+    has_photo = member.has_photo
 
     context = {
         "member":       member,
@@ -471,37 +420,19 @@ def member_delete(request, pk):
 @login_required
 def member_photo(request, pk):
     """
-    Serve a member photo stored as BinaryField (LONGBLOB in MySQL).
-    Must cast memoryview to bytes and check length — not truthiness.
-
-    Cache strategy:
-    • ETag is built from member.updated_at so the browser revalidates
-      automatically after any edit (including a photo change).
-    • max-age=0 + must-revalidate means the browser always checks the
-      ETag before using its cached copy — no stale photo after an edit.
+    Serve a member photo from the image store; ?size= picks a thumbnail.
+
+    Cache strategy (core/image_serving.py):
+    • ETag is the photo's content digest, Last-Modified the member's
+      updated_at — both from the row, so a revalidation is answered with
+      a 304 without reading the image.
+    • Plain URLs are revalidated on every use; ?v=<digest> URLs are
+      immutable and cached outright.
     """
-    member = get_object_or_404(Member, pk=pk, owner=request.user)
-
-    raw = member.photo
-    if raw is None:
-        return HttpResponse(status=404)
-
-    photo_bytes = bytes(raw)
-    if not photo_bytes:
-        return HttpResponse(status=404)
-
-    # Build a strong ETag from the member's last-update timestamp
-    etag = f'"{pk}-{int(member.updated_at.timestamp())}"'
-
-    # Respond 304 Not Modified if the browser's cached copy is still fresh
-    if request.META.get("HTTP_IF_NONE_MATCH") == etag:
-        return HttpResponse(status=304)
-
-    mime = (member.photo_mime_type or "image/jpeg").strip() or "image/jpeg"
-    response = HttpResponse(photo_bytes, content_type=mime)
-    response["ETag"] = etag
-    response["Cache-Control"] = "private, max-age=0, must-revalidate"
-    return response
+    member = get_object_or_404(
+        Member.objects.only("pk", "owner_id", "photo_hash", "updated_at"), pk=pk, owner=request.user,
+    )
+    return image_response(request, member.photo_hash, member.updated_at, not_found="No photo.")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -656,7 +587,7 @@ def clearance_check(request):
 @login_required
 def cleared_members(request):
     """Members whose clearance_status == 'cleared'."""
-    members = Member.objects.filter(
+    members = Member.objects.cards().filter(
         owner=request.user, clearance_status="cleared"
     ).select_related("department", "cleared_by").order_by("-clearance_date")
 
@@ -693,68 +624,26 @@ def cleared_members(request):
 @login_required
 def pending_clearance(request):
     """Members with outstanding books or unpaid fines."""
-    base_qs = Member.objects.filter(
-        owner=request.user, clearance_status="pending"
-    ).select_related("department")
-
-    # Annotate pending data in Python to keep owner-scoping simple
-    pending_members = []
-    for member in base_qs:
-        pending_books, pending_fines, lost_items = _pending_counts(member, request.user)
-
-        if pending_books > 0 or float(pending_fines) > 0 or lost_items > 0:
-            oldest = (
-                Transaction.objects.filter(
-                    member=member, owner=request.user,
-                    status__in=["issued", "overdue"],
-                ).order_by("issue_date").first()
-            )
-            member.pending_books   = pending_books
-            member.total_fine      = pending_fines
-            member.pending_damages = 0
-            member.pending_lost    = lost_items
-            member.days_pending    = (
-                (timezone.now().date() - oldest.issue_date.date()).days
-                if oldest else 0
-            )
-            pending_members.append(member)
-
-    # Post-annotation filters
-    if request.GET.get("department"):
-        try:
-            did = int(request.GET["department"])
-            pending_members = [m for m in pending_members if m.department_id == did]
-        except (ValueError, TypeError):
-            pass
+    library = getattr(request.user, "library", None)
+    if library is None:
+        members = Member.objects.none()
+        stats   = {"unreturned_books": 0, "total_fines": 0, "overdue_books": 0}
+    else:
+        from transactions.counts import get_status_counts
 
-    issue_type = request.GET.get("issue_type")
-    if issue_type == "books":
-        pending_members = [m for m in pending_members if m.pending_books > 0]
-    elif issue_type == "fines":
-        pending_members = [m for m in pending_members if float(m.total_fine) > 0]
-    elif issue_type == "damages":
-        pending_members = [m for m in pending_members if m.pending_damages > 0]
-    elif issue_type == "lost":
-        pending_members = [m for m in pending_members if m.pending_lost > 0]
-
-    priority = request.GET.get("priority")
-    if priority == "high":
-        pending_members = [m for m in pending_members if m.days_pending > 30]
-    elif priority == "medium":
-        pending_members = [m for m in pending_members if 15 < m.days_pending <= 30]
-    elif priority == "low":
-        pending_members = [m for m in pending_members if m.days_pending <= 15]
-
-    stats = {
-        "unreturned_books": sum(m.pending_books for m in pending_members),
-        "total_fines":      round(sum(float(m.total_fine) for m in pending_members), 2),
-        "overdue_books":    Transaction.objects.filter(
-            owner=request.user, status="overdue"
-        ).count(),
-    }
+        members = pending_clearance_members(
+            library,
+            department = request.GET.get("department"),
+            issue_type = request.GET.get("issue_type", ""),
+            priority   = request.GET.get("priority", ""),
+        )
+        stats = {
+            **pending_clearance_stats(members),
+            "overdue_books": get_status_counts(library)["overdue_count"],
+        }
 
-    total_count = len(pending_members)
-    page_obj    = _paginate(pending_members, request)
+    page_obj    = _paginate(members, request)
+    total_count = page_obj.paginator.count
 
     context = {
         **_owner_ctx(request),
@@ -911,6 +800,126 @@ def issue_clearance(request, pk):
     })
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Bulk clearance (graduating batches)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _bulk_filters(params) -> dict:
+    filters = {}
+    for key in ("department", "course", "passout_year"):
+        try:
+            filters[key] = int(params.get(key) or 0) or None
+        except (TypeError, ValueError):
+            filters[key] = None
+    return filters
+
+
+@login_required
+def bulk_clearance(request):
+    """
+    GET  → pick a passout year (optionally narrowed to a department /
+           course) and review who is eligible and who is blocked (grouped
+           by reason).
+    POST → clear every eligible member of the batch and start rendering
+           their certificates (ZIP or merged PDF) in the background.
+    """
+    library = getattr(request.user, "library", None)
+    if library is None:
+        messages.error(request, "No library associated with this account.")
+        return redirect("members:pending_clearance")
+
+    params  = request.POST if request.method == "POST" else request.GET
+    filters = _bulk_filters(params)
+    members = select_batch(library, **filters) if filters["passout_year"] else None
+
+    if request.method == "POST":
+        if members is None:
+            messages.error(request, "Choose the passout year of the batch first.")
+            return redirect("members:bulk_clearance")
+
+        fmt        = params.get("format") if params.get("format") in FORMATS else "zip"
+        evaluation = clear_batch(library, members, request.user)
+        job_id     = (
+            start_certificate_job(library, evaluation["eligible"], fmt)
+            if evaluation["eligible"] else ""
+        )
+        msg = (
+            f"{len(evaluation['eligible'])} member(s) cleared; "
+            f"{evaluation['blocked_count']} blocked by outstanding obligations."
+        )
+        if _wants_json(request):
+            from django.urls import reverse as _reverse
+            return JsonResponse({
+                "success":    True,
+                "message":    msg,
+                "cleared":    len(evaluation["eligible"]),
+                "blocked":    evaluation["blocked_count"],
+                "job_id":     job_id,
+                "status_url": _reverse("members:bulk_clearance_status", args=[job_id]) if job_id else None,
+            })
+        messages.success(request, msg)
+        query = urlencode({**{k: v for k, v in filters.items() if v}, **({"job": job_id} if job_id else {})})
+        return redirect(f"{request.path}?{query}")
+
+    passout_years = (
+        Member.objects.filter(owner=request.user, passout_year__isnull=False)
+        .values_list("passout_year", flat=True)
+        .distinct()
+        .order_by("-passout_year")
+    )
+
+    context = {
+        **_owner_ctx(request),
+        "filters":          filters,
+        "passout_years":    passout_years,
+        "evaluation":       evaluate_batch(library, members) if members is not None else None,
+        "blocking_reasons": BLOCKING_REASONS,
+        "formats":          FORMATS,
+        "job_id":           request.GET.get("job", ""),
+    }
+    return render(request, "members/bulk_clearance.html", context)
+
+
+@login_required
+def bulk_clearance_status(request, job_id):
+    """Progress of a certificate job — JSON { success, state, done, total, download_url }."""
+    library = getattr(request.user, "library", None)
+    job     = job_status(library, job_id) if library is not None else None
+    if job is None:
+        return JsonResponse({"success": False, "message": "Job not found."}, status=404)
+
+    payload = {
+        "success": True,
+        "state":   job["state"],
+        "done":    job["done"],
+        "total":   job["total"],
+        "error":   job["error"],
+    }
+    if job["state"] == "done":
+        from django.urls import reverse as _reverse
+        payload["download_url"] = _reverse("members:bulk_clearance_download", args=[job_id])
+    return JsonResponse(payload)
+
+
+@login_required
+def bulk_clearance_download(request, job_id):
+    """Stream a finished certificate job's ZIP / merged PDF."""
+    library = getattr(request.user, "library", None)
+    job     = job_status(library, job_id) if library is not None else None
+    if job is None or job["state"] != "done":
+        raise Http404("Certificates not ready.")
+
+    path = export_path(job_id, job["format"])
+    if not os.path.exists(path):
+        raise Http404("Certificates expired.")
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=f"clearance_certificates.{job['format']}",
+        content_type="application/zip" if job["format"] == "zip" else "application/pdf",
+    )
+
+
 def _build_blocking_reasons(member, owner):
     """
     Query BOTH the transactions app (authoritative) AND the legacy
@@ -925,8 +934,6 @@ def _build_blocking_reasons(member, owner):
         source:       str,   # 'transactions_app' | 'legacy'
       }
     """
-    from decimal import Decimal as _D
-
     library = None
     try:
         library = owner.library
@@ -935,29 +942,10 @@ def _build_blocking_reasons(member, owner):
 
     if library is not None:
         try:
-            from transactions.models import (
-                Transaction as TxnModel,
-                Fine        as FineModel,
-            )
-            from django.db.models import Sum as _Sum
-
-            active_loans = TxnModel.objects.for_library(library).filter(
-                member=member,
-                status__in=[TxnModel.STATUS_ISSUED, TxnModel.STATUS_OVERDUE],
-            ).count()
-
-            lost_items = TxnModel.objects.for_library(library).filter(
-                member=member,
-                status=TxnModel.STATUS_LOST,
-            ).count()
-
-            unpaid_fine = float(
-                FineModel.objects.for_library(library).filter(
-                    transaction__member=member,
-                    status=FineModel.STATUS_UNPAID,
-                ).aggregate(total=_Sum("amount"))["total"]
-                or _D("0.00")
-            )
+            row          = obligations_for(member, library)
+            active_loans = row["pending_books"]
+            lost_items   = row["pending_lost"]
+            unpaid_fine  = float(row["total_fine"])
 
             return {
                 "has_blocking": active_loans > 0 or lost_items > 0 or unpaid_fine > 0,
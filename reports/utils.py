@@ -109,6 +109,7 @@ def get_transaction_report(library, date_from, date_to, status=None):
         Transaction.objects.for_library(library)
         .select_related("member", "book")
         .filter(issue_date__gte=date_from, issue_date__lte=date_to)
+        .with_fine_fields(library)
     )
     if status:
         qs = qs.filter(status=status)
@@ -157,7 +158,7 @@ def get_book_report(library, date_from, date_to, category_id=None):
     )
     count_map = {row["book_id"]: row["issue_count"] for row in txn_counts}
 
-    qs = Book.objects.filter(owner=owner).select_related("category")
+    qs = Book.objects.filter(owner=owner).select_related("category").with_stock()
     if category_id:
         qs = qs.filter(category_id=category_id)
 
@@ -333,7 +334,8 @@ def get_fine_summary(library, date_from, date_to):
 def get_overdue_report(library):
     """
     All currently overdue transactions, ordered by most days overdue first.
-    Returns queryset.
+    Returns queryset annotated with with_fine_fields() (db_overdue_days,
+    db_fine_amount, …) so callers can sort / total fines in SQL.
     """
     from transactions.models import Transaction
 
@@ -341,7 +343,8 @@ def get_overdue_report(library):
         Transaction.objects.for_library(library)
         .select_related("member", "book")
         .filter(status=Transaction.STATUS_OVERDUE)
-        .order_by("due_date")
+        .with_fine_fields(library)
+        .order_by("-db_overdue_days", "pk")
     )
 
 
@@ -355,7 +358,7 @@ def get_inventory_report(library, category_id=None):
     """
     from books.models import Book
 
-    qs = Book.objects.filter(owner=library.user).select_related("category")
+    qs = Book.objects.filter(owner=library.user).select_related("category").with_stock()
     if category_id:
         qs = qs.filter(category_id=category_id)
     return qs.order_by("category__name", "title")
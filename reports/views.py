@@ -29,6 +29,7 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth.decorators import login_required
+from django.db.models import Sum
 from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
@@ -257,9 +258,9 @@ def overdue_report(request):
 
     overdues = get_overdue_report(library)
 
-    total_fine = sum(
-        (t.fine_amount for t in overdues),
-        Decimal("0.00"),
+    total_fine = (
+        overdues.order_by().aggregate(t=Sum("db_fine_amount"))["t"]
+        or Decimal("0.00")
     )
 
     return render(request, "reports/overdue_report.html", {
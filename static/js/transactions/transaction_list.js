@@ -59,6 +59,7 @@
       const url = new URL(window.location.href);
       url.searchParams.set('per_page', this.value);
       url.searchParams.set('page', '1');
+      url.searchParams.delete('cursor');
       window.location.href = url.toString();
     });
   }
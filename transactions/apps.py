@@ -19,6 +19,11 @@ class TransactionsConfig(AppConfig):
         is only created once even if ready() is called twice by Django's
         autoreloader (RUN_MAIN env-var trick is handled inside fine_sync).
         """
+        # Signal receivers (search-cache invalidation) are needed everywhere,
+        # including management commands that write data.
+        from . import signals
+        signals.connect()
+
         # Only start the background thread in the main worker process,
         # not during management commands like migrate, collectstatic, etc.
         import os
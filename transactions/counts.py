@@ -0,0 +1,69 @@
+"""
+transactions/counts.py
+──────────────────────
+Per-library transaction status counts for the transaction_list tabs.
+
+One conditional-aggregate query replaces the five separate COUNT(*)s;
+the result is cached (Django cache) per library and dropped whenever a
+transaction is written:
+
+  • post_save / post_delete on Transaction  (transactions/signals.py)
+  • bulk .update() paths that change status  (sync_overdue_for_library,
+    _sync_overdue_settled_for_library) call invalidate_status_counts()
+    directly because .update() sends no signals.
+
+Override the TTL in settings.py:
+    TXN_COUNTS_CACHE_TTL = 300   # seconds (default: 300)
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+TXN_COUNTS_CACHE_TTL: int = int(getattr(settings, "TXN_COUNTS_CACHE_TTL", 300))
+
+
+def _key(library_pk) -> str:
+    return f"dg:txn:counts:{library_pk}"
+
+
+def compute_status_counts(library) -> dict:
+    """Single aggregate: total + one count per status tab."""
+    from .models import Transaction
+
+    agg = Transaction.objects.for_library(library).aggregate(
+        total_count    = Count("id"),
+        issued_count   = Count("id", filter=Q(status=Transaction.STATUS_ISSUED)),
+        overdue_count  = Count("id", filter=Q(status=Transaction.STATUS_OVERDUE)),
+        returned_count = Count("id", filter=Q(status=Transaction.STATUS_RETURNED)),
+        lost_count     = Count("id", filter=Q(status=Transaction.STATUS_LOST)),
+    )
+    return {k: v or 0 for k, v in agg.items()}
+
+
+def get_status_counts(library) -> dict:
+    """
+    {"total_count", "issued_count", "overdue_count", "returned_count",
+     "lost_count"} for *library*, served from cache when possible.
+    """
+    key = _key(library.pk)
+    try:
+        counts = cache.get(key)
+    except Exception:
+        counts = None
+    if counts is None:
+        counts = compute_status_counts(library)
+        try:
+            cache.set(key, counts, TXN_COUNTS_CACHE_TTL)
+        except Exception:
+            pass
+    return counts
+
+
+def invalidate_status_counts(library_pk) -> None:
+    if not library_pk:
+        return
+    try:
+        cache.delete(_key(library_pk))
+    except Exception:
+        pass
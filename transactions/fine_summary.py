@@ -0,0 +1,113 @@
+"""
+transactions/fine_summary.py
+────────────────────────────
+Maintained per-transaction fine totals.
+
+    Transaction.total_fine   = SUM(fine.amount)                  — every status
+    Transaction.unpaid_fine  = SUM(fine.amount) WHERE unpaid     — still owed
+
+transaction_list and transaction_detail read these columns instead of
+aggregating finance_fine on every request.
+
+Keeping them correct
+────────────────────
+  • Any Fine .save() / .create() / .delete() — _upsert_fine, fine_sync,
+    Fine.mark_paid (mark_fine_paid), waive_fine, add_penalty … — is caught
+    by the post_save / post_delete receiver in transactions/signals.py.
+  • Bulk Fine .update() paths send no signals, so they call
+    refresh_fine_summaries() directly (return_book, mark_lost) or fold
+    fine_summary_expressions() into their own UPDATE (finance/settlement.py
+    — cash desk, Razorpay webhook, mark_success, and the admin's "Mark
+    selected fines as paid" / "Waive selected fines" actions).
+
+A refresh recomputes the totals from finance_fine in a single UPDATE …
+SET col = (SELECT SUM …), so it is idempotent and never drifts by
+accumulating deltas.  `manage.py check_fine_summaries [--fix]` reports
+(and repairs) any row that was written behind the app's back.
+"""
+
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+FINE_SUMMARY_FIELDS = ("total_fine", "unpaid_fine")
+
+_ZERO = Decimal("0.00")
+
+
+def _fine_sum_subquery(**filters):
+    """Correlated SUM(amount) of the fines on OuterRef("pk"), 0 when none."""
+    from finance.models import Fine
+
+    money = DecimalField(max_digits=10, decimal_places=2)
+    subq = (
+        Fine.objects
+        .filter(transaction=OuterRef("pk"), **filters)
+        .order_by()
+        .values("transaction")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(Subquery(subq, output_field=money), Value(_ZERO), output_field=money)
+
+
+def fine_summary_expressions() -> dict:
+    """
+    UPDATE expressions for the summary columns — for callers that fold the
+    refresh into an UPDATE of their own (finance/settlement.py).
+    """
+    from finance.models import Fine
+
+    return {
+        "total_fine":  _fine_sum_subquery(),
+        "unpaid_fine": _fine_sum_subquery(status=Fine.STATUS_UNPAID),
+    }
+
+
+def refresh_fine_summaries(transaction_ids) -> int:
+    """
+    Recompute total_fine / unpaid_fine for the given Transaction pks.
+    Returns the number of rows updated.  None / duplicate pks are ignored.
+    """
+    from .models import Transaction
+
+    pks = {pk for pk in transaction_ids if pk}
+    if not pks:
+        return 0
+    return Transaction.objects.filter(pk__in=pks).update(**fine_summary_expressions())
+
+
+def refresh_fine_summary(txn) -> None:
+    """Refresh one transaction and copy the new totals onto the instance."""
+    from .models import Transaction
+
+    if txn is None or not txn.pk:
+        return
+    refresh_fine_summaries([txn.pk])
+    txn.total_fine, txn.unpaid_fine = (
+        Transaction.objects.filter(pk=txn.pk)
+        .values_list(*FINE_SUMMARY_FIELDS).get()
+    )
+
+
+def drifted_transactions(library=None):
+    """
+    Transactions whose stored totals disagree with finance_fine, annotated
+    with the expected values as calc_total_fine / calc_unpaid_fine.
+    """
+    from finance.models import Fine
+
+    from .models import Transaction
+
+    qs = Transaction.objects.for_library(library) if library else Transaction.objects.all()
+    return (
+        qs.annotate(
+            calc_total_fine  = _fine_sum_subquery(),
+            calc_unpaid_fine = _fine_sum_subquery(status=Fine.STATUS_UNPAID),
+        )
+        .filter(
+            ~Q(total_fine=F("calc_total_fine")) | ~Q(unpaid_fine=F("calc_unpaid_fine"))
+        )
+        .order_by("pk")
+    )
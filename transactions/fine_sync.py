@@ -3,11 +3,23 @@ transactions/fine_sync.py
 ─────────────────────────
 Background daemon that runs every SYNC_INTERVAL_SECONDS (default 60 s).
 
-Each cycle does two things:
+Each cycle does three things:
   1. Flip issued → overdue for all past-due transactions
      (Transaction.sync_overdue_for_library — existing behaviour).
   2. Create or update a Fine row for every active overdue transaction
      so the amount is always persisted in the DB and stays current.
+  3. Refresh the dashboard KPI rollup (dashboards/rollup.py), at most
+     once every KPI_ROLLUP_INTERVAL seconds per library.
+
+Instrumentation
+───────────────
+Every phase runs inside a core.metrics span labelled with the library:
+
+    fine_sync.overdue_flip   fine_sync.fine_upsert   fine_sync.auto_block
+    fine_sync.auto_lost      fine_sync.reminders     fine_sync.rollup
+
+and the whole pass inside fine_sync.cycle — each with wall time, DB time,
+query count and rows written; reminders add email_ms and emails sent.
 
 Fine row upsert rules
 ─────────────────────
@@ -34,6 +46,10 @@ from decimal import Decimal
 
 from django.conf import settings
 
+from core.metrics import span, timing
+
+from .rules import get_rules
+
 logger = logging.getLogger("transactions.fine_sync")
 
 # ── Module-level guard — only one thread per process ─────────────────────────
@@ -72,7 +88,7 @@ def _sync_overdue_status(library, Transaction) -> None:
 # Step 2 — persist Fine rows for every overdue transaction
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _sync_fine_amounts(library, Transaction, Fine) -> int:
+def _sync_fine_amounts(library, Transaction, Fine, rules=None) -> int:
     """
     For every active (issued/overdue) transaction that has accrued a fine,
     create or update an unpaid Fine row so the amount is always in the DB.
@@ -80,29 +96,24 @@ def _sync_fine_amounts(library, Transaction, Fine) -> int:
     Rule 7: Fine rows are only created/updated if auto_fine is ON for the library.
     Rule 6: After syncing, block any active members who have overdue loans.
 
+    *rules* is the cycle's RulesSnapshot (loaded once in _run_sync_once).
+
     Returns the number of Fine rows created or updated.
     """
     from django.db import transaction as db_tx
 
-    # Rule 7: honour auto_fine setting
-    auto_fine = True
-    try:
-        auto_fine = bool(library.rules.auto_fine)
-    except Exception:
-        pass
+    if rules is None:
+        rules = get_rules(library)
 
-    if not auto_fine:
+    # Rule 7: honour auto_fine setting
+    if not rules.auto_fine:
         # Auto-fine is OFF — still auto-block overdue members (Rule 6) but
         # do NOT create or update any Fine rows.
-        _auto_block_overdue_members_sync(library, Transaction)
+        with span("fine_sync.auto_block", library=library):
+            _auto_block_overdue_members_sync(library, Transaction)
         return 0
 
-    # Read grace period from library rules
-    grace_period_days = 0
-    try:
-        grace_period_days = int(library.rules.grace_period or 0)
-    except Exception:
-        pass
+    grace_period_days = rules.grace_period
 
     # All active loans — include BOTH issued and overdue so newly-flipped
     # overdue transactions (like txn #9) are picked up in the same cycle.
@@ -114,87 +125,85 @@ def _sync_fine_amounts(library, Transaction, Fine) -> int:
 
     touched = 0
 
-    for txn in active_txns:
-        # Apply grace period: reduce overdue_days by grace_period before computing fine
-        raw_overdue_days = txn.overdue_days
-        effective_overdue_days = max(0, raw_overdue_days - grace_period_days)
-        try:
-            rate = library.rules.late_fine
-            fine_rate = Decimal(rate) if rate is not None else txn.fine_rate_per_day
-        except Exception:
-            fine_rate = txn.fine_rate_per_day
-        overdue_fine  = Decimal(effective_overdue_days) * fine_rate    # grace-adjusted
-        damage_charge = txn.damage_charge   # stored field
-
-        # ── Overdue fine row ──────────────────────────────────────────────
-        if overdue_fine > Decimal("0.00"):
-            try:
-                with db_tx.atomic():
-                    fine_obj, created = Fine.objects.get_or_create(
-                        library     = library,
-                        transaction = txn,
-                        fine_type   = Fine.TYPE_OVERDUE,
-                        defaults={
-                            "amount": overdue_fine,
-                            "status": Fine.STATUS_UNPAID,
-                        },
+    with span("fine_sync.fine_upsert", library=library) as sp:
+        for txn in active_txns:
+            # Apply grace period: reduce overdue_days by grace_period before computing fine
+            raw_overdue_days = txn.overdue_days
+            effective_overdue_days = max(0, raw_overdue_days - grace_period_days)
+            fine_rate = rules.fine_rate(txn)
+            overdue_fine  = Decimal(effective_overdue_days) * fine_rate    # grace-adjusted
+            damage_charge = txn.damage_charge   # stored field
+
+            # ── Overdue fine row ──────────────────────────────────────────
+            if overdue_fine > Decimal("0.00"):
+                try:
+                    with db_tx.atomic():
+                        fine_obj, created = Fine.objects.get_or_create(
+                            library     = library,
+                            transaction = txn,
+                            fine_type   = Fine.TYPE_OVERDUE,
+                            defaults={
+                                "amount": overdue_fine,
+                                "status": Fine.STATUS_UNPAID,
+                            },
+                        )
+                        if not created and fine_obj.status == Fine.STATUS_UNPAID:
+                            if fine_obj.amount != overdue_fine:
+                                fine_obj.amount = overdue_fine
+                                fine_obj.save(update_fields=["amount", "updated_at"])
+                        touched += 1
+                except Exception as exc:
+                    logger.warning(
+                        "fine_sync: could not upsert overdue fine for txn %s: %s",
+                        txn.pk, exc,
                     )
-                    if not created and fine_obj.status == Fine.STATUS_UNPAID:
-                        if fine_obj.amount != overdue_fine:
-                            fine_obj.amount = overdue_fine
-                            fine_obj.save(update_fields=["amount", "updated_at"])
-                    touched += 1
-            except Exception as exc:
-                logger.warning(
-                    "fine_sync: could not upsert overdue fine for txn %s: %s",
-                    txn.pk, exc,
-                )
 
-        # ── Damage charge row (only if not already created at return) ─────
-        if damage_charge > Decimal("0.00"):
-            try:
-                with db_tx.atomic():
-                    fine_obj, created = Fine.objects.get_or_create(
-                        library     = library,
-                        transaction = txn,
-                        fine_type   = Fine.TYPE_DAMAGE,
-                        defaults={
-                            "amount": damage_charge,
-                            "status": Fine.STATUS_UNPAID,
-                        },
+            # ── Damage charge row (only if not already created at return) ─
+            if damage_charge > Decimal("0.00"):
+                try:
+                    with db_tx.atomic():
+                        fine_obj, created = Fine.objects.get_or_create(
+                            library     = library,
+                            transaction = txn,
+                            fine_type   = Fine.TYPE_DAMAGE,
+                            defaults={
+                                "amount": damage_charge,
+                                "status": Fine.STATUS_UNPAID,
+                            },
+                        )
+                        if not created and fine_obj.status == Fine.STATUS_UNPAID:
+                            if fine_obj.amount != damage_charge:
+                                fine_obj.amount = damage_charge
+                                fine_obj.save(update_fields=["amount", "updated_at"])
+                        touched += 1
+                except Exception as exc:
+                    logger.warning(
+                        "fine_sync: could not upsert damage fine for txn %s: %s",
+                        txn.pk, exc,
                     )
-                    if not created and fine_obj.status == Fine.STATUS_UNPAID:
-                        if fine_obj.amount != damage_charge:
-                            fine_obj.amount = damage_charge
-                            fine_obj.save(update_fields=["amount", "updated_at"])
-                    touched += 1
-            except Exception as exc:
-                logger.warning(
-                    "fine_sync: could not upsert damage fine for txn %s: %s",
-                    txn.pk, exc,
-                )
+        sp.add("fines", touched)
 
     # Rule 6: auto-block members who still have overdue loans
-    _auto_block_overdue_members_sync(library, Transaction)
+    with span("fine_sync.auto_block", library=library):
+        _auto_block_overdue_members_sync(library, Transaction)
 
     # Rule: auto-mark severely overdue books as lost (if toggle ON)
-    _auto_mark_lost_sync(library, Transaction, Fine)
+    with span("fine_sync.auto_lost", library=library):
+        _auto_mark_lost_sync(library, Transaction, Fine, rules)
 
     return touched
 
 
-def _auto_mark_lost_sync(library, Transaction, Fine) -> None:
+def _auto_mark_lost_sync(library, Transaction, Fine, rules=None) -> None:
     """
     Background-thread version of auto_mark_lost:
     If rules.auto_mark_lost is ON, flip severely overdue (>60 days) transactions
     to STATUS_LOST and create a Fine(TYPE_LOST) row if auto_fine is also ON.
     """
-    try:
-        auto_mark_lost = bool(library.rules.auto_mark_lost)
-    except Exception:
-        auto_mark_lost = False
+    if rules is None:
+        rules = get_rules(library)
 
-    if not auto_mark_lost:
+    if not rules.auto_mark_lost:
         return
 
     AUTO_LOST_THRESHOLD_DAYS = 60
@@ -215,11 +224,7 @@ def _auto_mark_lost_sync(library, Transaction, Fine) -> None:
         .select_related("book")
     )
 
-    auto_fine = True
-    try:
-        auto_fine = bool(library.rules.auto_fine)
-    except Exception:
-        pass
+    auto_fine = rules.auto_fine
 
     for txn in overdue_qs:
         try:
@@ -264,6 +269,7 @@ def _auto_block_overdue_members_sync(library, Transaction) -> None:
     """
     try:
         from members.models import Member
+        from members.stats import invalidate_member_stats
         overdue_member_ids = set(
             Transaction.objects.for_library(library)
             .filter(status=Transaction.STATUS_OVERDUE)
@@ -271,10 +277,11 @@ def _auto_block_overdue_members_sync(library, Transaction) -> None:
             .distinct()
         )
         if overdue_member_ids:
-            Member.objects.filter(
+            if Member.objects.filter(
                 pk__in=overdue_member_ids,
                 status="active",
-            ).update(status="blocked")
+            ).update(status="blocked"):
+                invalidate_member_stats(library.user_id)
     except Exception as exc:
         logger.warning("fine_sync: auto-block failed for library %s: %s", library.pk, exc)
 
@@ -357,11 +364,12 @@ def _send_daily_fine_reminders(library, Fine) -> int:
     sent = 0
     for member, fines in member_fines.items():
         try:
-            success = send_fine_daily_reminder(
-                member=member,
-                unpaid_fines=fines,
-                library_name=library_name,
-            )
+            with timing("email_ms"):
+                success = send_fine_daily_reminder(
+                    member=member,
+                    unpaid_fines=fines,
+                    library_name=library_name,
+                )
             if success:
                 sent += 1
                 logger.debug(
@@ -388,6 +396,19 @@ def _send_daily_fine_reminders(library, Fine) -> int:
     return sent
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Dashboard KPI rollup — throttled inside dashboards.rollup
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _rollup_daily_stats(library) -> None:
+    try:
+        from dashboards.rollup import rollup_if_due
+    except Exception as exc:
+        logger.debug("fine_sync: KPI rollup unavailable: %s", exc)
+        return
+    rollup_if_due(library)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Combined sync — called every cycle
 # ─────────────────────────────────────────────────────────────────────────────
@@ -404,25 +425,34 @@ def _run_sync_once() -> int:
     libraries = list(Library.objects.all())
     synced = 0
 
-    for library in libraries:
-        try:
-            _sync_overdue_status(library, Transaction)
-            touched = _sync_fine_amounts(library, Transaction, Fine)
-            reminded = _send_daily_fine_reminders(library, Fine)
-            logger.debug(
-                "fine_sync: library %s — %d fine row(s) created/updated, %d reminder(s) sent.",
-                getattr(library, "name", library.pk),
-                touched,
-                reminded,
-            )
-            synced += 1
-        except Exception as exc:
-            logger.warning(
-                "fine_sync: error syncing library %s (pk=%s): %s",
-                getattr(library, "name", "?"),
-                library.pk,
-                exc,
-            )
+    with span("fine_sync.cycle") as cycle:
+        for library in libraries:
+            try:
+                # One fresh rules read per library per cycle, passed through.
+                rules = get_rules(library, refresh=True)
+                with span("fine_sync.overdue_flip", library=library):
+                    _sync_overdue_status(library, Transaction)
+                touched = _sync_fine_amounts(library, Transaction, Fine, rules)
+                with span("fine_sync.reminders", library=library) as sp:
+                    reminded = _send_daily_fine_reminders(library, Fine)
+                    sp.add("emails", reminded)
+                with span("fine_sync.rollup", library=library):
+                    _rollup_daily_stats(library)
+                logger.debug(
+                    "fine_sync: library %s — %d fine row(s) created/updated, %d reminder(s) sent.",
+                    getattr(library, "name", library.pk),
+                    touched,
+                    reminded,
+                )
+                synced += 1
+            except Exception as exc:
+                logger.warning(
+                    "fine_sync: error syncing library %s (pk=%s): %s",
+                    getattr(library, "name", "?"),
+                    library.pk,
+                    exc,
+                )
+        cycle.add("libraries", synced)
 
     return synced
 
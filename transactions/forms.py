@@ -76,6 +76,70 @@ class IssueBookForm(forms.Form):
             return None
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch Checkout Form
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BatchIssueForm(forms.Form):
+    """
+    Several copies to one member in one POST (issue_batch).  Both IDs are
+    the printed / scanned ones — member card ID and copy IDs, one per line
+    or separated by commas / spaces.  clean_copies() returns BookCopy pks in
+    scanned order; availability and the member's limits are checked by
+    issue_engine.issue_many() under row locks.
+    """
+
+    member_id = forms.CharField(max_length=50)
+    copies = forms.CharField(
+        widget=forms.Textarea(attrs={"rows": 5, "spellcheck": "false"}),
+        help_text="Scan or type copy IDs — one per line.",
+    )
+    issue_date = forms.DateField(
+        widget=forms.DateInput(attrs={"type": "date"}),
+        initial=date.today,
+    )
+    notes = forms.CharField(
+        widget=forms.Textarea(attrs={"rows": 2}),
+        required=False,
+    )
+
+    def __init__(self, *args, library=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.library = library
+
+    def clean_member_id(self):
+        from members.models import Member
+        member_id = self.cleaned_data["member_id"].strip().upper()
+        member = Member.objects.filter(owner=self.library.user, member_id__iexact=member_id).first()
+        if member is None:
+            raise forms.ValidationError(f"Member {member_id} not found.")
+        return member
+
+    def clean_copies(self):
+        import re
+
+        from books.models import BookCopy
+        from .issue_engine import BATCH_ISSUE_MAX
+
+        scanned = [c.upper() for c in re.split(r"[\s,;]+", self.cleaned_data["copies"]) if c]
+        if not scanned:
+            raise forms.ValidationError("Add at least one copy ID.")
+        repeated = sorted({c for c in scanned if scanned.count(c) > 1})
+        if repeated:
+            raise forms.ValidationError(f"Listed more than once: {', '.join(repeated)}.")
+        if len(scanned) > BATCH_ISSUE_MAX:
+            raise forms.ValidationError(f"At most {BATCH_ISSUE_MAX} copies can be issued at once.")
+
+        found = dict(
+            BookCopy.objects.filter(book__owner=self.library.user, copy_id__in=scanned)
+            .values_list("copy_id", "pk")
+        )
+        missing = [c for c in scanned if c not in found]
+        if missing:
+            raise forms.ValidationError(f"Copy not found: {', '.join(missing)}.")
+        return [found[c] for c in scanned]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Return Book Form
 # ─────────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,373 @@
+"""
+transactions/issue_engine.py
+────────────────────────────
+Issue a book as one short, row-locked critical section.
+
+    issue(library, member_id=…, book_id=…, copy_id=None, issue_date=…,
+          notes="", issued_by="")                         → Transaction
+    issue_many(library, member_id=…, copy_ids=[…], …)     → [Transaction, …]
+    IssueRefused(code, message)                           — a rule said no
+
+Lock order
+──────────
+Every issue path locks rows in the same order, so two desks working on
+the same member or copy queue behind each other instead of deadlocking:
+
+    1. Member     SELECT … FOR UPDATE   (SQLite: a no-op UPDATE, which
+                                         takes the database write lock)
+    2. Book       SELECT … FOR UPDATE   (available_copies)
+    3. BookCopy   SELECT … FOR UPDATE   (the scanned copy, or the first
+                                         free one — SKIP LOCKED where the
+                                         database supports it)
+
+issue_many() (batch checkout) takes the same locks for a whole basket:
+the member, then its books and then its copies, each sorted by pk.  It
+writes with bulk operations, so it runs what transactions/signals.py
+would have done on post_save itself.
+
+Validation
+──────────
+Every rule is checked against one snapshot read while the member lock is
+held.  The locked row gives the member's status.  One query with
+correlated subqueries then counts open and overdue loans and sums unpaid
+fines.  It runs as a separate statement after the lock: a locking SELECT
+on PostgreSQL, or InnoDB's first read, can see the other tables as they
+were before the lock wait ended.  Availability comes from the locked
+book / copy.  The writes take three statements: INSERT the loan, UPDATE
+the copy and UPDATE book.available_copies.  BookCopy and Book are
+updated with .update(), so no post_save fires for them.  The Transaction
+insert still bumps the library's search-cache version.
+
+transaction_id
+──────────────
+The human-readable ID is random, so a collision is possible but rare.  A
+failed INSERT leaves the surrounding transaction unusable on PostgreSQL,
+so the whole locked block is retried with a fresh ID instead of retrying
+inside it.
+
+Override in settings.py:
+    ISSUE_ID_RETRIES = 5
+    BATCH_ISSUE_MAX  = 10     # copies per batch checkout (BatchIssueForm)
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connection
+from django.db import transaction as db_transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import search_cache
+from .counts import invalidate_status_counts
+from .models import Transaction, _generate_transaction_id, _money
+from .rules import get_rules
+
+ISSUE_ID_RETRIES: int = int(getattr(settings, "ISSUE_ID_RETRIES", 5))
+BATCH_ISSUE_MAX:  int = int(getattr(settings, "BATCH_ISSUE_MAX", 10))
+
+_ZERO = Decimal("0.00")
+
+
+class IssueRefused(Exception):
+    """
+    A business rule refused the issue.  *code* is one of:
+    no_rules, advance_booking, blocked, inactive, overdue, unpaid_fine,
+    borrow_limit, unavailable, not_found, duplicate.
+    """
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code    = code
+        self.message = message
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Locked reads
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _per_member(qs, member_field, aggregate, output_field):
+    return Subquery(
+        qs.order_by().values(member_field).annotate(v=aggregate).values("v")[:1],
+        output_field=output_field,
+    )
+
+
+def _lock_member(library, member_id):
+    """The member row, locked, with open_loans / overdue_loans / unpaid_fines read after the lock."""
+    from finance.models import Fine
+    from members.models import Member
+
+    members = Member.objects.filter(pk=member_id, owner_id=library.user_id)
+    if not connection.features.has_select_for_update:
+        # SQLite has no row locks: a no-op write takes the database write
+        # lock before anything is read, so concurrent issues run one at a time.
+        members.update(id=F("id"))
+    member = members.select_for_update().first()
+    if member is None:
+        raise IssueRefused("not_found", "Member not found.")
+
+    loans = Transaction.objects.for_library(library).filter(member=OuterRef("pk"))
+    fines = Fine.objects.for_library(library).filter(
+        transaction__member=OuterRef("pk"), status=Fine.STATUS_UNPAID,
+    )
+    zero  = Value(0, output_field=IntegerField())
+    money = DecimalField(max_digits=12, decimal_places=2)
+    snapshot = (
+        Member.objects.filter(pk=member.pk)
+        .annotate(
+            open_loans = Coalesce(_per_member(
+                loans.filter(status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE)),
+                "member", Count("pk"), IntegerField(),
+            ), zero),
+            overdue_loans = Coalesce(_per_member(
+                loans.filter(status=Transaction.STATUS_OVERDUE),
+                "member", Count("pk"), IntegerField(),
+            ), zero),
+            unpaid_fines = Coalesce(_per_member(
+                fines, "transaction__member", Sum("amount"), money,
+            ), Value(_ZERO, output_field=money)),
+        )
+        .values("open_loans", "overdue_loans", "unpaid_fines")
+        .get()
+    )
+    member.open_loans    = snapshot["open_loans"]
+    member.overdue_loans = snapshot["overdue_loans"]
+    member.unpaid_fines  = _money(snapshot["unpaid_fines"])
+    return member
+
+
+def _lock_book(library, book_id):
+    from books.models import Book
+
+    book = Book.objects.select_for_update().filter(pk=book_id, owner_id=library.user_id).first()
+    if book is None:
+        raise IssueRefused("not_found", "Book not found.")
+    return book
+
+
+def _lock_copy(book, copy_id):
+    """
+    The copy to lend: *copy_id* if given (must be free), else the first
+    free copy of *book*, else None when the title has no free copy rows.
+    """
+    from books.models import BookCopy
+
+    copies = BookCopy.objects.filter(book=book)
+    if copy_id:
+        copy = copies.select_for_update().filter(pk=copy_id).first()
+        if copy is None:
+            raise IssueRefused("not_found", "Copy not found for this book.")
+        if copy.status != BookCopy.Status.AVAILABLE:
+            raise IssueRefused(
+                "unavailable", f"Copy {copy.copy_id} is {copy.get_status_display().lower()}, not available.",
+            )
+        return copy
+
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    return (
+        copies.select_for_update(skip_locked=skip_locked)
+        .filter(status=BookCopy.Status.AVAILABLE)
+        .order_by("pk")
+        .first()
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rules
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _check_member(member, rules, adding=1):
+    name = f"{member.first_name} {member.last_name}"
+    if member.status == "blocked":
+        raise IssueRefused(
+            "blocked",
+            f"Cannot issue — {name}'s account is blocked. They must return all overdue books first.",
+        )
+    if member.status != "active":
+        raise IssueRefused(
+            "inactive", f"{name} is not an active member (status: {member.get_status_display()}).",
+        )
+    if member.overdue_loans:
+        raise IssueRefused(
+            "overdue",
+            f"Cannot issue — {name} has overdue books. They must return all overdue "
+            f"loans before borrowing new books.",
+        )
+    if member.unpaid_fines > _ZERO:
+        raise IssueRefused(
+            "unpaid_fine",
+            f"Cannot issue — {name} has an unpaid fine of ₹{member.unpaid_fines}. Please clear it first.",
+        )
+    limit = rules.borrow_limit(member)
+    if limit and member.open_loans + adding > limit:
+        if adding == 1:
+            message = f"Cannot issue — {name} has reached their borrow limit ({limit} books)."
+        else:
+            message = (
+                f"Cannot issue {adding} books — {name} has {member.open_loans} on loan and a "
+                f"borrow limit of {limit}, so at most {max(0, limit - member.open_loans)} more can be issued."
+            )
+        raise IssueRefused("borrow_limit", message)
+
+
+def _check_request(rules, issue_date):
+    if not rules:
+        raise IssueRefused("no_rules", "Library rule settings not configured.")
+    if issue_date > date.today() and not rules.allow_advance_booking:
+        raise IssueRefused(
+            "advance_booking",
+            "Cannot issue — advance booking (future issue date) is disabled. "
+            "Enable it in Settings → Fine & Loans → Allow Advance Booking.",
+        )
+
+
+def _retrying_ids(block):
+    """Run *block* in its own atomic block, again on a transaction_id collision."""
+    for attempt in range(ISSUE_ID_RETRIES):
+        try:
+            with db_transaction.atomic():
+                return block()
+        except IntegrityError as exc:
+            if "transaction_id" not in str(exc) or attempt == ISSUE_ID_RETRIES - 1:
+                raise
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Issue
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _new_loan(library, rules, member, book, copy, issue_date, notes, issued_by, transaction_id):
+    borrowing_period = rules.borrowing_period
+    return Transaction(
+        transaction_id     = transaction_id,
+        library            = library,
+        member             = member,
+        book               = book,
+        book_copy          = copy,
+        issue_date         = issue_date,
+        due_date           = issue_date + timedelta(days=borrowing_period),
+        loan_duration_days = borrowing_period,
+        fine_rate_per_day  = rules.late_fine or _ZERO,
+        status             = Transaction.STATUS_ISSUED,
+        issued_by          = issued_by,
+        notes              = notes,
+    )
+
+
+def _issue_locked(library, rules, member_id, book_id, copy_id, issue_date, notes, issued_by, transaction_id):
+    from books.models import Book, BookCopy
+
+    member = _lock_member(library, member_id)
+    _check_member(member, rules)
+
+    book = _lock_book(library, book_id)
+    copy = _lock_copy(book, copy_id)
+    if copy is None and book.available_copies <= 0:
+        raise IssueRefused("unavailable", f'No copies of "{book.title}" are available.')
+
+    txn = _new_loan(library, rules, member, book, copy, issue_date, notes, issued_by, transaction_id)
+    txn.save(force_insert=True)
+
+    if copy is not None:
+        BookCopy.objects.filter(pk=copy.pk).update(status=BookCopy.Status.BORROWED, borrowed_at=timezone.now())
+        copy.status = BookCopy.Status.BORROWED
+    if book.available_copies > 0:
+        Book.objects.filter(pk=book.pk).update(available_copies=book.available_copies - 1)
+        book.available_copies -= 1
+    return txn
+
+
+def issue(library, *, member_id, book_id, copy_id=None, issue_date=None, notes="", issued_by="", rules=None):
+    """
+    Lend *book_id* (a specific *copy_id*, or any free copy) to *member_id*.
+    Raises IssueRefused when a rule says no; returns the new Transaction.
+    """
+    rules      = rules or get_rules(library)
+    issue_date = issue_date or date.today()
+    _check_request(rules, issue_date)
+    return _retrying_ids(lambda: _issue_locked(
+        library, rules, member_id, book_id, copy_id, issue_date, notes, issued_by,
+        _generate_transaction_id(library, issue_date),
+    ))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch checkout — several copies to one member
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _issue_many_locked(library, rules, member_id, copy_ids, issue_date, notes, issued_by):
+    from books.models import Book, BookCopy
+
+    member = _lock_member(library, member_id)
+    _check_member(member, rules, adding=len(copy_ids))
+
+    # Same lock order as issue(): books by pk, then copies by pk.  The
+    # unlocked read only finds the parent books — a copy never changes book.
+    copies_qs = BookCopy.objects.filter(pk__in=copy_ids, book__owner_id=library.user_id)
+    book_ids  = sorted(set(copies_qs.values_list("book_id", flat=True)))
+    books     = {b.pk: b for b in Book.objects.select_for_update().filter(pk__in=book_ids).order_by("pk")}
+    copies    = list(copies_qs.select_for_update().order_by("pk"))
+    if len(copies) != len(copy_ids):
+        raise IssueRefused("not_found", "Some of the copies were not found in this library.")
+
+    busy = [c for c in copies if c.status != BookCopy.Status.AVAILABLE]
+    if busy:
+        raise IssueRefused("unavailable", "Not available: " + ", ".join(
+            f"{c.copy_id} ({c.get_status_display().lower()})" for c in busy
+        ) + ".")
+
+    ids = set()
+    while len(ids) < len(copies):
+        ids.add(_generate_transaction_id(library, issue_date))
+    by_copy = {c.pk: c for c in copies}
+    loans = [
+        _new_loan(library, rules, member, books[by_copy[pk].book_id], by_copy[pk], issue_date, notes, issued_by, tid)
+        for pk, tid in zip(copy_ids, sorted(ids))
+    ]
+    Transaction.objects.bulk_create(loans)
+    if any(txn.pk is None for txn in loans):
+        # MySQL's bulk_create does not return primary keys — re-read by the natural key.
+        saved = dict(
+            Transaction.objects.filter(transaction_id__in=ids).values_list("transaction_id", "pk")
+        )
+        for txn in loans:
+            txn.pk = saved[txn.transaction_id]
+
+    BookCopy.objects.filter(pk__in=copy_ids).update(status=BookCopy.Status.BORROWED, borrowed_at=timezone.now())
+    for copy in copies:
+        copy.status = BookCopy.Status.BORROWED
+        book = books[copy.book_id]
+        book.available_copies = max(0, book.available_copies - 1)
+    Book.objects.bulk_update(books.values(), ["available_copies"])
+
+    # bulk_create sends no post_save — do what transactions/signals.py would.
+    library_pk = library.pk
+    db_transaction.on_commit(lambda: search_cache.bump_version(library_pk))
+    db_transaction.on_commit(lambda: invalidate_status_counts(library_pk))
+    return loans
+
+
+def issue_many(library, *, member_id, copy_ids, issue_date=None, notes="", issued_by="", rules=None):
+    """
+    Lend every copy in *copy_ids* (BookCopy pks) to *member_id* at once.
+
+    The whole basket is checked in one pass against the member's borrow
+    limit, overdue loans and unpaid fines, and every copy must be free —
+    otherwise IssueRefused and nothing is issued.  The loans are written
+    with one bulk INSERT, one copy UPDATE and one book UPDATE.  Returns the
+    new Transactions in *copy_ids* order.
+    """
+    copy_ids = list(copy_ids)
+    if not copy_ids:
+        raise IssueRefused("not_found", "Add at least one copy to issue.")
+    if len(set(copy_ids)) != len(copy_ids):
+        raise IssueRefused("duplicate", "The same copy is listed more than once.")
+    rules      = rules or get_rules(library)
+    issue_date = issue_date or date.today()
+    _check_request(rules, issue_date)
+    return _retrying_ids(lambda: _issue_many_locked(
+        library, rules, member_id, copy_ids, issue_date, notes, issued_by,
+    ))
@@ -0,0 +1,56 @@
+"""
+transactions/management/commands/check_fine_summaries.py
+────────────────────────────────────────────────────────
+Compare every Transaction's maintained total_fine / unpaid_fine with the
+sums in finance_fine and report rows that disagree.
+
+    python manage.py check_fine_summaries
+    python manage.py check_fine_summaries --library 3 --fix
+
+Exits non-zero when drift is found and --fix was not given, so it can be
+scheduled as a health check.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.fine_summary import drifted_transactions, refresh_fine_summaries
+
+
+class Command(BaseCommand):
+    help = "Check (and optionally repair) per-transaction fine totals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", type=int, help="Only check this Library pk.")
+        parser.add_argument("--fix", action="store_true", help="Recompute drifted rows.")
+        parser.add_argument("--limit", type=int, default=20, help="Drifted rows to list (default 20).")
+
+    def handle(self, *args, **options):
+        library = None
+        if options["library"]:
+            from accounts.models import Library
+            library = Library.objects.filter(pk=options["library"]).first()
+            if library is None:
+                raise CommandError(f"Library {options['library']} does not exist.")
+
+        drifted = list(
+            drifted_transactions(library).values_list(
+                "pk", "total_fine", "calc_total_fine", "unpaid_fine", "calc_unpaid_fine",
+            )
+        )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Fine summaries are consistent."))
+            return
+
+        for pk, total, calc_total, unpaid, calc_unpaid in drifted[: options["limit"]]:
+            self.stdout.write(
+                f"  txn {pk}: total_fine {total} (expected {calc_total}), "
+                f"unpaid_fine {unpaid} (expected {calc_unpaid})"
+            )
+        if len(drifted) > options["limit"]:
+            self.stdout.write(f"  … and {len(drifted) - options['limit']} more")
+
+        if options["fix"]:
+            fixed = refresh_fine_summaries(pk for pk, *_ in drifted)
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {fixed} transaction(s)."))
+        else:
+            raise CommandError(f"{len(drifted)} transaction(s) have drifted fine summaries; rerun with --fix.")
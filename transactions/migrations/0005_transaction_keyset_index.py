@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_alter_transaction_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['library', '-created_at', '-id'], name='txn_lib_created_id_idx'),
+        ),
+    ]
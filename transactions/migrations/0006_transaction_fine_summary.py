@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:13
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_fine_summary(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Fine = apps.get_model('finance', 'Fine')
+    money = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def fine_sum(**filters):
+        subq = (
+            Fine.objects.filter(transaction=OuterRef('pk'), **filters)
+            .order_by().values('transaction')
+            .annotate(total=Sum('amount')).values('total')
+        )
+        return Coalesce(Subquery(subq, output_field=money), Value(Decimal('0.00')), output_field=money)
+
+    Transaction.objects.update(
+        total_fine=fine_sum(),
+        unpaid_fine=fine_sum(status='unpaid'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        ('transactions', '0005_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='total_fine',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='unpaid_fine',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.RunPython(backfill_fine_summary, migrations.RunPython.noop),
+    ]
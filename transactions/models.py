@@ -11,9 +11,18 @@ from datetime import date
 from decimal import Decimal
 
 from django.db import models
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q,
+    Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
 
 from accounts.models import Library
 
+from .counts import invalidate_status_counts
+from .fine_summary import FINE_SUMMARY_FIELDS
+from .rules import get_rules
+
 import random
 from django.db import IntegrityError, transaction as db_transaction
 # ─────────────────────────────────────────────────────────────────────────────
@@ -44,6 +53,118 @@ class TenantManager(models.Manager):
         return self.get_queryset().for_library(library)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Fine arithmetic in SQL
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _money(value) -> Decimal:
+    # SQLite hands back computed decimals unquantized (e.g. Decimal("0")).
+    return Decimal(value or 0).quantize(Decimal("0.01"))
+
+
+class _DaysBetween(models.Func):
+    """
+    Whole days from *start* to *end* (end - start) as an integer, portable
+    across the backends this project runs on.
+    """
+
+    output_field = models.IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL / Oracle: date - date is already an integer day count.
+        return super().as_sql(
+            compiler, connection, template="(%(expressions)s)", arg_joiner=" - ",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function="DATEDIFF", **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+class TransactionQuerySet(TenantQuerySet):
+
+    def with_fine_fields(self, library=None, today=None):
+        """
+        Annotate the same numbers the Python properties compute, in SQL:
+
+            db_overdue_days  ≡ overdue_days
+            db_overdue_fine  ≡ overdue_fine    (days × live rate)
+            db_grace_fine    = max(0, days − grace_period) × live rate
+                               (what fine_sync persists as the Fine row)
+            db_fine_amount   ≡ fine_amount     (overdue_fine + damage_charge)
+
+        so lists and exports can filter, sort and paginate by fine without
+        evaluating rows in Python.  When *library* is given the live rate
+        and grace period come from its cached rules snapshot; otherwise they
+        are read per row from LibraryRuleSettings.  The properties pick the
+        annotations up automatically when present.
+        """
+        today = today or date.today()
+        money = DecimalField(max_digits=12, decimal_places=2)
+
+        if library is not None:
+            rules = get_rules(library)
+            rate  = (
+                Value(rules.late_fine, output_field=money)
+                if rules.late_fine is not None else F("fine_rate_per_day")
+            )
+            grace = Value(rules.grace_period, output_field=IntegerField())
+        else:
+            from accounts.models import LibraryRuleSettings
+            rule_row = LibraryRuleSettings.objects.filter(library_id=OuterRef("library_id"))
+            rate  = Coalesce(
+                Subquery(rule_row.values("late_fine")[:1], output_field=money),
+                F("fine_rate_per_day"), output_field=money,
+            )
+            grace = Coalesce(
+                Subquery(rule_row.values("grace_period")[:1], output_field=IntegerField()),
+                Value(0), output_field=IntegerField(),
+            )
+
+        closed = (self.model.STATUS_RETURNED, self.model.STATUS_LOST, self.model.STATUS_OVERDUE_SETTLED)
+        zero   = Value(0, output_field=IntegerField())
+        days   = Case(
+            When(
+                Q(status=self.model.STATUS_RETURNED, return_date__isnull=False),
+                then=Greatest(_DaysBetween(F("return_date"), F("due_date")), zero),
+            ),
+            When(status__in=closed, then=zero),
+            When(due_date__lt=today, then=_DaysBetween(Value(today, output_field=models.DateField()), F("due_date"))),
+            default=zero,
+            output_field=IntegerField(),
+        )
+
+        return self.annotate(
+            db_overdue_days=days,
+        ).annotate(
+            db_overdue_fine=ExpressionWrapper(F("db_overdue_days") * rate, output_field=money),
+            db_grace_fine=ExpressionWrapper(
+                Greatest(F("db_overdue_days") - grace, zero) * rate, output_field=money,
+            ),
+        ).annotate(
+            db_fine_amount=ExpressionWrapper(F("db_overdue_fine") + F("damage_charge"), output_field=money),
+        )
+
+
+class TransactionManager(TenantManager):
+    def get_queryset(self):
+        return TransactionQuerySet(self.model, using=self._db)
+
+    def with_fine_fields(self, library=None, today=None):
+        return self.get_queryset().with_fine_fields(library, today)
+
+
 class TenantModelMixin(models.Model):
     library = models.ForeignKey(
         Library,
@@ -83,6 +204,8 @@ class Transaction(TenantModelMixin):
         (STATUS_LOST,            "Lost"),
     ]
 
+    objects = TransactionManager()
+
     CONDITION_GOOD    = "good"
     CONDITION_FAIR    = "fair"
     CONDITION_DAMAGED = "damaged"
@@ -160,6 +283,11 @@ class Transaction(TenantModelMixin):
     fine_paid      = models.BooleanField(default=False)
     fine_paid_date = models.DateField(null=True, blank=True)
 
+    # Maintained from finance_fine — see fine_summary.py.  Never assign
+    # these directly; a plain save() leaves them out of the UPDATE.
+    total_fine  = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    unpaid_fine = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+
     # ── Notes ─────────────────────────────────────────────────────────────
     notes        = models.TextField(blank=True)
     return_notes = models.TextField(blank=True)
@@ -177,6 +305,8 @@ class Transaction(TenantModelMixin):
             models.Index(fields=["library", "due_date"]),
             models.Index(fields=["library", "member"]),
             models.Index(fields=["book"]),
+            # Keyset pagination on (created_at, id) — see pagination.py.
+            models.Index(fields=["library", "-created_at", "-id"], name="txn_lib_created_id_idx"),
         ]
 
     def __str__(self):
@@ -190,7 +320,22 @@ class Transaction(TenantModelMixin):
             self.transaction_id = _generate_transaction_id(
                 self.library, self.issue_date or date.today()
             )
-        max_retries = 5
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            # A stale instance must not overwrite fine totals refreshed
+            # by fine_summary.py since it was loaded.
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in FINE_SUMMARY_FIELDS
+            ]
+        # A failed INSERT inside an atomic block leaves the transaction
+        # unusable on PostgreSQL — there the caller retries the whole block
+        # with a fresh ID (see issue_engine.py).
+        in_atomic   = db_transaction.get_connection(kwargs.get("using")).in_atomic_block
+        max_retries = 1 if in_atomic else 5
         for attempt in range(max_retries):
             try:
                 super().save(*args, **kwargs)
@@ -213,6 +358,8 @@ class Transaction(TenantModelMixin):
 
     @property
     def overdue_days(self) -> int:
+        if "db_overdue_days" in self.__dict__:
+            return self.db_overdue_days
         if self.status == self.STATUS_RETURNED and self.return_date:
             return max(0, (self.return_date - self.due_date).days)
         if not self.is_overdue:
@@ -220,20 +367,19 @@ class Transaction(TenantModelMixin):
         return max(0, (date.today() - self.due_date).days)
 
     def _live_fine_rate(self) -> Decimal:
-        try:
-            rate = self.library.rules.late_fine
-            if rate is not None:
-                return Decimal(rate)
-        except Exception:
-            pass
-        return self.fine_rate_per_day
+        # Rules snapshot is cached per process — no per-row library/rules queries.
+        return get_rules(self.library_id).fine_rate(self)
 
     @property
     def overdue_fine(self) -> Decimal:
+        if "db_overdue_fine" in self.__dict__:
+            return _money(self.db_overdue_fine)
         return Decimal(self.overdue_days) * self._live_fine_rate()
 
     @property
     def fine_amount(self) -> Decimal:
+        if "db_fine_amount" in self.__dict__:
+            return _money(self.db_fine_amount)
         return self.overdue_fine + self.damage_charge
 
     @property
@@ -258,15 +404,15 @@ class Transaction(TenantModelMixin):
         """
         today = date.today()
 
-        cls.objects.for_library(library).filter(
+        flipped = cls.objects.for_library(library).filter(
             status=cls.STATUS_ISSUED,
             due_date__lt=today,
         ).update(status=cls.STATUS_OVERDUE)
+        if flipped:
+            # .update() sends no signals — drop the cached status-tab counts.
+            invalidate_status_counts(library.pk)
 
-        try:
-            live_rate = library.rules.late_fine
-        except Exception:
-            live_rate = None
+        live_rate = get_rules(library).late_fine
 
         if live_rate is not None:
             (
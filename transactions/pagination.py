@@ -0,0 +1,88 @@
+"""
+transactions/pagination.py
+──────────────────────────
+Keyset (cursor) pagination on (created_at, id) — or any other
+(datetime field, id) pair via the *field* argument.
+
+OFFSET pagination makes the database walk and discard every earlier row,
+so page 40 000 of a multi-million-row table is slow.  A keyset page instead
+seeks straight to "rows older than the last one I saw":
+
+    WHERE created_at < :ts OR (created_at = :ts AND id < :id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :per_page + 1
+
+The cursor is an opaque URL-safe token encoding (created_at, id) of the
+last row on the previous page.  Backed by the (library, created_at, id)
+index on Transaction; finance.income_list pages Payment on
+(transaction_date, id) the same way.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+PER_PAGE_DEFAULT = 25
+PER_PAGE_MAX     = 100
+
+
+def bounded_per_page(raw, default=PER_PAGE_DEFAULT, maximum=PER_PAGE_MAX) -> int:
+    """Parse a ?per_page= value, clamped to 1..maximum."""
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, maximum))
+
+
+def encode_cursor(obj, field: str = "created_at") -> str:
+    raw = f"{getattr(obj, field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """Return (timestamp, pk) or None for a malformed / tampered token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        ts, pk = base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """
+    Minimal page object for templates:
+        for obj in page / page|length / page.has_next / page.next_cursor
+    """
+
+    def __init__(self, object_list, next_cursor, has_previous):
+        self.object_list  = object_list
+        self.next_cursor  = next_cursor
+        self.has_next     = next_cursor is not None
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def keyset_page(qs, cursor: str, per_page: int, field: str = "created_at") -> KeysetPage:
+    """
+    Return one page of *qs* (newest first) starting after *cursor*.
+    An empty / invalid cursor yields the first page.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        ts, pk = position
+        qs = qs.filter(Q(**{f"{field}__lt": ts}) | Q(**{field: ts, "pk__lt": pk}))
+
+    rows = list(qs.order_by(f"-{field}", "-pk")[: per_page + 1])
+    next_cursor = encode_cursor(rows[per_page - 1], field) if len(rows) > per_page else None
+    return KeysetPage(rows[:per_page], next_cursor, has_previous=position is not None)
@@ -0,0 +1,163 @@
+"""
+transactions/rules.py
+─────────────────────
+Immutable snapshot of a library's LibraryRuleSettings row.
+
+Circulation code used to reach for  library.rules  (one query per Library
+instance) from a dozen helpers, often inside per-transaction loops where
+every  txn.library  is a fresh instance.  Instead, load a RulesSnapshot
+once and pass it through:
+
+    rules = get_rules(library)              # once per request / sync cycle
+    rules.fine_rate(txn)                    # no queries from here on
+    rules.borrow_limit(member)
+
+Caching
+───────
+  • Per request  — the snapshot is memoised on the Library instance, so
+                   request.user.library only ever loads it once.
+  • Per process  — snapshots are kept in a module dict for
+                   RULES_CACHE_TTL seconds (default 60).  Saving a
+                   LibraryRuleSettings row (settings page, first-time setup,
+                   admin) drops the entry via a post_save receiver in
+                   transactions/signals.py; the TTL bounds staleness in
+                   *other* worker processes.
+
+Defaults mirror the old helper fallbacks exactly, so a library without a
+rules row behaves as before.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+
+RULES_CACHE_TTL: int = int(getattr(settings, "RULES_CACHE_TTL", 60))
+
+# library pk → (RulesSnapshot, loaded_at monotonic seconds)
+_cache: dict = {}
+_lock  = threading.Lock()
+
+_ATTR = "_rules_snapshot"
+
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    library_pk:            int
+    exists:                bool               = False
+    late_fine:             Decimal | None     = None
+    borrowing_period:      int                = 14
+    student_borrow_limit:  int | None         = None
+    teacher_borrow_limit:  int | None         = None
+    max_books_per_member:  int | None         = None
+    max_renewal_count:     int                = 2
+    grace_period:          int                = 0
+    auto_fine:             bool               = True
+    allow_renewal:         bool               = True
+    allow_partial_payment: bool               = False
+    auto_mark_lost:        bool               = False
+    allow_advance_booking: bool               = False
+    is_setup_complete:     bool               = False
+
+    def __bool__(self) -> bool:
+        # Lets callers keep writing  `if not rules:`  for "not configured".
+        return self.exists
+
+    @classmethod
+    def from_model(cls, library_pk, rules) -> "RulesSnapshot":
+        if rules is None:
+            return cls(library_pk=library_pk)
+        return cls(
+            library_pk            = library_pk,
+            exists                = True,
+            late_fine             = Decimal(rules.late_fine) if rules.late_fine is not None else None,
+            borrowing_period      = int(rules.borrowing_period or 14),
+            student_borrow_limit  = rules.student_borrow_limit,
+            teacher_borrow_limit  = rules.teacher_borrow_limit,
+            max_books_per_member  = rules.max_books_per_member,
+            max_renewal_count     = int(rules.max_renewal_count if rules.max_renewal_count is not None else 2),
+            grace_period          = int(rules.grace_period or 0),
+            auto_fine             = bool(rules.auto_fine),
+            allow_renewal         = bool(rules.allow_renewal),
+            allow_partial_payment = bool(rules.allow_partial_payment),
+            auto_mark_lost        = bool(rules.auto_mark_lost),
+            allow_advance_booking = bool(rules.allow_advance_booking),
+            is_setup_complete     = bool(rules.is_setup_complete),
+        )
+
+    # ── Derived values ────────────────────────────────────────────────────
+
+    def borrow_limit(self, member=None) -> int:
+        """Role-specific borrow limit; 0 means unlimited / not configured."""
+        role = getattr(member, "role", "") if member else ""
+        if role in ("teacher", "faculty", "staff"):
+            limit = self.teacher_borrow_limit
+        else:
+            limit = self.student_borrow_limit
+        if limit is None:
+            limit = self.max_books_per_member
+        return int(limit) if limit is not None else 0
+
+    def fine_rate(self, txn=None) -> Decimal:
+        """Live per-day rate; falls back to the txn snapshot, then ₹2."""
+        if self.late_fine is not None:
+            return self.late_fine
+        if txn is not None:
+            return txn.fine_rate_per_day
+        return Decimal("2.00")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Loading / caching
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _load(library_pk) -> RulesSnapshot:
+    from accounts.models import LibraryRuleSettings
+    try:
+        row = LibraryRuleSettings.objects.filter(library_id=library_pk).first()
+    except Exception:
+        row = None
+    return RulesSnapshot.from_model(library_pk, row)
+
+
+def get_rules(library, refresh: bool = False) -> RulesSnapshot:
+    """
+    Return the RulesSnapshot for *library* (a Library instance or pk).
+
+    refresh=True bypasses the process cache and reloads from the DB —
+    used by fine_sync at the start of each cycle.
+    """
+    is_instance = not isinstance(library, int)
+    library_pk  = library.pk if is_instance else library
+
+    if is_instance and not refresh:
+        snap = library.__dict__.get(_ATTR)
+        if snap is not None:
+            return snap
+
+    snap = None
+    if not refresh and RULES_CACHE_TTL > 0:
+        with _lock:
+            hit = _cache.get(library_pk)
+        if hit is not None and time.monotonic() - hit[1] < RULES_CACHE_TTL:
+            snap = hit[0]
+
+    if snap is None:
+        snap = _load(library_pk)
+        with _lock:
+            _cache[library_pk] = (snap, time.monotonic())
+
+    if is_instance:
+        library.__dict__[_ATTR] = snap
+    return snap
+
+
+def invalidate_rules(library) -> None:
+    """Drop the cached snapshot for *library* (instance or pk)."""
+    library_pk = library if isinstance(library, int) else library.pk
+    with _lock:
+        _cache.pop(library_pk, None)
+    if not isinstance(library, int):
+        library.__dict__.pop(_ATTR, None)
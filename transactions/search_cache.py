@@ -0,0 +1,176 @@
+"""
+transactions/search_cache.py
+────────────────────────────
+Short-lived response cache for the circulation autocomplete endpoints
+(member_search_api, member_suggestions_api, book_search_api).
+
+Circulation staff type the same prefixes over and over, so each JSON
+payload is cached in Django's cache framework (locmem / file / db /
+redis — whatever CACHES points at) for SEARCH_CACHE_TTL seconds.
+
+Key layout
+──────────
+    dg:search:v:<library_pk>                          → version counter
+    dg:search:<endpoint>:<library_pk>:<version>:<q>   → cached payload
+    dg:search:stats:<library_pk>:<endpoint>:<outcome> → hit / miss counter
+
+The query part is the normalised prefix (stripped, lower-cased, inner
+whitespace collapsed) hashed with md5 so it is always a safe cache key.
+
+Invalidation
+────────────
+Every member / book / copy / transaction / fine write bumps the library's
+version counter (see transactions/signals.py).  Old entries are never
+deleted explicitly — they simply stop being addressed and expire via TTL.
+
+Monitoring
+──────────
+Hit / miss counters are kept per library and endpoint in the same cache
+backend, so they are shared across workers when the backend is shared.
+get_stats(library_pk) returns one library's counters with the hit rate;
+transactions:search_cache_stats serves the signed-in library's numbers
+as JSON.
+
+Override the TTL in settings.py:
+    SEARCH_CACHE_TTL = 60   # seconds (default: 30, 0 disables caching)
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("transactions.search_cache")
+
+SEARCH_CACHE_TTL: int = int(getattr(settings, "SEARCH_CACHE_TTL", 30))
+
+# Version counters must outlive every payload they guard.
+_VERSION_TTL = 60 * 60 * 24 * 7
+
+# Longer inputs are not "prefixes" any more — don't cache them.
+_MAX_QUERY_LENGTH = 64
+
+ENDPOINTS = ("member_search", "member_suggestions", "book_search")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Key helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def normalize_query(q: str) -> str:
+    """Canonical form of an autocomplete query — all lookups are icontains."""
+    return " ".join((q or "").split()).lower()
+
+
+def _version_key(library_pk) -> str:
+    return f"dg:search:v:{library_pk}"
+
+
+def _stats_key(library_pk, endpoint: str, outcome: str) -> str:
+    return f"dg:search:stats:{library_pk}:{endpoint}:{outcome}"
+
+
+def get_version(library_pk) -> int:
+    """Current cache generation for *library_pk* (1 when never bumped)."""
+    version = cache.get(_version_key(library_pk))
+    if version is None:
+        cache.add(_version_key(library_pk), 1, _VERSION_TTL)
+        version = cache.get(_version_key(library_pk), 1)
+    return version
+
+
+def bump_version(library_pk) -> None:
+    """Invalidate every cached autocomplete payload for *library_pk*."""
+    if not library_pk:
+        return
+    key = _version_key(library_pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing / expired — start a fresh generation.
+        cache.set(key, 2, _VERSION_TTL)
+    except Exception as exc:
+        logger.warning("search cache: version bump failed for library %s: %s", library_pk, exc)
+
+
+def _count(library_pk, endpoint: str, outcome: str) -> None:
+    key = _stats_key(library_pk, endpoint, outcome)
+    try:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    except Exception:
+        pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────────────────────────────────────
+
+def cached_payload(endpoint: str, library, q: str, build):
+    """
+    Return the JSON-serialisable payload for (*endpoint*, *library*, *q*).
+
+    *build* is a zero-argument callable that computes the payload on a miss.
+    Errors from the cache backend never break the endpoint — the payload is
+    simply rebuilt.
+    """
+    norm = normalize_query(q)
+    if SEARCH_CACHE_TTL <= 0 or len(norm) > _MAX_QUERY_LENGTH:
+        return build()
+
+    try:
+        digest = hashlib.md5(norm.encode("utf-8")).hexdigest()
+        key    = f"dg:search:{endpoint}:{library.pk}:{get_version(library.pk)}:{digest}"
+        payload = cache.get(key)
+    except Exception as exc:
+        logger.warning("search cache: lookup failed (%s): %s", endpoint, exc)
+        return build()
+
+    if payload is not None:
+        _count(library.pk, endpoint, "hits")
+        return payload
+
+    _count(library.pk, endpoint, "misses")
+    payload = build()
+    try:
+        cache.set(key, payload, SEARCH_CACHE_TTL)
+    except Exception as exc:
+        logger.warning("search cache: store failed (%s): %s", endpoint, exc)
+    return payload
+
+
+def get_stats(library_pk) -> dict:
+    """
+    Hit / miss counters of *library_pk* per endpoint plus totals.
+
+        {"ttl": 30, "endpoints": {"book_search": {"hits": 12, "misses": 4,
+         "hit_rate": 0.75}, ...}, "hits": .., "misses": .., "hit_rate": ..}
+    """
+    keys   = [_stats_key(library_pk, e, o) for e in ENDPOINTS for o in ("hits", "misses")]
+    values = cache.get_many(keys)
+
+    def _rate(hits, misses):
+        total = hits + misses
+        return round(hits / total, 4) if total else 0.0
+
+    endpoints = {}
+    total_hits = total_misses = 0
+    for endpoint in ENDPOINTS:
+        hits   = int(values.get(_stats_key(library_pk, endpoint, "hits"), 0))
+        misses = int(values.get(_stats_key(library_pk, endpoint, "misses"), 0))
+        total_hits   += hits
+        total_misses += misses
+        endpoints[endpoint] = {"hits": hits, "misses": misses, "hit_rate": _rate(hits, misses)}
+
+    return {
+        "ttl":       SEARCH_CACHE_TTL,
+        "endpoints": endpoints,
+        "hits":      total_hits,
+        "misses":    total_misses,
+        "hit_rate":  _rate(total_hits, total_misses),
+    }
+
+
+def reset_stats(library_pk) -> None:
+    cache.delete_many([_stats_key(library_pk, e, o) for e in ENDPOINTS for o in ("hits", "misses")])
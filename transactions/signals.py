@@ -0,0 +1,125 @@
+"""
+transactions/signals.py
+───────────────────────
+Model signal receivers owned by the transactions app.
+
+Connected from TransactionsConfig.ready().
+
+Search cache invalidation
+─────────────────────────
+Any write to a Member, Book, BookCopy, Transaction or Fine bumps the
+owning library's autocomplete cache version (see search_cache.py).
+Member / Book / BookCopy are owner-scoped, so the owner → library pk
+mapping is resolved once and memoised (a library never changes owner).
+
+The bump is deferred with on_commit() so a concurrent request can't
+re-cache results between the write and the COMMIT.
+
+Transaction writes also drop the cached status-tab counts (counts.py).
+
+Fine summaries
+──────────────
+Fine writes recompute the owning transaction's total_fine / unpaid_fine
+(fine_summary.py) inside the same DB transaction as the fine itself.
+
+Rules snapshot invalidation
+───────────────────────────
+Saving LibraryRuleSettings (settings page, first-time setup, admin) drops
+the process-level RulesSnapshot for that library (see rules.py).
+"""
+
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import search_cache
+from .counts import invalidate_status_counts
+from .fine_summary import refresh_fine_summaries
+from .rules import invalidate_rules
+
+# owner (User) pk → Library pk
+_library_pk_by_owner: dict = {}
+
+
+def _library_pk_for_owner(owner_id):
+    if not owner_id:
+        return None
+    if owner_id not in _library_pk_by_owner:
+        from accounts.models import Library
+        pk = Library.objects.filter(user_id=owner_id).values_list("pk", flat=True).first()
+        if pk is None:
+            return None
+        _library_pk_by_owner[owner_id] = pk
+    return _library_pk_by_owner[owner_id]
+
+
+def _bump_later(library_pk) -> None:
+    if library_pk:
+        db_transaction.on_commit(lambda: search_cache.bump_version(library_pk))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Receivers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _on_owner_scoped_write(sender, instance, **kwargs):
+    """Member / Book — scoped by owner."""
+    _bump_later(_library_pk_for_owner(getattr(instance, "owner_id", None)))
+
+
+def _on_copy_write(sender, instance, **kwargs):
+    """BookCopy — scoped through its parent book."""
+    try:
+        owner_id = instance.book.owner_id
+    except Exception:
+        return
+    _bump_later(_library_pk_for_owner(owner_id))
+
+
+def _on_library_scoped_write(sender, instance, **kwargs):
+    """Transaction / Fine — scoped by library FK."""
+    _bump_later(getattr(instance, "library_id", None))
+
+
+def _on_transaction_write(sender, instance, **kwargs):
+    """Transaction — also drops the cached status-tab counts."""
+    _on_library_scoped_write(sender, instance, **kwargs)
+    library_pk = getattr(instance, "library_id", None)
+    if library_pk:
+        db_transaction.on_commit(lambda: invalidate_status_counts(library_pk))
+
+
+def _on_fine_write(sender, instance, **kwargs):
+    """Fine — also refreshes the transaction's maintained fine totals."""
+    _on_library_scoped_write(sender, instance, **kwargs)
+    refresh_fine_summaries([getattr(instance, "transaction_id", None)])
+
+
+def _on_rules_write(sender, instance, **kwargs):
+    """LibraryRuleSettings — drop the cached rules snapshot."""
+    library_pk = getattr(instance, "library_id", None)
+    if library_pk:
+        invalidate_rules(library_pk)
+        db_transaction.on_commit(lambda: invalidate_rules(library_pk))
+
+
+def connect():
+    from accounts.models import LibraryRuleSettings
+    from books.models import Book, BookCopy
+    from finance.models import Fine
+    from members.models import Member
+
+    from .models import Transaction
+
+    for model, receiver in (
+        (Member,      _on_owner_scoped_write),
+        (Book,        _on_owner_scoped_write),
+        (BookCopy,    _on_copy_write),
+        (Transaction, _on_transaction_write),
+        (Fine,        _on_fine_write),
+    ):
+        uid = f"search_cache_{model._meta.label_lower}"
+        post_save.connect(receiver, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(receiver, sender=model, dispatch_uid=f"{uid}_delete")
+
+    post_save.connect(_on_rules_write, sender=LibraryRuleSettings, dispatch_uid="rules_snapshot_save")
+    post_delete.connect(_on_rules_write, sender=LibraryRuleSettings, dispatch_uid="rules_snapshot_delete")
@@ -1,3 +1,776 @@
-from django.test import TestCase
+"""
+transactions/tests.py
 
-# Create your tests here.
+Run with:
+    python manage.py test transactions
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _make_library(username="lib"):
+    from accounts.models import Library
+    user = User.objects.create_user(username, f"{username}@test.com", "pw")
+    return Library.objects.create(user=user, library_name="Test Library", institute_email=f"{username}@library.test")
+
+
+def _make_member(library, n=1):
+    from members.models import Member
+    return Member.objects.create(
+        owner=library.user,
+        first_name="Arjun",
+        last_name=f"Sen{n}",
+        email=f"arjun{n}@test.com",
+        phone=f"90000000{n:02d}",
+        date_of_birth=date(2000, 1, 1),
+        gender="M",
+    )
+
+
+def _make_book(library):
+    from books.models import Book
+    return Book.objects.create(
+        owner=library.user,
+        title="Wings of Fire",
+        author="A.P.J. Abdul Kalam",
+        isbn="9788173711466",
+        total_copies=3,
+        available_copies=3,
+    )
+
+
+def _make_transaction(library, member, book, **kwargs):
+    from transactions.models import Transaction
+    today = date.today()
+    fields = {
+        "library":    library,
+        "member":     member,
+        "book":       book,
+        "issue_date": today - timedelta(days=20),
+        "due_date":   today - timedelta(days=6),
+        "status":     Transaction.STATUS_OVERDUE,
+    }
+    fields.update(kwargs)
+    return Transaction.objects.create(**fields)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# with_fine_fields()
+# ─────────────────────────────────────────────────────────────────────────────
+
+class WithFineFieldsTests(TestCase):
+
+    def setUp(self):
+        from accounts.models import LibraryRuleSettings
+        from transactions.rules import invalidate_rules
+
+        self.library = _make_library()
+        rules, _ = LibraryRuleSettings.objects.get_or_create(library=self.library)
+        rules.late_fine    = Decimal("3.50")
+        rules.grace_period = 2
+        rules.save()
+        invalidate_rules(self.library)
+
+        member = _make_member(self.library)
+        book   = _make_book(self.library)
+        today  = date.today()
+
+        from transactions.models import Transaction
+        _make_transaction(self.library, member, book)
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_ISSUED,
+                          due_date=today + timedelta(days=3))
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_ISSUED,
+                          due_date=today - timedelta(days=1), damage_charge=Decimal("40.00"))
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_RETURNED,
+                          return_date=today - timedelta(days=2))
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_RETURNED,
+                          due_date=today, return_date=today - timedelta(days=5))
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_LOST)
+        _make_transaction(self.library, member, book, status=Transaction.STATUS_OVERDUE_SETTLED)
+
+    def _assert_matches_properties(self, qs):
+        from transactions.models import Transaction
+        annotated = {t.pk: t for t in qs}
+        self.assertEqual(len(annotated), 7)
+        for plain in Transaction.objects.for_library(self.library):
+            t = annotated[plain.pk]
+            self.assertEqual(t.db_overdue_days, plain.overdue_days, plain.status)
+            self.assertEqual(t.db_overdue_fine, plain.overdue_fine, plain.status)
+            self.assertEqual(t.db_fine_amount, plain.fine_amount, plain.status)
+            self.assertEqual(
+                t.db_grace_fine,
+                Decimal(max(0, plain.overdue_days - 2)) * Decimal("3.50"),
+            )
+
+    def test_matches_properties_with_library_rules(self):
+        from transactions.models import Transaction
+        self._assert_matches_properties(
+            Transaction.objects.for_library(self.library).with_fine_fields(self.library)
+        )
+
+    def test_matches_properties_with_per_row_rules(self):
+        from transactions.models import Transaction
+        self._assert_matches_properties(
+            Transaction.objects.for_library(self.library).with_fine_fields()
+        )
+
+    def test_sort_by_fine_in_sql(self):
+        from transactions.models import Transaction
+        fines = list(
+            Transaction.objects.for_library(self.library)
+            .with_fine_fields(self.library)
+            .order_by("-db_fine_amount")
+            .values_list("db_fine_amount", flat=True)
+        )
+        self.assertEqual(fines, sorted(fines, reverse=True))
+        self.assertEqual(fines[0], Decimal("43.50"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# transaction_list — cached counts + keyset pagination
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TransactionListTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.library = _make_library()
+        member = _make_member(self.library)
+        book   = _make_book(self.library)
+        for _ in range(7):
+            _make_transaction(self.library, member, book)
+        self.client.force_login(self.library.user)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        from transactions.models import Transaction
+        url  = "/transactions/?per_page=3"
+        seen = []
+        resp = self.client.get(url)
+        seen += [t.pk for t in resp.context["transactions"]]
+        cursor = resp.context["next_cursor"]
+        while cursor:
+            resp = self.client.get(f"{url}&cursor={cursor}")
+            self.assertTrue(resp.context["cursor_mode"])
+            seen += [t.pk for t in resp.context["transactions"]]
+            cursor = resp.context["next_cursor"]
+        expected = list(
+            Transaction.objects.for_library(self.library)
+            .order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_per_page_is_bounded(self):
+        resp = self.client.get("/transactions/?per_page=100000")
+        self.assertEqual(resp.context["per_page"], 100)
+
+    def test_status_counts_invalidated_on_write(self):
+        from transactions.models import Transaction
+        self.assertEqual(self.client.get("/transactions/").context["overdue_count"], 7)
+        txn = Transaction.objects.for_library(self.library).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            txn.status = Transaction.STATUS_RETURNED
+            txn.save()
+        resp = self.client.get("/transactions/")
+        self.assertEqual(resp.context["overdue_count"], 6)
+        self.assertEqual(resp.context["returned_count"], 1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Autocomplete response cache (search_cache.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SearchCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.library = _make_library()
+        self.other   = _make_library("other")
+        self.builds  = []
+
+    def _lookup(self, library, q="arj"):
+        from transactions import search_cache
+
+        def build():
+            self.builds.append(library.pk)
+            return {"results": [library.pk, len(self.builds)]}
+        return search_cache.cached_payload("member_search", library, q, build)
+
+    def test_hit_after_miss_on_normalised_query(self):
+        from transactions import search_cache
+
+        first = self._lookup(self.library, "  Arjun   Sen ")
+        self.assertEqual(self._lookup(self.library, "arjun sen"), first)
+        self.assertEqual(len(self.builds), 1)
+        stats = search_cache.get_stats(self.library.pk)
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    def test_keys_and_counters_are_per_library(self):
+        from transactions import search_cache
+
+        self._lookup(self.library)
+        self._lookup(self.other)
+        self.assertEqual(self.builds, [self.library.pk, self.other.pk])
+        self.assertEqual(search_cache.get_stats(self.other.pk)["misses"], 1)
+        self.assertEqual(search_cache.get_stats(self.other.pk)["hits"], 0)
+
+    def test_writes_bump_the_owning_library_only(self):
+        from transactions import search_cache
+
+        self._lookup(self.library)
+        self._lookup(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            member = _make_member(self.library)
+        self._lookup(self.library)
+        self._lookup(self.other)
+        self.assertEqual(self.builds, [self.library.pk, self.other.pk, self.library.pk])
+
+        for write in (lambda: _make_book(self.library),
+                      lambda: _make_transaction(self.library, member, _issue_setup(self.library, n=1))):
+            before = search_cache.get_version(self.library.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertGreater(search_cache.get_version(self.library.pk), before)
+        self.assertEqual(search_cache.get_version(self.other.pk), 1)
+
+    def test_stats_endpoint_shows_the_callers_library(self):
+        from django.urls import reverse
+
+        self._lookup(self.other)
+        self._lookup(self.other)
+        self.client.force_login(self.library.user)
+        stats = self.client.get(reverse("transactions:search_cache_stats")).json()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 0))
+
+        self.client.force_login(self.other.user)
+        stats = self.client.get(reverse("transactions:search_cache_stats")).json()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rules snapshot (rules.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class RulesSnapshotTests(TestCase):
+
+    def setUp(self):
+        from accounts.models import LibraryRuleSettings
+        from transactions.rules import invalidate_rules
+
+        self.library = _make_library()
+        self.row, _  = LibraryRuleSettings.objects.update_or_create(library=self.library,
+                                                                    defaults={"borrowing_period": 10})
+        invalidate_rules(self.library)
+
+    def _fresh_library(self):
+        from accounts.models import Library
+        return Library.objects.get(pk=self.library.pk)
+
+    def _next_request_library(self):
+        # A new Library instance without a DB hit — as on the next request.
+        from accounts.models import Library
+        return Library(pk=self.library.pk)
+
+    def test_memoised_per_request_and_per_process(self):
+        from transactions.rules import get_rules
+
+        library = self._fresh_library()
+        with self.assertNumQueries(1):
+            first = get_rules(library)
+        with self.assertNumQueries(0):
+            self.assertIs(get_rules(library), first)                   # same Library instance
+            self.assertIs(get_rules(self._next_request_library()), first)   # process cache
+        self.assertEqual(first.borrowing_period, 10)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_rules(library, refresh=True), first)
+
+    def test_saving_the_row_drops_the_process_cache(self):
+        from transactions import rules
+        from transactions.rules import get_rules
+
+        self.assertEqual(get_rules(self.library.pk).borrowing_period, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.row.borrowing_period = 21
+            self.row.save()
+        self.assertNotIn(self.library.pk, rules._cache)
+        self.assertEqual(get_rules(self._fresh_library()).borrowing_period, 21)
+
+        self.row.delete()
+        self.assertFalse(get_rules(self._fresh_library()))
+
+    def test_borrow_limit_falls_back_to_max_books_per_member(self):
+        from types import SimpleNamespace
+
+        from transactions.rules import RulesSnapshot
+
+        student = SimpleNamespace(role="student")
+        teacher = SimpleNamespace(role="teacher")
+        snap = RulesSnapshot(library_pk=1, exists=True, student_borrow_limit=2,
+                             teacher_borrow_limit=6, max_books_per_member=4)
+        self.assertEqual((snap.borrow_limit(student), snap.borrow_limit(teacher), snap.borrow_limit()), (2, 6, 2))
+
+        snap = RulesSnapshot(library_pk=1, exists=True, max_books_per_member=4)
+        self.assertEqual((snap.borrow_limit(student), snap.borrow_limit(teacher)), (4, 4))
+        self.assertEqual(RulesSnapshot(library_pk=1).borrow_limit(student), 0)   # not configured = unlimited
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Maintained fine summaries (total_fine / unpaid_fine)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FineSummaryTests(TestCase):
+
+    def setUp(self):
+        self.library = _make_library()
+        member = _make_member(self.library)
+        book   = _make_book(self.library)
+        self.txn = _make_transaction(self.library, member, book)
+
+    def _fine(self, fine_type, amount):
+        from finance.models import Fine
+        return Fine.objects.create(
+            library=self.library, transaction=self.txn,
+            fine_type=fine_type, amount=Decimal(amount),
+        )
+
+    def _totals(self):
+        from transactions.models import Transaction
+        return Transaction.objects.values_list("total_fine", "unpaid_fine").get(pk=self.txn.pk)
+
+    def test_fine_writes_refresh_summary(self):
+        from finance.models import Fine
+        overdue = self._fine(Fine.TYPE_OVERDUE, "18.00")
+        damage  = self._fine(Fine.TYPE_DAMAGE, "40.00")
+        self.assertEqual(self._totals(), (Decimal("58.00"), Decimal("58.00")))
+
+        overdue.mark_paid(method=Fine.METHOD_CASH)
+        self.assertEqual(self._totals(), (Decimal("58.00"), Decimal("40.00")))
+
+        damage.status = Fine.STATUS_WAIVED
+        damage.save(update_fields=["status", "updated_at"])
+        self.assertEqual(self._totals(), (Decimal("58.00"), Decimal("0.00")))
+
+        damage.delete()
+        self.assertEqual(self._totals(), (Decimal("18.00"), Decimal("0.00")))
+
+    def test_stale_instance_save_keeps_summary(self):
+        from finance.models import Fine
+        self._fine(Fine.TYPE_OVERDUE, "18.00")
+        self.txn.notes = "called member"
+        self.txn.save()
+        self.assertEqual(self._totals(), (Decimal("18.00"), Decimal("18.00")))
+
+    def test_check_command_reports_and_fixes_drift(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from finance.models import Fine
+        from transactions.models import Transaction
+
+        self._fine(Fine.TYPE_OVERDUE, "18.00")
+        Transaction.objects.filter(pk=self.txn.pk).update(total_fine=0, unpaid_fine=0)
+
+        with self.assertRaises(CommandError):
+            call_command("check_fine_summaries", stdout=StringIO())
+        call_command("check_fine_summaries", "--fix", stdout=StringIO())
+        self.assertEqual(self._totals(), (Decimal("18.00"), Decimal("18.00")))
+        call_command("check_fine_summaries", stdout=StringIO())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Hot-path spans (core/metrics.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        from unittest import mock
+
+        from core.metrics import RingBufferSink
+
+        self.ring = RingBufferSink()
+        patcher = mock.patch("core.metrics._sinks", [self.ring])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.library = _make_library()
+        self.member  = _make_member(self.library)
+        self.book    = _make_book(self.library)
+        self.client.force_login(self.library.user)
+
+    def test_sync_cycle_reports_each_phase_per_library(self):
+        from django.test.utils import override_settings
+
+        from accounts.models import LibraryRuleSettings
+        from transactions.fine_sync import _run_sync_once
+
+        LibraryRuleSettings.objects.update_or_create(library=self.library, defaults={"late_fine": Decimal("2.00")})
+        _make_transaction(self.library, self.member, self.book)
+        with override_settings(FINE_DAILY_REMINDER=False):
+            _run_sync_once()
+
+        library = str(self.library.pk)
+        for phase in ("overdue_flip", "fine_upsert", "auto_block", "auto_lost", "reminders", "rollup"):
+            spans = self.ring.spans(f"fine_sync.{phase}", library=library)
+            self.assertEqual(len(spans), 1, phase)
+            self.assertGreaterEqual(spans[0]["duration_ms"], spans[0]["db_ms"])
+
+        upsert = self.ring.spans("fine_sync.fine_upsert")[0]
+        self.assertEqual(upsert["fines"], 1)
+        self.assertGreater(upsert["queries"], 0)
+        self.assertGreater(upsert["rows"], 0)                  # the Fine INSERT
+        self.assertEqual(self.ring.spans("fine_sync.auto_block")[0]["rows"], 1)   # member blocked
+
+        cycle = self.ring.spans("fine_sync.cycle")[-1]
+        self.assertNotIn("library", cycle["labels"])
+        self.assertGreaterEqual(cycle["queries"], upsert["queries"])
+
+    def test_circulation_views_record_db_and_email_time(self):
+        import time
+        from unittest import mock
+
+        from django.urls import reverse
+
+        from books.models import BookCopy
+        from transactions.models import Transaction
+
+        copy = BookCopy.objects.filter(book=self.book, status=BookCopy.Status.AVAILABLE).first()
+        svc = mock.Mock()
+        svc.send_book_issued_email.side_effect   = lambda *a: time.sleep(0.005) or True
+        svc.send_book_returned_email.side_effect = lambda *a: time.sleep(0.005) or True
+        with mock.patch("transactions.views._email_svc", svc), \
+                mock.patch("transactions.views._EMAIL_AVAILABLE", True), \
+                mock.patch("transactions.views._member_emails_on", return_value=True):
+            self.client.post(reverse("transactions:issue_book"), {
+                "member": self.member.pk, "book": self.book.pk,
+                "book_copy": copy.pk if copy else "", "issue_date": date.today().isoformat(),
+            })
+            txn = Transaction.objects.get(member=self.member)
+            self.client.post(reverse("transactions:return_book", args=[txn.pk]), {
+                "return_date": date.today().isoformat(), "condition": "good",
+            })
+
+        for name in ("circulation.issue_book", "circulation.return_book"):
+            [sp] = self.ring.spans(name, library=self.library.pk, method="POST")
+            self.assertEqual(sp["labels"]["status"], "302", name)
+            self.assertGreater(sp["queries"], 0)
+            self.assertGreater(sp["rows"], 0)
+            self.assertGreaterEqual(sp["email_ms"], 5)
+            self.assertLess(sp["email_ms"], sp["duration_ms"])
+
+        self.client.get(reverse("transactions:renew_book", args=[txn.pk]))
+        self.assertEqual(len(self.ring.spans("circulation.renew_book", method="GET")), 1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# issue_engine — locked issue critical section
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _issue_setup(library, copies=1, n=0, **rules):
+    """Configured rules and title *n* with *copies* free BookCopy rows."""
+    from accounts.models import LibraryRuleSettings
+    from books.models import Book, BookCopy
+
+    LibraryRuleSettings.objects.update_or_create(library=library, defaults={"late_fine": Decimal("2.00"), **rules})
+    book = Book.objects.create(
+        owner=library.user, title=f"Title {n}", author="Author", isbn=f"97800000{n:05d}",
+        total_copies=copies, available_copies=copies,
+    )
+    BookCopy.objects.filter(book=book).delete()
+    for c in range(copies):
+        BookCopy.objects.create(book=book, copy_id=f"DGTESBK01{book.pk:03d}{c:02d}", copy_number=c + 1)
+    return book
+
+
+class IssueEngineTests(TestCase):
+
+    def setUp(self):
+        self.library = _make_library()
+        self.member  = _make_member(self.library)
+        self.book    = _issue_setup(self.library, copies=3, student_borrow_limit=2)
+
+    def _issue(self, **kwargs):
+        from transactions import issue_engine
+        return issue_engine.issue(self.library, **{"member_id": self.member.pk, "book_id": self.book.pk, **kwargs})
+
+    def _refused(self, code, **kwargs):
+        from transactions.issue_engine import IssueRefused
+        with self.assertRaises(IssueRefused) as ctx:
+            self._issue(**kwargs)
+        self.assertEqual(ctx.exception.code, code)
+
+    def test_issues_a_free_copy_and_updates_stock(self):
+        from books.models import BookCopy
+
+        txn = self._issue(issue_date=date.today())
+        self.assertEqual(txn.due_date, date.today() + timedelta(days=txn.loan_duration_days))
+        self.assertEqual(txn.fine_rate_per_day, Decimal("2.00"))
+        self.assertEqual(BookCopy.objects.get(pk=txn.book_copy_id).status, BookCopy.Status.BORROWED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+
+        second = self._issue()
+        self.assertNotEqual(second.book_copy_id, txn.book_copy_id)
+        self._refused("borrow_limit")
+
+    def test_scanned_copy_must_be_free(self):
+        from books.models import BookCopy
+
+        copy = BookCopy.objects.filter(book=self.book).first()
+        self._issue(copy_id=copy.pk)
+        self._refused("unavailable", copy_id=copy.pk)
+
+    def test_rules_read_from_the_locked_snapshot(self):
+        from finance.models import Fine
+        from members.models import Member
+
+        old = _make_transaction(self.library, self.member, _issue_setup(self.library, n=1))
+        self._refused("overdue")
+
+        old.status = old.STATUS_RETURNED
+        old.save()
+        fine = Fine.objects.create(library=self.library, transaction=old, fine_type=Fine.TYPE_OVERDUE,
+                                   amount=Decimal("12.00"))
+        self._refused("unpaid_fine")
+        fine.delete()
+
+        Member.objects.filter(pk=self.member.pk).update(status="blocked")
+        self._refused("blocked")
+        Member.objects.filter(pk=self.member.pk).update(status="inactive")
+        self._refused("inactive")
+        Member.objects.filter(pk=self.member.pk).update(status="active")
+
+        self._refused("advance_booking", issue_date=date.today() + timedelta(days=3))
+        self.assertEqual(self._issue().status, "issued")
+
+    def test_transaction_id_collision_retries_the_whole_block(self):
+        from unittest import mock
+
+        from transactions.models import Transaction
+
+        taken = self._issue().transaction_id
+        with mock.patch("transactions.issue_engine._generate_transaction_id",
+                        side_effect=[taken, "DGTESTR000001"]):
+            txn = self._issue()
+        self.assertEqual(txn.transaction_id, "DGTESTR000001")
+        self.assertEqual(Transaction.objects.filter(member=self.member).count(), 2)
+
+    def test_statement_count(self):
+        from core.query_budget import QueryRecorder
+
+        with QueryRecorder() as rec:
+            self._issue()
+        writes = [sql for sql, _ in rec.queries if sql.lstrip().upper().startswith(("INSERT", "UPDATE"))
+                  and "members_member" not in sql]   # SQLite's lock-taking no-op UPDATE
+        self.assertEqual(len(writes), 3, writes)
+        reads = [sql for sql, _ in rec.queries if sql.lstrip().upper().startswith("SELECT")]
+        self.assertLessEqual(len(reads), 5, reads)   # rules, member, loan / fine snapshot, book, copy
+
+    def test_view_reports_refusals(self):
+        from django.urls import reverse
+
+        from members.models import Member
+
+        Member.objects.filter(pk=self.member.pk).update(status="blocked")
+        self.client.force_login(self.library.user)
+        response = self.client.post(reverse("transactions:issue_book"), {
+            "member": self.member.pk, "book": self.book.pk, "issue_date": date.today().isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("blocked", " ".join(str(m) for m in response.context["messages"]))
+
+
+class BatchIssueTests(TestCase):
+
+    def setUp(self):
+        self.library = _make_library()
+        self.member  = _make_member(self.library)
+        self.books   = [_issue_setup(self.library, copies=2, n=n, student_borrow_limit=3) for n in range(2)]
+
+    def _copies(self):
+        from books.models import BookCopy
+        return list(BookCopy.objects.filter(book__in=self.books).order_by("pk"))
+
+    def _issue_many(self, copies):
+        from transactions import issue_engine
+        return issue_engine.issue_many(self.library, member_id=self.member.pk, copy_ids=[c.pk for c in copies])
+
+    def test_issues_the_basket_with_bulk_writes(self):
+        from books.models import Book, BookCopy
+        from core.query_budget import QueryRecorder
+
+        copies = self._copies()[:3]
+        with QueryRecorder() as rec:
+            txns = self._issue_many(copies)
+        self.assertEqual([t.book_copy_id for t in txns], [c.pk for c in copies])
+        self.assertTrue(all(t.pk for t in txns))
+        self.assertEqual(len({t.transaction_id for t in txns}), 3)
+        writes = [sql for sql, _ in rec.queries if sql.lstrip().upper().startswith(("INSERT", "UPDATE"))
+                  and "members_member" not in sql]
+        self.assertEqual(len(writes), 3, writes)   # one INSERT, copy UPDATE, book UPDATE
+
+        self.assertEqual(BookCopy.objects.filter(pk__in=[c.pk for c in copies],
+                                                 status=BookCopy.Status.BORROWED).count(), 3)
+        self.assertEqual(dict(Book.objects.filter(pk__in=[b.pk for b in self.books])
+                              .values_list("pk", "available_copies")),
+                         {self.books[0].pk: 0, self.books[1].pk: 1})
+
+    def test_one_refusal_issues_nothing(self):
+        from transactions.issue_engine import IssueRefused
+        from transactions.models import Transaction
+
+        copies = self._copies()
+        with self.assertRaises(IssueRefused) as ctx:
+            self._issue_many(copies)
+        self.assertEqual(ctx.exception.code, "borrow_limit")
+
+        self._issue_many(copies[:1])
+        with self.assertRaises(IssueRefused) as ctx:
+            self._issue_many(copies[:2])
+        self.assertEqual(ctx.exception.code, "unavailable")
+        self.assertIn(copies[0].copy_id, ctx.exception.message)
+        self.assertEqual(Transaction.objects.filter(member=self.member).count(), 1)
+
+    def test_view_sends_one_combined_email(self):
+        from unittest import mock
+
+        from django.urls import reverse
+
+        from transactions.models import Transaction
+
+        svc = mock.Mock()
+        copies = self._copies()[:2]
+        self.client.force_login(self.library.user)
+        with mock.patch("transactions.views._email_svc", svc), \
+                mock.patch("transactions.views._EMAIL_AVAILABLE", True), \
+                mock.patch("transactions.views._member_emails_on", return_value=True):
+            response = self.client.post(reverse("transactions:issue_batch"), {
+                "member_id":  self.member.member_id.lower(),
+                "copies":     "\n".join(c.copy_id for c in copies),
+                "issue_date": date.today().isoformat(),
+            })
+        self.assertRedirects(response, reverse("transactions:transaction_list"), fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.filter(member=self.member).count(), 2)
+        svc.send_books_issued_email.assert_called_once()
+        self.assertEqual(len(svc.send_books_issued_email.call_args.args[1]), 2)
+        svc.send_book_issued_email.assert_not_called()
+
+    def test_view_json(self):
+        from django.urls import reverse
+
+        copies = self._copies()
+        self.client.force_login(self.library.user)
+        self.assertContains(self.client.get(reverse("transactions:issue_batch")), 'name="copies"')
+        url = reverse("transactions:issue_batch") + "?format=json"
+
+        response = self.client.post(url, {"member_id": self.member.member_id, "copies": "NOPE01, NOPE02",
+                                          "issue_date": date.today().isoformat()})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("NOPE01", response.json()["errors"]["copies"][0])
+
+        response = self.client.post(url, {"member_id": self.member.member_id,
+                                          "copies": " ".join(c.copy_id for c in copies),
+                                          "issue_date": date.today().isoformat()})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["code"], "borrow_limit")
+
+        response = self.client.post(url, {"member_id": self.member.member_id,
+                                          "copies": f"{copies[0].copy_id},{copies[2].copy_id}",
+                                          "issue_date": date.today().isoformat()})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([t["copy_id"] for t in response.json()["transactions"]],
+                         [copies[0].copy_id, copies[2].copy_id])
+
+
+class IssueEngineConcurrencyTests(TransactionTestCase):
+    """Desks issuing at the same moment — each thread has its own connection."""
+
+    DESKS = 6
+
+    def setUp(self):
+        self.library = _make_library()
+
+    def _race(self, jobs):
+        """Run each job at once on its own thread; return "ok" / refusal code / error name per job."""
+        import threading
+
+        from django.db import connection
+
+        from transactions.issue_engine import IssueRefused
+
+        barrier = threading.Barrier(len(jobs))
+        outcomes = [None] * len(jobs)
+
+        def desk(n, job):
+            try:
+                barrier.wait()
+                job()
+                outcomes[n] = "ok"
+            except IssueRefused as refused:
+                outcomes[n] = refused.code
+            except Exception as exc:   # SQLite: "database is locked" instead of waiting on a row lock
+                outcomes[n] = type(exc).__name__
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=desk, args=(n, job)) for n, job in enumerate(jobs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def _assert_one_winner(self, outcomes, refusal):
+        from django.db import connection
+
+        self.assertEqual(outcomes.count("ok"), 1, outcomes)
+        losers = set(outcomes) - {"ok"}
+        if connection.features.has_select_for_update:
+            self.assertEqual(losers, {refusal}, outcomes)
+        else:
+            self.assertLessEqual(losers, {refusal, "OperationalError"}, outcomes)
+
+    def test_last_copy_goes_to_one_desk(self):
+        from books.models import BookCopy
+        from transactions import issue_engine
+        from transactions.models import Transaction
+
+        book    = _issue_setup(self.library, copies=1)
+        copy    = BookCopy.objects.get(book=book)
+        members = [_make_member(self.library, n) for n in range(self.DESKS)]
+        outcomes = self._race([
+            (lambda m=m: issue_engine.issue(self.library, member_id=m.pk, book_id=book.pk, copy_id=copy.pk))
+            for m in members
+        ])
+
+        self._assert_one_winner(outcomes, "unavailable")
+        self.assertEqual(Transaction.objects.filter(book_copy=copy).count(), 1)
+        book.refresh_from_db()
+        self.assertEqual(book.available_copies, 0)
+
+    def test_borrow_limit_holds_across_desks(self):
+        from transactions import issue_engine
+        from transactions.models import Transaction
+
+        member = _make_member(self.library)
+        books  = [_issue_setup(self.library, n=n, student_borrow_limit=1) for n in range(self.DESKS)]
+        outcomes = self._race([
+            (lambda b=b: issue_engine.issue(self.library, member_id=member.pk, book_id=b.pk))
+            for b in books
+        ])
+
+        self._assert_one_winner(outcomes, "borrow_limit")
+        self.assertEqual(Transaction.objects.filter(member=member).count(), 1)
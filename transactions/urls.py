@@ -10,6 +10,7 @@ urlpatterns = [
     # ── Transaction CRUD ──────────────────────────────────────────────────────
     path("",                          views.transaction_list,   name="transaction_list"),
     path("issue/",                    views.issue_book,         name="issue_book"),
+    path("issue/batch/",              views.issue_batch,        name="issue_batch"),
     path("<int:pk>/",                 views.transaction_detail, name="transaction_detail"),
     path("<int:pk>/return/",          views.return_book,        name="return_book"),
     path("<int:pk>/renew/",           views.renew_book,         name="renew_book"),
@@ -31,6 +32,7 @@ urlpatterns = [
     path("api/member-suggestions/",   views.member_suggestions_api, name="member_suggestions_api"),  # ← autocomplete
     path("api/book-lookup/",          views.book_lookup_api,        name="book_lookup_api"),
     path("api/book-search/",          views.book_search_api,        name="book_search_api"),
+    path("api/search-cache/stats/",   views.search_cache_stats_api, name="search_cache_stats"),
     path("api/book-cover/<int:pk>/",  views.book_cover_image,       name="book_cover_image"),
     path("api/book-cover/copy/<str:copy_id>/", views.book_cover_by_copy_id, name="book_cover_by_copy_id"),
     path("api/member-photo/<int:pk>/", views.member_photo_image,    name="member_photo_image"),
@@ -19,6 +19,8 @@ BUSINESS RULES
    ✔ Member must not have exceeded their borrow limit
    ✔ Member must have no pending (unpaid) fines
 
+   Batch checkout (issue_batch) applies the same rules to a whole basket.
+
 2. RETURN BOOK
    ✔ Transaction must belong to this library (tenant check)
    ✔ Book must not already be returned
@@ -46,6 +48,13 @@ Transaction.sync_overdue_for_library() every FINE_SYNC_INTERVAL seconds.
 Views call _sync_overdue_if_stale() which is a no-op when the background
 thread has already synced within STALE_THRESHOLD_SECONDS.
 
+Instrumentation
+───────────────
+issue_book, return_book and renew_book run inside core.metrics spans
+(circulation.issue_book / .return_book / .renew_book) labelled with the
+library, method and status: wall time, DB time, query count, rows written
+and email_ms — the time spent in _send_email.
+
 Double-fine prevention
 ──────────────────────
 fine_sync.py uses get_or_create keyed on (library, transaction, fine_type).
@@ -67,21 +76,29 @@ from django.db import transaction as db_transaction
 from django.db.models import Count, Q, Sum, DecimalField as _DF
 from django.http import (
     Http404,
-    HttpResponse,
     JsonResponse,
 )
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
+from core.image_serving import image_response, image_url
+from core.metrics import instrument, timing
 from finance.models import Fine
+from finance.timeseries import invalidate_finance_series
 from .forms import (
     AddPenaltyForm,
+    BatchIssueForm,
     IssueBookForm,
     MarkFinePaidForm,
     MarkLostForm,
     ReturnBookForm,
 )
+from . import issue_engine, search_cache
+from .counts import get_status_counts, invalidate_status_counts
+from .fine_summary import refresh_fine_summaries
 from .models import MissingBook, Transaction
+from .pagination import bounded_per_page, encode_cursor, keyset_page
+from .rules import get_rules
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -104,7 +121,8 @@ def _send_email(fn_name: str, *args, **kwargs) -> bool:
     if not _EMAIL_AVAILABLE:
         return False
     try:
-        return getattr(_email_svc, fn_name)(*args, **kwargs)
+        with timing("email_ms"):
+            return getattr(_email_svc, fn_name)(*args, **kwargs)
     except Exception as _exc:
         import logging
         logging.getLogger("transactions.email").warning(
@@ -138,11 +156,12 @@ def _get_library_or_404(request):
 
 
 def _get_library_rules(library):
-    """Safely return library.rules or None."""
-    try:
-        return library.rules
-    except Exception:
-        return None
+    """
+    Rules snapshot for *library* — falsy when no LibraryRuleSettings row
+    exists.  Loaded once per request (memoised on the Library instance and
+    in a process-level cache, see transactions/rules.py).
+    """
+    return get_rules(library)
 
 
 def _get_borrow_limit(library, member=None) -> int:
@@ -150,101 +169,47 @@ def _get_borrow_limit(library, member=None) -> int:
     Role-specific borrow limit from LibraryRuleSettings.
     Returns 0 when no limit is configured (= unlimited).
     """
-    role = getattr(member, "role", "") if member else ""
-    try:
-        rules = library.rules
-        if role in ("teacher", "faculty", "staff"):
-            limit = getattr(rules, "teacher_borrow_limit", None)
-        else:
-            limit = getattr(rules, "student_borrow_limit", None)
-        if limit is None:
-            limit = getattr(rules, "max_books_per_member", None)
-        if limit is not None:
-            return int(limit)
-    except Exception:
-        pass
-    try:
-        from accounts.models import MemberSettings
-        ms = MemberSettings.objects.get(library=library)
-        if ms.borrow_limit:
-            return int(ms.borrow_limit)
-    except Exception:
-        pass
-    return 0
+    return get_rules(library).borrow_limit(member)
 
 
 def _get_max_renewals(library) -> int:
     """Max renewals from library rules; falls back to 2."""
-    try:
-        rules = library.rules
-        for attr in ("max_renewal_count", "max_renewals", "renewal_limit"):
-            val = getattr(rules, attr, None)
-            if val is not None:
-                return int(val)
-    except Exception:
-        pass
-    return 2
+    return get_rules(library).max_renewal_count
 
 
 def _get_fine_rate(library, txn=None) -> Decimal:
     """Live fine rate from library rules; falls back to txn snapshot then ₹2."""
-    try:
-        rate = library.rules.late_fine
-        if rate is not None:
-            return Decimal(rate)
-    except Exception:
-        pass
-    if txn is not None:
-        return txn.fine_rate_per_day
-    return Decimal("2.00")
+    return get_rules(library).fine_rate(txn)
 
 
 def _auto_fine_enabled(library) -> bool:
     """Return True if the library has auto-fine enabled (default True)."""
-    try:
-        return bool(library.rules.auto_fine)
-    except Exception:
-        return True
+    return get_rules(library).auto_fine
 
 
 def _renewal_allowed(library) -> bool:
     """Return True if the library has renewals enabled (default True)."""
-    try:
-        return bool(library.rules.allow_renewal)
-    except Exception:
-        return True
+    return get_rules(library).allow_renewal
 
 
 def _partial_payment_allowed(library) -> bool:
     """Return True if partial fine payments are allowed (default False)."""
-    try:
-        return bool(library.rules.allow_partial_payment)
-    except Exception:
-        return False
+    return get_rules(library).allow_partial_payment
 
 
 def _auto_mark_lost_enabled(library) -> bool:
     """Return True if the library auto-marks severely overdue books as lost."""
-    try:
-        return bool(library.rules.auto_mark_lost)
-    except Exception:
-        return False
+    return get_rules(library).auto_mark_lost
 
 
 def _advance_booking_allowed(library) -> bool:
     """Return True if the library allows advance booking (default False)."""
-    try:
-        return bool(library.rules.allow_advance_booking)
-    except Exception:
-        return False
+    return get_rules(library).allow_advance_booking
 
 
 def _get_grace_period(library) -> int:
     """Return the grace period in days before a fine begins to accrue (default 0)."""
-    try:
-        return int(library.rules.grace_period or 0)
-    except Exception:
-        return 0
+    return get_rules(library).grace_period
 
 
 def _member_has_overdue_loan(member, library) -> bool:
@@ -413,6 +378,7 @@ def _auto_block_overdue_members(library) -> None:
     Only touches members whose current status is 'active'.
     """
     from members.models import Member
+    from members.stats import invalidate_member_stats
     try:
         overdue_member_ids = set(
             Transaction.objects.for_library(library)
@@ -436,6 +402,8 @@ def _auto_block_overdue_members(library) -> None:
                 pk__in=overdue_member_ids,
                 status="active",
             ).update(status="blocked")
+            # .update() sends no signals — drop the cached member statistics.
+            invalidate_member_stats(library.user_id)
 
             # Send blocked notification to each newly blocked member
             for _m in members_to_notify:
@@ -494,6 +462,7 @@ def _sync_overdue_settled_for_library(library) -> None:
         fine_paid      = True,
         fine_paid_date = today,
     )
+    invalidate_status_counts(library.pk)
 
 
 def _reset_overdue_after_fine_settled(txn, library) -> None:
@@ -579,9 +548,8 @@ def transaction_list(request):
     library = _get_library_or_404(request)
     _sync_overdue_if_stale(library)
 
-    from django.db.models import OuterRef, Subquery, Sum as _Sum, DecimalField as _DCF
-    from finance.models import Fine as _Fine
-
+    # The Fine column reads txn.total_fine — maintained from finance_fine
+    # (see fine_summary.py) so no per-row SUM subquery is needed here.
     qs = Transaction.objects.for_library(library).select_related("member", "book")
 
     q = request.GET.get("q", "").strip()
@@ -604,36 +572,40 @@ def transaction_list(request):
     if date_to:
         qs = qs.filter(issue_date__lte=date_to)
 
-    # Annotate each transaction with the real total fine from the Fine table.
-    # This replaces txn.fine_amount (a live property = overdue_days × rate)
-    # which returns 0 for returned/settled books even when fines were charged.
-    fine_subq = (
-        _Fine.objects
-        .filter(transaction=OuterRef("pk"))
-        .values("transaction")
-        .annotate(total=_Sum("amount", output_field=_DCF()))
-        .values("total")
-    )
-    qs = qs.annotate(db_total_fine=Subquery(fine_subq, output_field=_DCF()))
+    # One conditional-aggregate query, cached per library (see counts.py).
+    counts = get_status_counts(library)
 
-    base           = Transaction.objects.for_library(library)
-    total_count    = base.count()
-    issued_count   = base.filter(status=Transaction.STATUS_ISSUED).count()
-    overdue_count  = base.filter(status=Transaction.STATUS_OVERDUE).count()
-    returned_count = base.filter(status=Transaction.STATUS_RETURNED).count()
-    lost_count     = base.filter(status=Transaction.STATUS_LOST).count()
+    per_page = bounded_per_page(request.GET.get("per_page"))
+    ordered  = qs.order_by("-created_at", "-pk")
+    cursor   = request.GET.get("cursor", "").strip()
 
-    per_page     = int(request.GET.get("per_page", 25))
-    paginator    = Paginator(qs.order_by("-created_at"), per_page)
-    transactions = paginator.get_page(request.GET.get("page", 1))
+    if cursor:
+        # Keyset mode — seeks on (created_at, id); no OFFSET, no COUNT.
+        transactions = keyset_page(ordered, cursor, per_page)
+        next_cursor  = transactions.next_cursor
+    else:
+        paginator = Paginator(ordered, per_page)
+        if not (q or status or date_from or date_to):
+            # Unfiltered list — the cached total is the paginator count.
+            paginator.count = counts["total_count"]
+        transactions = paginator.get_page(request.GET.get("page", 1))
+        next_cursor  = (
+            encode_cursor(transactions.object_list[len(transactions) - 1])
+            if transactions.has_next() else None
+        )
+
+    # Query string without page / cursor — reused by the pagination links.
+    params = request.GET.copy()
+    params.pop("page", None)
+    params.pop("cursor", None)
 
     return render(request, "transactions/transaction_list.html", {
         "transactions":   transactions,
-        "total_count":    total_count,
-        "issued_count":   issued_count,
-        "overdue_count":  overdue_count,
-        "returned_count": returned_count,
-        "lost_count":     lost_count,
+        "cursor_mode":    bool(cursor),
+        "next_cursor":    next_cursor,
+        "query_base":     params.urlencode(),
+        "per_page":       per_page,
+        **counts,
     })
 
 
@@ -656,27 +628,25 @@ def transaction_detail(request, pk):
         status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE),
     ).count()
 
-    # ── Fine breakdown from finance_fine table (single query set, reused) ──
-    fine_qs = Fine.objects.for_library(library).filter(transaction=txn)
-
-    def _sum(qs):
-        return qs.aggregate(t=Sum("amount", output_field=_DF()))["t"] or Decimal("0.00")
-
-    # Per-type totals — used for the breakdown rows in the Fine Details card
-    db_overdue_fine  = _sum(fine_qs.filter(fine_type=Fine.TYPE_OVERDUE))
-    db_damage_charge = _sum(fine_qs.filter(fine_type=Fine.TYPE_DAMAGE))
-    db_lost_penalty  = _sum(fine_qs.filter(fine_type=Fine.TYPE_LOST))
+    # ── Fine breakdown ─────────────────────────────────────────────────────
+    # Per-type / per-status splits come from the fines already loaded above;
+    # the amount still due is the maintained txn.unpaid_fine (fine_summary.py).
+    def _sum(rows):
+        return sum((f.amount for f in rows), Decimal("0.00"))
 
-    # Per-status totals — used for Amount Due / Already Paid rows
-    unpaid_fine_amount = _sum(fine_qs.filter(status=Fine.STATUS_UNPAID))
-    paid_fine_amount   = _sum(fine_qs.filter(status=Fine.STATUS_PAID))
+    db_overdue_fine    = _sum(f for f in fines if f.fine_type == Fine.TYPE_OVERDUE)
+    db_damage_charge   = _sum(f for f in fines if f.fine_type == Fine.TYPE_DAMAGE)
+    db_lost_penalty    = _sum(f for f in fines if f.fine_type == Fine.TYPE_LOST)
+    unpaid_fine_amount = txn.unpaid_fine
+    paid_fine_amount   = _sum(f for f in fines if f.status == Fine.STATUS_PAID)
+    waived_fine_amount = _sum(f for f in fines if f.status == Fine.STATUS_WAIVED)
 
     # Outstanding fine = all unpaid fines across ALL of this member's transactions
     # (shown in the Member info card — may differ from unpaid_fine_amount above)
     outstanding_fine = (
-        Fine.objects.for_library(library)
-        .filter(transaction__member=member, status=Fine.STATUS_UNPAID)
-        .aggregate(t=Sum("amount", output_field=_DF()))["t"] or Decimal("0.00")
+        Transaction.objects.for_library(library)
+        .filter(member=member)
+        .aggregate(t=Sum("unpaid_fine"))["t"] or Decimal("0.00")
     )
 
     return render(request, "transactions/transaction_detail.html", {
@@ -692,6 +662,7 @@ def transaction_detail(request, pk):
         "db_lost_penalty":    db_lost_penalty,
         "unpaid_fine_amount": unpaid_fine_amount,
         "paid_fine_amount":   paid_fine_amount,
+        "waived_fine_amount": waived_fine_amount,
     })
 
 
@@ -706,9 +677,14 @@ def transaction_detail(request, pk):
 #   ✔ Borrow limit not exceeded
 #   ✔ No unpaid fines (Rule 1)
 #   ✔ Auto-fine setting respected when creating fines (Rule 7)
+#
+# The checks and writes run in issue_engine.issue(): member, book and copy
+# rows are locked in that order and every rule is evaluated from one
+# snapshot, so two desks cannot issue the same copy or overrun a limit.
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
+@instrument("circulation.issue_book")
 def issue_book(request):
     library = _get_library_or_404(request)
     owner   = library.user
@@ -770,167 +746,49 @@ def issue_book(request):
 
     books = Book.objects.filter(owner=owner, available_copies__gt=0).order_by("title")
 
+    context = {
+        "members":              members,
+        "books":                books,
+        "today":                today.isoformat(),
+        "default_due_date":     default_due_date,
+        "rules":                rules,
+        "fine_rate_per_day":    fine_rate_per_day,
+        "default_loan_days":    borrowing_period,
+        "max_books_per_member": max_books_per_member,
+        "max_renewal_count":    max_renewal_count,
+        "is_institute":         is_institute,
+        "student_borrow_limit": student_borrow_limit,
+        "teacher_borrow_limit": teacher_borrow_limit,
+    }
+
     # ── POST ──────────────────────────────────────────────────────────────────
     if request.method == "POST":
         form = IssueBookForm(request.POST, library=library)
 
         if form.is_valid():
-            cd         = form.cleaned_data
-            member     = cd["member"]
-            book       = cd["book"]
-            book_copy  = cd.get("book_copy")
-            issue_date = cd["issue_date"]
-            due_date   = issue_date + timedelta(days=borrowing_period)
-
-            # ── Rule: advance booking (future issue_date) requires toggle ──────
-            if cd["issue_date"] > date.today() and not _advance_booking_allowed(library):
-                messages.error(
-                    request,
-                    "Cannot issue — advance booking (future issue date) is disabled. "
-                    "Enable it in Settings → Fine & Loans → Allow Advance Booking.",
-                )
-                return render(request, "transactions/issue_book.html", {
-                    "form": form, "members": members, "books": books,
-                    "today": today.isoformat(), "default_due_date": default_due_date,
-                    "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                    "default_loan_days": borrowing_period,
-                    "max_books_per_member": max_books_per_member,
-                    "max_renewal_count": max_renewal_count,
-                    "is_institute": is_institute,
-                    "student_borrow_limit": student_borrow_limit,
-                    "teacher_borrow_limit": teacher_borrow_limit,
-                })
-
-            # ── Rule: member active and not blocked ────────────────────────────
-            if _member_is_blocked(member):
-                messages.error(
-                    request,
-                    f"Cannot issue — {member.first_name} {member.last_name}'s account "
-                    f"is blocked. They must return all overdue books first.",
-                )
-                return render(request, "transactions/issue_book.html", {
-                    "form": form, "members": members, "books": books,
-                    "today": today.isoformat(), "default_due_date": default_due_date,
-                    "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                    "default_loan_days": borrowing_period,
-                    "max_books_per_member": max_books_per_member,
-                    "max_renewal_count": max_renewal_count,
-                    "is_institute": is_institute,
-                    "student_borrow_limit": student_borrow_limit,
-                    "teacher_borrow_limit": teacher_borrow_limit,
-                })
-
-            if getattr(member, "status", "active") != "active":
-                messages.error(
-                    request,
-                    f"{member.first_name} {member.last_name} is not an active member "
-                    f"(status: {member.get_status_display()}).",
-                )
-                return render(request, "transactions/issue_book.html", {
-                    "form": form, "members": members, "books": books,
-                    "today": today.isoformat(), "default_due_date": default_due_date,
-                    "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                    "default_loan_days": borrowing_period,
-                    "max_books_per_member": max_books_per_member,
-                    "max_renewal_count": max_renewal_count,
-                    "is_institute": is_institute,
-                    "student_borrow_limit": student_borrow_limit,
-                    "teacher_borrow_limit": teacher_borrow_limit,
-                })
-
-            # ── Rule 5: member must not have any overdue loans ────────────────
-            if _member_has_overdue_loan(member, library):
-                messages.error(
-                    request,
-                    f"Cannot issue — {member.first_name} {member.last_name} has "
-                    f"overdue books. They must return all overdue loans before "
-                    f"borrowing new books.",
-                )
-                return render(request, "transactions/issue_book.html", {
-                    "form": form, "members": members, "books": books,
-                    "today": today.isoformat(), "default_due_date": default_due_date,
-                    "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                    "default_loan_days": borrowing_period,
-                    "max_books_per_member": max_books_per_member,
-                    "max_renewal_count": max_renewal_count,
-                    "is_institute": is_institute,
-                    "student_borrow_limit": student_borrow_limit,
-                    "teacher_borrow_limit": teacher_borrow_limit,
-                })
-
-            # ── Rule: no pending fine ──────────────────────────────────────────
-            has_fine, fine_total = _has_unpaid_fine_for_member(member, library)
-            if has_fine:
-                messages.error(
-                    request,
-                    f"Cannot issue — {member.first_name} {member.last_name} "
-                    f"has an unpaid fine of ₹{fine_total}. Please clear it first.",
-                )
-                return render(request, "transactions/issue_book.html", {
-                    "form": form, "members": members, "books": books,
-                    "today": today.isoformat(), "default_due_date": default_due_date,
-                    "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                    "default_loan_days": borrowing_period,
-                    "max_books_per_member": max_books_per_member,
-                    "max_renewal_count": max_renewal_count,
-                    "is_institute": is_institute,
-                    "student_borrow_limit": student_borrow_limit,
-                    "teacher_borrow_limit": teacher_borrow_limit,
-                })
-
-            # ── Rule: borrow limit ─────────────────────────────────────────────
-            borrow_limit = _get_borrow_limit(library, member)
-            if borrow_limit:
-                active_loans = Transaction.objects.for_library(library).filter(
-                    member=member,
-                    status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE),
-                ).count()
-                if active_loans >= borrow_limit:
-                    messages.error(
-                        request,
-                        f"Cannot issue — {member.first_name} {member.last_name} "
-                        f"has reached their borrow limit ({borrow_limit} books).",
-                    )
-                    return render(request, "transactions/issue_book.html", {
-                        "form": form, "members": members, "books": books,
-                        "today": today.isoformat(), "default_due_date": default_due_date,
-                        "rules": rules, "fine_rate_per_day": fine_rate_per_day,
-                        "default_loan_days": borrowing_period,
-                        "max_books_per_member": max_books_per_member,
-                        "max_renewal_count": max_renewal_count,
-                        "is_institute": is_institute,
-                        "student_borrow_limit": student_borrow_limit,
-                        "teacher_borrow_limit": teacher_borrow_limit,
-                    })
-
-            with db_transaction.atomic():
-                txn = Transaction.objects.create(
-                    library            = library,
-                    member             = member,
-                    book               = book,
-                    book_copy          = book_copy,
-                    issue_date         = issue_date,
-                    due_date           = due_date,
-                    loan_duration_days = borrowing_period,
-                    fine_rate_per_day  = fine_rate_per_day,
-                    status             = Transaction.STATUS_ISSUED,
-                    issued_by          = request.user.get_full_name() or request.user.username,
-                    notes              = cd.get("notes", ""),
+            cd        = form.cleaned_data
+            book_copy = cd.get("book_copy")
+            # Every rule is re-checked under row locks — see issue_engine.py.
+            try:
+                txn = issue_engine.issue(
+                    library,
+                    member_id  = cd["member"].pk,
+                    book_id    = cd["book"].pk,
+                    copy_id    = book_copy.pk if book_copy is not None else None,
+                    issue_date = cd["issue_date"],
+                    notes      = cd.get("notes", ""),
+                    issued_by  = request.user.get_full_name() or request.user.username,
+                    rules      = rules,
                 )
+            except issue_engine.IssueRefused as refused:
+                messages.error(request, refused.message)
+                return render(request, "transactions/issue_book.html", {"form": form, **context})
 
-                # Mark copy as issued
-                if book_copy is not None:
-                    book_copy.status = "issued"
-                    book_copy.save(update_fields=["status"])
-                else:
-                    if hasattr(book, "available_copies"):
-                        book.available_copies = max(0, book.available_copies - 1)
-                        book.save(update_fields=["available_copies"])
-
+            member, book = txn.member, txn.book
             messages.success(
                 request,
                 f'"{book.title}" issued to {member.first_name} {member.last_name}. '
-                f'Due: {due_date.strftime("%d %B %Y")}.',
+                f'Due: {txn.due_date.strftime("%d %B %Y")}.',
             )
             # ── Email: book issued confirmation ────────────────────────────────
             if _member_emails_on(library) and getattr(member, "email", None):
@@ -946,33 +804,88 @@ def issue_book(request):
     else:
         form = IssueBookForm(library=library)
 
-    return render(request, "transactions/issue_book.html", {
-        "form":                 form,
-        "members":              members,
-        "books":                books,
-        "today":                today.isoformat(),
-        "default_due_date":     default_due_date,
-        "rules":                rules,
-        "fine_rate_per_day":    fine_rate_per_day,
-        "default_loan_days":    borrowing_period,
-        "max_books_per_member": max_books_per_member,
-        "max_renewal_count":    max_renewal_count,
-        "is_institute":         is_institute,
-        "student_borrow_limit": student_borrow_limit,
-        "teacher_borrow_limit": teacher_borrow_limit,
-    })
+    return render(request, "transactions/issue_book.html", {"form": form, **context})
 
 
-def _has_unpaid_fine_for_member(member, library) -> tuple[bool, Decimal]:
-    """Any unpaid fine across ALL transactions for this member."""
-    qs = (
-        Fine.objects.for_library(library)
-        .filter(transaction__member=member, status=Fine.STATUS_UNPAID)
-    )
-    if not qs.exists():
-        return False, Decimal("0.00")
-    total = qs.aggregate(t=Sum("amount"))["t"] or Decimal("0.00")
-    return True, total
+# ─────────────────────────────────────────────────────────────────────────────
+# 3b. Batch Checkout — several copies to one member
+# ─────────────────────────────────────────────────────────────────────────────
+#
+# Same rules as Issue Book, checked once for the whole basket by
+# issue_engine.issue_many(): the borrow limit must cover every copy, and
+# one unavailable copy refuses the lot.  One combined "books issued"
+# email instead of one per book.  JSON in / out for the desk scanner
+# (Accept: application/json or ?format=json).
+# ─────────────────────────────────────────────────────────────────────────────
+
+@login_required
+@instrument("circulation.issue_batch")
+def issue_batch(request):
+    library   = _get_library_or_404(request)
+    rules     = _get_library_rules(library)
+    want_json = _wants_json(request)
+
+    if not rules:
+        messages.error(request, "Library rule settings not configured.")
+        return redirect("transactions:transaction_list")
+
+    if request.method == "POST":
+        form = BatchIssueForm(request.POST, library=library)
+
+        if form.is_valid():
+            cd     = form.cleaned_data
+            member = cd["member_id"]
+            try:
+                txns = issue_engine.issue_many(
+                    library,
+                    member_id  = member.pk,
+                    copy_ids   = cd["copies"],
+                    issue_date = cd["issue_date"],
+                    notes      = cd.get("notes", ""),
+                    issued_by  = request.user.get_full_name() or request.user.username,
+                    rules      = rules,
+                )
+            except issue_engine.IssueRefused as refused:
+                if want_json:
+                    return JsonResponse({"ok": False, "code": refused.code, "error": refused.message}, status=409)
+                messages.error(request, refused.message)
+            else:
+                if _member_emails_on(library) and getattr(member, "email", None):
+                    _send_email("send_books_issued_email", member, txns)
+                if want_json:
+                    return JsonResponse({"ok": True, "transactions": [{
+                        "pk":             t.pk,
+                        "transaction_id": t.transaction_id,
+                        "book":           t.book.title,
+                        "copy_id":        t.book_copy.copy_id,
+                        "due_date":       t.due_date.isoformat(),
+                    } for t in txns]}, status=201)
+                messages.success(
+                    request,
+                    f"{len(txns)} book{'s' if len(txns) != 1 else ''} issued to "
+                    f"{member.first_name} {member.last_name}. Due: {txns[0].due_date.strftime('%d %B %Y')}.",
+                )
+                return redirect("transactions:transaction_list")
+
+        elif want_json:
+            return JsonResponse({"ok": False, "errors": {f: [str(e) for e in errs] for f, errs in form.errors.items()}},
+                                status=400)
+        else:
+            for field, errs in form.errors.items():
+                for e in errs:
+                    messages.error(request, e)
+
+    else:
+        form = BatchIssueForm(library=library)
+
+    return render(request, "transactions/issue_batch.html", {
+        "form":              form,
+        "today":             date.today(),
+        "batch_max":         issue_engine.BATCH_ISSUE_MAX,
+        "default_loan_days": rules.borrowing_period,
+        "fine_rate_per_day": rules.late_fine or Decimal("0.00"),
+        "borrow_limit":      rules.borrow_limit(),
+    })
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -992,6 +905,7 @@ def _has_unpaid_fine_for_member(member, library) -> tuple[bool, Decimal]:
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
+@instrument("circulation.return_book")
 def return_book(request, pk):
     library = _get_library_or_404(request)
     txn = get_object_or_404(
@@ -1142,6 +1056,9 @@ def return_book(request, pk):
                         transaction=txn,
                         status=Fine.STATUS_UNPAID,
                     ).update(status=Fine.STATUS_PAID, paid_date=return_date)
+                    refresh_fine_summaries([txn.pk])
+                    library_pk = library.pk
+                    db_transaction.on_commit(lambda: invalidate_finance_series(library_pk))
                     txn.fine_paid      = True
                     txn.fine_paid_date = return_date
                     txn.save(update_fields=["fine_paid", "fine_paid_date", "updated_at"])
@@ -1236,6 +1153,7 @@ def return_book(request, pk):
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
+@instrument("circulation.renew_book")
 def renew_book(request, pk):
     if request.method != "POST":
         return redirect("transactions:transaction_detail", pk=pk)
@@ -1408,17 +1326,20 @@ def overdue_list(request):
     elif severity == "severe":
         qs = qs.filter(due_date__lt=today - timedelta(days=30))
 
-    overdue_transactions = list(qs.order_by("due_date"))
+    # Overdue days / fine are computed in SQL so sorting and the total
+    # happen in the database instead of per-row Python properties.
+    qs = qs.with_fine_fields(library)
 
     sort = request.GET.get("sort", "")
     if sort == "overdue_days":
-        overdue_transactions.sort(key=lambda t: t.overdue_days)
+        qs = qs.order_by("db_overdue_days", "pk")
     elif sort == "-fine_amount":
-        overdue_transactions.sort(key=lambda t: t.fine_amount, reverse=True)
+        qs = qs.order_by("-db_fine_amount", "pk")
     else:
-        overdue_transactions.sort(key=lambda t: t.overdue_days, reverse=True)
+        qs = qs.order_by("-db_overdue_days", "pk")
 
-    total_fine = sum(t.fine_amount for t in overdue_transactions)
+    overdue_transactions = list(qs)
+    total_fine = sum((t.fine_amount for t in overdue_transactions), Decimal("0.00"))
 
     return render(request, "transactions/overdue_list.html", {
         "overdue_transactions": overdue_transactions,
@@ -1696,6 +1617,9 @@ def mark_lost(request, pk=None):
                 ).exclude(fine_type=Fine.TYPE_LOST).update(
                     status=Fine.STATUS_PAID, paid_date=date.today()
                 )
+                refresh_fine_summaries([txn.pk])
+                library_pk = library.pk
+                db_transaction.on_commit(lambda: invalidate_finance_series(library_pk))
 
     paid_msg = f" Penalty of ₹{penalty_amount} collected." if fine_paid_now else f" Penalty of ₹{penalty_amount} recorded (unpaid)."
     messages.success(request, f'"{txn.book.title}" marked as lost. Copy removed from inventory.' + paid_msg)
@@ -1807,51 +1731,48 @@ def member_search_api(request):
     from members.models import Member
 
     q  = request.GET.get("q", "").strip()
-    qs = Member.objects.filter(owner=owner, status="active")
-    if q:
-        qs = qs.filter(
-            Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(member_id__icontains=q)
-            | Q(email__icontains=q)
-        )
 
-    members_list = list(qs.order_by("first_name", "last_name")[:20])
+    def _build():
+        qs = Member.objects.cards().filter(owner=owner, status="active")
+        if q:
+            qs = qs.filter(
+                Q(first_name__icontains=q)
+                | Q(last_name__icontains=q)
+                | Q(member_id__icontains=q)
+                | Q(email__icontains=q)
+            )
 
-    active_counts = {
-        row["member_id"]: row["cnt"]
-        for row in Transaction.objects.for_library(library).filter(
-            member__in=members_list,
-            status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE),
-        ).values("member_id").annotate(cnt=Count("id"))
-    }
+        members_list = list(qs.order_by("first_name", "last_name")[:20])
 
-    def _photo_url(member):
-        for _f in ("photo", "profile_photo", "avatar", "profile_picture", "image", "profile_image"):
-            _v = getattr(member, _f, None)
-            if _v:
-                try:
-                    if hasattr(_v, "name") and _v.name:
-                        return request.build_absolute_uri(_v.url)
-                except Exception:
-                    pass
-        try:
-            return request.build_absolute_uri(reverse("transactions:member_photo_image", args=[member.pk]))
-        except Exception:
-            return None
-
-    results = [
-        {
-            "id":           m.pk,
-            "name":         f"{m.first_name} {m.last_name}".strip(),
-            "member_id":    m.member_id,
-            "active_loans": active_counts.get(m.pk, 0),
-            "borrow_limit": _get_borrow_limit(library, m),
-            "photo_url":    _photo_url(m),
+        active_counts = {
+            row["member_id"]: row["cnt"]
+            for row in Transaction.objects.for_library(library).filter(
+                member__in=members_list,
+                status__in=(Transaction.STATUS_ISSUED, Transaction.STATUS_OVERDUE),
+            ).values("member_id").annotate(cnt=Count("id"))
         }
-        for m in members_list
-    ]
-    return JsonResponse({"results": results})
+
+        def _photo_url(member):
+            if not member.has_photo:
+                return None
+            return request.build_absolute_uri(image_url(
+                reverse("transactions:member_photo_image", args=[member.pk]), member.photo_hash, "sm",
+            ))
+
+        results = [
+            {
+                "id":           m.pk,
+                "name":         f"{m.first_name} {m.last_name}".strip(),
+                "member_id":    m.member_id,
+                "active_loans": active_counts.get(m.pk, 0),
+                "borrow_limit": _get_borrow_limit(library, m),
+                "photo_url":    _photo_url(m),
+            }
+            for m in members_list
+        ]
+        return {"results": results}
+
+    return JsonResponse(search_cache.cached_payload("member_search", library, q, _build))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1868,35 +1789,45 @@ def book_search_api(request):
 
         q = request.GET.get("q", "").strip()
 
-        if q:
-            matching_pks = (
-                _BookCopy.objects
-                .filter(book__owner=owner, status="available", copy_id__icontains=q)
-                .values_list("book_id", flat=True).distinct()
-            )
-            qs = Book.objects.filter(owner=owner, available_copies__gt=0, pk__in=matching_pks)
-        else:
-            qs = Book.objects.filter(owner=owner, available_copies__gt=0)
+        def _build():
+            if q:
+                matching_pks = (
+                    _BookCopy.objects
+                    .filter(book__owner=owner, status="available", copy_id__icontains=q)
+                    .values_list("book_id", flat=True).distinct()
+                )
+                qs = Book.objects.cards().filter(owner=owner, available_copies__gt=0, pk__in=matching_pks)
+            else:
+                qs = Book.objects.cards().filter(owner=owner, available_copies__gt=0)
 
-        results = []
-        for b in qs.order_by("title")[:20]:
-            copy_filter = {"book": b, "status": "available"}
+            books = list(qs.order_by("title")[:20])
+
+            # One query for every listed book's available copy IDs.
+            copy_filter = {"book__in": books, "status": "available"}
             if q:
                 copy_filter["copy_id__icontains"] = q
-            copy_ids = list(
+            copies_by_book = {}
+            for book_pk, copy_id in (
                 _BookCopy.objects.filter(**copy_filter)
-                .values_list("copy_id", flat=True).order_by("copy_id")[:10]
-            )
-            results.append({
-                "id":               b.pk,
-                "title":            b.title,
-                "author":           b.author,
-                "isbn":             getattr(b, "isbn", "") or "",
-                "book_id":          getattr(b, "book_id", "") or "",
-                "available_copies": b.available_copies,
-                "copy_ids":         copy_ids,
-            })
-        return JsonResponse({"results": results})
+                .values_list("book_id", "copy_id").order_by("copy_id")
+            ):
+                copies_by_book.setdefault(book_pk, []).append(copy_id)
+
+            results = []
+            for b in books:
+                copy_ids = copies_by_book.get(b.pk, [])[:10]
+                results.append({
+                    "id":               b.pk,
+                    "title":            b.title,
+                    "author":           b.author,
+                    "isbn":             getattr(b, "isbn", "") or "",
+                    "book_id":          getattr(b, "book_id", "") or "",
+                    "available_copies": b.available_copies,
+                    "copy_ids":         copy_ids,
+                })
+            return {"results": results}
+
+        return JsonResponse(search_cache.cached_payload("book_search", library, q, _build))
 
     except Exception as exc:
         import logging, traceback
@@ -1924,50 +1855,60 @@ def member_suggestions_api(request):
     if not q:
         return JsonResponse({"results": []})
 
-    # Evaluate queryset into a list so we can reuse it without a second DB hit
-    members = list(
-        Member.objects.filter(owner=owner).filter(
-            Q(member_id__icontains=q)
-            | Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-        ).order_by("member_id")[:10]
-    )
+    def _build():
+        # Evaluate queryset into a list so we can reuse it without a second DB hit.
+        # Only the columns the suggestion needs — photo presence is read
+        # from photo_hash, never from image data.
+        members = list(
+            Member.objects.filter(owner=owner)
+            .only("pk", "member_id", "first_name", "last_name", "status", "photo_hash")
+            .filter(
+                Q(member_id__icontains=q)
+                | Q(first_name__icontains=q)
+                | Q(last_name__icontains=q)
+            ).order_by("member_id")[:10]
+        )
 
-    if not members:
-        return JsonResponse({"results": []})
+        if not members:
+            return {"results": []}
+
+        # Bulk unpaid fine totals — keyed by member PK
+        member_pks = [m.pk for m in members]
+        fine_totals = {
+            row["transaction__member_id"]: row["total"]
+            for row in Fine.objects.for_library(library)
+            .filter(transaction__member_id__in=member_pks, status=Fine.STATUS_UNPAID)
+            .values("transaction__member_id")
+            .annotate(total=Sum("amount", output_field=_DF()))
+        }
 
-    # Bulk unpaid fine totals — keyed by member PK
-    member_pks = [m.pk for m in members]
-    fine_totals = {
-        row["transaction__member_id"]: row["total"]
-        for row in Fine.objects.for_library(library)
-        .filter(transaction__member_id__in=member_pks, status=Fine.STATUS_UNPAID)
-        .values("transaction__member_id")
-        .annotate(total=Sum("amount", output_field=_DF()))
-    }
+        def _suggestion_photo_url(member):
+            if not member.has_photo:
+                return None
+            return request.build_absolute_uri(image_url(
+                reverse("transactions:member_photo_image", args=[member.pk]), member.photo_hash, "sm",
+            ))
 
-    def _suggestion_photo_url(member):
-        if getattr(member, "photo", None):
-            try:
-                return request.build_absolute_uri(
-                    reverse("transactions:member_photo_image", args=[member.pk])
-                )
-            except Exception:
-                pass
-        return None
+        results = [
+            {
+                "member_id": m.member_id,
+                "name":      f"{m.first_name} {m.last_name}".strip(),
+                "status":    m.status,
+                "total_due": str(fine_totals.get(m.pk, Decimal("0.00"))),
+                "photo_url": _suggestion_photo_url(m),
+            }
+            for m in members
+        ]
+        return {"results": results}
+
+    return JsonResponse(search_cache.cached_payload("member_suggestions", library, q, _build))
 
-    results = [
-        {
-            "member_id": m.member_id,
-            "name":      f"{m.first_name} {m.last_name}".strip(),
-            "status":    m.status,
-            "total_due": str(fine_totals.get(m.pk, Decimal("0.00"))),
-            "photo_url": _suggestion_photo_url(m),
-        }
-        for m in members
-    ]
 
-    return JsonResponse({"results": results})
+@login_required
+def search_cache_stats_api(request):
+    """Hit / miss counters of this library's autocomplete response cache (monitoring)."""
+    library = _get_library_or_404(request)
+    return JsonResponse(search_cache.get_stats(library.pk))
 
 
 @login_required
@@ -1999,15 +1940,12 @@ def member_lookup_api(request):
     )
     slots = max(0, borrow_limit - active_loans) if borrow_limit else -1
 
-    # photo is a raw BLOB — use member_photo_image route only when data exists
+    # Link the member_photo_image route only when a photo is stored
     photo_url = None
-    if getattr(member, "photo", None):
-        try:
-            photo_url = request.build_absolute_uri(
-                reverse("transactions:member_photo_image", args=[member.pk])
-            )
-        except Exception:
-            pass
+    if member.has_photo:
+        photo_url = request.build_absolute_uri(image_url(
+            reverse("transactions:member_photo_image", args=[member.pk]), member.photo_hash, "md",
+        ))
 
     return JsonResponse({
         "found":        True,
@@ -2064,13 +2002,10 @@ def book_lookup_api(request):
             category_name = ""
 
         cover_url = None
-        try:
-            if getattr(book, "cover_image", None):
-                cover_url = request.build_absolute_uri(
-                    reverse("transactions:book_cover_image", args=[book.pk])
-                )
-        except Exception:
-            pass
+        if book.has_cover:
+            cover_url = request.build_absolute_uri(image_url(
+                reverse("transactions:book_cover_image", args=[book.pk]), book.cover_hash, "md",
+            ))
 
         return JsonResponse({
             "found":            True,
@@ -2100,13 +2035,15 @@ def book_lookup_api(request):
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 18. Book Cover Image  (serves BLOB by book PK)
+# 18. Book Cover Image  (serves the image-store blob by book PK)
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
 def book_cover_image(request, pk):
     """
-    Serve the cover image BLOB for a book identified by its PK.
+    Serve the cover image for a book identified by its PK (?size= picks a
+    thumbnail from the image store).  Conditional GETs are answered from
+    the Book row alone — see core/image_serving.py.
 
     Owner is resolved via library.user (same pattern as every other view)
     so staff / superuser accounts that are the library admin still match.
@@ -2118,20 +2055,10 @@ def book_cover_image(request, pk):
     library = _get_library_or_404(request)
     owner   = library.user
 
-    book = get_object_or_404(Book, pk=pk, owner=owner)
-
-    raw = book.cover_image
-    if not raw:
-        raise Http404("No cover image.")
-
-    image_bytes = bytes(raw)
-    if not image_bytes:
-        raise Http404("Cover image is empty.")
-
-    mime     = (getattr(book, "cover_mime_type", None) or "image/jpeg").strip() or "image/jpeg"
-    response = HttpResponse(image_bytes, content_type=mime)
-    response["Cache-Control"] = "private, max-age=3600"
-    return response
+    book = get_object_or_404(
+        Book.objects.only("pk", "owner_id", "cover_hash", "updated_at"), pk=pk, owner=owner,
+    )
+    return image_response(request, book.cover_hash, book.updated_at, not_found="No cover image.")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -2142,43 +2069,37 @@ def book_cover_image(request, pk):
 @login_required
 def book_cover_by_copy_id(request, copy_id):
     """
-    Resolve a BookCopy.copy_id → Book → cover BLOB and serve it.
+    Resolve a BookCopy.copy_id → Book → cover image and serve it.
     """
     from books.models import BookCopy
 
     library = _get_library_or_404(request)
     owner   = library.user
 
-    try:
-        copy = (
-            BookCopy.objects
-            .select_related("book")
-            .get(copy_id=copy_id.strip().upper(), book__owner=owner)
-        )
-    except BookCopy.DoesNotExist:
+    cover = (
+        BookCopy.objects
+        .filter(copy_id=copy_id.strip().upper(), book__owner=owner)
+        .values("book__cover_hash", "book__updated_at")
+        .first()
+    )
+    if cover is None:
         raise Http404(f"Copy ID '{copy_id}' not found.")
 
-    book        = copy.book
-    raw         = book.cover_image
-    if not raw:
-        raise Http404("This book has no cover image.")
-    image_bytes = bytes(raw)
-    if not image_bytes:
-        raise Http404("Cover image is empty.")
-    mime        = (getattr(book, "cover_mime_type", None) or "image/jpeg").strip() or "image/jpeg"
-    response    = HttpResponse(image_bytes, content_type=mime)
-    response["Cache-Control"] = "private, max-age=3600"
-    return response
+    return image_response(
+        request, cover["book__cover_hash"], cover["book__updated_at"],
+        not_found="This book has no cover image.",
+    )
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 19. Member Photo  (serves BLOB by member PK)
+# 19. Member Photo  (serves the image-store blob by member PK)
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
 def member_photo_image(request, pk):
     """
-    Serve the photo BLOB for a member identified by PK.
-    photo_mime_type column is used when present, falls back to image/jpeg.
+    Serve the photo for a member identified by PK (?size= picks a thumbnail
+    from the image store).  Conditional GETs are answered from the Member
+    row alone — see core/image_serving.py.
     Returns 404 when the member has no photo so the frontend initial-avatar
     fallback renders instead of a broken <img>.
     """
@@ -2187,17 +2108,7 @@ def member_photo_image(request, pk):
     library = _get_library_or_404(request)
     owner   = library.user
 
-    member = get_object_or_404(Member, pk=pk, owner=owner)
-
-    raw = getattr(member, "photo", None)
-    if not raw:
-        raise Http404("No photo.")
-
-    image_bytes = bytes(raw)
-    if not image_bytes:
-        raise Http404("Photo is empty.")
-
-    mime = (getattr(member, "photo_mime_type", None) or "image/jpeg").strip() or "image/jpeg"
-    response = HttpResponse(image_bytes, content_type=mime)
-    response["Cache-Control"] = "private, max-age=3600"
-    return response
\ No newline at end of file
+    member = get_object_or_404(
+        Member.objects.only("pk", "owner_id", "photo_hash", "updated_at"), pk=pk, owner=owner,
+    )
+    return image_response(request, member.photo_hash, member.updated_at, not_found="No photo.")